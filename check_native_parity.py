@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+import argparse
+import io
+from contextlib import redirect_stdout
+from pathlib import Path
+
+from pdf_converter.datalab.native_extract import check_parity, is_digital_pdf
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(
+        description="Compare the local table extraction of digital PDFs against cached Datalab markdown."
+    )
+    parser.add_argument("pdfs", nargs="+", type=Path, help="PDFs whose <name>.datalab.md sits next to them")
+    parser.add_argument("--markdown", type=Path, help="Cached Datalab markdown (only with a single PDF)")
+    parser.add_argument("--min-accuracy", type=float, default=1.0, help="Minimum fraction of matching cells")
+    parser.add_argument("--max-diffs", type=int, default=20, help="Maximum number of cell diffs to print per PDF")
+    args = parser.parse_args()
+
+    if args.markdown and len(args.pdfs) > 1:
+        parser.error("--markdown only applies to a single PDF")
+
+    failed = 0
+    for pdf in args.pdfs:
+        reference = args.markdown or pdf.with_suffix(".datalab.md")
+        if not reference.exists():
+            print(f"=== {pdf.name}: SKIPPED (no cached markdown at {reference.name}) ===")
+            continue
+        if not is_digital_pdf(pdf):
+            print(f"=== {pdf.name}: SKIPPED (scanned pages, goes to Datalab) ===")
+            continue
+
+        with redirect_stdout(io.StringIO()):
+            report = check_parity(pdf, reference.read_text(encoding="utf-8"))
+        passed = report.accuracy >= args.min_accuracy and not (report.missing_sheets or report.extra_sheets)
+        print(f"=== {pdf.name}: {'MATCH' if passed else 'MISMATCH'} ===")
+        for line in report.summary(args.max_diffs):
+            print(line)
+        failed += not passed
+
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -4,11 +4,7 @@ import argparse
 import math
 from pathlib import Path
 
-from openpyxl import load_workbook
-
-
-def _load(path: Path):
-    return load_workbook(path, data_only=True)
+from workbook_diff import diff_workbooks
 
 
 def _normalize(value):
@@ -38,46 +34,35 @@ def compare_workbooks(
     include_sheets: list[str] | None = None,
     ignore_extra_sheets: bool = False,
 ):
-    baseline_wb = _load(baseline_path)
-    candidate_wb = _load(candidate_path)
+    sheet_diffs = diff_workbooks(
+        baseline_path,
+        candidate_path,
+        lambda left, right, _header: _values_equal(left, right, tolerance),
+        sheets=include_sheets,
+        quantum=tolerance,
+        max_cell_diffs=max_diffs,
+    )
 
     diffs: list[str] = []
-
-    baseline_sheets = include_sheets or list(baseline_wb.sheetnames)
-    candidate_sheets = list(candidate_wb.sheetnames)
-
-    for sheet_name in baseline_sheets:
-        if sheet_name not in candidate_sheets:
+    for sheet_diff in sheet_diffs:
+        sheet_name = sheet_diff.sheet
+        if sheet_diff.status == "missing":
             diffs.append(f"Missing sheet in candidate: {sheet_name}")
-            if len(diffs) >= max_diffs:
-                return diffs
-            continue
-
-        baseline_ws = baseline_wb[sheet_name]
-        candidate_ws = candidate_wb[sheet_name]
-
-        max_row = max(baseline_ws.max_row, candidate_ws.max_row)
-        max_col = max(baseline_ws.max_column, candidate_ws.max_column)
-
-        for row in range(1, max_row + 1):
-            for col in range(1, max_col + 1):
-                baseline_value = baseline_ws.cell(row, col).value
-                candidate_value = candidate_ws.cell(row, col).value
-                if _values_equal(baseline_value, candidate_value, tolerance):
-                    continue
-
+        elif sheet_diff.status == "added":
+            if not ignore_extra_sheets:
+                diffs.append(f"Unexpected sheet in candidate: {sheet_name}")
+        else:
+            for cell in sheet_diff.cells:
+                moved = f" (candidate R{cell.current_row})" if cell.current_row != cell.row else ""
                 diffs.append(
-                    f"{sheet_name}!R{row}C{col}: baseline={baseline_value!r} candidate={candidate_value!r}"
+                    f"{sheet_name}!R{cell.row}C{cell.col}{moved}: baseline={cell.baseline!r} candidate={cell.current!r}"
                 )
-                if len(diffs) >= max_diffs:
-                    return diffs
-
-    if not ignore_extra_sheets:
-        for sheet_name in candidate_sheets:
-            if sheet_name not in baseline_sheets:
-                diffs.append(f"Unexpected sheet in candidate: {sheet_name}")
-                if len(diffs) >= max_diffs:
-                    return diffs
+            for row in sheet_diff.rows_removed:
+                diffs.append(f"{sheet_name}!R{row}: row missing in candidate: {sheet_diff.baseline_rows[row]!r}")
+            for row in sheet_diff.rows_added:
+                diffs.append(f"{sheet_name}!R{row}: unexpected row in candidate: {sheet_diff.current_rows[row]!r}")
+        if len(diffs) >= max_diffs:
+            return diffs[:max_diffs]
 
     return diffs
 
@@ -6,12 +6,15 @@ Supports both Gallo and Visual format financial reports.
 import streamlit as st
 import pandas as pd
 import tempfile
+import hashlib
+import json
 import os
 import io
 import re
+import shutil
 import sys
 from pathlib import Path
-from datetime import datetime
+from datetime import datetime, timedelta
 
 # Add parent directory to path for imports
 sys.path.insert(0, str(Path(__file__).parent.parent))
@@ -32,11 +35,14 @@ require_login()
 
 # Import our converter
 from pdf_converter.datalab import DatalabClient
-from pdf_converter.datalab.md_to_excel import convert_markdown_to_excel
 from pdf_converter.datalab.postprocess import postprocess_gallo_workbook, postprocess_visual_workbook
-from pdf_converter.datalab.merge_gallo_visual import GalloVisualMerger
+from pdf_converter.datalab.merge_gallo_visual import AuxDataStore
 from pdf_converter.datalab.excel_to_pdf import ExcelToPdfExporter
-from pdf_converter.datalab.economic_sanity import add_validation_sheet, validate_workbook
+from pdf_converter.datalab.case_pipeline import CaseSource, convert_source, pipeline_version, run_case
+from pdf_converter.datalab.job_queue import JobContext, JobQueue, WorkerPool
+from pdf_converter.datalab.native_extract import EXTRACTOR_DATALAB
+from pdf_converter.datalab.source_cache import SourceCache
+from pdf_converter.datalab.tracing import Tracer, activate, span
 from pdf_converter.datalab import excel_to_pdf as excel_to_pdf_module
 from pdf_converter.datalab.datalab_excel_reader import DatalabExcelReader
 from openpyxl import load_workbook
@@ -63,6 +69,7 @@ with st.sidebar:
     
     # En producción, agregar botón de logout aquí
     st.markdown("---")
+    show_timings = st.checkbox("⏱️ Mostrar tiempos por etapa", value=False, key="show_timings")
 
 # Initialize session state
 if 'processed_files' not in st.session_state:
@@ -134,60 +141,280 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-def convert_pdf_to_excel_streamlit(pdf_bytes: bytes, pdf_name: str, format_type: str, temp_dir: str, progress_callback=None) -> tuple:
+AUX_DATA_DIR = Path(__file__).parent.parent / "pdf_converter" / "datalab" / "aux_data"
+
+
+def file_digest(data: bytes) -> str:
+    """Hash de contenido usado como clave de cache de cada upload/intermedio."""
+    return hashlib.sha256(data).hexdigest()
+
+
+@st.cache_resource(show_spinner=False)
+def get_aux_store() -> AuxDataStore:
+    """Hojas auxiliares cargadas una vez por proceso y compartidas entre sesiones."""
+    return AuxDataStore(str(AUX_DATA_DIR))
+
+
+@st.cache_resource(show_spinner=False)
+def get_datalab_client(api_key: str) -> DatalabClient:
+    """Cliente Datalab (conexión HTTP persistente) compartido entre sesiones."""
+    return DatalabClient(api_key=api_key, mode="accurate")
+
+
+# Etiqueta de cada fuente en los mensajes de progreso
+SOURCE_TITLES = {'gallo': 'Gallo', 'visual': 'Visual', 'precio_tenencias': 'Precio Tenencias'}
+
+JOB_QUEUE_DB = Path(os.environ.get("JOB_QUEUE_DB", Path(tempfile.gettempdir()) / "pdf_converter_jobs.sqlite"))
+CASE_WORKERS = int(os.environ.get("CASE_WORKERS", "2"))
+# Fuentes ya convertidas (OCR + tablas) por formato y hash del PDF, compartidas entre casos
+SOURCE_CACHE_DB = Path(os.environ.get("SOURCE_CACHE_DB", Path(tempfile.gettempdir()) / "pdf_converter_sources.sqlite"))
+# Cuánto se reutiliza un caso o una fuente ya procesados; después se borran
+CASE_CACHE_TTL = timedelta(hours=float(os.environ.get("CASE_CACHE_HOURS", "24")))
+# LOW_MEMORY=1: las salidas de cada caso van a disco (CASE_OUTPUT_DIR/<job>) apenas se generan
+# y el resultado del trabajo guarda rutas en lugar de bytes. TRACE_MEMORY=1 suma picos de memoria
+# por etapa al panel de tiempos.
+LOW_MEMORY = os.environ.get("LOW_MEMORY", "").strip().lower() in {"1", "true", "yes"}
+TRACE_MEMORY = os.environ.get("TRACE_MEMORY", "").strip().lower() in {"1", "true", "yes"}
+CASE_OUTPUT_DIR = Path(os.environ.get("CASE_OUTPUT_DIR", Path(tempfile.gettempdir()) / "pdf_converter_cases"))
+# PDF_EXTRACTOR=auto: páginas digitales extraídas localmente, solo las escaneadas a Datalab
+# (ver native_extract). Por defecto todo va a Datalab.
+PDF_EXTRACTOR = os.environ.get("PDF_EXTRACTOR", EXTRACTOR_DATALAB).strip().lower()
+
+
+def stored_output(value: bytes | Path | None) -> bytes | None:
+    """Una salida del caso: bytes en memoria o, con LOW_MEMORY, el archivo en disco."""
+    return value.read_bytes() if isinstance(value, Path) else value
+
+
+def conversion_version() -> str:
+    """Versión del pipeline más el extractor: un resultado de otro extractor no se reutiliza."""
+    return f"{pipeline_version(str(AUX_DATA_DIR))}-{PDF_EXTRACTOR}"
+
+
+def outputs_available(results: dict) -> bool:
+    """Un caso terminado se puede reutilizar si sus salidas en disco (LOW_MEMORY) siguen ahí."""
+    return all(value.exists() for value in results.values() if isinstance(value, Path))
+
+
+def remove_case_outputs(job_ids: list[str]) -> None:
+    """Borra las carpetas de salida (LOW_MEMORY) de los trabajos purgados de la cola."""
+    for job_id in job_ids:
+        shutil.rmtree(CASE_OUTPUT_DIR / job_id, ignore_errors=True)
+
+
+def process_case_job(
+    payload: dict,
+    job: JobContext,
+    datalab_client: DatalabClient,
+    aux_store: AuxDataStore,
+    source_cache: SourceCache,
+) -> dict:
     """
-    Convert PDF to Excel using Datalab API.
-    
-    Args:
-        pdf_bytes: PDF file content
-        pdf_name: Original filename
-        format_type: 'gallo' or 'visual'
-        temp_dir: Temporary directory path
-        progress_callback: Optional callback for progress updates
-    
+    Corre un caso encolado (en un worker, fuera del script de Streamlit): OCR y tablas
+    de cada PDF, y merge + validación si hay Visual.
+
+    Cada PDF pasa por OCR solo si no está en `source_cache` (mismo formato, mismo
+    contenido y misma versión del pipeline): cambiar un solo PDF del caso no vuelve
+    a pagar el OCR de los otros.
+
     Returns:
-        Tuple of (excel_path, comitente_number, comitente_name)
+        dict con los Excel por fuente, comitente, markdown, el merge y los spans del trace
+        (con LOW_MEMORY los Excel son rutas dentro de CASE_OUTPUT_DIR y el markdown queda en disco).
     """
     from pdf_converter.datalab.md_to_excel import extract_comitente_info
-    
-    api_key = os.environ.get("DATALAB_API_KEY", "").strip()
-    if not api_key:
-        raise ValueError("DATALAB_API_KEY no encontrada. Configure la variable de entorno.")
-    
-    # Save PDF to temp
-    pdf_path = os.path.join(temp_dir, f"{format_type}.pdf")
-    with open(pdf_path, "wb") as f:
-        f.write(pdf_bytes)
-    
-    if progress_callback:
-        progress_callback(f"Procesando {format_type.upper()} con OCR...")
-    
-    # Convert PDF to Markdown using Datalab
-    with DatalabClient(api_key=api_key, mode="accurate") as client:
-        result = client.convert_pdf(pdf_path, paginate=True)
-        
-        if not result.success:
-            raise RuntimeError(f"Error en OCR: {result.error}")
-    
-    markdown_content = result.markdown or ""
-    
-    # Extract comitente info from markdown
-    comitente_number, comitente_name = extract_comitente_info(markdown_content)
-    
-    # Save markdown
-    md_path = os.path.join(temp_dir, f"{format_type}.datalab.md")
-    with open(md_path, 'w', encoding='utf-8') as f:
-        f.write(markdown_content)
-    
-    if progress_callback:
-        progress_callback(f"Creando Excel de {format_type.upper()}...")
-    
-    # Convert Markdown to Excel
-    excel_path = os.path.join(temp_dir, f"{format_type}_estructurado.xlsx")
-    convert_markdown_to_excel(md_path, excel_path, apply_postprocess=True)
-    
-    # Devolver también el markdown para uso posterior (PDF export)
-    return excel_path, comitente_number, comitente_name, markdown_content
+
+    tracer = Tracer(f"case_{job.job_id[:8]}", memory=TRACE_MEMORY)
+    case_base = CASE_OUTPUT_DIR / job.job_id / "caso"
+    results = {}
+    sources = payload['sources']
+    total_steps = len(sources) + (1 if 'visual' in sources else 0)
+    version = conversion_version()
+
+    with activate(tracer):
+        converted = {}
+        for step, (key, (pdf_name, pdf_bytes)) in enumerate(sources.items()):
+            digest = file_digest(pdf_bytes)
+            converted[key] = source_cache.get(key, digest, version)
+            if converted[key] is None:
+                job.progress(step / (total_steps + 1), f"📊 Procesando reporte {SOURCE_TITLES[key]} con OCR...")
+                with span("app.ocr", "ocr", format=key, file=pdf_name):
+                    converted[key] = convert_source(
+                        key, CaseSource.pdf(pdf_bytes, pdf_name), datalab_client, extractor=PDF_EXTRACTOR
+                    )
+                source_cache.put(key, digest, version, converted[key])
+            else:
+                job.progress(step / (total_steps + 1), f"📊 Reporte {SOURCE_TITLES[key]} ya procesado, reutilizando OCR...")
+            if not LOW_MEMORY:
+                with span("app.markdown_to_excel", "parse", format=key):
+                    results[key] = converted[key].excel_bytes()
+                results[f'{key}_markdown'] = converted[key].markdown
+            results[f'{key}_extractor'] = converted[key].extractor
+            if key != 'precio_tenencias':
+                comitente_number, comitente_name = extract_comitente_info(converted[key].markdown)
+                results[f'{key}_comitente_num'] = comitente_number
+                results[f'{key}_comitente_name'] = comitente_name
+
+        # ======== MERGE AUTOMÁTICO SI HAY VISUAL ========
+        if 'visual' in converted:
+            job.progress(len(sources) / (total_steps + 1), "🔄 Generando Resumen Impositivo combinado...")
+
+            def source(key: str) -> CaseSource | None:
+                return CaseSource.tables(converted[key].tables) if key in converted else None
+
+            with span("app.merge_case", "merge"):
+                merged = run_case(
+                    source('visual'),
+                    source('gallo'),
+                    source('precio_tenencias'),
+                    aux_store=aux_store,
+                    prefer_precio_tenencias_usd_cost_basis=True,
+                    export_pdf=False,
+                    output_dir=case_base.parent if LOW_MEMORY else None,
+                    case_prefix=case_base.name,
+                    low_memory=LOW_MEMORY,
+                )
+
+            # Users should receive the materialized workbook so Excel and PDF
+            # show the same resolved values.
+            if LOW_MEMORY:
+                results.update({key: merged.paths[key] for key in converted})
+                results['merged_formulas'] = merged.paths['merge_formulas']
+                results['merged'] = merged.paths['merge_values']
+            else:
+                results['merged_formulas'] = merged.formulas_bytes()
+                results['merged'] = merged.values_bytes()
+            results['merged_values'] = results['merged']
+            results['validation_report'] = merged.validation_report.to_dict()
+        elif LOW_MEMORY:
+            with span("app.markdown_to_excel", "parse"):
+                for key, source in converted.items():
+                    results[key] = source.write(case_base, key)[key]
+
+    job.progress(1.0, "✅ Procesamiento completado!")
+    results['trace_spans'] = tracer.spans
+    return results
+
+
+@st.cache_resource(show_spinner=False)
+def get_job_queue() -> JobQueue:
+    """Cola SQLite de casos, compartida por todas las sesiones del proceso."""
+    return JobQueue(JOB_QUEUE_DB)
+
+
+@st.cache_resource(show_spinner=False)
+def get_source_cache() -> SourceCache:
+    """Fuentes convertidas por formato + hash del PDF, compartidas por los workers."""
+    return SourceCache(SOURCE_CACHE_DB, max_age=CASE_CACHE_TTL)
+
+
+@st.cache_resource(show_spinner=False)
+def get_worker_pool(api_key: str) -> WorkerPool:
+    """
+    Workers que corren los casos encolados; CASE_WORKERS acota los casos simultáneos.
+    Los casos terminados hace más de CASE_CACHE_TTL se borran (con sus salidas en disco).
+    """
+    datalab_client = get_datalab_client(api_key)
+    aux_store = get_aux_store()
+    source_cache = get_source_cache()
+
+    def handler(payload: dict, job: JobContext) -> dict:
+        return process_case_job(payload, job, datalab_client, aux_store, source_cache)
+
+    return WorkerPool(
+        get_job_queue(),
+        {'caso': handler},
+        workers=CASE_WORKERS,
+        retention=CASE_CACHE_TTL,
+        on_purge=remove_case_outputs,
+    ).start()
+
+
+def load_job_results(job_id: str) -> None:
+    """Pasa el resultado de un trabajo terminado a la sesión (descargas, PDF, tiempos)."""
+    results = dict(get_job_queue().result(job_id))
+    tracer = Tracer("app_datalab", memory=TRACE_MEMORY)
+    tracer.spans = list(results.pop('trace_spans', []))
+    st.session_state.pipeline_tracer = tracer
+    st.session_state.processed_files = {
+        **results,
+        'timestamp': datetime.now().strftime('%Y%m%d_%H%M')
+    }
+    st.session_state.loaded_job_id = job_id
+
+
+def forget_job() -> None:
+    st.session_state.case_job_id = None
+    st.query_params.pop('job', None)
+
+
+@st.fragment(run_every=1.0)
+def render_job_status(job_id: str) -> None:
+    """Progreso del trabajo en curso; al terminar recarga la app con los resultados."""
+    queue = get_job_queue()
+    job = queue.get(job_id)
+    if job is None or not job.activo:
+        # Terminó (o se canceló): la corrida completa muestra el resultado
+        st.rerun()
+
+    position = queue.position(job_id)
+    if job.estado == 'pendiente':
+        st.info(f"⏳ Caso en cola ({position} por delante)" if position else "⏳ Caso en cola, empieza en breve...")
+    st.progress(int(job.progreso * 100))
+    st.text(job.mensaje or "🔄 Procesando reportes...")
+    if job.cancelar:
+        st.caption("Cancelando...")
+    elif st.button("✖️ Cancelar", key=f"cancel_{job_id}"):
+        queue.cancel(job_id)
+
+
+# Filas por página en la vista previa: st.dataframe serializa todo lo que recibe en cada rerun
+PREVIEW_PAGE_ROWS = 500
+
+
+def output_key(value: bytes | Path) -> str:
+    """Clave de cache de una salida; si está en disco no hace falta leerla para calcularla."""
+    if isinstance(value, Path):
+        stat = value.stat()
+        return f"{value}:{stat.st_size}:{stat.st_mtime_ns}"
+    return file_digest(value)
+
+
+@st.cache_data(show_spinner=False, max_entries=16)
+def preview_sheet_names(data_key: str, _output: bytes | Path) -> list[str]:
+    """Nombres de las hojas sin parsear celdas (read_only solo lee el índice del workbook)."""
+    wb = load_workbook(io.BytesIO(stored_output(_output)), read_only=True)
+    try:
+        return list(wb.sheetnames)
+    finally:
+        wb.close()
+
+
+@st.cache_data(show_spinner=False, max_entries=64)
+def load_preview_sheet(data_key: str, sheet_name: str, _output: bytes | Path) -> pd.DataFrame:
+    """Parsea una sola hoja, la primera vez que se la muestra (los reruns de Streamlit no re-leen)."""
+    return pd.read_excel(io.BytesIO(stored_output(_output)), sheet_name=sheet_name)
+
+
+def render_sheet_preview(data_key: str, output: bytes | Path) -> None:
+    """Vista previa de un workbook: solo se carga la hoja elegida, de a PREVIEW_PAGE_ROWS filas."""
+    cache_key = output_key(output)
+    sheet_names = preview_sheet_names(cache_key, output)
+    if not sheet_names:
+        return
+    sheet_name = st.radio("Hoja:", sheet_names, horizontal=True, key=f"preview_sheet_{data_key}")
+    df = load_preview_sheet(cache_key, sheet_name, output)
+
+    pages = max(1, -(-len(df) // PREVIEW_PAGE_ROWS))
+    page = 1
+    if pages > 1:
+        page = st.number_input(
+            f"Página (de {pages})", min_value=1, max_value=pages, value=1, step=1,
+            key=f"preview_page_{data_key}_{sheet_name}",
+        )
+    start = (page - 1) * PREVIEW_PAGE_ROWS
+    st.dataframe(df.iloc[start:start + PREVIEW_PAGE_ROWS], use_container_width=True, hide_index=True)
+    if pages > 1:
+        st.caption(f"Filas {start + 1:,}–{min(start + PREVIEW_PAGE_ROWS, len(df)):,} de {len(df):,}")
 
 
 def resolve_merge_client_info(results: dict) -> tuple[str, str]:
@@ -221,6 +448,32 @@ def render_validation_panel(report: dict | None) -> None:
         st.dataframe(df[[col for col in visible_cols if col in df.columns]], use_container_width=True, hide_index=True)
 
 
+def render_timing_panel(tracer: Tracer) -> None:
+    """Tabla de tiempos (y memoria) por etapa de la última corrida + descarga del trace (Chrome trace viewer)."""
+    st.markdown("### ⏱️ Tiempos por etapa")
+    summary = tracer.summary()
+    if not summary:
+        st.info("Todavía no hay etapas registradas en esta sesión.")
+        return
+    df = pd.DataFrame(summary)
+    df['stage'] = ["\u2003" * depth + stage for depth, stage in zip(df['depth'], df['stage'])]
+    columns = {'stage': 'Etapa', 'calls': 'Llamadas', 'total_ms': 'Total (ms)'}
+    # Con TRACE_MEMORY cada etapa trae además sus picos de memoria
+    columns.update({key: label for key, label in (('heap_peak_mb', 'Pico heap (MB)'), ('rss_peak_mb', 'Pico RSS (MB)')) if key in df})
+    st.dataframe(
+        df[list(columns)].rename(columns=columns),
+        use_container_width=True,
+        hide_index=True,
+    )
+    st.download_button(
+        label="⬇️ Descargar trace (JSON)",
+        data=json.dumps(tracer.to_chrome_trace(), ensure_ascii=False),
+        file_name=f"trace_{datetime.now().strftime('%Y%m%d_%H%M')}.json",
+        mime="application/json",
+        key='download_trace',
+    )
+
+
 # File uploaders
 col1, col2, col3 = st.columns(3)
 
@@ -266,170 +519,78 @@ if st.button("🚀 Procesar Reportes", type="primary", use_container_width=True)
         if not api_key:
             st.error("⚠️ DATALAB_API_KEY no configurada. Agregue la API key en el archivo .env")
         else:
-            try:
-                with st.spinner("🔄 Procesando reportes..."):
-                    temp_dir = tempfile.mkdtemp()
-                    
-                    progress_bar = st.progress(0)
-                    status_text = st.empty()
-                    
-                    results = {}
-                    step = 0
-                    total_steps = (1 if gallo_file else 0) + (1 if visual_file else 0) + (1 if precio_tenencias_file else 0)
-                    
-                    # Process Gallo if provided
-                    if gallo_file:
-                        status_text.text("📊 Procesando reporte Gallo...")
-                        step += 1
-                        progress_bar.progress(int(step / (total_steps + 1) * 100))
-                        
-                        gallo_excel, gallo_comitente_num, gallo_comitente_name, gallo_markdown = convert_pdf_to_excel_streamlit(
-                            gallo_file.getvalue(),
-                            gallo_file.name,
-                            "gallo",
-                            temp_dir,
-                            lambda msg: status_text.text(msg)
-                        )
-                        
-                        with open(gallo_excel, "rb") as f:
-                            results['gallo'] = f.read()
-                        results['gallo_comitente_num'] = gallo_comitente_num
-                        results['gallo_comitente_name'] = gallo_comitente_name
-                        results['gallo_markdown'] = gallo_markdown
-                    
-                    # Process Visual if provided
-                    if visual_file:
-                        status_text.text("📊 Procesando reporte Visual...")
-                        step += 1
-                        progress_bar.progress(int(step / (total_steps + 1) * 100))
-                        
-                        visual_excel, visual_comitente_num, visual_comitente_name, visual_markdown = convert_pdf_to_excel_streamlit(
-                            visual_file.getvalue(),
-                            visual_file.name,
-                            "visual",
-                            temp_dir,
-                            lambda msg: status_text.text(msg)
-                        )
-                        
-                        with open(visual_excel, "rb") as f:
-                            results['visual'] = f.read()
-                        results['visual_comitente_num'] = visual_comitente_num
-                        results['visual_comitente_name'] = visual_comitente_name
-                        results['visual_markdown'] = visual_markdown
-
-                    # Process Precio Tenencias if provided
-                    if precio_tenencias_file:
-                        status_text.text("📊 Procesando reporte Precio Tenencias...")
-                        step += 1
-                        progress_bar.progress(int(step / (total_steps + 1) * 100))
-
-                        precio_excel, _, _, precio_markdown = convert_pdf_to_excel_streamlit(
-                            precio_tenencias_file.getvalue(),
-                            precio_tenencias_file.name,
-                            "precio_tenencias",
-                            temp_dir,
-                            lambda msg: status_text.text(msg)
-                        )
-
-                        with open(precio_excel, "rb") as f:
-                            results['precio_tenencias'] = f.read()
-                        results['precio_tenencias_markdown'] = precio_markdown
-                    
-                    progress_bar.progress(100)
-                    status_text.text("✅ Procesamiento completado!")
-                    
-                    # ======== MERGE AUTOMÁTICO SI HAY VISUAL ========
-                    if 'visual' in results:
-                        status_text.text("🔄 Generando Resumen Impositivo combinado...")
-                        
-                        # Create temp files for merge
-                        visual_temp = os.path.join(temp_dir, "visual_for_merge.xlsx")
-                        precio_tenencias_temp = os.path.join(temp_dir, "precio_tenencias_for_merge.xlsx")
-                        
-                        gallo_temp = None
-                        if 'gallo' in results:
-                            gallo_temp = os.path.join(temp_dir, "gallo_for_merge.xlsx")
-                            with open(gallo_temp, "wb") as f:
-                                f.write(results['gallo'])
-                        with open(visual_temp, "wb") as f:
-                            f.write(results['visual'])
-                        if 'precio_tenencias' in results:
-                            with open(precio_tenencias_temp, "wb") as f:
-                                f.write(results['precio_tenencias'])
-                        
-                        # Get aux_data path
-                        aux_data_dir = Path(__file__).parent.parent / "pdf_converter" / "datalab" / "aux_data"
-                        
-                        # Execute merge - returns (wb_formulas, wb_values)
-                        merger = GalloVisualMerger(
-                            gallo_path=gallo_temp,
-                            visual_path=visual_temp,
-                            aux_data_dir=str(aux_data_dir),
-                            precio_tenencias_path=precio_tenencias_temp if 'precio_tenencias' in results else None,
-                            prefer_precio_tenencias_usd_cost_basis=True,
-                        )
-                        wb_formulas, wb_values = merger.merge(output_mode="both")
-                        validation_report = validate_workbook(wb_values)
-                        add_validation_sheet(wb_values, validation_report)
-                        
-                        # Save both versions
-                        merged_excel_path = os.path.join(temp_dir, "merged_resumen.xlsx")
-                        merged_values_path = os.path.join(temp_dir, "merged_resumen_values.xlsx")
-                        
-                        wb_formulas.save(merged_excel_path)
-                        wb_values.save(merged_values_path)
-                        
-                        # Read bytes for download. Users should receive the materialized workbook
-                        # so Excel and PDF show the same resolved values.
-                        with open(merged_excel_path, "rb") as f:
-                            results['merged_formulas'] = f.read()
-                        
-                        # Read bytes of values version for user download and PDF export
-                        with open(merged_values_path, "rb") as f:
-                            merged_values_bytes = f.read()
-                            results['merged'] = merged_values_bytes
-                            results['merged_values'] = merged_values_bytes
-                        
-                        # Store values workbook in session for PDF generation
-                        st.session_state.merged_values_wb = wb_values
-                        results['validation_report'] = validation_report.to_dict()
-                        
-                        status_text.text("✅ Resumen Impositivo generado!")
-                    
-                    # Store results
-                    st.session_state.processed_files = {
-                        **results,
-                        'timestamp': datetime.now().strftime('%Y%m%d_%H%M')
-                    }
-                    
-                    # Show success message based on what was processed
-                    if 'merged' in results and 'gallo' in results:
-                        st.markdown("""
-                        <div class="success-box">
-                            <h3>✅ Procesamiento Completo!</h3>
-                            <p>Se generó el <strong>Resumen Impositivo combinado</strong> con datos de Gallo + Visual.</p>
-                            <p>También puede descargar los Excel individuales de cada formato.</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    elif 'merged' in results:
-                        st.markdown("""
-                        <div class="success-box">
-                            <h3>✅ Procesamiento Completo!</h3>
-                            <p>Se generó el <strong>Resumen Impositivo</strong> usando Visual como fuente principal.</p>
-                            <p>El caso no incluyó PDF de Gallo ni Precio Tenencias.</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    else:
-                        st.markdown("""
-                        <div class="success-box">
-                            <h3>✅ Procesamiento Exitoso!</h3>
-                            <p>Los archivos Excel estructurados están listos para descargar.</p>
-                        </div>
-                        """, unsafe_allow_html=True)
-                    
-            except Exception as e:
-                st.error(f"❌ Error durante el procesamiento: {str(e)}")
-                st.exception(e)
+            # El caso corre en un worker: la sesión no se bloquea y un refresh no lo pierde
+            # (el job id queda en la URL). Mismos PDFs con el mismo código y datos auxiliares
+            # -> mismo trabajo, sin reprocesar, mientras no tenga más de CASE_CACHE_TTL.
+            uploads = {'gallo': gallo_file, 'visual': visual_file, 'precio_tenencias': precio_tenencias_file}
+            sources = {key: (upload.name, upload.getvalue()) for key, upload in uploads.items() if upload}
+            case_key = file_digest("|".join(
+                [conversion_version()]
+                + [f"{key}:{file_digest(data)}" for key, (_, data) in sources.items()]
+            ).encode())
+            get_worker_pool(api_key)
+            job_id = get_job_queue().submit(
+                'caso',
+                {'sources': sources},
+                key=case_key,
+                max_age=CASE_CACHE_TTL,
+                reusable=outputs_available,
+            )
+            st.session_state.case_job_id = job_id
+            st.session_state.loaded_job_id = None
+            st.query_params['job'] = job_id
+
+# Trabajo en curso o recién terminado (también tras refrescar el navegador)
+case_job_id = st.session_state.get('case_job_id') or st.query_params.get('job')
+if case_job_id and st.session_state.get('loaded_job_id') != case_job_id:
+    case_job = get_job_queue().get(case_job_id)
+    if case_job is None:
+        forget_job()
+    elif case_job.activo:
+        api_key = os.environ.get("DATALAB_API_KEY", "").strip()
+        if api_key:
+            get_worker_pool(api_key)
+        st.session_state.case_job_id = case_job_id
+        render_job_status(case_job_id)
+    elif case_job.estado == 'terminado' and not outputs_available(get_job_queue().result(case_job_id)):
+        st.warning("⚠️ Los archivos de este caso ya no están disponibles. Vuelva a procesar los reportes.")
+        forget_job()
+    elif case_job.estado == 'terminado':
+        load_job_results(case_job_id)
+        results = st.session_state.processed_files
+
+        # Show success message based on what was processed
+        if 'merged' in results and 'gallo' in results:
+            st.markdown("""
+            <div class="success-box">
+                <h3>✅ Procesamiento Completo!</h3>
+                <p>Se generó el <strong>Resumen Impositivo combinado</strong> con datos de Gallo + Visual.</p>
+                <p>También puede descargar los Excel individuales de cada formato.</p>
+            </div>
+            """, unsafe_allow_html=True)
+        elif 'merged' in results:
+            st.markdown("""
+            <div class="success-box">
+                <h3>✅ Procesamiento Completo!</h3>
+                <p>Se generó el <strong>Resumen Impositivo</strong> usando Visual como fuente principal.</p>
+                <p>El caso no incluyó PDF de Gallo ni Precio Tenencias.</p>
+            </div>
+            """, unsafe_allow_html=True)
+        else:
+            st.markdown("""
+            <div class="success-box">
+                <h3>✅ Procesamiento Exitoso!</h3>
+                <p>Los archivos Excel estructurados están listos para descargar.</p>
+            </div>
+            """, unsafe_allow_html=True)
+    elif case_job.estado == 'cancelado':
+        st.warning("✖️ Procesamiento cancelado.")
+        forget_job()
+    else:
+        st.error(f"❌ Error durante el procesamiento: {case_job.error.splitlines()[0] if case_job.error else ''}")
+        with st.expander("Detalle del error"):
+            st.code(case_job.error or "")
+        forget_job()
 
 # Download buttons
 if st.session_state.processed_files is not None:
@@ -454,7 +615,7 @@ if st.session_state.processed_files is not None:
             
             st.download_button(
                 label="📊 Excel Gallo",
-                data=st.session_state.processed_files['gallo'],
+                data=stored_output(st.session_state.processed_files['gallo']),
                 file_name=gallo_filename,
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 use_container_width=True,
@@ -476,7 +637,7 @@ if st.session_state.processed_files is not None:
             
             st.download_button(
                 label="📊 Excel Visual",
-                data=st.session_state.processed_files['visual'],
+                data=stored_output(st.session_state.processed_files['visual']),
                 file_name=visual_filename,
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 use_container_width=True,
@@ -511,7 +672,7 @@ if st.session_state.processed_files is not None:
         
         st.download_button(
             label="📥 Descargar Resumen Impositivo (Excel)",
-            data=st.session_state.processed_files['merged'],
+            data=stored_output(st.session_state.processed_files['merged']),
             file_name=merged_filename,
             mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
             use_container_width=True,
@@ -523,7 +684,7 @@ if st.session_state.processed_files is not None:
             formulas_filename = merged_filename.replace('.xlsx', '_formulas.xlsx')
             st.download_button(
                 label="📥 Descargar Resumen Impositivo (Excel con fórmulas)",
-                data=st.session_state.processed_files['merged_formulas'],
+                data=stored_output(st.session_state.processed_files['merged_formulas']),
                 file_name=formulas_filename,
                 mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
                 use_container_width=True,
@@ -546,8 +707,6 @@ if st.session_state.processed_files is not None:
         # Generar PDF automáticamente si no existe, o con botón si el usuario quiere regenerar
         def generate_pdf_report():
             """Genera el PDF del reporte usando el Excel con valores calculados."""
-            import tempfile
-            
             # Usar el Excel con valores calculados (tiene todas las fórmulas resueltas)
             merged_values_bytes = st.session_state.processed_files.get('merged_values')
             
@@ -557,18 +716,13 @@ if st.session_state.processed_files is not None:
                 if not merged_values_bytes:
                     raise RuntimeError("No hay Excel disponible. Reprocese los PDFs.")
             
-            # Guardar Excel temporalmente
-            with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-                tmp.write(merged_values_bytes)
-                tmp_excel_path = tmp.name
-            
             # Crear exportador SIN datalab (el Excel ya tiene valores calculados)
             cliente_info = {
                 'numero': comitente_num or 'XXXXX',
                 'nombre': comitente_name or 'CLIENTE'
             }
             exporter = ExcelToPdfExporter(
-                tmp_excel_path, 
+                merged_values_bytes,
                 cliente_info
                 # Sin datalab_markdown - usará openpyxl directamente
             )
@@ -577,46 +731,32 @@ if st.session_state.processed_files is not None:
             exporter.anio = int(pdf_anio)
             
             # Generar PDF
-            pdf_bytes = exporter.export_to_pdf()
-            
-            # Limpiar temporal
-            os.unlink(tmp_excel_path)
-            
-            return pdf_bytes
+            return exporter.export_to_pdf()
 
         def generate_client_excel():
             """Genera Excel para cliente con mismas secciones del PDF (valores planos)."""
-            import tempfile
-
             merged_values_bytes = st.session_state.processed_files.get('merged_values')
             if not merged_values_bytes:
                 merged_values_bytes = st.session_state.processed_files.get('merged')
                 if not merged_values_bytes:
                     raise RuntimeError("No hay Excel disponible. Reprocese los PDFs.")
 
-            with tempfile.NamedTemporaryFile(suffix='.xlsx', delete=False) as tmp:
-                tmp.write(merged_values_bytes)
-                tmp_excel_path = tmp.name
-
             cliente_info = {
                 'numero': comitente_num or 'XXXXX',
                 'nombre': comitente_name or 'CLIENTE'
             }
-            exporter = ExcelToPdfExporter(tmp_excel_path, cliente_info)
+            exporter = ExcelToPdfExporter(merged_values_bytes, cliente_info)
             exporter.periodo_inicio = pdf_periodo_inicio
             exporter.periodo_fin = pdf_periodo_fin
             exporter.anio = int(pdf_anio)
 
-            excel_bytes = exporter.export_to_client_excel()
-
-            os.unlink(tmp_excel_path)
-            return excel_bytes
+            return exporter.export_to_client_excel()
         
         # Auto-generar PDF si no existe o si cambiaron parámetros
         pdf_params_key = f"{pdf_periodo_inicio}_{pdf_periodo_fin}_{pdf_anio}"
         if 'pdf' not in st.session_state.processed_files or st.session_state.get('pdf_params_key') != pdf_params_key:
             try:
-                with st.spinner("Generando PDF automáticamente..."):
+                with st.spinner("Generando PDF automáticamente..."), activate(st.session_state.get('pipeline_tracer')):
                     st.session_state.processed_files['pdf'] = generate_pdf_report()
                     st.session_state.pdf_params_key = pdf_params_key
             except Exception as e:
@@ -625,7 +765,7 @@ if st.session_state.processed_files is not None:
         # Botón para regenerar si el usuario cambia fechas
         if st.button("🔄 Regenerar PDF con nuevas fechas", use_container_width=True, key="gen_pdf"):
             try:
-                with st.spinner("Regenerando PDF..."):
+                with st.spinner("Regenerando PDF..."), activate(st.session_state.get('pipeline_tracer')):
                     st.session_state.processed_files['pdf'] = generate_pdf_report()
                     st.session_state.pdf_params_key = pdf_params_key
                     st.success("✅ PDF regenerado correctamente")
@@ -683,14 +823,11 @@ if st.session_state.processed_files is not None:
         else:
             data_key = selected.lower()
         
-        xl = pd.ExcelFile(io.BytesIO(st.session_state.processed_files[data_key]))
-        
-        tabs = st.tabs(xl.sheet_names)
-        
-        for i, sheet_name in enumerate(xl.sheet_names):
-            with tabs[i]:
-                df = pd.read_excel(io.BytesIO(st.session_state.processed_files[data_key]), sheet_name=sheet_name)
-                st.dataframe(df, use_container_width=True, hide_index=True)
+        render_sheet_preview(data_key, st.session_state.processed_files[data_key])
+
+# Timing panel (opcional, desde el sidebar)
+if show_timings and st.session_state.get('pipeline_tracer') is not None:
+    render_timing_panel(st.session_state.pipeline_tracer)
 
 # Footer
 st.markdown("---")
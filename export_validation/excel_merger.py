@@ -4,11 +4,23 @@ Combina los dos reportes estructurados en un Excel unificado
 """
 import pandas as pd
 from datetime import datetime
+from validation_module import load_sheets
 
 class ExcelMerger:
     def __init__(self, gallo_excel_path, visual_excel_path):
         self.gallo_path = gallo_excel_path
         self.visual_path = visual_excel_path
+        # Cada Excel se lee una sola vez (y se reusa si ya se leyó al validarlo)
+        self._sheets = {}
+    
+    def _read(self, source, sheet_name):
+        """Copia de una hoja de 'Gallo' o 'Visual'; ValueError si no existe (como pd.read_excel)"""
+        if source not in self._sheets:
+            path = self.gallo_path if source == 'Gallo' else self.visual_path
+            self._sheets[source] = load_sheets(path)
+        if sheet_name not in self._sheets[source]:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        return self._sheets[source][sheet_name].copy()
         
     def merge(self, output_path):
         """Combina los dos excels en uno unificado"""
@@ -50,7 +62,7 @@ class ExcelMerger:
         """Combina una hoja de ambos excels agregando columna Origen"""
         try:
             # Leer de Gallo
-            df_gallo = pd.read_excel(self.gallo_path, sheet_name=sheet_name)
+            df_gallo = self._read('Gallo', sheet_name)
             df_gallo['Origen'] = 'Gallo'
         except Exception as e:
             print(f"    ⚠️ No se encontró {sheet_name} en Gallo: {e}")
@@ -58,7 +70,7 @@ class ExcelMerger:
         
         try:
             # Leer de Visual
-            df_visual = pd.read_excel(self.visual_path, sheet_name=sheet_name)
+            df_visual = self._read('Visual', sheet_name)
             df_visual['Origen'] = 'Visual'
         except Exception as e:
             print(f"    ⚠️ No se encontró {sheet_name} en Visual: {e}")
@@ -106,12 +118,12 @@ class ExcelMerger:
     def _merge_resumen(self, writer):
         """Suma los totales del resumen de ambos reportes"""
         try:
-            df_gallo = pd.read_excel(self.gallo_path, sheet_name="Resumen")
+            df_gallo = self._read('Gallo', "Resumen")
         except:
             df_gallo = pd.DataFrame()
         
         try:
-            df_visual = pd.read_excel(self.visual_path, sheet_name="Resumen")
+            df_visual = self._read('Visual', "Resumen")
         except:
             df_visual = pd.DataFrame()
         
@@ -140,13 +152,13 @@ class ExcelMerger:
     def _merge_posicion(self, writer):
         """Combina posiciones de títulos sumando cantidades del mismo instrumento"""
         try:
-            df_gallo = pd.read_excel(self.gallo_path, sheet_name="Posicion Titulos")
+            df_gallo = self._read('Gallo', "Posicion Titulos")
             df_gallo['Origen'] = 'Gallo'
         except:
             df_gallo = pd.DataFrame()
         
         try:
-            df_visual = pd.read_excel(self.visual_path, sheet_name="Posicion Titulos")
+            df_visual = self._read('Visual', "Posicion Titulos")
             df_visual['Origen'] = 'Visual'
         except:
             df_visual = pd.DataFrame()
@@ -45,12 +45,20 @@ Uso:
     
     # Validación completa con reporte
     run_full_validation('archivo.xlsx', tipo='visual')  # o 'gallo'
+
+Cada workbook se lee una sola vez (load_sheets) y todas las verificaciones trabajan
+sobre ese dict de DataFrames; el cache se invalida si el archivo cambia en disco.
 """
 
 import pandas as pd
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import List, Dict, Tuple, Optional
 import os
+import re
+
+# Workbooks parseados que se conservan (app.py valida y después mergea los mismos archivos)
+SHEETS_CACHE_SIZE = 4
 
 
 @dataclass
@@ -110,6 +118,52 @@ class ValidationReport:
         print()
 
 
+@lru_cache(maxsize=SHEETS_CACHE_SIZE)
+def _read_sheets(file_path: str, size: int, mtime_ns: int) -> Dict[str, pd.DataFrame]:
+    # size/mtime_ns solo forman parte de la clave: un archivo reescrito se vuelve a leer
+    return pd.read_excel(file_path, sheet_name=None)
+
+
+def load_sheets(file_path: str) -> Dict[str, pd.DataFrame]:
+    """
+    Lee todas las hojas del workbook en una sola pasada: {nombre de hoja: DataFrame}.
+
+    El resultado se cachea y se comparte entre llamadas, así que no hay que
+    modificar los DataFrames en el lugar (usar .copy() o .assign()).
+    """
+    stat = os.stat(file_path)
+    return _read_sheets(os.path.abspath(file_path), stat.st_size, stat.st_mtime_ns)
+
+
+def to_float_series(values: pd.Series) -> pd.Series:
+    """
+    Convierte una columna a float de forma vectorizada: quita comas de miles, acepta
+    el signo negativo al final (ej: "538.62-") y lo que no es un número queda en 0.
+    """
+    if pd.api.types.is_bool_dtype(values) or pd.api.types.is_numeric_dtype(values):
+        return values.astype(float).fillna(0.0)
+    numbers = pd.to_numeric(values, errors='coerce')
+    text = values.astype(str).str.replace(',', '', regex=False).str.strip()
+    trailing_minus = text.str.endswith('-')
+    text = text.where(~trailing_minus, '-' + text.str[:-1])
+    parsed = pd.to_numeric(text, errors='coerce')
+    return numbers.fillna(parsed).where(values.notna()).fillna(0.0).astype(float)
+
+
+def _sum_where(df: Optional[pd.DataFrame], column: str, category: Optional[str] = None) -> float:
+    """SUM / SUMIF de una hoja de detalle; 0 si la hoja o las columnas no existen."""
+    if df is None or len(df) == 0 or column not in df.columns:
+        return 0
+    if category is None:
+        return df[column].sum()
+    if 'categoria' not in df.columns:
+        return 0
+    # La categoría se compara en el mismo caso en que viene escrita ("RENTAS" o "rentas")
+    categoria = df['categoria'].str
+    categoria = categoria.upper() if category.isupper() else categoria.lower()
+    return df[column][categoria == category].sum()
+
+
 def validate_visual(file_path: str, tolerance: float = 0.01) -> ValidationReport:
     """
     Valida un archivo Visual verificando las relaciones matemáticas
@@ -123,76 +177,29 @@ def validate_visual(file_path: str, tolerance: float = 0.01) -> ValidationReport
         ValidationReport con los resultados
     """
     results = []
-    xls = pd.ExcelFile(file_path)
-    
-    # Cargar hoja Resumen
-    resumen = pd.read_excel(xls, sheet_name='Resumen')
-    
-    # 1. Ventas ARS = SUM(Resultado Ventas ARS.resultado)
-    if 'Resultado Ventas ARS' in xls.sheet_names:
-        df = pd.read_excel(xls, sheet_name='Resultado Ventas ARS')
-        calc = df['resultado'].sum() if len(df) > 0 and 'resultado' in df.columns else 0
-    else:
-        calc = 0
-    expected = resumen.iloc[0]['ventas']
-    results.append(ValidationResult('ARS ventas (B2)', calc, expected, abs(calc - expected) < tolerance))
-    
-    # 2. Ventas USD = SUM(Resultado Ventas USD.resultado)
-    if 'Resultado Ventas USD' in xls.sheet_names:
-        df = pd.read_excel(xls, sheet_name='Resultado Ventas USD')
-        calc = df['resultado'].sum() if len(df) > 0 and 'resultado' in df.columns else 0
-    else:
-        calc = 0
-    expected = resumen.iloc[1]['ventas']
-    results.append(ValidationResult('USD ventas (B3)', calc, expected, abs(calc - expected) < tolerance))
-    
-    # 3. Rentas ARS = SUMIF(Rentas Dividendos ARS, categoria="RENTAS", importe)
-    if 'Rentas Dividendos ARS' in xls.sheet_names:
-        df = pd.read_excel(xls, sheet_name='Rentas Dividendos ARS')
-        if len(df) > 0 and 'categoria' in df.columns and 'importe' in df.columns:
-            calc = df[df['categoria'].str.upper() == 'RENTAS']['importe'].sum()
-        else:
-            calc = 0
-    else:
-        calc = 0
-    expected = resumen.iloc[0]['rentas']
-    results.append(ValidationResult('ARS rentas (E2)', calc, expected, abs(calc - expected) < tolerance))
-    
-    # 4. Rentas USD = SUMIF(Rentas Dividendos USD, categoria="Rentas", importe)
-    if 'Rentas Dividendos USD' in xls.sheet_names:
-        df = pd.read_excel(xls, sheet_name='Rentas Dividendos USD')
-        if len(df) > 0 and 'categoria' in df.columns and 'importe' in df.columns:
-            calc = df[df['categoria'].str.lower() == 'rentas']['importe'].sum()
-        else:
-            calc = 0
-    else:
-        calc = 0
-    expected = resumen.iloc[1]['rentas']
-    results.append(ValidationResult('USD rentas (E3)', calc, expected, abs(calc - expected) < tolerance))
-    
-    # 5. Dividendos ARS = SUMIF(Rentas Dividendos ARS, categoria="DIVIDENDOS", importe)
-    if 'Rentas Dividendos ARS' in xls.sheet_names:
-        df = pd.read_excel(xls, sheet_name='Rentas Dividendos ARS')
-        if len(df) > 0 and 'categoria' in df.columns and 'importe' in df.columns:
-            calc = df[df['categoria'].str.upper() == 'DIVIDENDOS']['importe'].sum()
-        else:
-            calc = 0
-    else:
-        calc = 0
-    expected = resumen.iloc[0]['dividendos']
-    results.append(ValidationResult('ARS dividendos (F2)', calc, expected, abs(calc - expected) < tolerance))
-    
-    # 6. Dividendos USD = SUMIF(Rentas Dividendos USD, categoria="Dividendos", importe)
-    if 'Rentas Dividendos USD' in xls.sheet_names:
-        df = pd.read_excel(xls, sheet_name='Rentas Dividendos USD')
-        if len(df) > 0 and 'categoria' in df.columns and 'importe' in df.columns:
-            calc = df[df['categoria'].str.lower() == 'dividendos']['importe'].sum()
-        else:
-            calc = 0
-    else:
-        calc = 0
-    expected = resumen.iloc[1]['dividendos']
-    results.append(ValidationResult('USD dividendos (F3)', calc, expected, abs(calc - expected) < tolerance))
+    sheets = load_sheets(file_path)
+    resumen = sheets['Resumen']
+    ventas_ars = sheets.get('Resultado Ventas ARS')
+    ventas_usd = sheets.get('Resultado Ventas USD')
+    rentas_ars = sheets.get('Rentas Dividendos ARS')
+    rentas_usd = sheets.get('Rentas Dividendos USD')
+
+    checks = [
+        # 1. Ventas ARS = SUM(Resultado Ventas ARS.resultado)
+        ('ARS ventas (B2)', _sum_where(ventas_ars, 'resultado'), resumen.iloc[0]['ventas']),
+        # 2. Ventas USD = SUM(Resultado Ventas USD.resultado)
+        ('USD ventas (B3)', _sum_where(ventas_usd, 'resultado'), resumen.iloc[1]['ventas']),
+        # 3. Rentas ARS = SUMIF(Rentas Dividendos ARS, categoria="RENTAS", importe)
+        ('ARS rentas (E2)', _sum_where(rentas_ars, 'importe', 'RENTAS'), resumen.iloc[0]['rentas']),
+        # 4. Rentas USD = SUMIF(Rentas Dividendos USD, categoria="Rentas", importe)
+        ('USD rentas (E3)', _sum_where(rentas_usd, 'importe', 'rentas'), resumen.iloc[1]['rentas']),
+        # 5. Dividendos ARS = SUMIF(Rentas Dividendos ARS, categoria="DIVIDENDOS", importe)
+        ('ARS dividendos (F2)', _sum_where(rentas_ars, 'importe', 'DIVIDENDOS'), resumen.iloc[0]['dividendos']),
+        # 6. Dividendos USD = SUMIF(Rentas Dividendos USD, categoria="Dividendos", importe)
+        ('USD dividendos (F3)', _sum_where(rentas_usd, 'importe', 'dividendos'), resumen.iloc[1]['dividendos']),
+    ]
+    for field, calc, expected in checks:
+        results.append(ValidationResult(field, calc, expected, abs(calc - expected) < tolerance))
     
     # 7. Total ARS = suma de columnas B-K fila 2
     total_calc = sum([resumen.iloc[0][col] for col in ['ventas', 'fci', 'opciones', 'rentas', 'dividendos', 
@@ -225,10 +232,10 @@ def validate_gallo(file_path: str, tolerance: float = 0.01) -> ValidationReport:
         ValidationReport con los resultados
     """
     results = []
-    xls = pd.ExcelFile(file_path)
+    sheets = load_sheets(file_path)
 
     # Cargar hoja Resultado Totales
-    totales = pd.read_excel(xls, sheet_name='Resultado Totales')
+    totales = sheets['Resultado Totales']
     
     print(f"[DEBUG] Categorías en Resultado Totales: {totales['categoria'].tolist()}")
 
@@ -258,104 +265,59 @@ def validate_gallo(file_path: str, tolerance: float = 0.01) -> ValidationReport:
                 return sheet
         return None
 
-    def clean_numeric_column(df, col_name):
-        """Limpia una columna numérica quitando comas de miles"""
-        def to_float(x):
-            if pd.isna(x):
-                return 0.0
-            if isinstance(x, (int, float)):
-                return float(x)
-            s = str(x).replace(',', '').strip()
-            # Manejar números negativos con signo al final (ej: "538.62-")
-            if s.endswith('-'):
-                s = '-' + s[:-1]
-            try:
-                return float(s)
-            except:
-                return 0.0
-        df[col_name] = df[col_name].apply(to_float)
-        return df
+    details: Dict[str, pd.DataFrame] = {}
+
+    def detail_rows(sheet_name: str) -> pd.DataFrame:
+        """Filas de transacciones de la hoja (sin filas de Total), calculadas una vez por hoja"""
+        if sheet_name not in details:
+            df = sheets[sheet_name]
+            if 'tipo_fila' in df.columns:
+                is_total = df['tipo_fila'].astype(str).str.lower().str.contains('total', na=False)
+                df = df[~is_total]
+            details[sheet_name] = df
+        return details[sheet_name]
 
     def sum_transactions(sheet_name: str, tipo_pattern: str, col_name: str) -> float:
         """Suma valores de TRANSACCIONES individuales (excluyendo filas de Total).
         tipo_pattern: 'enajenacion' para compra/venta, 'renta' para rentas/dividendos/amortizaciones
         """
-        if sheet_name not in xls.sheet_names:
+        if sheet_name not in sheets:
             print(f"  [DEBUG] Hoja '{sheet_name}' no encontrada")
             return 0
-        df = pd.read_excel(xls, sheet_name=sheet_name)
+        df = detail_rows(sheet_name)
         if col_name not in df.columns:
             print(f"  [DEBUG] Columna '{col_name}' no encontrada en '{sheet_name}'")
             return 0
-        
-        # Limpiar números con comas
-        df = clean_numeric_column(df, col_name)
 
-        # Excluir filas de Total
-        if 'tipo_fila' in df.columns:
-            tipo_lower = df['tipo_fila'].astype(str).str.lower().fillna('')
-            is_total = tipo_lower.str.contains('total', na=False)
-        else:
-            is_total = pd.Series([False] * len(df))
-        
         # Filtrar por tipo de operación
         if 'operacion' in df.columns:
-            oper_lower = df['operacion'].astype(str).str.lower().fillna('')
-            
+            oper_lower = df['operacion'].astype(str).str.lower()
+            is_renta = oper_lower.str.contains('renta|dividendo', na=False, regex=True)
             if tipo_pattern.lower() == 'enajenacion':
                 # Enajenación: compra, venta, amortización, ret ajuste (no renta/dividendo)
-                is_enajenacion = (
-                    oper_lower.str.contains('compra|venta|amortizacion|cpra|cable|ret', na=False, regex=True) &
-                    ~oper_lower.str.contains('renta|dividendo', na=False, regex=True)
-                )
-                mask = ~is_total & is_enajenacion
+                mask = oper_lower.str.contains('compra|venta|amortizacion|cpra|cable|ret', na=False, regex=True) & ~is_renta
             else:  # renta
                 # Renta: solo operaciones de renta/dividendo
-                is_renta = oper_lower.str.contains('renta|dividendo', na=False, regex=True)
-                mask = ~is_total & is_renta
-        else:
-            mask = ~is_total
-        
-        return df[mask][col_name].sum()
+                mask = is_renta
+            df = df[mask]
+
+        # Limpiar números con comas
+        return to_float_series(df[col_name]).sum()
 
     def sum_cauciones(sheet_name: str, col_name: str) -> float:
         """Suma intereses de cauciones (excluyendo filas de total)"""
-        if sheet_name not in xls.sheet_names:
+        if sheet_name not in sheets:
             return 0
-        df = pd.read_excel(xls, sheet_name=sheet_name)
+        df = detail_rows(sheet_name)
         if col_name not in df.columns:
             return 0
-        
-        # Limpiar números
-        df = clean_numeric_column(df, col_name)
-        
-        if 'tipo_fila' in df.columns:
-            tipo_lower = df['tipo_fila'].astype(str).str.lower()
-            mask = ~tipo_lower.str.contains('total', na=False)
-            return df[mask][col_name].sum()
-        else:
-            return df[col_name].sum()
+        return to_float_series(df[col_name]).sum()
 
-    import re
-    
-    def clean_number(val):
-        """Limpia un valor numérico con posibles comas de miles"""
-        if pd.isna(val):
-            return 0
-        if isinstance(val, (int, float)):
-            return float(val)
-        # Quitar comas de miles
-        val_str = str(val).replace(',', '')
-        try:
-            return float(val_str)
-        except:
-            return 0
-    
     # Procesar cada categoría en Resultado Totales (excepto TOTAL GENERAL)
-    for _, row in totales.iterrows():
-        categoria = str(row['categoria']).strip()
-        valor_pesos = clean_number(row['valor_pesos'])
-        valor_usd = clean_number(row['valor_usd'])
+    valores_pesos = to_float_series(totales['valor_pesos'])
+    valores_usd = to_float_series(totales['valor_usd'])
+    for categoria, valor_pesos, valor_usd in zip(totales['categoria'], valores_pesos, valores_usd):
+        categoria = str(categoria).strip()
         
         # Ignorar TOTAL GENERAL
         if 'total general' in categoria.lower():
@@ -420,8 +382,8 @@ def detect_file_type(file_path: str) -> Optional[str]:
         'visual', 'gallo', o None si no se puede determinar
     """
     try:
-        xls = pd.ExcelFile(file_path)
-        sheets = set(xls.sheet_names)
+        # Misma lectura (cacheada) que usa la validación que viene después
+        sheets = set(load_sheets(file_path))
         
         # Hojas características de Visual
         visual_sheets = {'Boletos', 'Resultado Ventas ARS', 'Resultado Ventas USD', 'Resumen'}
@@ -1,15 +1,14 @@
 from __future__ import annotations
 
 import argparse
-import json
 from pathlib import Path
 
 from dotenv import load_dotenv
 
-from pdf_converter.convert_with_datalab import convert_pdf_to_excel
-from pdf_converter.datalab.excel_to_pdf import ExcelToPdfExporter
-from pdf_converter.datalab.economic_sanity import add_validation_sheet, validate_workbook
-from pdf_converter.datalab.merge_gallo_visual import GalloVisualMerger
+from pdf_converter.datalab.case_pipeline import CaseSource, run_case
+from pdf_converter.datalab.native_extract import EXTRACTOR_AUTO, EXTRACTORS
+from pdf_converter.datalab.position_ledger import PositionLedger
+from pdf_converter.datalab.tracing import Tracer, activate
 
 
 def main() -> int:
@@ -43,6 +42,27 @@ def main() -> int:
         default=[],
         help="Code that should use Gallo position USD even when --prefer-precio-tenencias-usd-basis is enabled.",
     )
+    parser.add_argument(
+        "--position-ledger",
+        type=Path,
+        help="SQLite ledger of year-end positions per client; reuses stored closings instead of replaying pre-period history.",
+    )
+    parser.add_argument(
+        "--extractor",
+        choices=list(EXTRACTORS),
+        default=EXTRACTOR_AUTO,
+        help="How PDFs are read: auto (text pages locally, scanned pages with Datalab), native or datalab.",
+    )
+    parser.add_argument(
+        "--low-memory",
+        action="store_true",
+        help="Write each output as soon as it is built and keep a single merged workbook in memory.",
+    )
+    parser.add_argument(
+        "--trace-memory",
+        action="store_true",
+        help="Record peak Python heap and RSS per stage in the trace (slower).",
+    )
     args = parser.parse_args()
 
     root = args.root.resolve()
@@ -63,13 +83,6 @@ def main() -> int:
     visual_excel = visual_xlsx or (root / f"{args.case_prefix}_Visual_from_PDF.xlsx")
     gallo_excel = gallo_xlsx or (root / f"{args.case_prefix}_Gallo_from_PDF.xlsx")
     precio_excel = precio_xlsx or ((root / f"{args.case_prefix}_PrecioTenencias_from_PDF.xlsx") if precio_pdf else None)
-    merge_formulas = root / f"{args.case_prefix}_Resumen_Impositivo_FIXED_formulas.xlsx"
-    merge_values = root / f"{args.case_prefix}_Resumen_Impositivo_FIXED_values.xlsx"
-    pdf_output = root / f"{args.case_prefix}_Resumen_Impositivo_FIXED.pdf"
-
-    for output_path in [visual_excel, gallo_excel, precio_excel, merge_formulas, merge_values, pdf_output]:
-        if output_path is not None:
-            output_path.parent.mkdir(parents=True, exist_ok=True)
 
     missing_inputs = []
     if visual_excel is None or not visual_excel.exists():
@@ -86,53 +99,52 @@ def main() -> int:
     print(f"Gallo source: {gallo_excel.name if gallo_excel.exists() else gallo_pdf.name}")
     print(f"Precio source: {precio_excel.name if precio_excel and precio_excel.exists() else (precio_pdf.name if precio_pdf else 'omitted')}")
 
-    if not visual_excel.exists():
-        convert_pdf_to_excel(str(visual_pdf), str(visual_excel))
-    if not gallo_excel.exists():
-        convert_pdf_to_excel(str(gallo_pdf), str(gallo_excel))
-    if precio_excel is not None and not precio_excel.exists():
-        convert_pdf_to_excel(str(precio_pdf), str(precio_excel))
-
-    aux_dir = root / "pdf_converter" / "datalab" / "aux_data"
-    merger = GalloVisualMerger(
-        str(gallo_excel),
-        str(visual_excel),
-        str(aux_dir),
-        precio_tenencias_path=str(precio_excel) if precio_excel else None,
-        prefer_precio_tenencias_usd_cost_basis=True,
-        precio_tenencias_usd_basis_fallback_codes=list(args.precio_tenencias_usd_basis_fallback_code),
-    )
-    wb_formulas, wb_values = merger.merge(output_mode="both")
-    validation_report = validate_workbook(wb_values)
-
-    add_validation_sheet(wb_values, validation_report)
-    wb_formulas.save(merge_formulas)
-    wb_values.save(merge_values)
-
-    validation_output = root / f"{args.case_prefix}_Resumen_Impositivo_VALIDATION.json"
-    validation_output.write_text(
-        json.dumps(validation_report.to_dict(), indent=2, ensure_ascii=False),
-        encoding="utf-8",
-    )
-
-    exporter = ExcelToPdfExporter(
-        str(merge_values),
-        {"numero": args.client_number, "nombre": args.client_name},
-    )
-    exporter.periodo_inicio = args.period_start
-    exporter.periodo_fin = args.period_end
-    exporter.anio = args.year
-    exporter.export_to_pdf(str(pdf_output))
+    def case_source(excel: Path | None, pdf: Path | None) -> CaseSource | None:
+        # Un Excel ya convertido se reutiliza; si no, el PDF se convierte en memoria
+        if excel is not None and excel.exists():
+            return CaseSource.excel(excel)
+        if pdf is not None:
+            return CaseSource.pdf(pdf)
+        return None
+
+    tracer = Tracer(args.case_prefix, memory=args.trace_memory)
+    with activate(tracer):
+        result = run_case(
+            case_source(visual_excel, visual_pdf),
+            case_source(gallo_excel, gallo_pdf),
+            case_source(precio_excel, precio_pdf),
+            aux_data_dir=str(root / "pdf_converter" / "datalab" / "aux_data"),
+            prefer_precio_tenencias_usd_cost_basis=True,
+            precio_tenencias_usd_basis_fallback_codes=list(args.precio_tenencias_usd_basis_fallback_code),
+            comitente=args.client_number if args.position_ledger else None,
+            position_ledger=PositionLedger(resolve_input(args.position_ledger)) if args.position_ledger else None,
+            anio=args.year if args.year != parser.get_default("year") else None,
+            cliente_info={"numero": args.client_number, "nombre": args.client_name},
+            periodo_inicio=args.period_start,
+            periodo_fin=args.period_end,
+            extractor=args.extractor,
+            output_dir=root if args.low_memory else None,
+            case_prefix=args.case_prefix,
+            low_memory=args.low_memory,
+        )
+        outputs = result.paths if args.low_memory else result.save(root, args.case_prefix)
+
+    trace_output = tracer.write_chrome_trace(root / f"{args.case_prefix}_Resumen_Impositivo_TRACE.json")
 
     print("DONE")
-    print(visual_excel)
-    print(gallo_excel)
+    print(outputs.get("visual", visual_excel))
+    print(outputs.get("gallo", gallo_excel))
     if precio_excel:
-        print(precio_excel)
-    print(merge_formulas)
-    print(merge_values)
-    print(validation_output)
-    print(pdf_output)
+        print(outputs.get("precio_tenencias", precio_excel))
+    print(outputs["merge_formulas"])
+    print(outputs["merge_values"])
+    print(outputs["validation"])
+    print(trace_output)
+    print(outputs["pdf"])
+    if args.trace_memory:
+        for row in tracer.summary():
+            if row["depth"] == 0:
+                print(f"  {row['stage']}: {row['total_ms']:.0f} ms, peak heap {row.get('heap_peak_mb', 0):.0f} MB, peak RSS {row.get('rss_peak_mb', 0):.0f} MB")
     return 0
 
 
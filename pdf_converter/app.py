@@ -65,15 +65,23 @@ class PDFConverter:
     Main converter class that orchestrates the PDF to Excel conversion.
     """
     
-    def __init__(self, max_pages_per_chunk: int = 5):
+    def __init__(
+        self,
+        max_pages_per_chunk: Optional[int] = None,
+        max_tokens_input: int = 80000,
+        max_tokens_output: int = 16000
+    ):
         """
         Initialize the converter.
         
         Args:
-            max_pages_per_chunk: Maximum pages to process per LLM call
+            max_pages_per_chunk: Optional cap on pages per LLM call (chunks are packed by token budget)
+            max_tokens_input: Input token budget per LLM call
+            max_tokens_output: Output token budget per LLM call
         """
         self.max_pages_per_chunk = max_pages_per_chunk
-        self.llm = LLMClient()
+        self.max_tokens_input = max_tokens_input
+        self.llm = LLMClient(max_tokens_output=max_tokens_output)
     
     def convert(
         self,
@@ -186,12 +194,12 @@ class PDFConverter:
     
     def _extract_gallo(self, pdf_path: str) -> Dict[str, List[Dict]]:
         """Extract data from a Gallo PDF."""
-        with GalloExtractor(pdf_path, self.llm, self.max_pages_per_chunk) as extractor:
+        with GalloExtractor(pdf_path, self.llm, self.max_pages_per_chunk, self.max_tokens_input) as extractor:
             return extractor.extract_all()
     
     def _extract_visual(self, pdf_path: str) -> Dict[str, List[Dict]]:
         """Extract data from a Visual PDF."""
-        with VisualExtractor(pdf_path, self.llm, self.max_pages_per_chunk) as extractor:
+        with VisualExtractor(pdf_path, self.llm, self.max_pages_per_chunk, self.max_tokens_input) as extractor:
             return extractor.extract_all()
     
     def _postprocess(self, data: Dict[str, List[Dict]], report_type: str) -> Dict[str, List[Dict]]:
@@ -278,8 +286,8 @@ Examples:
     parser.add_argument(
         "--chunk-size", "-c",
         type=int,
-        default=5,
-        help="Maximum pages per LLM call (default: 5)"
+        default=None,
+        help="Maximum pages per LLM call (default: no cap, pages are packed by token budget)"
     )
     
     args = parser.parse_args()
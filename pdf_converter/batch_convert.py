@@ -16,7 +16,7 @@ import sys
 import json
 from pathlib import Path
 from datetime import datetime
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from rich.console import Console
 from rich.table import Table
 from rich.progress import Progress, SpinnerColumn, TextColumn, BarColumn, TaskProgressColumn
@@ -63,7 +63,7 @@ def find_pdfs(source: str, pattern: str = "*.pdf") -> List[Path]:
 def batch_convert(
     pdf_files: List[Path],
     output_dir: Path,
-    max_pages_per_chunk: int = 5
+    max_pages_per_chunk: Optional[int] = None
 ) -> List[Dict[str, Any]]:
     """
     Convert multiple PDF files to Excel.
@@ -71,7 +71,7 @@ def batch_convert(
     Args:
         pdf_files: List of PDF file paths
         output_dir: Output directory for Excel files
-        max_pages_per_chunk: Maximum pages per LLM call
+        max_pages_per_chunk: Optional cap on pages per LLM call (chunks are packed by token budget)
     
     Returns:
         List of conversion results
@@ -208,8 +208,8 @@ def main():
     parser.add_argument(
         "--chunk-size", "-c",
         type=int,
-        default=5,
-        help="Maximum pages per LLM call (default: 5)"
+        default=None,
+        help="Maximum pages per LLM call (default: no cap, pages are packed by token budget)"
     )
     
     parser.add_argument(
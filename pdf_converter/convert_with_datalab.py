@@ -2,12 +2,21 @@
 """
 Complete PDF to Excel converter using Datalab API.
 Handles both Gallo and Visual format financial reports.
+
+PDFs go to Datalab by default. With --extractor auto, pages with a text layer
+are extracted locally and only scanned pages go to Datalab (as one page_range
+request); --extractor native reads everything locally.
+
+With --watch DIR the script stays running: every PDF copied into DIR is
+converted (xlsx and markdown next to it, plus <name>.status.json) by a bounded
+pool of workers that share one Datalab client.
 """
 
 import os
 import sys
+from contextlib import nullcontext
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Tuple
 
 sys.path.insert(0, str(Path(__file__).parent))
 
@@ -17,6 +26,8 @@ from rich.panel import Panel
 
 from datalab import DatalabClient
 from datalab.md_to_excel import convert_markdown_to_excel
+from datalab.native_extract import EXTRACTOR_DATALAB, EXTRACTORS, route_pdf
+from datalab.watch_folder import ERROR, TERMINADO, FolderWatcher
 
 console = Console()
 
@@ -25,7 +36,9 @@ def convert_pdf_to_excel(
     pdf_path: str,
     output_path: Optional[str] = None,
     mode: str = "accurate",
-    keep_markdown: bool = True
+    keep_markdown: bool = True,
+    extractor: str = EXTRACTOR_DATALAB,
+    client: Optional[DatalabClient] = None,
 ) -> str:
     """
     Convert a PDF financial report to structured Excel.
@@ -35,18 +48,34 @@ def convert_pdf_to_excel(
         output_path: Optional path for output Excel
         mode: Datalab processing mode (fast, balanced, accurate)
         keep_markdown: Keep the intermediate markdown file
+        extractor: "datalab" (default), "auto" (text pages local, scanned pages Datalab) or "native"
+        client: Open Datalab client to reuse (default: one per conversion)
     
     Returns:
         Path to the generated Excel file
     """
+    return _convert_pdf(pdf_path, output_path, mode, keep_markdown, extractor, client)[0]
+
+
+def _convert_pdf(
+    pdf_path: str,
+    output_path: Optional[str],
+    mode: str,
+    keep_markdown: bool,
+    extractor: str,
+    client: Optional[DatalabClient],
+) -> Tuple[str, Optional[Path], str]:
+    """convert_pdf_to_excel; also returns the markdown path (None if deleted) and the extractor used."""
     load_dotenv()
     
     pdf_path = Path(pdf_path)
     if not pdf_path.exists():
         raise FileNotFoundError(f"PDF not found: {pdf_path}")
+    if extractor not in EXTRACTORS:
+        raise ValueError(f"Unknown extractor: {extractor}")
     
-    api_key = os.environ.get("DATALAB_API_KEY", "").strip()
-    if not api_key:
+    api_key = client.api_key if client is not None else os.environ.get("DATALAB_API_KEY", "").strip()
+    if extractor == EXTRACTOR_DATALAB and not api_key:
         raise ValueError(
             "DATALAB_API_KEY not found. "
             "Set it in .env file or as environment variable. "
@@ -59,7 +88,7 @@ def convert_pdf_to_excel(
     
     console.print(Panel.fit(
         f"[bold cyan]PDF to Excel Converter[/bold cyan]\n"
-        f"[dim]Using Datalab API ({mode} mode)[/dim]",
+        f"[dim]Text pages: local extraction · scanned pages: Datalab API ({mode} mode)[/dim]",
         border_style="cyan"
     ))
     
@@ -67,25 +96,38 @@ def convert_pdf_to_excel(
     console.print(f"[bold]Output:[/bold] {Path(output_path).name}")
     console.print()
     
-    # Step 1: Convert PDF to Markdown using Datalab
+    # Step 1: Convert PDF to Markdown (text pages locally, scanned pages with Datalab)
     console.print("[cyan]Step 1:[/cyan] Converting PDF to Markdown...")
     
-    with DatalabClient(api_key=api_key, mode=mode) as client:
-        result = client.convert_pdf(str(pdf_path), paginate=True)
-        
-        if not result.success:
-            raise RuntimeError(f"PDF conversion failed: {result.error}")
-        
-        console.print(f"  [green]✓[/green] Converted {result.page_count} pages in {result.runtime:.1f}s")
-        
-        if result.cost_breakdown:
-            cost = result.cost_breakdown.get('final_cost_cents', 0) / 100
-            console.print(f"  [dim]Cost: ${cost:.2f}[/dim]")
+    def datalab_markdown(page_range: Optional[str]) -> str:
+        if not api_key:
+            raise ValueError(
+                "DATALAB_API_KEY not found (needed for scanned pages). "
+                "Set it in .env file or as environment variable. "
+                "Get your key at: https://www.datalab.to"
+            )
+        with nullcontext(client) if client is not None else DatalabClient(api_key=api_key, mode=mode) as datalab:
+            result = datalab.convert_pdf(str(pdf_path), mode=mode, page_range=page_range, paginate=True)
+            
+            if not result.success:
+                raise RuntimeError(f"PDF conversion failed: {result.error}")
+            
+            console.print(f"  [green]✓[/green] Datalab converted {result.page_count} pages in {result.runtime:.1f}s")
+            
+            if result.cost_breakdown:
+                cost = result.cost_breakdown.get('final_cost_cents', 0) / 100
+                console.print(f"  [dim]Cost: ${cost:.2f}[/dim]")
+        return result.markdown or ""
+    
+    markdown, used = route_pdf(pdf_path, datalab_markdown, extractor)
+    if used != EXTRACTOR_DATALAB:
+        console.print(f"  [green]✓[/green] Extracted text pages locally ({used})")
+    # Local output is kept apart from .datalab.md so the cached Datalab output stays comparable
+    md_path = pdf_path.with_suffix(f'.{used}.md')
     
     # Save markdown
-    md_path = pdf_path.with_suffix('.datalab.md')
     with open(md_path, 'w', encoding='utf-8') as f:
-        f.write(result.markdown or "")
+        f.write(markdown)
     
     console.print(f"  [dim]Markdown saved: {md_path.name}[/dim]")
     
@@ -97,6 +139,7 @@ def convert_pdf_to_excel(
     # Cleanup if not keeping markdown
     if not keep_markdown:
         md_path.unlink()
+        md_path = None
         console.print("  [dim]Cleaned up intermediate files[/dim]")
     
     console.print(Panel.fit(
@@ -105,7 +148,65 @@ def convert_pdf_to_excel(
         border_style="green"
     ))
     
-    return excel_path
+    return excel_path, md_path, used
+
+
+def watch_folder(
+    folder: str,
+    mode: str = "accurate",
+    keep_markdown: bool = True,
+    extractor: str = EXTRACTOR_DATALAB,
+    workers: int = 2,
+    poll_interval: float = 2.0,
+    settle_seconds: float = 5.0,
+    once: bool = False,
+) -> None:
+    """
+    Convert every PDF that lands in `folder` until interrupted (or, with once, until
+    the folder has nothing left to convert). See datalab.watch_folder for the
+    debounce and status-file rules.
+    """
+    load_dotenv()
+    folder = Path(folder)
+    if not folder.is_dir():
+        raise FileNotFoundError(f"Folder not found: {folder}")
+    api_key = os.environ.get("DATALAB_API_KEY", "").strip()
+
+    # One HTTP client (kept-alive connection) for every file the daemon converts
+    with DatalabClient(api_key=api_key, mode=mode) if api_key else nullcontext() as client:
+        def convert(pdf_path: Path) -> dict:
+            excel_path, md_path, used = _convert_pdf(str(pdf_path), None, mode, keep_markdown, extractor, client)
+            return {
+                "output": Path(excel_path).name,
+                "markdown": md_path.name if md_path else None,
+                "extractor": used,
+            }
+
+        def report(pdf_path: Path, status: dict) -> None:
+            estado = status["estado"]
+            if estado == TERMINADO:
+                console.print(f"[green]✓ {pdf_path.name} -> {status['output']} ({status['segundos']:.1f}s)[/green]")
+            elif estado == ERROR:
+                console.print(f"[red]❌ {pdf_path.name}: {status['error']}[/red]")
+
+        watcher = FolderWatcher(
+            folder,
+            convert,
+            workers=workers,
+            poll_interval=poll_interval,
+            settle_seconds=settle_seconds,
+            on_status=report,
+        )
+        console.print(Panel.fit(
+            f"[bold cyan]Watching {folder}[/bold cyan]\n"
+            f"[dim]{workers} worker(s) · new PDFs are converted once unchanged for {settle_seconds:g}s · Ctrl+C to stop[/dim]",
+            border_style="cyan"
+        ))
+        try:
+            watcher.run(once=once)
+        except KeyboardInterrupt:
+            # run() already waited for the conversions that were in progress
+            console.print("[yellow]Stopped.[/yellow]")
 
 
 def main():
@@ -115,7 +216,7 @@ def main():
     parser = argparse.ArgumentParser(
         description="Convert PDF financial reports to Excel using Datalab API"
     )
-    parser.add_argument("pdf", help="Path to the PDF file")
+    parser.add_argument("pdf", nargs="?", help="Path to the PDF file")
     parser.add_argument("-o", "--output", help="Output Excel path")
     parser.add_argument(
         "-m", "--mode",
@@ -123,20 +224,54 @@ def main():
         default="accurate",
         help="Processing mode (default: accurate)"
     )
+    parser.add_argument(
+        "--extractor",
+        choices=list(EXTRACTORS),
+        default=EXTRACTOR_DATALAB,
+        help="datalab: whole PDF with Datalab (default); auto: text pages extracted locally, "
+             "scanned pages with Datalab; native: local only"
+    )
     parser.add_argument(
         "--no-keep-md",
         action="store_true",
         help="Delete intermediate markdown file"
     )
+    parser.add_argument("--watch", metavar="DIR", help="Keep running and convert every PDF dropped into DIR")
+    parser.add_argument("--workers", type=int, default=2, help="PDFs converted at the same time in --watch mode (default: 2)")
+    parser.add_argument("--poll", type=float, default=2.0, help="Seconds between folder scans in --watch mode (default: 2)")
+    parser.add_argument(
+        "--settle",
+        type=float,
+        default=5.0,
+        help="Seconds a PDF must stay unchanged before it is converted in --watch mode (default: 5)"
+    )
+    parser.add_argument("--once", action="store_true", help="With --watch: convert what is in DIR and exit")
     
     args = parser.parse_args()
+    if bool(args.pdf) == bool(args.watch):
+        parser.error("give either a PDF or --watch DIR")
+    if args.watch and args.output:
+        parser.error("--output does not apply to --watch (outputs go next to each PDF)")
     
     try:
+        if args.watch:
+            watch_folder(
+                args.watch,
+                mode=args.mode,
+                keep_markdown=not args.no_keep_md,
+                extractor=args.extractor,
+                workers=args.workers,
+                poll_interval=args.poll,
+                settle_seconds=args.settle,
+                once=args.once,
+            )
+            return 0
         convert_pdf_to_excel(
             args.pdf,
             args.output,
             mode=args.mode,
-            keep_markdown=not args.no_keep_md
+            keep_markdown=not args.no_keep_md,
+            extractor=args.extractor,
         )
         return 0
     except Exception as e:
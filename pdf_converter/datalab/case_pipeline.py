@@ -0,0 +1,435 @@
+"""
+Pipeline de un caso completo en memoria: PDF/markdown -> tablas -> merge -> validación -> PDF.
+
+Las etapas se pasan objetos (TableBook, InputWorkbook, Workbook) en lugar de escribir y
+releer Excel intermedios. Guardar en disco es opcional y explícito:
+
+    resultado = run_case(
+        visual=CaseSource.pdf(visual_bytes),
+        gallo=CaseSource.markdown(gallo_md),
+        cliente_info={"numero": "13353", "nombre": "CLIENTE"},
+    )
+    resultado.values_bytes()                       # Excel de valores para descargar
+    resultado.save(Path("salida"), "CASO_13353")   # solo si se quiere persistir
+
+Cada fuente puede venir como PDF, markdown de Datalab, tablas ya parseadas (TableBook)
+o un Excel de entrada (ruta, bytes o Workbook). Los PDF van a Datalab; con
+extractor="auto" las páginas digitales se extraen localmente y solo las escaneadas van
+al OCR (ver native_extract.route_pdf). "auto" es opcional: la extracción local todavía
+no se validó contra Datalab con reportes reales del broker.
+
+Con `low_memory=True` cada salida se escribe en disco apenas existe y se suelta: nunca
+hay más de un workbook del merge vivo a la vez (ver run_case).
+"""
+
+from __future__ import annotations
+
+import functools
+import hashlib
+import io
+import json
+import os
+import shutil
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Union
+
+from openpyxl import Workbook
+
+from .client import DatalabClient
+from .economic_sanity import ValidationReport, add_validation_sheet, validate_workbook
+from .excel_to_pdf import ExcelToPdfExporter
+from .input_tables import InputSource, InputWorkbook, open_input_workbook
+from .md_to_excel import TableBook, markdown_to_table_book, table_book_to_workbook
+from .merge_gallo_visual import AuxDataStore, GalloVisualMerger
+from .native_extract import EXTRACTOR_DATALAB, EXTRACTORS, route_pdf
+from .position_ledger import PositionLedger
+from .tracing import span
+
+
+# Nombre de cada fuente en los archivos del caso (<prefijo>_<Etiqueta>_from_PDF.xlsx)
+SOURCE_LABELS = {"visual": "Visual", "gallo": "Gallo", "precio_tenencias": "PrecioTenencias"}
+# Archivos del merge: <prefijo><sufijo>
+CASE_OUTPUTS = {
+    "merge_formulas": "_Resumen_Impositivo_FIXED_formulas.xlsx",
+    "merge_values": "_Resumen_Impositivo_FIXED_values.xlsx",
+    "validation": "_Resumen_Impositivo_VALIDATION.json",
+    "pdf": "_Resumen_Impositivo_FIXED.pdf",
+}
+
+
+@functools.lru_cache(maxsize=None)
+def pipeline_version(aux_data_dir: Optional[str] = None) -> str:
+    """
+    Hash del código de este paquete y de las hojas auxiliares (cotizaciones, especies,
+    ratios). Cambia con cualquier fix del parser, el merge o los datos auxiliares:
+    sirve para que un resultado cacheado no sobreviva a un cambio que lo alteraría.
+    """
+    package = Path(__file__).resolve().parent
+    aux_dir = Path(aux_data_dir) if aux_data_dir else package / "aux_data"
+    hasher = hashlib.sha256()
+    files = [(f"code/{path.relative_to(package).as_posix()}", path) for path in package.rglob("*.py")]
+    files += [(f"aux/{path.name}", path) for path in aux_dir.iterdir() if path.is_file()]
+    for name, path in sorted(files):
+        hasher.update(name.encode("utf-8") + b"\0")
+        hasher.update(path.read_bytes())
+    return hasher.hexdigest()[:16]
+
+
+def workbook_bytes(wb: Workbook) -> bytes:
+    """Serializa un Workbook a .xlsx sin pasar por disco."""
+    buffer = io.BytesIO()
+    wb.save(buffer)
+    return buffer.getvalue()
+
+
+@dataclass(frozen=True)
+class CaseSource:
+    """Una entrada del caso: PDF, markdown de Datalab, tablas parseadas o Excel ya generado."""
+
+    kind: str
+    data: object
+    name: str = ""
+
+    @classmethod
+    def pdf(cls, data: Union[bytes, str, Path], name: str = "") -> "CaseSource":
+        if isinstance(data, (str, Path)):
+            path = Path(data)
+            return cls("pdf", path.read_bytes(), name or path.name)
+        return cls("pdf", bytes(data), name or "document.pdf")
+
+    @classmethod
+    def markdown(cls, text: str, name: str = "") -> "CaseSource":
+        return cls("markdown", text, name)
+
+    @classmethod
+    def tables(cls, book: TableBook, name: str = "") -> "CaseSource":
+        return cls("tables", book, name)
+
+    @classmethod
+    def excel(cls, data: InputSource, name: str = "") -> "CaseSource":
+        if not name and isinstance(data, (str, Path)):
+            name = Path(data).name
+        return cls("excel", data, name)
+
+
+@dataclass(frozen=True)
+class ConvertedSource:
+    """
+    Una fuente ya lista para el merge; markdown y tablas solo si se generaron en el caso.
+    `extractor` indica quién leyó el PDF: "native", "datalab" o "hybrid" (por página).
+    """
+
+    workbook: InputWorkbook
+    markdown: Optional[str] = None
+    tables: Optional[TableBook] = None
+    extractor: Optional[str] = None
+
+    def excel_bytes(self) -> Optional[bytes]:
+        """Excel estructurado de la fuente (el de convert_pdf_to_excel), o None si vino como Excel."""
+        if self.tables is None:
+            return None
+        return workbook_bytes(table_book_to_workbook(self.tables))
+
+    def write(self, base: Path, key: str) -> Dict[str, Path]:
+        """
+        Escribe el markdown y el Excel estructurado de la fuente junto a `base`
+        (<base>_<Etiqueta>_from_PDF.*); nada si vino como Excel.
+        """
+        if self.tables is None:
+            return {}
+        paths: Dict[str, Path] = {}
+        label = SOURCE_LABELS.get(key, key)
+        if self.markdown is not None:
+            # El markdown local no pisa el cache de Datalab (el de check_native_parity)
+            suffix = self.extractor or EXTRACTOR_DATALAB
+            paths[f"{key}_markdown"] = Path(f"{base}_{label}_from_PDF.{suffix}.md")
+            paths[f"{key}_markdown"].write_text(self.markdown, encoding="utf-8")
+        paths[key] = Path(f"{base}_{label}_from_PDF.xlsx")
+        table_book_to_workbook(self.tables).save(paths[key])
+        return paths
+
+
+@dataclass(frozen=True)
+class CaseResult:
+    """
+    Salidas del caso en memoria; los bytes de los Excel se serializan al pedirlos.
+
+    Un caso corrido con low_memory ya está en disco (`paths`, las rutas de save): sus
+    workbooks y el PDF quedan en None y los bytes se leen de los archivos.
+    """
+
+    sources: Dict[str, ConvertedSource]
+    wb_formulas: Optional[Workbook]
+    wb_values: Optional[Workbook]
+    validation_report: ValidationReport
+    pdf: Optional[bytes] = None
+    paths: Dict[str, Path] = field(default_factory=dict)
+    _bytes: Dict[str, bytes] = field(default_factory=dict, repr=False, compare=False)
+
+    def formulas_bytes(self) -> bytes:
+        if self.wb_formulas is None:
+            return self.paths["merge_formulas"].read_bytes()
+        if "formulas" not in self._bytes:
+            self._bytes["formulas"] = workbook_bytes(self.wb_formulas)
+        return self._bytes["formulas"]
+
+    def values_bytes(self) -> bytes:
+        if self.wb_values is None:
+            return self.paths["merge_values"].read_bytes()
+        if "values" not in self._bytes:
+            self._bytes["values"] = workbook_bytes(self.wb_values)
+        return self._bytes["values"]
+
+    def pdf_bytes(self) -> Optional[bytes]:
+        if self.pdf is None and "pdf" in self.paths:
+            return self.paths["pdf"].read_bytes()
+        return self.pdf
+
+    def save(self, output_dir: Union[str, Path], case_prefix: str) -> Dict[str, Path]:
+        """
+        Escribe los archivos del caso con los nombres de generate_case_outputs y devuelve
+        sus rutas. Las fuentes que llegaron como Excel no se reescriben.
+        """
+        base = _case_base(output_dir, case_prefix)
+
+        if self.paths:
+            # Caso low_memory: ya está en disco, se copian sus archivos con el nuevo prefijo
+            saved_base = str(self.paths["merge_values"])[: -len(CASE_OUTPUTS["merge_values"])]
+            copies = {key: Path(f"{base}{str(path)[len(saved_base):]}") for key, path in self.paths.items()}
+            with span("case.save", "merge"):
+                for key, path in self.paths.items():
+                    if copies[key].resolve() != path.resolve():
+                        shutil.copyfile(path, copies[key])
+            return copies
+
+        paths: Dict[str, Path] = {}
+        with span("case.save", "merge"):
+            for key, source in self.sources.items():
+                paths.update(source.write(base, key))
+            paths["merge_formulas"] = _case_path(base, "merge_formulas")
+            paths["merge_formulas"].write_bytes(self.formulas_bytes())
+            paths["merge_values"] = _case_path(base, "merge_values")
+            paths["merge_values"].write_bytes(self.values_bytes())
+            paths["validation"] = _write_validation(base, self.validation_report)
+            if self.pdf is not None:
+                paths["pdf"] = _case_path(base, "pdf")
+                paths["pdf"].write_bytes(self.pdf)
+        return paths
+
+
+def convert_source(
+    key: str,
+    source: CaseSource,
+    datalab_client: Optional[DatalabClient] = None,
+    mode: str = "accurate",
+    extractor: str = EXTRACTOR_DATALAB,
+) -> ConvertedSource:
+    """
+    Lleva una fuente hasta InputWorkbook: OCR (si es PDF) -> tablas -> hojas de entrada.
+
+    Por defecto el PDF va entero a Datalab. Con extractor="auto" las páginas digitales
+    se leen localmente y solo las escaneadas van a Datalab; "native" fuerza la lectura
+    local (ver route_pdf).
+    """
+    if extractor not in EXTRACTORS:
+        raise ValueError(f"Extractor desconocido: {extractor}")
+    if source.kind == "excel":
+        return ConvertedSource(open_input_workbook(source.data))
+
+    markdown = None
+    used = None
+    if source.kind == "pdf":
+        with span("convert_pdf", "ocr", source=key):
+            try:
+                markdown, used = route_pdf(
+                    source.data,
+                    lambda pages: _ocr_pdf(source, datalab_client, mode, pages),
+                    extractor,
+                )
+            except ValueError as exc:
+                raise ValueError(f"{source.name or key}: {exc}") from exc
+    elif source.kind == "markdown":
+        markdown = source.data
+    elif source.kind != "tables":
+        raise ValueError(f"Tipo de fuente desconocido: {source.kind}")
+
+    book = source.data if source.kind == "tables" else markdown_to_table_book(markdown)
+    workbook = InputWorkbook.from_sheets(book.worksheets) if book.sheetnames else _empty_input()
+    return ConvertedSource(workbook, markdown, book, used)
+
+
+def run_case(
+    visual: CaseSource,
+    gallo: Optional[CaseSource] = None,
+    precio_tenencias: Optional[CaseSource] = None,
+    *,
+    aux_data_dir: Optional[str] = None,
+    aux_store: Optional[AuxDataStore] = None,
+    prefer_precio_tenencias_usd_cost_basis: bool = True,
+    precio_tenencias_usd_basis_fallback_codes: Optional[Iterable[str]] = None,
+    comitente: Optional[str] = None,
+    position_ledger: Optional[PositionLedger] = None,
+    anio: Optional[int] = None,
+    export_pdf: bool = True,
+    cliente_info: Optional[Dict[str, str]] = None,
+    periodo_inicio: str = "Enero 1",
+    periodo_fin: str = "Diciembre 31",
+    datalab_client: Optional[DatalabClient] = None,
+    mode: str = "accurate",
+    extractor: str = EXTRACTOR_DATALAB,
+    output_dir: Optional[Union[str, Path]] = None,
+    case_prefix: Optional[str] = None,
+    low_memory: bool = False,
+) -> CaseResult:
+    """
+    Corre el caso completo sin Excel intermedios en disco.
+
+    Args:
+        visual, gallo, precio_tenencias: fuentes del caso (gallo y precio_tenencias opcionales).
+        aux_data_dir, aux_store, prefer_..., comitente, position_ledger, anio: ver GalloVisualMerger.
+        export_pdf: genera también el PDF del resumen con ExcelToPdfExporter.
+        cliente_info, periodo_inicio, periodo_fin: encabezado del PDF.
+        datalab_client: cliente para las fuentes PDF (default: uno nuevo con DATALAB_API_KEY).
+        extractor: "datalab" (default), "auto" (páginas digitales locales, escaneadas a
+            Datalab) o "native".
+        output_dir, case_prefix: si se indican, guarda los archivos del caso (ver CaseResult.save).
+        low_memory: escribe cada salida en output_dir apenas se genera (markdown y Excel
+            de cada fuente, fórmulas, valores, validación, PDF) y la suelta, para que nunca
+            haya dos workbooks del merge en memoria. Requiere output_dir y case_prefix.
+
+    Returns:
+        CaseResult con los workbooks, el reporte de validación y el PDF en memoria
+        (con low_memory: solo las rutas en `paths`).
+    """
+    if output_dir is not None and not case_prefix:
+        raise ValueError("case_prefix es obligatorio para guardar el caso")
+    if low_memory and output_dir is None:
+        raise ValueError("low_memory necesita output_dir: las salidas se escriben en disco")
+
+    base = _case_base(output_dir, case_prefix) if low_memory else None
+    paths: Dict[str, Path] = {}
+    fuentes = {"visual": visual, "gallo": gallo, "precio_tenencias": precio_tenencias}
+    sources = {}
+    for key, source in fuentes.items():
+        if source is None:
+            continue
+        converted = convert_source(key, source, datalab_client, mode, extractor)
+        if low_memory:
+            with span("case.save_source", "merge", source=key):
+                paths.update(converted.write(base, key))
+            # El merge solo lee las hojas de entrada: markdown y tablas ya están en disco
+            converted = ConvertedSource(converted.workbook, extractor=converted.extractor)
+        sources[key] = converted
+
+    # Solo se pasan los opcionales indicados: el resto queda con el default del merger
+    merger_kwargs = {}
+    if aux_store is not None:
+        merger_kwargs["aux_store"] = aux_store
+    if comitente:
+        merger_kwargs["comitente"] = comitente
+    if position_ledger is not None:
+        merger_kwargs["position_ledger"] = position_ledger
+    if anio is not None:
+        merger_kwargs["anio"] = anio
+
+    with span("merge.load_inputs", "merge"):
+        merger = GalloVisualMerger(
+            sources["gallo"].workbook if "gallo" in sources else None,
+            sources["visual"].workbook,
+            aux_data_dir,
+            precio_tenencias_path=sources["precio_tenencias"].workbook if "precio_tenencias" in sources else None,
+            prefer_precio_tenencias_usd_cost_basis=prefer_precio_tenencias_usd_cost_basis,
+            precio_tenencias_usd_basis_fallback_codes=list(precio_tenencias_usd_basis_fallback_codes or []),
+            **merger_kwargs,
+        )
+    with span("merge", "merge"):
+        if low_memory:
+            paths["merge_formulas"] = _case_path(base, "merge_formulas")
+            wb_formulas, wb_values = merger.merge(output_mode="both", formulas_path=paths["merge_formulas"])
+        else:
+            wb_formulas, wb_values = merger.merge(output_mode="both")
+    anio_pdf = getattr(merger, "anio", anio)
+    del merger
+    validation_report = validate_workbook(wb_values)
+    add_validation_sheet(wb_values, validation_report)
+
+    if low_memory:
+        # El PDF relee los valores del archivo: el workbook del merge se suelta antes
+        with span("case.save_values", "merge"):
+            paths["merge_values"] = _case_path(base, "merge_values")
+            wb_values.save(paths["merge_values"])
+            paths["validation"] = _write_validation(base, validation_report)
+        wb_values = None
+        if export_pdf:
+            paths["pdf"] = _case_path(base, "pdf")
+            _export_pdf(paths["merge_values"], cliente_info, periodo_inicio, periodo_fin, anio_pdf, paths["pdf"])
+        return CaseResult(sources, None, None, validation_report, paths=paths)
+
+    pdf = None
+    if export_pdf:
+        pdf = _export_pdf(wb_values, cliente_info, periodo_inicio, periodo_fin, anio_pdf)
+
+    result = CaseResult(sources, wb_formulas, wb_values, validation_report, pdf)
+    if output_dir is not None:
+        result.save(output_dir, case_prefix)
+    return result
+
+
+def _export_pdf(
+    values: Union[Workbook, Path],
+    cliente_info: Optional[Dict[str, str]],
+    periodo_inicio: str,
+    periodo_fin: str,
+    anio: Optional[int],
+    output_path: Optional[Path] = None,
+) -> bytes:
+    exporter = ExcelToPdfExporter(values, cliente_info)
+    exporter.periodo_inicio = periodo_inicio
+    exporter.periodo_fin = periodo_fin
+    exporter.anio = anio
+    return exporter.export_to_pdf(str(output_path) if output_path else None)
+
+
+def _case_base(output_dir: Union[str, Path], case_prefix: str) -> Path:
+    base = Path(output_dir) / case_prefix
+    base.parent.mkdir(parents=True, exist_ok=True)
+    return base
+
+
+def _case_path(base: Path, key: str) -> Path:
+    return Path(f"{base}{CASE_OUTPUTS[key]}")
+
+
+def _write_validation(base: Path, report: ValidationReport) -> Path:
+    path = _case_path(base, "validation")
+    path.write_text(json.dumps(report.to_dict(), indent=2, ensure_ascii=False), encoding="utf-8")
+    return path
+
+
+def _ocr_pdf(
+    source: CaseSource,
+    datalab_client: Optional[DatalabClient],
+    mode: str,
+    page_range: Optional[str] = None,
+) -> str:
+    if datalab_client is None:
+        api_key = os.environ.get("DATALAB_API_KEY", "").strip()
+        if not api_key:
+            raise ValueError(
+                "DATALAB_API_KEY not found. "
+                "Set it in .env file or as environment variable. "
+                "Get your key at: https://www.datalab.to"
+            )
+        with DatalabClient(api_key=api_key, mode=mode) as client:
+            result = client.convert_pdf(source.data, page_range=page_range, paginate=True, filename=source.name)
+    else:
+        result = datalab_client.convert_pdf(source.data, page_range=page_range, paginate=True, filename=source.name)
+    if not result.success:
+        raise RuntimeError(f"PDF conversion failed: {result.error}")
+    return result.markdown or ""
+
+
+def _empty_input() -> InputWorkbook:
+    # Mismo resultado que releer el Excel "SinDatos" que escribe convert_markdown_to_excel
+    return InputWorkbook.from_workbook(table_book_to_workbook(TableBook({})))
@@ -5,13 +5,16 @@ Uses the Marker API for high-accuracy OCR of financial documents.
 
 import os
 import time
+from io import BytesIO
 from pathlib import Path
-from typing import Optional
+from typing import Optional, Union
 from dataclasses import dataclass
 import httpx
 from rich.console import Console
 from rich.progress import Progress, SpinnerColumn, TextColumn
 
+from .tracing import span
+
 console = Console()
 
 
@@ -77,21 +80,23 @@ class DatalabClient:
     
     def convert_pdf(
         self,
-        pdf_path: str,
+        pdf_path: Union[str, Path, bytes],
         mode: Optional[str] = None,
         output_format: Optional[str] = None,
         page_range: Optional[str] = None,
-        paginate: bool = True
+        paginate: bool = True,
+        filename: str = "document.pdf"
     ) -> DatalabResult:
         """
         Convert a PDF file to markdown/html using Datalab Marker API.
         
         Args:
-            pdf_path: Path to the PDF file
+            pdf_path: Path to the PDF file, or the PDF content as bytes
             mode: Processing mode ("fast", "balanced", "accurate")
             output_format: Output format ("markdown", "html", "json")
             page_range: Specific pages to process (e.g., "0,2-4,6")
             paginate: Add page separators to output
+            filename: Upload name when pdf_path is bytes
         
         Returns:
             DatalabResult with converted content
@@ -102,12 +107,18 @@ class DatalabClient:
                 error="No API key configured. Set DATALAB_API_KEY environment variable."
             )
         
-        pdf_path = Path(pdf_path)
-        if not pdf_path.exists():
-            return DatalabResult(
-                success=False,
-                error=f"PDF file not found: {pdf_path}"
-            )
+        if isinstance(pdf_path, (bytes, bytearray)):
+            pdf_name = filename
+            open_pdf = lambda: BytesIO(pdf_path)
+        else:
+            pdf_path = Path(pdf_path)
+            if not pdf_path.exists():
+                return DatalabResult(
+                    success=False,
+                    error=f"PDF file not found: {pdf_path}"
+                )
+            pdf_name = pdf_path.name
+            open_pdf = lambda: open(pdf_path, "rb")
         
         mode = mode or self.mode
         output_format = output_format or self.output_format
@@ -116,8 +127,8 @@ class DatalabClient:
         
         # Step 1: Submit PDF for processing
         try:
-            with open(pdf_path, "rb") as f:
-                files = {"file": (pdf_path.name, f, "application/pdf")}
+            with open_pdf() as f, span("datalab.upload", "ocr", mode=mode, file=pdf_name):
+                files = {"file": (pdf_name, f, "application/pdf")}
                 data = {
                     "mode": mode,
                     "output_format": output_format,
@@ -158,7 +169,8 @@ class DatalabClient:
         console.print(f"[green]✓ PDF submitted. Request ID: {request_id}[/green]")
         
         # Step 2: Poll for results
-        return self._poll_for_result(request_id, check_url)
+        with span("datalab.poll", "ocr", request_id=request_id):
+            return self._poll_for_result(request_id, check_url)
     
     def _poll_for_result(self, request_id: str, check_url: Optional[str] = None) -> DatalabResult:
         """
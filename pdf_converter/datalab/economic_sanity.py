@@ -2,12 +2,17 @@ from __future__ import annotations
 
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Iterable
+from itertools import islice
+from time import perf_counter
+from typing import Any, Callable, Iterable, Iterator
 import unicodedata
 
+import numpy as np
 from openpyxl.styles import Font, PatternFill
 from openpyxl.utils import get_column_letter
 
+from .tracing import traced
+
 
 VALIDATION_SHEET_NAME = "Validacion"
 
@@ -51,6 +56,7 @@ class ValidationIssue:
 class ValidationReport:
     generated_at: str
     issues: tuple[ValidationIssue, ...] = field(default_factory=tuple)
+    rule_timings: tuple[tuple[str, float], ...] = field(default_factory=tuple)
 
     @property
     def issue_count(self) -> int:
@@ -62,12 +68,16 @@ class ValidationReport:
             counts[issue.severity] = counts.get(issue.severity, 0) + 1
         return counts
 
+    def timings_ms(self) -> dict[str, float]:
+        return {name: round(seconds * 1000, 3) for name, seconds in self.rule_timings}
+
     def to_dict(self) -> dict[str, Any]:
         return {
             "generated_at": self.generated_at,
             "issue_count": self.issue_count,
             "counts_by_severity": self.counts_by_severity(),
             "issues": [issue.to_dict() for issue in self.issues],
+            "rule_timings_ms": self.timings_ms(),
         }
 
 
@@ -106,10 +116,10 @@ def _to_float(value: Any) -> float:
     return -number if negative else number
 
 
-def _header_map(ws) -> dict[str, int]:
+def _header_map(header_row: Iterable[Any]) -> dict[str, int]:
     headers: dict[str, int] = {}
-    for col in range(1, ws.max_column + 1):
-        normalized = _normalize_text(ws.cell(1, col).value)
+    for col, value in enumerate(header_row, start=1):
+        normalized = _normalize_text(value)
         if normalized:
             headers[normalized] = col
     return headers
@@ -138,222 +148,368 @@ def _clean_code(value: Any) -> str:
     return _normalize_text(text)
 
 
-def _recovered_cost_codes(wb) -> set[str]:
-    if "Posicion Inicial Gallo" not in wb.sheetnames:
-        return set()
-
-    ws = wb["Posicion Inicial Gallo"]
-    headers = _header_map(ws)
-    code_col = _find_col(headers, ["Codigo especie", "Cod.Especie", "Codigo"])
-    origin_col = _find_col(headers, ["Origen precio costo"])
-    if not code_col or not origin_col:
-        return set()
+class SheetFrame:
+    """Vista columnar de una hoja para las reglas de sanidad.
+
+    Cada columna se lee una sola vez, a pedido, y sus derivados (numerico,
+    texto normalizado, codigos) quedan memoizados en el frame, de modo que
+    todas las reglas de una hoja comparten la misma conversion. Los frames
+    viven solo durante una llamada a `validate_workbook`: una hoja editada
+    en el lugar se vuelve a leer en la siguiente validacion.
+    """
+
+    def __init__(self, title: str, header_row: Iterable[Any], row_count: int, column_reader: Callable[[int], tuple]):
+        self.title = title
+        self.headers = _header_map(header_row)
+        self.row_count = row_count
+        self.rows = np.arange(2, row_count + 2)
+        self._read_column = column_reader
+        self._columns: dict[int, tuple] = {}
+        self._numeric: dict[int | None, np.ndarray] = {}
+        self._text: dict[int | None, np.ndarray] = {}
+        self._codes: dict[int | None, np.ndarray] = {}
+        self._derived: dict[str, Any] = {}
+
+    @classmethod
+    def from_worksheet(cls, ws) -> "SheetFrame":
+        cells = getattr(ws, "_cells", None)
+        if cells is None:
+            # Hojas read-only: no hay acceso aleatorio, se lee todo en una pasada.
+            rows = list(ws.iter_rows(values_only=True))
+            header = rows[0] if rows else ()
+            body = rows[1:]
+            width = max([len(header), *(len(row) for row in body)])
+            columns = list(zip(*(tuple(row) + (None,) * (width - len(row)) for row in body))) if body else []
+            empty = (None,) * len(body)
+            return cls(ws.title, header, len(body), lambda col: columns[col - 1] if col <= len(columns) else empty)
+
+        max_row, max_col = 1, 1
+        for row, col in cells:
+            if row > max_row:
+                max_row = row
+            if col > max_col:
+                max_col = col
+        header = tuple(cells[(1, col)].value if (1, col) in cells else None for col in range(1, max_col + 1))
+
+        def read_column(col: int) -> tuple:
+            column = (cells.get((row, col)) for row in range(2, max_row + 1))
+            return tuple(cell.value if cell is not None else None for cell in column)
+
+        return cls(ws.title, header, max_row - 1, read_column)
+
+    def raw(self, col: int | None) -> tuple:
+        if not col:
+            return (None,) * self.row_count
+        if col not in self._columns:
+            self._columns[col] = self._read_column(col)
+        return self._columns[col]
+
+    def find_col(self, candidates: Iterable[str]) -> int | None:
+        return _find_col(self.headers, candidates)
+
+    def numeric(self, col: int | None) -> np.ndarray:
+        if col not in self._numeric:
+            self._numeric[col] = np.fromiter((_to_float(value) for value in self.raw(col)), dtype=float, count=self.row_count)
+        return self._numeric[col]
+
+    def text(self, col: int | None) -> np.ndarray:
+        if col not in self._text:
+            # Monedas y operaciones se repiten mucho: normalizar cada valor distinto una vez.
+            normalized: dict[Any, str] = {}
+            values = [
+                normalized[value] if value in normalized else normalized.setdefault(value, _normalize_text(value))
+                for value in self.raw(col)
+            ]
+            self._text[col] = np.array(values, dtype=str)
+        return self._text[col]
+
+    def codes(self, col: int | None) -> np.ndarray:
+        if col not in self._codes:
+            self._codes[col] = np.array([_clean_code(value) for value in self.raw(col)], dtype=str)
+        return self._codes[col]
+
+    def contains(self, col: int | None, *needles: str) -> np.ndarray:
+        texts = self.text(col)
+        mask = np.zeros(self.row_count, dtype=bool)
+        for needle in needles:
+            mask |= np.char.find(texts, needle) >= 0
+        return mask
+
+    def derive(self, key: str, builder: Callable[["SheetFrame"], Any]) -> Any:
+        if key not in self._derived:
+            self._derived[key] = builder(self)
+        return self._derived[key]
+
+
+class _WorkbookFrames:
+    def __init__(self, wb, timings: dict[str, float]):
+        self._wb = wb
+        self._timings = timings
+        self._frames: dict[str, SheetFrame | None] = {}
+
+    def get(self, sheet_name: str) -> SheetFrame | None:
+        if sheet_name not in self._frames:
+            if sheet_name not in self._wb.sheetnames:
+                self._frames[sheet_name] = None
+            else:
+                started = perf_counter()
+                self._frames[sheet_name] = SheetFrame.from_worksheet(self._wb[sheet_name])
+                self._timings[f"frame:{sheet_name}"] = perf_counter() - started
+        return self._frames[sheet_name]
+
+
+RuleEvaluator = Callable[[SheetFrame, EconomicSanityConfig, _WorkbookFrames], Iterator[ValidationIssue]]
 
-    codes: set[str] = set()
-    for row in range(2, ws.max_row + 1):
-        origin = _normalize_text(_cell(ws, row, origin_col))
-        if "preciotenenciascostorecuperado" in origin.replace(" ", ""):
-            code = _clean_code(_cell(ws, row, code_col))
-            if code:
-                codes.add(code)
-    return codes
 
-
-def _cell(ws, row: int, col: int | None) -> Any:
-    if not col:
-        return None
-    return ws.cell(row, col).value
+@dataclass(frozen=True)
+class SanityRule:
+    rule_id: str
+    sheet: str
+    evaluate: RuleEvaluator
 
 
-def _is_usd_currency(value: Any) -> bool:
-    text = _normalize_text(value)
-    return "dolar" in text or "usd" in text or "u$s" in text
+SANITY_RULES: list[SanityRule] = []
 
 
-def _is_future_row(*values: Any) -> bool:
-    combined = " ".join(_normalize_text(value) for value in values)
-    return "futuro" in combined
+def register_rule(rule_id: str, sheet: str) -> Callable[[RuleEvaluator], RuleEvaluator]:
+    """Registra una regla vectorizada; el orden de registro define el orden del reporte."""
+    def decorator(evaluate: RuleEvaluator) -> RuleEvaluator:
+        SANITY_RULES.append(SanityRule(rule_id, sheet, evaluate))
+        return evaluate
+    return decorator
 
 
-def _append_limited(issues: list[ValidationIssue], issue: ValidationIssue, per_rule_counts: dict[str, int], limit: int) -> None:
-    count = per_rule_counts.get(issue.rule_id, 0)
-    if count >= limit:
+@dataclass(frozen=True)
+class _BoletosView:
+    has_bruto: bool
+    abs_bruto: np.ndarray
+    abs_neto: np.ndarray
+    cantidad: np.ndarray
+    precio: np.ndarray
+    is_usd: np.ndarray
+    is_future: np.ndarray
+
+
+def _boletos_view(frame: SheetFrame) -> _BoletosView:
+    moneda_col = frame.find_col(["Moneda"])
+    bruto_col = frame.find_col(["Bruto"])
+    neto_col = frame.find_col(["Neto", "Neto Calculado"])
+    cantidad_col = frame.find_col(["Cantidad"])
+    precio_col = frame.find_col(["Precio Nominal", "Precio", "Precio Unitario"])
+    operacion_col = frame.find_col(["Tipo Operación", "Operacion"])
+    instrumento_col = frame.find_col(["Tipo de Instrumento", "Instrumento"])
+    return _BoletosView(
+        has_bruto=bool(bruto_col),
+        abs_bruto=np.abs(frame.numeric(bruto_col)),
+        abs_neto=np.abs(frame.numeric(neto_col)),
+        cantidad=np.abs(frame.numeric(cantidad_col)),
+        precio=np.abs(frame.numeric(precio_col)),
+        is_usd=frame.contains(moneda_col, "dolar", "usd", "u$s"),
+        is_future=frame.contains(instrumento_col, "futuro") | frame.contains(operacion_col, "futuro"),
+    )
+
+
+def _safe_ratio(numerator: np.ndarray, denominator: np.ndarray, where: np.ndarray) -> np.ndarray:
+    return np.divide(numerator, denominator, out=np.zeros_like(numerator, dtype=float), where=where & (denominator != 0))
+
+
+@register_rule("BOL-USD-LARGE-001", "Boletos")
+def _rule_boletos_usd_large(frame: SheetFrame, config: EconomicSanityConfig, frames: _WorkbookFrames) -> Iterator[ValidationIssue]:
+    view = frame.derive("boletos", _boletos_view)
+    if not view.has_bruto:
         return
-    per_rule_counts[issue.rule_id] = count + 1
-    issues.append(issue)
-
-
-def _validate_boletos(wb, config: EconomicSanityConfig, issues: list[ValidationIssue], per_rule_counts: dict[str, int]) -> None:
-    if "Boletos" not in wb.sheetnames:
+    for idx in np.flatnonzero(view.is_usd & (view.abs_bruto > config.usd_large_boleto)):
+        yield ValidationIssue(
+            "review", "BOL-USD-LARGE-001", "Boletos", int(frame.rows[idx]), "abs_bruto_usd", round(float(view.abs_bruto[idx]), 4),
+            f"Boleto USD con bruto mayor a {config.usd_large_boleto:,.0f}.",
+            "Revisar escala de cantidad/precio, moneda y tipo de cambio.",
+        )
+
+
+@register_rule("BOL-ARS-LARGE-001", "Boletos")
+def _rule_boletos_ars_large(frame: SheetFrame, config: EconomicSanityConfig, frames: _WorkbookFrames) -> Iterator[ValidationIssue]:
+    view = frame.derive("boletos", _boletos_view)
+    if not view.has_bruto:
         return
-    ws = wb["Boletos"]
-    headers = _header_map(ws)
-    moneda_col = _find_col(headers, ["Moneda"])
-    bruto_col = _find_col(headers, ["Bruto"])
-    neto_col = _find_col(headers, ["Neto", "Neto Calculado"])
-    cantidad_col = _find_col(headers, ["Cantidad"])
-    precio_col = _find_col(headers, ["Precio Nominal", "Precio", "Precio Unitario"])
-    operacion_col = _find_col(headers, ["Tipo Operación", "Operacion"])
-    instrumento_col = _find_col(headers, ["Tipo de Instrumento", "Instrumento"])
-
-    if not bruto_col:
+    for idx in np.flatnonzero(~view.is_usd & (view.abs_bruto > config.ars_large_boleto)):
+        yield ValidationIssue(
+            "review", "BOL-ARS-LARGE-001", "Boletos", int(frame.rows[idx]), "abs_bruto_ars", round(float(view.abs_bruto[idx]), 4),
+            f"Boleto ARS con bruto mayor a {config.ars_large_boleto:,.0f}.",
+            "Revisar si la escala del cliente justifica el monto o si hay multiplicacion OCR.",
+        )
+
+
+@register_rule("BOL-TINY-001", "Boletos")
+def _rule_boletos_tiny(frame: SheetFrame, config: EconomicSanityConfig, frames: _WorkbookFrames) -> Iterator[ValidationIssue]:
+    view = frame.derive("boletos", _boletos_view)
+    if not view.has_bruto:
         return
-
-    for row in range(2, ws.max_row + 1):
-        moneda = _cell(ws, row, moneda_col)
-        bruto = _to_float(_cell(ws, row, bruto_col))
-        neto = _to_float(_cell(ws, row, neto_col))
-        abs_bruto = abs(bruto)
-        abs_neto = abs(neto)
-        is_usd = _is_usd_currency(moneda)
-        is_future = _is_future_row(_cell(ws, row, instrumento_col), _cell(ws, row, operacion_col))
-
-        if abs_bruto > 0:
-            if is_usd and abs_bruto > config.usd_large_boleto:
-                _append_limited(
-                    issues,
-                    ValidationIssue(
-                        "review", "BOL-USD-LARGE-001", "Boletos", row, "abs_bruto_usd", round(abs_bruto, 4),
-                        f"Boleto USD con bruto mayor a {config.usd_large_boleto:,.0f}.",
-                        "Revisar escala de cantidad/precio, moneda y tipo de cambio.",
-                    ),
-                    per_rule_counts,
-                    config.max_issues_per_rule,
-                )
-            if not is_usd and abs_bruto > config.ars_large_boleto:
-                _append_limited(
-                    issues,
-                    ValidationIssue(
-                        "review", "BOL-ARS-LARGE-001", "Boletos", row, "abs_bruto_ars", round(abs_bruto, 4),
-                        f"Boleto ARS con bruto mayor a {config.ars_large_boleto:,.0f}.",
-                        "Revisar si la escala del cliente justifica el monto o si hay multiplicacion OCR.",
-                    ),
-                    per_rule_counts,
-                    config.max_issues_per_rule,
-                )
-            tiny_threshold = config.usd_tiny_boleto if is_usd else config.ars_tiny_boleto
-            if 0 < abs_bruto <= tiny_threshold and not is_future:
-                _append_limited(
-                    issues,
-                    ValidationIssue(
-                        "review", "BOL-TINY-001", "Boletos", row, "abs_bruto", round(abs_bruto, 4),
-                        f"Boleto con bruto muy chico para revision ({abs_bruto:,.4f}).",
-                        "Revisar si es una operacion real o un corrimiento/parseo de centavos.",
-                    ),
-                    per_rule_counts,
-                    config.max_issues_per_rule,
-                )
-
-        if abs_bruto > 0 and abs_neto > 0 and not is_future:
-            ratio = abs_neto / abs_bruto
-            if ratio > 1.5 or ratio < 0.5:
-                _append_limited(
-                    issues,
-                    ValidationIssue(
-                        "review", "BOL-NETO-BRUTO-001", "Boletos", row, "abs_neto_abs_bruto_ratio", round(ratio, 6),
-                        "Neto y bruto difieren en una magnitud inusual.",
-                        "Revisar gastos, signos, moneda y si bruto/neto fueron rescatados correctamente.",
-                    ),
-                    per_rule_counts,
-                    config.max_issues_per_rule,
-                )
-
-        cantidad = abs(_to_float(_cell(ws, row, cantidad_col)))
-        precio = abs(_to_float(_cell(ws, row, precio_col)))
-        if cantidad > 0 and precio > 0 and abs_bruto > 0 and not is_future:
-            expected = cantidad * precio
-            ratio = expected / abs_bruto if abs_bruto else 0
-            if ratio > 1_000 or ratio < 0.001:
-                _append_limited(
-                    issues,
-                    ValidationIssue(
-                        "review", "BOL-QTY-PRICE-BRUTO-001", "Boletos", row, "qty_price_vs_bruto", round(ratio, 6),
-                        "Cantidad x precio queda extremadamente lejos del bruto.",
-                        "Revisar precio cada 100, tipo de cambio, cantidad OCR o columnas corridas.",
-                    ),
-                    per_rule_counts,
-                    config.max_issues_per_rule,
-                )
-
-
-def _validate_resultado_sheet(
-    wb,
-    sheet_name: str,
-    moneda_tipo: str,
-    config: EconomicSanityConfig,
-    issues: list[ValidationIssue],
-    per_rule_counts: dict[str, int],
-) -> None:
-    if sheet_name not in wb.sheetnames:
+    tiny_threshold = np.where(view.is_usd, config.usd_tiny_boleto, config.ars_tiny_boleto)
+    mask = (view.abs_bruto > 0) & (view.abs_bruto <= tiny_threshold) & ~view.is_future
+    for idx in np.flatnonzero(mask):
+        abs_bruto = float(view.abs_bruto[idx])
+        yield ValidationIssue(
+            "review", "BOL-TINY-001", "Boletos", int(frame.rows[idx]), "abs_bruto", round(abs_bruto, 4),
+            f"Boleto con bruto muy chico para revision ({abs_bruto:,.4f}).",
+            "Revisar si es una operacion real o un corrimiento/parseo de centavos.",
+        )
+
+
+@register_rule("BOL-NETO-BRUTO-001", "Boletos")
+def _rule_boletos_neto_bruto(frame: SheetFrame, config: EconomicSanityConfig, frames: _WorkbookFrames) -> Iterator[ValidationIssue]:
+    view = frame.derive("boletos", _boletos_view)
+    if not view.has_bruto:
         return
-    ws = wb[sheet_name]
-    headers = _header_map(ws)
-    bruto_col = _find_col(headers, ["Bruto", "Bruto en USD"])
-    costo_col = _find_col(headers, ["Costo", "Costo Computable", "Costo Calculado"])
-    resultado_col = _find_col(headers, ["Resultado Calculado(final)", "Resultado Calculado", "Resultado"])
-    operacion_col = _find_col(headers, ["Tipo Operación", "Operacion"])
-    stock_qty_col = _find_col(headers, ["Cantidad Stock Inicial"])
-    code_col = _find_col(headers, ["Cod.Instrum", "Cod Instrum", "Codigo instrumento", "Codigo"])
-    recovered_codes = _recovered_cost_codes(wb) if moneda_tipo == "ARS" else set()
-
-    if not resultado_col:
+    base = (view.abs_bruto > 0) & (view.abs_neto > 0) & ~view.is_future
+    ratio = _safe_ratio(view.abs_neto, view.abs_bruto, base)
+    for idx in np.flatnonzero(base & ((ratio > 1.5) | (ratio < 0.5))):
+        yield ValidationIssue(
+            "review", "BOL-NETO-BRUTO-001", "Boletos", int(frame.rows[idx]), "abs_neto_abs_bruto_ratio", round(float(ratio[idx]), 6),
+            "Neto y bruto difieren en una magnitud inusual.",
+            "Revisar gastos, signos, moneda y si bruto/neto fueron rescatados correctamente.",
+        )
+
+
+@register_rule("BOL-QTY-PRICE-BRUTO-001", "Boletos")
+def _rule_boletos_qty_price(frame: SheetFrame, config: EconomicSanityConfig, frames: _WorkbookFrames) -> Iterator[ValidationIssue]:
+    view = frame.derive("boletos", _boletos_view)
+    if not view.has_bruto:
         return
+    base = (view.cantidad > 0) & (view.precio > 0) & (view.abs_bruto > 0) & ~view.is_future
+    ratio = _safe_ratio(view.cantidad * view.precio, view.abs_bruto, base)
+    for idx in np.flatnonzero(base & ((ratio > 1_000) | (ratio < 0.001))):
+        yield ValidationIssue(
+            "review", "BOL-QTY-PRICE-BRUTO-001", "Boletos", int(frame.rows[idx]), "qty_price_vs_bruto", round(float(ratio[idx]), 6),
+            "Cantidad x precio queda extremadamente lejos del bruto.",
+            "Revisar precio cada 100, tipo de cambio, cantidad OCR o columnas corridas.",
+        )
+
+
+def _recovered_cost_codes(frame: SheetFrame) -> frozenset[str]:
+    code_col = frame.find_col(["Codigo especie", "Cod.Especie", "Codigo"])
+    origin_col = frame.find_col(["Origen precio costo"])
+    if not code_col or not origin_col or not frame.row_count:
+        return frozenset()
+    origin = np.char.replace(frame.text(origin_col), " ", "")
+    codes = frame.codes(code_col)[np.char.find(origin, "preciotenenciascostorecuperado") >= 0]
+    return frozenset(code for code in codes.tolist() if code)
 
-    for row in range(2, ws.max_row + 1):
-        operacion_text = _normalize_text(_cell(ws, row, operacion_col))
-        if "compra" in operacion_text and "venta" not in operacion_text:
-            continue
-        resultado = _to_float(_cell(ws, row, resultado_col))
-        bruto = _to_float(_cell(ws, row, bruto_col))
-        costo = _to_float(_cell(ws, row, costo_col))
-        if resultado == 0:
-            continue
 
-        denominator_name = "bruto"
-        denominator = abs(bruto)
-        if moneda_tipo == "USD" and abs(costo) > 0:
-            denominator_name = "costo"
-            denominator = abs(costo)
-        if denominator <= 0:
-            continue
+@dataclass(frozen=True)
+class _ResultadoView:
+    has_resultado: bool
+    resultado: np.ndarray
+    bruto: np.ndarray
+    costo: np.ndarray
+    stock_qty: np.ndarray
+    is_compra_only: np.ndarray
+    code_col: int | None
+
+
+def _resultado_view(frame: SheetFrame) -> _ResultadoView:
+    bruto_col = frame.find_col(["Bruto", "Bruto en USD"])
+    costo_col = frame.find_col(["Costo", "Costo Computable", "Costo Calculado"])
+    resultado_col = frame.find_col(["Resultado Calculado(final)", "Resultado Calculado", "Resultado"])
+    operacion_col = frame.find_col(["Tipo Operación", "Operacion"])
+    stock_qty_col = frame.find_col(["Cantidad Stock Inicial"])
+    return _ResultadoView(
+        has_resultado=bool(resultado_col),
+        resultado=frame.numeric(resultado_col),
+        bruto=frame.numeric(bruto_col),
+        costo=frame.numeric(costo_col),
+        stock_qty=frame.numeric(stock_qty_col),
+        is_compra_only=frame.contains(operacion_col, "compra") & ~frame.contains(operacion_col, "venta"),
+        code_col=frame.find_col(["Cod.Instrum", "Cod Instrum", "Codigo instrumento", "Codigo"]),
+    )
+
+
+def _resultado_ratio_issues(
+    frame: SheetFrame,
+    moneda_tipo: str,
+    config: EconomicSanityConfig,
+    frames: _WorkbookFrames,
+) -> Iterator[ValidationIssue]:
+    view = frame.derive("resultado", _resultado_view)
+    if not view.has_resultado:
+        return
 
-        ratio = abs(resultado) / denominator
-        code = _clean_code(_cell(ws, row, code_col))
-        recovered_cost_stock = moneda_tipo == "ARS" and code in recovered_codes and _to_float(_cell(ws, row, stock_qty_col)) > 0
-        if recovered_cost_stock and ratio <= 1.000001:
-            continue
-        if ratio > config.result_ratio_high:
-            severity = "high"
-        elif ratio > config.result_ratio_review:
-            severity = "review"
-        else:
-            severity = ""
-        if severity:
-            _append_limited(
-                issues,
-                ValidationIssue(
-                    severity,
-                    f"RES-{moneda_tipo}-RATIO-001",
-                    sheet_name,
-                    row,
-                    f"abs_resultado_abs_{denominator_name}",
-                    round(ratio, 6),
-                    f"Resultado representa {ratio:.2%} del {denominator_name}.",
-                    "Revisar stock inicial, costo PPP, cantidad, precio y routing ARS/USD.",
-                ),
-                per_rule_counts,
-                config.max_issues_per_rule,
-            )
-
-
-def validate_workbook(wb, config: EconomicSanityConfig | None = None) -> ValidationReport:
+    abs_bruto = np.abs(view.bruto)
+    abs_costo = np.abs(view.costo)
+    uses_costo = (abs_costo > 0) if moneda_tipo == "USD" else np.zeros(frame.row_count, dtype=bool)
+    denominator = np.where(uses_costo, abs_costo, abs_bruto)
+    base = ~view.is_compra_only & (view.resultado != 0) & (denominator > 0)
+    ratio = _safe_ratio(np.abs(view.resultado), denominator, base)
+
+    if moneda_tipo == "ARS":
+        position_frame = frames.get("Posicion Inicial Gallo")
+        recovered_codes = position_frame.derive("recovered_cost_codes", _recovered_cost_codes) if position_frame else frozenset()
+        if recovered_codes:
+            recovered_cost_stock = np.isin(frame.codes(view.code_col), list(recovered_codes)) & (view.stock_qty > 0)
+            base &= ~(recovered_cost_stock & (ratio <= 1.000001))
+
+    high = base & (ratio > config.result_ratio_high)
+    review = base & ~high & (ratio > config.result_ratio_review)
+    for idx in np.flatnonzero(high | review):
+        row_ratio = float(ratio[idx])
+        denominator_name = "costo" if uses_costo[idx] else "bruto"
+        yield ValidationIssue(
+            "high" if high[idx] else "review",
+            f"RES-{moneda_tipo}-RATIO-001",
+            frame.title,
+            int(frame.rows[idx]),
+            f"abs_resultado_abs_{denominator_name}",
+            round(row_ratio, 6),
+            f"Resultado representa {row_ratio:.2%} del {denominator_name}.",
+            "Revisar stock inicial, costo PPP, cantidad, precio y routing ARS/USD.",
+        )
+
+
+@register_rule("RES-ARS-RATIO-001", "Resultado Ventas ARS")
+def _rule_resultado_ars_ratio(frame: SheetFrame, config: EconomicSanityConfig, frames: _WorkbookFrames) -> Iterator[ValidationIssue]:
+    return _resultado_ratio_issues(frame, "ARS", config, frames)
+
+
+@register_rule("RES-USD-RATIO-001", "Resultado Ventas USD")
+def _rule_resultado_usd_ratio(frame: SheetFrame, config: EconomicSanityConfig, frames: _WorkbookFrames) -> Iterator[ValidationIssue]:
+    return _resultado_ratio_issues(frame, "USD", config, frames)
+
+
+@traced("validate_workbook", "validation")
+def validate_workbook(
+    wb,
+    config: EconomicSanityConfig | None = None,
+    rules: Iterable[SanityRule] | None = None,
+) -> ValidationReport:
+    """Evalua las reglas registradas sobre frames columnares, una pasada por hoja.
+
+    Cada regla produce como maximo `max_issues_per_rule` issues y su tiempo de
+    evaluacion queda en `ValidationReport.rule_timings` (junto al costo de
+    armar cada frame, bajo `frame:<hoja>`). El reporte conserva el orden
+    historico: hoja, fila y orden de registro de la regla.
+    """
     config = config or EconomicSanityConfig()
-    issues: list[ValidationIssue] = []
-    per_rule_counts: dict[str, int] = {}
-    _validate_boletos(wb, config, issues, per_rule_counts)
-    _validate_resultado_sheet(wb, "Resultado Ventas ARS", "ARS", config, issues, per_rule_counts)
-    _validate_resultado_sheet(wb, "Resultado Ventas USD", "USD", config, issues, per_rule_counts)
-    return ValidationReport(datetime.now().isoformat(timespec="seconds"), tuple(issues))
+    rules = list(SANITY_RULES if rules is None else rules)
+    timings: dict[str, float] = {}
+    frames = _WorkbookFrames(wb, timings)
+    sheet_rank: dict[str, int] = {}
+    ranked: list[tuple[int, int, int, ValidationIssue]] = []
+
+    for rule_rank, rule in enumerate(rules):
+        frame = frames.get(rule.sheet)
+        if frame is None:
+            continue
+        rank = sheet_rank.setdefault(rule.sheet, len(sheet_rank))
+        started = perf_counter()
+        for issue in islice(rule.evaluate(frame, config, frames), config.max_issues_per_rule):
+            ranked.append((rank, issue.row, rule_rank, issue))
+        timings[rule.rule_id] = timings.get(rule.rule_id, 0.0) + perf_counter() - started
+
+    ranked.sort(key=lambda item: item[:3])
+    return ValidationReport(
+        datetime.now().isoformat(timespec="seconds"),
+        tuple(item[3] for item in ranked),
+        tuple(timings.items()),
+    )
 
 
 def add_validation_sheet(wb, report: ValidationReport) -> None:
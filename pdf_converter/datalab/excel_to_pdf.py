@@ -24,16 +24,49 @@ from reportlab.platypus import (
     PageBreak, KeepTogether, Image
 )
 from reportlab.lib.enums import TA_LEFT, TA_CENTER, TA_RIGHT
+from reportlab.pdfbase.pdfmetrics import stringWidth
 from openpyxl import load_workbook, Workbook
 from openpyxl.styles import Font
 from datetime import datetime
 from pathlib import Path
-from typing import Dict, List, Optional, Tuple, Any
+from typing import Dict, List, Optional, Tuple, Any, Union
+from concurrent.futures import ProcessPoolExecutor
 import io
+import multiprocessing
+import os
+
+from .input_tables import valor_guardado
+from .tracing import span, traced
 
 # Version para debugging en Streamlit Cloud
 __version__ = "2.0.0-datalab"
 
+# Filas por trozo de tabla (par, para que las filas alternadas sigan el patrón)
+TABLE_CHUNK_ROWS = 200
+# Desde cuántas filas del workbook export_to_pdf renderiza las partes en paralelo
+PARALLEL_MIN_ROWS = 5000
+# Línea base del "Pág. N" medida desde el borde superior
+PAGE_NUMBER_Y = 11*mm
+
+
+def _data_only_copy(wb: Workbook) -> Workbook:
+    """
+    Copia de solo valores de un Workbook en memoria, como lo devolvería
+    load_workbook(data_only=True) tras guardarlo: las fórmulas no tienen valor
+    cacheado (None), '' se lee como None, los números pasan por el formato de
+    escritura (ver valor_guardado) y las celdas vacías sin estilo no cuentan.
+    """
+    copia = Workbook()
+    copia.remove(copia.active)
+    for ws in wb.worksheets:
+        destino = copia.create_sheet(ws.title)
+        for (row, column), cell in ws._cells.items():
+            if cell.value is None and not cell.has_style:
+                continue
+            value = None if cell.data_type == 'f' else valor_guardado(cell.value)
+            destino.cell(row, column).value = value
+    return copia
+
 
 class ExcelToPdfExporter:
     """
@@ -49,19 +82,27 @@ class ExcelToPdfExporter:
     SECTION_BG = colors.Color(0.85, 0.85, 0.9)  # Gris azulado
     SUBSECTION_BG = colors.Color(0.9, 0.9, 0.95)  # Gris más claro
     
-    def __init__(self, excel_path: str, cliente_info: Dict[str, str] = None, 
+    def __init__(self, excel_path: Union[str, Path, bytes, Workbook], cliente_info: Dict[str, str] = None, 
                  datalab_api_key: str = None, datalab_markdown: str = None):
         """
         Inicializa el exportador.
         
         Args:
-            excel_path: Ruta al Excel consolidado
+            excel_path: Ruta al Excel consolidado, sus bytes o el Workbook de valores ya en
+                memoria (se lee como data_only: las fórmulas quedan en None, igual que al releer
+                un archivo guardado por openpyxl)
             cliente_info: Diccionario con info del cliente (numero, nombre)
             datalab_api_key: API key de Datalab para leer valores de fórmulas
             datalab_markdown: Markdown ya convertido por Datalab (recomendado para evitar re-conversión)
         """
-        self.excel_path = Path(excel_path)
-        self.wb = load_workbook(excel_path, data_only=True)
+        self.excel_path = Path(excel_path) if isinstance(excel_path, (str, Path)) else None
+        with span("pdf.load_workbook", "pdf"):
+            if isinstance(excel_path, Workbook):
+                self.wb = _data_only_copy(excel_path)
+            elif isinstance(excel_path, (bytes, bytearray)):
+                self.wb = load_workbook(io.BytesIO(excel_path), data_only=True)
+            else:
+                self.wb = load_workbook(excel_path, data_only=True)
         
         # Inicializar atributos (COM ya no se usa, pero mantener para compatibilidad)
         self._com_data = None
@@ -79,7 +120,7 @@ class ExcelToPdfExporter:
                 print(f"[WARNING] No se pudo parsear Datalab markdown: {e}")
         
         # 2. Si no hay markdown pero hay API key, convertir Excel ahora
-        elif datalab_api_key:
+        elif datalab_api_key and self.excel_path is not None:
             try:
                 from .datalab_excel_reader import DatalabExcelReader
                 print("[INFO] Convirtiendo Excel con Datalab API...")
@@ -136,11 +177,7 @@ class ExcelToPdfExporter:
             # Fallback a openpyxl
             if sheet_name in self.wb.sheetnames:
                 ws = self.wb[sheet_name]
-                data = []
-                for row in range(1, ws.max_row + 1):
-                    row_data = [ws.cell(row, col).value for col in range(1, ws.max_column + 1)]
-                    data.append(row_data)
-                return data
+                return [list(row) for row in ws.iter_rows(max_col=ws.max_column, values_only=True)]
             return []
     
     def _setup_styles(self):
@@ -296,30 +333,30 @@ class ExcelToPdfExporter:
             return [], []
         
         ws = self.wb[sheet_name]
+        # max_column recorre todas las celdas: calcularlo una vez, no por fila
+        max_col = ws.max_column
         
         # Headers
         headers = []
-        for col in range(1, ws.max_column + 1):
-            val = ws.cell(1, col).value
+        for val in next(ws.iter_rows(min_row=1, max_row=1, max_col=max_col, values_only=True)):
             headers.append(str(val) if val else "")
         
         # Data rows
-        rows = []
-        for row_num in range(2, ws.max_row + 1):
-            row_data = []
-            for col in range(1, ws.max_column + 1):
-                val = ws.cell(row_num, col).value
-                row_data.append(val)
-            rows.append(row_data)
+        rows = [list(row) for row in ws.iter_rows(min_row=2, max_col=max_col, values_only=True)]
         
         return headers, rows
     
-    def _create_table(self, headers: List[str], rows: List[List[Any]], 
-                      col_widths: List[float] = None,
-                      col_formatters: Dict[int, str] = None,
-                      font_size: int = 6) -> Table:
+    def _create_tables(self, headers: List[str], rows: List[List[Any]], 
+                       col_widths: List[float] = None,
+                       col_formatters: Dict[int, str] = None,
+                       font_size: int = 6) -> List[Table]:
         """
-        Crea una tabla formateada.
+        Crea una tabla formateada, partida en trozos de TABLE_CHUNK_ROWS filas.
+        
+        Los trozos van uno debajo del otro sin separación, así que el PDF se ve igual
+        que con una sola tabla, pero reportlab no re-parte (y re-mide) todas las filas
+        restantes en cada salto de página. El primer trozo lleva el encabezado; los de
+        continuación completos comparten un mismo TableStyle.
         
         Args:
             headers: Lista de encabezados
@@ -329,12 +366,12 @@ class ExcelToPdfExporter:
             font_size: Tamaño de fuente para el cuerpo (default 6)
         """
         if not headers:
-            return None
+            return []
         
         col_formatters = col_formatters or {}
         
         # Formatear datos
-        formatted_rows = [headers]
+        formatted_rows = []
         for row in rows:
             formatted_row = []
             for i, val in enumerate(row):
@@ -357,48 +394,59 @@ class ExcelToPdfExporter:
                     formatted_row.append(str(val) if val is not None else "")
             formatted_rows.append(formatted_row)
         
-        # Crear tabla
-        if col_widths:
-            table = Table(formatted_rows, colWidths=[w * mm for w in col_widths])
-        else:
-            table = Table(formatted_rows)
-        
-        # Estilo
-        style = TableStyle([
-            # Header
-            ('BACKGROUND', (0, 0), (-1, 0), self.HEADER_BG),
-            ('TEXTCOLOR', (0, 0), (-1, 0), self.HEADER_TEXT),
-            ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
-            ('FONTSIZE', (0, 0), (-1, 0), 6),
-            ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
-            
+        numeric_cols = [i for i in range(len(headers)) if col_formatters.get(i) in ('number', 'integer')]
+        widths = [w * mm for w in col_widths] if col_widths else None
+        
+        first = [headers] + formatted_rows[:TABLE_CHUNK_ROWS]
+        tables = [Table(first, colWidths=widths, style=self._table_style(numeric_cols, font_size, True, len(first)))]
+        chunk_style = self._table_style(numeric_cols, font_size, False, TABLE_CHUNK_ROWS)
+        for start in range(TABLE_CHUNK_ROWS, len(formatted_rows), TABLE_CHUNK_ROWS):
+            chunk = formatted_rows[start:start + TABLE_CHUNK_ROWS]
+            if len(chunk) < TABLE_CHUNK_ROWS:
+                chunk_style = self._table_style(numeric_cols, font_size, False, len(chunk))
+            tables.append(Table(chunk, colWidths=widths, style=chunk_style))
+        return tables
+    
+    def _table_style(self, numeric_cols: List[int], font_size: int, header: bool, n_rows: int) -> TableStyle:
+        """Estilo de una tabla de _create_tables; sin header es el de los trozos de continuación."""
+        body = 1 if header else 0
+        commands = []
+        if header:
+            commands += [
+                ('BACKGROUND', (0, 0), (-1, 0), self.HEADER_BG),
+                ('TEXTCOLOR', (0, 0), (-1, 0), self.HEADER_TEXT),
+                ('FONTNAME', (0, 0), (-1, 0), 'Helvetica-Bold'),
+                ('FONTSIZE', (0, 0), (-1, 0), 6),
+                ('ALIGN', (0, 0), (-1, 0), 'CENTER'),
+            ]
+        commands += [
             # Body
-            ('FONTNAME', (0, 1), (-1, -1), 'Helvetica'),
-            ('FONTSIZE', (0, 1), (-1, -1), font_size),
-            ('ALIGN', (0, 1), (-1, -1), 'LEFT'),
+            ('FONTNAME', (0, body), (-1, -1), 'Helvetica'),
+            ('FONTSIZE', (0, body), (-1, -1), font_size),
+            ('ALIGN', (0, body), (-1, -1), 'LEFT'),
             
             # Números alineados a la derecha
-            *[(('ALIGN', (i, 1), (i, -1), 'RIGHT')) for i in range(len(headers)) 
-              if col_formatters.get(i) in ('number', 'integer')],
+            *[('ALIGN', (i, body), (i, -1), 'RIGHT') for i in numeric_cols],
             
             # Bordes
             ('GRID', (0, 0), (-1, -1), 0.5, colors.grey),
-            ('LINEBELOW', (0, 0), (-1, 0), 1, colors.black),
-            
+        ]
+        if header:
+            commands.append(('LINEBELOW', (0, 0), (-1, 0), 1, colors.black))
+        commands += [
             # Padding
             ('TOPPADDING', (0, 0), (-1, -1), 2),
             ('BOTTOMPADDING', (0, 0), (-1, -1), 2),
             ('LEFTPADDING', (0, 0), (-1, -1), 3),
             ('RIGHTPADDING', (0, 0), (-1, -1), 3),
-        ])
-        
-        # Filas alternadas
-        for i in range(1, len(formatted_rows)):
-            if i % 2 == 0:
-                style.add('BACKGROUND', (0, i), (-1, i), self.ROW_ALT_BG)
+        ]
         
-        table.setStyle(style)
-        return table
+        # Filas alternadas, fila por fila: ROWBACKGROUNDS reinicia el ciclo cuando la
+        # tabla se parte entre páginas. TABLE_CHUNK_ROWS es par, así que cada trozo
+        # arranca con una fila blanca.
+        for i in range(body + 1, n_rows, 2):
+            commands.append(('BACKGROUND', (0, i), (-1, i), self.ROW_ALT_BG))
+        return TableStyle(commands)
     
     def _get_col_index(self, headers: List[str], col_name: str, alt_names: List[str] = None) -> int:
         """
@@ -502,9 +550,7 @@ class ExcelToPdfExporter:
             # Fecha, Liquid, Boleto, Mon, Operación, Cód, Instrumento, Cantidad, Precio, TC, Bruto, Interés, Gastos, Neto
             col_widths = [16, 16, 12, 16, 27, 12, 39, 22, 18, 14, 26, 18, 16, 26]
             
-            table = self._create_table(table_headers, table_rows, col_widths, col_formatters, font_size=5)
-            if table:
-                elements.append(table)
+            elements.extend(self._create_tables(table_headers, table_rows, col_widths, col_formatters, font_size=5))
             elements.append(Spacer(1, 3*mm))
         
         elements.append(Spacer(1, 10*mm))
@@ -599,9 +645,7 @@ class ExcelToPdfExporter:
             # Instr, Cód, Fecha, TipoOp, Cantidad, Precio, Bruto, Gastos, IVA, Resultado
             col_widths = [42, 14, 16, 28, 22, 18, 26, 20, 18, 26]
             
-            table = self._create_table(table_headers, table_rows, col_widths, col_formatters, font_size=5)
-            if table:
-                elements.append(table)
+            elements.extend(self._create_tables(table_headers, table_rows, col_widths, col_formatters, font_size=5))
             elements.append(Spacer(1, 4*mm))
         
         elements.append(Spacer(1, 10*mm))
@@ -702,9 +746,7 @@ class ExcelToPdfExporter:
                     
                     col_widths = [18, 18, 15, 28, 18, 22, 18, 18, 25]
                     
-                    table = self._create_table(table_headers, table_rows, col_widths, col_formatters)
-                    if table:
-                        elements.append(table)
+                    elements.extend(self._create_tables(table_headers, table_rows, col_widths, col_formatters))
                     elements.append(Spacer(1, 2*mm))
 
         if rendered_row_count != len(non_empty_rows):
@@ -808,9 +850,7 @@ class ExcelToPdfExporter:
             
             col_widths = [18, 10, 18, 25, 15, 22, 22, 16, 14, 18, 18, 15, 14, 18]
             
-            table = self._create_table(table_headers, table_rows, col_widths, col_formatters)
-            if table:
-                elements.append(table)
+            elements.extend(self._create_tables(table_headers, table_rows, col_widths, col_formatters))
             
             # Total usando índice de columna
             total_cf = 0.0
@@ -865,9 +905,7 @@ class ExcelToPdfExporter:
             elements.append(Spacer(1, 10*mm))
             return elements
 
-        table = self._create_table(table_headers, table_rows, col_widths, col_formatters)
-        if table:
-            elements.append(table)
+        elements.extend(self._create_tables(table_headers, table_rows, col_widths, col_formatters))
         elements.append(Spacer(1, 10*mm))
         return elements
 
@@ -1211,26 +1249,70 @@ class ExcelToPdfExporter:
         
         col_widths = [90, 20, 20, 30, 35, 25]
         
-        table = self._create_table(table_headers, table_rows, col_widths, col_formatters)
-        if table:
-            elements.append(table)
+        elements.extend(self._create_tables(table_headers, table_rows, col_widths, col_formatters))
         
         return elements
     
-    def export_to_pdf(self, output_path: str = None) -> bytes:
-        """
-        Exporta el Excel a PDF.
-        
-        Args:
-            output_path: Ruta opcional para guardar el archivo
-            
-        Returns:
-            bytes del PDF generado
-        """
-        # Buffer para el PDF
+    # Partes del PDF en orden: cada una arranca en página nueva y sus secciones fluyen juntas
+    PDF_PARTS = (
+        (('_build_boletos_section',),),
+        (('_build_resultado_ventas_section', 'ARS'),),
+        (('_build_resultado_ventas_section', 'USD'),),
+        (('_build_rentas_dividendos_section', 'ARS'),),
+        (('_build_rentas_dividendos_section', 'USD'),),
+        (('_build_fci_section',),),
+        (('_build_opciones_section',),),
+        (('_build_futuros_section',),),
+        (('_build_pagare_cpd_section',),),
+        (('_build_cauciones_section', 'tomadoras'), ('_build_cauciones_section', 'colocadoras')),
+        (('_build_resumen_section',), ('_build_posicion_titulos_section',)),
+    )
+    
+    # Hojas que leen las secciones del PDF (las auxiliares de especies/precios no)
+    PDF_SHEETS = (
+        'Boletos', 'Resultado Ventas ARS', 'Resultado Ventas USD',
+        'Rentas Dividendos ARS', 'Rentas Dividendos USD', 'Cauciones',
+        'Cauciones Tomadoras', 'Cauciones Colocadoras', 'FCI', 'Opciones',
+        'Futuros', 'Pagare_CPD', 'Posicion Titulos',
+    )
+    
+    def __getstate__(self) -> Dict[str, Any]:
+        """Estado para los procesos de export_to_pdf: solo los valores de PDF_SHEETS."""
+        state = self.__dict__.copy()
+        wb = state.pop('wb')
+        state['wb'] = {
+            title: list(wb[title].iter_rows(values_only=True))
+            for title in self.PDF_SHEETS if title in wb.sheetnames
+        }
+        del state['styles']
+        return state
+    
+    def __setstate__(self, state: Dict[str, Any]) -> None:
+        sheets = state.pop('wb')
+        self.__dict__.update(state)
+        self.wb = Workbook()
+        self.wb.remove(self.wb.active)
+        for title, rows in sheets.items():
+            ws = self.wb.create_sheet(title)
+            for row in rows:
+                ws.append(row)
+        self.styles = getSampleStyleSheet()
+        self._setup_styles()
+    
+    def _build_part(self, index: int) -> List:
+        """Flowables de la parte `index` de PDF_PARTS."""
+        elements = []
+        for method, *args in self.PDF_PARTS[index]:
+            elements.extend(getattr(self, method)(*args))
+        return elements
+    
+    def _data_rows(self) -> int:
+        """Filas de las hojas del PDF, para decidir si conviene renderizar en paralelo."""
+        return sum(self.wb[title].max_row for title in self.PDF_SHEETS if title in self.wb.sheetnames)
+    
+    def _render(self, elements: List, generado: datetime, page_numbers: bool = True) -> bytes:
+        """Renderiza flowables con el header/footer del reporte en cada página."""
         buffer = io.BytesIO()
-        
-        # Crear documento
         doc = SimpleDocTemplate(
             buffer,
             pagesize=landscape(A4),
@@ -1240,61 +1322,6 @@ class ExcelToPdfExporter:
             bottomMargin=15*mm
         )
         
-        # Construir contenido
-        elements = []
-        
-        # Header principal (se repetirá en cada página via onPage)
-        
-        # Boletos
-        elements.extend(self._build_boletos_section())
-        elements.append(PageBreak())
-        
-        # Resultado Ventas ARS
-        elements.extend(self._build_resultado_ventas_section('ARS'))
-        elements.append(PageBreak())
-        
-        # Resultado Ventas USD
-        elements.extend(self._build_resultado_ventas_section('USD'))
-        elements.append(PageBreak())
-        
-        # Rentas y Dividendos ARS
-        elements.extend(self._build_rentas_dividendos_section('ARS'))
-        elements.append(PageBreak())
-        
-        # Rentas y Dividendos USD
-        elements.extend(self._build_rentas_dividendos_section('USD'))
-        elements.append(PageBreak())
-
-        # FCI
-        elements.extend(self._build_fci_section())
-        elements.append(PageBreak())
-
-        # Opciones
-        elements.extend(self._build_opciones_section())
-        elements.append(PageBreak())
-
-        # Futuros
-        elements.extend(self._build_futuros_section())
-        elements.append(PageBreak())
-
-        # Pagare/CPD
-        elements.extend(self._build_pagare_cpd_section())
-        elements.append(PageBreak())
-        
-        # Cauciones Tomadoras
-        elements.extend(self._build_cauciones_section('tomadoras'))
-        
-        # Cauciones Colocadoras
-        elements.extend(self._build_cauciones_section('colocadoras'))
-        elements.append(PageBreak())
-        
-        # Resumen
-        elements.extend(self._build_resumen_section())
-        
-        # Posición de Títulos
-        elements.extend(self._build_posicion_titulos_section())
-        
-        # Generar PDF
         def add_header_footer(canvas, doc):
             canvas.saveState()
             page_width = landscape(A4)[0]
@@ -1333,10 +1360,11 @@ class ExcelToPdfExporter:
             info_text = f"Período: {self.periodo_inicio} - {self.periodo_fin}, {self.anio}   |   {self.cliente_info['numero']} - {self.cliente_info['nombre']}"
             canvas.drawString(text_x, page_height - 14*mm, info_text)
             
-            # Page number (derecha)
-            canvas.setFont('Helvetica-Bold', 9)
-            page_num = f"Pág. {doc.page}"
-            canvas.drawRightString(page_width - 10*mm, page_height - 11*mm, page_num)
+            # Page number (derecha); en el render por partes lo estampa _merge_parts
+            if page_numbers:
+                canvas.setFont('Helvetica-Bold', 9)
+                page_num = f"Pág. {doc.page}"
+                canvas.drawRightString(page_width - 10*mm, page_height - PAGE_NUMBER_Y, page_num)
             
             # Línea decorativa debajo del header
             canvas.setStrokeColor(colors.Color(0.9, 0.7, 0.1))  # Dorado/amarillo
@@ -1346,15 +1374,45 @@ class ExcelToPdfExporter:
             # Footer
             canvas.setFillColor(colors.Color(0.5, 0.5, 0.5))
             canvas.setFont('Helvetica', 6)
-            canvas.drawCentredString(page_width/2, 8*mm, f"Generado automáticamente - {datetime.now().strftime('%d/%m/%Y %H:%M')}")
+            canvas.drawCentredString(page_width/2, 8*mm, f"Generado automáticamente - {generado.strftime('%d/%m/%Y %H:%M')}")
             
             canvas.restoreState()
         
         doc.build(elements, onFirstPage=add_header_footer, onLaterPages=add_header_footer)
+        return buffer.getvalue()
+    
+    @traced("pdf.export_to_pdf", "pdf")
+    def export_to_pdf(self, output_path: str = None, workers: Optional[int] = None) -> bytes:
+        """
+        Exporta el Excel a PDF.
         
-        # Obtener bytes
-        pdf_bytes = buffer.getvalue()
-        buffer.close()
+        Con workers > 1 cada parte de PDF_PARTS se renderiza en un proceso aparte y
+        los PDFs se concatenan con PyMuPDF, numerando las páginas sobre el total.
+        
+        Args:
+            output_path: Ruta opcional para guardar el archivo
+            workers: Procesos para renderizar las partes. None = automático
+                (paralelo solo desde PARALLEL_MIN_ROWS filas); 1 = un solo render
+            
+        Returns:
+            bytes del PDF generado
+        """
+        if workers is None:
+            workers = min(os.cpu_count() or 1, len(self.PDF_PARTS)) if self._data_rows() >= PARALLEL_MIN_ROWS else 1
+        generado = datetime.now()
+        
+        if workers > 1:
+            pdf_bytes = self._export_parts(workers, generado)
+        else:
+            # Construir contenido: un PageBreak entre partes
+            elements = []
+            for index in range(len(self.PDF_PARTS)):
+                if index:
+                    elements.append(PageBreak())
+                elements.extend(self._build_part(index))
+            
+            with span("pdf.render", "pdf", flowables=len(elements)):
+                pdf_bytes = self._render(elements, generado)
         
         # Guardar si se especificó ruta
         if output_path:
@@ -1362,7 +1420,38 @@ class ExcelToPdfExporter:
                 f.write(pdf_bytes)
         
         return pdf_bytes
-
+    
+    def _export_parts(self, workers: int, generado: datetime) -> bytes:
+        """Renderiza las partes en un pool de procesos y las une con la numeración global."""
+        import fitz  # PyMuPDF
+        
+        indexes = range(len(self.PDF_PARTS))
+        # spawn: igual en Windows y seguro con los threads de Streamlit/la cola de casos
+        with span("pdf.render_parts", "pdf", workers=workers, parts=len(indexes)):
+            with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_pdf_worker,
+                initargs=(self,),
+            ) as pool:
+                last = [index == indexes[-1] for index in indexes]
+                parts = list(pool.map(_render_pdf_part, indexes, last, [generado] * len(indexes)))
+        
+        with span("pdf.merge_parts", "pdf"):
+            merged = fitz.open()
+            for part in parts:
+                if part:
+                    with fitz.open(stream=part, filetype="pdf") as doc:
+                        merged.insert_pdf(doc)
+            for page in merged:
+                label = f"Pág. {page.number + 1}"
+                width = stringWidth(label, 'Helvetica-Bold', 9)
+                page.insert_text(
+                    (page.rect.width - 10*mm - width, PAGE_NUMBER_Y),
+                    label, fontname="hebo", fontsize=9, color=(1, 1, 1),
+                )
+            return merged.tobytes(garbage=3, deflate=True)
+    
     def export_to_client_excel(self, output_path: str = None) -> bytes:
         """Exporta un Excel para cliente con las mismas secciones del PDF (valores planos)."""
         wb = Workbook()
@@ -1653,6 +1742,26 @@ class ExcelToPdfExporter:
         return data
 
 
+# Exportador de cada proceso de ExcelToPdfExporter._export_parts
+_pdf_worker: Optional[ExcelToPdfExporter] = None
+
+
+def _init_pdf_worker(exporter: ExcelToPdfExporter) -> None:
+    global _pdf_worker
+    _pdf_worker = exporter
+
+
+def _render_pdf_part(index: int, last: bool, generado: datetime) -> bytes:
+    """PDF de una parte sin número de página (b'' si la última parte está vacía)."""
+    elements = _pdf_worker._build_part(index)
+    if not elements:
+        if last:
+            return b""
+        # Como en el render único: el PageBreak de una parte vacía deja una página en blanco
+        elements = [PageBreak()]
+    return _pdf_worker._render(elements, generado, page_numbers=False)
+
+
 def export_excel_to_pdf(excel_path: str, output_path: str = None,
                         cliente_numero: str = None, cliente_nombre: str = None,
                         periodo_inicio: str = None, periodo_fin: str = None,
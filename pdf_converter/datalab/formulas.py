@@ -0,0 +1,383 @@
+"""
+Fórmulas de Excel como objetos: se construyen en forma invariante y se renderizan al final.
+
+Las hojas del merge guardan las fórmulas en formato invariante (nombres en inglés, coma
+como separador de argumentos y punto decimal), que es lo que Excel 2007+ espera en el
+XML. En lugar de armar strings en castellano y traducirlos con regex, las fórmulas se
+arman con nodos:
+
+    lookup = fn.VLOOKUP(cell("D", 5), sheet_range("EspeciesVisual", "C:R"), 16, FALSE)
+    ws.cell(5, 21, formula(if_error(lookup, "")))
+    # =IF(ISERROR(VLOOKUP(D5,EspeciesVisual!C:R,16,FALSE)),"",VLOOKUP(D5,EspeciesVisual!C:R,16,FALSE))
+
+`render(expr, ES)` da la versión en castellano (SI, BUSCARV, punto y coma, coma
+decimal) solo para mostrar; `evaluate(expr, ...)` calcula una fórmula localmente.
+"""
+
+from __future__ import annotations
+
+import re
+from dataclasses import dataclass
+from typing import Callable, Dict, Optional, Tuple
+
+
+@dataclass(frozen=True)
+class Locale:
+    """Convenciones de renderizado: separador de argumentos, decimal y nombres de funciones."""
+
+    separator: str
+    decimal: str
+    functions: Dict[str, str]
+    true: str
+    false: str
+
+
+INVARIANT = Locale(separator=",", decimal=".", functions={}, true="TRUE", false="FALSE")
+
+ES = Locale(
+    separator=";",
+    decimal=",",
+    functions={
+        "IF": "SI",
+        "ISERROR": "ESERROR",
+        "VLOOKUP": "BUSCARV",
+        "SEARCH": "HALLAR",
+        "ISNUMBER": "ESNUMERO",
+        "OR": "O",
+        "AND": "Y",
+        "NOT": "NO",
+        "LOWER": "MINUSC",
+        "UPPER": "MAYUSC",
+        "LEFT": "IZQUIERDA",
+        "SUM": "SUMA",
+        "SUMIF": "SUMAR.SI",
+        "SUMIFS": "SUMAR.SI.CONJUNTO",
+    },
+    true="VERDADERO",
+    false="FALSO",
+)
+
+
+# Precedencia de operadores de Excel (mayor = liga más fuerte)
+_PRECEDENCIA = {"=": 1, "<>": 1, "<": 1, ">": 1, "<=": 1, ">=": 1, "&": 2, "+": 3, "-": 3, "*": 4, "/": 4}
+
+
+class Expr:
+    """Nodo de fórmula. Los operadores aritméticos de Python arman nodos BinOp."""
+
+    precedence = 9
+
+    def render(self, locale: Locale = INVARIANT) -> str:
+        raise NotImplementedError
+
+    def __add__(self, other):
+        return BinOp("+", self, to_expr(other))
+
+    def __radd__(self, other):
+        return BinOp("+", to_expr(other), self)
+
+    def __sub__(self, other):
+        return BinOp("-", self, to_expr(other))
+
+    def __rsub__(self, other):
+        return BinOp("-", to_expr(other), self)
+
+    def __mul__(self, other):
+        return BinOp("*", self, to_expr(other))
+
+    def __rmul__(self, other):
+        return BinOp("*", to_expr(other), self)
+
+    def __truediv__(self, other):
+        return BinOp("/", self, to_expr(other))
+
+    def __rtruediv__(self, other):
+        return BinOp("/", to_expr(other), self)
+
+    # Comparaciones como métodos: __eq__ queda para comparar nodos entre sí
+    def eq(self, other) -> "BinOp":
+        return BinOp("=", self, to_expr(other))
+
+    def ne(self, other) -> "BinOp":
+        return BinOp("<>", self, to_expr(other))
+
+    def gt(self, other) -> "BinOp":
+        return BinOp(">", self, to_expr(other))
+
+    def lt(self, other) -> "BinOp":
+        return BinOp("<", self, to_expr(other))
+
+    def ge(self, other) -> "BinOp":
+        return BinOp(">=", self, to_expr(other))
+
+    def le(self, other) -> "BinOp":
+        return BinOp("<=", self, to_expr(other))
+
+    def __str__(self) -> str:
+        return self.render()
+
+
+@dataclass(frozen=True, eq=True)
+class Ref(Expr):
+    """Referencia a celda o rango tal como se escribe en Excel (D5, EspeciesVisual!C:R)."""
+
+    text: str
+
+    def render(self, locale: Locale = INVARIANT) -> str:
+        return self.text
+
+
+@dataclass(frozen=True, eq=True)
+class Num(Expr):
+    value: float
+
+    def render(self, locale: Locale = INVARIANT) -> str:
+        text = str(self.value)
+        return text.replace(".", locale.decimal) if locale.decimal != "." else text
+
+
+@dataclass(frozen=True, eq=True)
+class Str(Expr):
+    value: str
+
+    def render(self, locale: Locale = INVARIANT) -> str:
+        return '"' + self.value.replace('"', '""') + '"'
+
+
+@dataclass(frozen=True, eq=True)
+class Bool(Expr):
+    value: bool
+
+    def render(self, locale: Locale = INVARIANT) -> str:
+        return locale.true if self.value else locale.false
+
+
+@dataclass(frozen=True, eq=True)
+class Func(Expr):
+    name: str
+    args: Tuple[Expr, ...]
+
+    def render(self, locale: Locale = INVARIANT) -> str:
+        name = locale.functions.get(self.name, self.name)
+        return f"{name}(" + locale.separator.join(arg.render(locale) for arg in self.args) + ")"
+
+
+@dataclass(frozen=True, eq=True)
+class Paren(Expr):
+    """Paréntesis explícitos (los necesarios por precedencia se agregan solos)."""
+
+    expr: Expr
+
+    def render(self, locale: Locale = INVARIANT) -> str:
+        return f"({self.expr.render(locale)})"
+
+
+@dataclass(frozen=True, eq=True)
+class BinOp(Expr):
+    op: str
+    left: Expr
+    right: Expr
+
+    @property
+    def precedence(self) -> int:
+        return _PRECEDENCIA[self.op]
+
+    def render(self, locale: Locale = INVARIANT) -> str:
+        left = self.left.render(locale)
+        if self.left.precedence < self.precedence:
+            left = f"({left})"
+        right = self.right.render(locale)
+        if self.right.precedence < self.precedence or (
+            self.right.precedence == self.precedence and self.op in ("-", "/")
+        ):
+            right = f"({right})"
+        return f"{left}{self.op}{right}"
+
+
+TRUE = Bool(True)
+FALSE = Bool(False)
+
+
+def to_expr(value) -> Expr:
+    """Números -> Num, bool -> Bool, str -> literal de texto; los Expr quedan igual."""
+    if isinstance(value, Expr):
+        return value
+    if isinstance(value, bool):
+        return Bool(value)
+    if isinstance(value, (int, float)):
+        return Num(value)
+    if isinstance(value, str):
+        return Str(value)
+    raise TypeError(f"No se puede usar {value!r} en una fórmula")
+
+
+class _Functions:
+    """`fn.IF(...)`, `fn.VLOOKUP(...)`: cualquier función de Excel por su nombre en inglés."""
+
+    def __getattr__(self, name: str) -> Callable[..., Func]:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return lambda *args: Func(name, tuple(to_expr(arg) for arg in args))
+
+
+fn = _Functions()
+
+
+def cell(column: str, row: int) -> Ref:
+    return Ref(f"{column}{row}")
+
+
+def sheet_range(sheet: str, area: str) -> Ref:
+    """Rango de otra hoja; el nombre se cita si tiene espacios u otros símbolos."""
+    if re.fullmatch(r"[A-Za-z_][A-Za-z0-9_]*", sheet):
+        return Ref(f"{sheet}!{area}")
+    return Ref("'" + sheet.replace("'", "''") + f"'!{area}")
+
+
+def group(expr) -> Paren:
+    return Paren(to_expr(expr))
+
+
+def sum_exprs(exprs) -> Expr:
+    """a+b+c... con las expresiones dadas (al menos una)."""
+    exprs = [to_expr(expr) for expr in exprs]
+    total = exprs[0]
+    for expr in exprs[1:]:
+        total = total + expr
+    return total
+
+
+def if_error(expr, fallback) -> Func:
+    """IF(ISERROR(expr), fallback, expr): el patrón SI(ESERROR(...)) de las hojas."""
+    expr = to_expr(expr)
+    return fn.IF(fn.ISERROR(expr), fallback, expr)
+
+
+def vlookup(key, table: Ref, column: int) -> Func:
+    """VLOOKUP exacto (último argumento FALSE)."""
+    return fn.VLOOKUP(key, table, column, FALSE)
+
+
+def contains_any(words, text) -> Func:
+    """OR(ISNUMBER(SEARCH("w1", text)), ...) para cada palabra."""
+    return fn.OR(*(fn.ISNUMBER(fn.SEARCH(word, text)) for word in words))
+
+
+def render(expr, locale: Locale = INVARIANT) -> str:
+    return to_expr(expr).render(locale)
+
+
+def formula(expr, locale: Locale = INVARIANT) -> str:
+    """Texto de celda ('=...'); por defecto invariante, que es como se guarda en el XLSX."""
+    return "=" + render(expr, locale)
+
+
+# --- Evaluación local ---
+
+
+class FormulaError(Exception):
+    """Error de Excel (#N/A, #VALUE!, #DIV/0!) durante la evaluación."""
+
+
+def evaluate(
+    expr: Expr,
+    resolve: Callable[[str], object],
+    lookup: Optional[Callable[[object, str, int], object]] = None,
+):
+    """
+    Evalúa una fórmula. `resolve(ref)` devuelve el valor de una celda; `lookup(key,
+    tabla, columna)` resuelve VLOOKUP exactos y lanza FormulaError si no encuentra.
+    """
+
+    def ev(node: Expr):
+        if isinstance(node, (Num, Str, Bool)):
+            return node.value
+        if isinstance(node, Ref):
+            return resolve(node.text)
+        if isinstance(node, Paren):
+            return ev(node.expr)
+        if isinstance(node, BinOp):
+            return _binop(node.op, ev(node.left), ev(node.right))
+        if isinstance(node, Func):
+            return _call(node)
+        raise TypeError(f"Nodo desconocido: {node!r}")
+
+    def _call(node: Func):
+        name, args = node.name, node.args
+        if name == "IF":
+            cond = ev(args[0])
+            if cond:
+                return ev(args[1])
+            return ev(args[2]) if len(args) > 2 else False
+        if name == "ISERROR":
+            try:
+                ev(args[0])
+            except FormulaError:
+                return True
+            return False
+        if name == "OR":
+            return any(ev(arg) for arg in args)
+        if name == "AND":
+            return all(ev(arg) for arg in args)
+        values = [ev(arg) for arg in args]
+        if name == "NOT":
+            return not values[0]
+        if name == "ISNUMBER":
+            return isinstance(values[0], (int, float)) and not isinstance(values[0], bool)
+        if name == "SEARCH":
+            position = str(values[1]).lower().find(str(values[0]).lower())
+            if position < 0:
+                raise FormulaError("#VALUE!")
+            return position + 1
+        if name == "LOWER":
+            return str(values[0] or "").lower()
+        if name == "UPPER":
+            return str(values[0] or "").upper()
+        if name == "LEFT":
+            return str(values[0] or "")[: int(values[1]) if len(values) > 1 else 1]
+        if name == "ABS":
+            return abs(_number(values[0]))
+        if name == "VLOOKUP":
+            if lookup is None:
+                raise FormulaError("#N/A")
+            return lookup(values[0], args[1].render(), int(values[2]))
+        raise NotImplementedError(f"Función no soportada en evaluación local: {name}")
+
+    return ev(to_expr(expr))
+
+
+def _number(value) -> float:
+    if value is None or value == "":
+        return 0
+    if isinstance(value, bool):
+        return int(value)
+    if isinstance(value, (int, float)):
+        return value
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise FormulaError("#VALUE!") from None
+
+
+def _binop(op: str, left, right):
+    if op == "&":
+        return f"{'' if left is None else left}{'' if right is None else right}"
+    if op in ("=", "<>", "<", ">", "<=", ">="):
+        if isinstance(left, str) or isinstance(right, str):
+            left, right = str(left or "").lower(), str(right or "").lower()
+        else:
+            left, right = _number(left), _number(right)
+        return {
+            "=": left == right, "<>": left != right, "<": left < right,
+            ">": left > right, "<=": left <= right, ">=": left >= right,
+        }[op]
+    left, right = _number(left), _number(right)
+    if op == "+":
+        return left + right
+    if op == "-":
+        return left - right
+    if op == "*":
+        return left * right
+    if right == 0:
+        raise FormulaError("#DIV/0!")
+    return left / right
@@ -0,0 +1,182 @@
+"""
+Series históricas de cotización del dólar con búsquedas vectorizadas.
+
+FxRateStore guarda, por tipo de dólar ("Dolar MEP (local)", "Dolar Cable (exterior)"),
+las fechas en un array ordenado de numpy (datetime64[D]) y las cotizaciones en un
+array paralelo. Las búsquedas de una columna completa se resuelven con un único
+searchsorted:
+
+    store.rates_on(fechas, tipo)      -> cotización exacta del día (NaN si falta)
+    store.rates_as_of(fechas, tipo)   -> última cotización <= fecha (día hábil previo)
+    store.period_start_rate(tipo, 2025)
+
+La cotización de inicio de período es la de cierre del año anterior: si existe una
+fijación explícita en Cotizacion_Inicio_Periodo.csv se usa esa, si no la última
+cotización de la serie al 31/12.
+"""
+
+from __future__ import annotations
+
+import csv
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterable, Mapping, Optional, Sequence, Tuple
+
+import numpy as np
+
+
+PERIOD_START_FILE = 'Cotizacion_Inicio_Periodo.csv'
+
+
+def _to_day(value) -> Optional[date]:
+    if isinstance(value, datetime):
+        return value.date()
+    if isinstance(value, date):
+        return value
+    return None
+
+
+def _to_days(fechas: Iterable) -> np.ndarray:
+    return np.array(
+        [np.datetime64(day, 'D') if day is not None else np.datetime64('NaT', 'D') for day in map(_to_day, fechas)],
+        dtype='datetime64[D]',
+    )
+
+
+class FxRateStore:
+    """Cotizaciones por tipo de dólar en arrays ordenados por fecha."""
+
+    def __init__(
+        self,
+        series: Mapping[str, Mapping[date, float]],
+        period_start: Optional[Mapping[Tuple[date, str], float]] = None,
+    ):
+        self._fechas: Dict[str, np.ndarray] = {}
+        self._valores: Dict[str, np.ndarray] = {}
+        self._crudos: Dict[str, list] = {}
+        for tipo, por_fecha in series.items():
+            dias = sorted(por_fecha)
+            self._fechas[tipo] = np.array(dias, dtype='datetime64[D]')
+            self._crudos[tipo] = [por_fecha[dia] for dia in dias]
+            self._valores[tipo] = np.array(self._crudos[tipo], dtype=float)
+        self._period_start = dict(period_start or {})
+
+    @classmethod
+    def from_rows(
+        cls,
+        rows: Iterable[Sequence],
+        period_start: Optional[Mapping[Tuple[date, str], float]] = None,
+    ) -> "FxRateStore":
+        """Filas (fecha, cotización, tipo) como en Cotizacion_Dolar_Historica; la última repetida gana."""
+        series: Dict[str, Dict[date, float]] = {}
+        for fecha, cotizacion, tipo in rows:
+            dia = _to_day(fecha)
+            if dia is None or not cotizacion:
+                continue
+            series.setdefault(tipo, {})[dia] = cotizacion
+        return cls(series, period_start)
+
+    @staticmethod
+    def load_period_start(path: Path) -> Dict[Tuple[date, str], float]:
+        """Lee fijaciones de inicio de período (fecha, moneda, cotizacion) si el archivo existe."""
+        if not path.exists():
+            return {}
+        fixings = {}
+        with open(path, newline='', encoding='utf-8') as fh:
+            for row in csv.DictReader(fh):
+                fixings[(date.fromisoformat(row['fecha']), row['moneda'])] = float(row['cotizacion'])
+        return fixings
+
+    @property
+    def tipos(self) -> list:
+        return list(self._fechas)
+
+    def resolve_tipo(self, tipo: str) -> Optional[str]:
+        """Nombre de serie para un tipo exacto o abreviado ("Dolar Cable" -> "Dolar Cable (exterior)")."""
+        if tipo in self._fechas:
+            return tipo
+        prefix = str(tipo or '').strip().lower()
+        matches = [name for name in self._fechas if prefix and name.lower().startswith(prefix)]
+        return matches[0] if len(matches) == 1 else None
+
+    def _indices(self, fechas: Iterable, tipo: str, as_of: bool) -> np.ndarray:
+        """Posición en la serie de cada fecha (-1 si no hay cotización)."""
+        dias = _to_days(fechas)
+        result = np.full(len(dias), -1)
+        serie = self._fechas.get(tipo)
+        if serie is None or not len(serie) or not len(dias):
+            return result
+        validas = ~np.isnat(dias)
+        if as_of:
+            idx = np.searchsorted(serie, dias, side='right') - 1
+            hit = validas & (idx >= 0)
+        else:
+            idx = np.searchsorted(serie, dias, side='left')
+            hit = validas & (idx < len(serie))
+            hit[hit] = serie[idx[hit]] == dias[hit]
+        result[hit] = idx[hit]
+        return result
+
+    def _rates(self, fechas: Iterable, tipo: str, as_of: bool) -> np.ndarray:
+        idx = self._indices(fechas, tipo, as_of)
+        result = np.full(len(idx), np.nan)
+        hit = idx >= 0
+        if hit.any():
+            result[hit] = self._valores[tipo][idx[hit]]
+        return result
+
+    def rates_on(self, fechas: Iterable, tipo: str) -> np.ndarray:
+        """Cotización exacta de cada fecha (NaN si no hay dato ese día o la fecha no es válida)."""
+        return self._rates(fechas, tipo, as_of=False)
+
+    def rates_as_of(self, fechas: Iterable, tipo: str) -> np.ndarray:
+        """Última cotización disponible a cada fecha (NaN antes del inicio de la serie)."""
+        return self._rates(fechas, tipo, as_of=True)
+
+    def values_for(self, fechas: Iterable, tipo: str, as_of: bool = False) -> list:
+        """Como rates_on/rates_as_of pero con el valor tal cual figura en la hoja (None si falta)."""
+        crudos = self._crudos.get(tipo, [])
+        return [crudos[i] if i >= 0 else None for i in self._indices(fechas, tipo, as_of).tolist()]
+
+    def rate_on(self, fecha, tipo: str) -> Optional[float]:
+        return self.values_for([fecha], tipo)[0]
+
+    def as_of(self, fecha, tipo: str) -> Optional[float]:
+        return self.values_for([fecha], tipo, as_of=True)[0]
+
+    def period_start_rate(self, tipo: str, anio: int) -> Optional[float]:
+        """Cotización de cierre del año anterior a `anio` para el tipo indicado."""
+        serie = self.resolve_tipo(tipo) or tipo
+        cierre = date(anio - 1, 12, 31)
+        if (cierre, serie) in self._period_start:
+            return self._period_start[(cierre, serie)]
+        return self.as_of(cierre, serie)
+
+
+class PeriodStartRate:
+    """
+    Atributo de clase con la cotización de inicio de período de un tipo de dólar.
+
+    Se resuelve solo con el FxRateStore de la instancia (`_fx_rates`, el de su
+    AuxDataStore) y su año (`anio`): sin store no hay cotización, así un merger con
+    otros datos auxiliares nunca termina usando los de aux_data. Desde la clase
+    devuelve el descriptor.
+    """
+
+    def __init__(self, tipo: str):
+        self.tipo = tipo
+
+    def __set_name__(self, owner, name: str):
+        self.name = name
+
+    def __get__(self, obj, owner) -> float:
+        if obj is None:
+            return self
+        store = getattr(obj, '_fx_rates', None)
+        if store is None:
+            raise AttributeError(f"{owner.__name__}.{self.name} requiere el FxRateStore del merger (_fx_rates)")
+        anio = getattr(obj, 'anio', None) or owner.ANIO_PERIODO
+        rate = store.period_start_rate(self.tipo, anio)
+        if rate is None:
+            raise ValueError(f"Sin cotización {self.tipo} de inicio de período {anio}")
+        return rate
@@ -0,0 +1,339 @@
+"""
+Ingesta tipada de los Excel de entrada del merge (Gallo, Visual, Precio Tenencias).
+
+Cada workbook se abre en modo read-only y cada hoja se lee una sola vez a una
+SheetTable en memoria. La tabla expone la misma interfaz de lectura que una hoja
+de openpyxl (`cell(row, col).value`, `max_row`, `max_column`, `iter_rows`) y además
+columnas ya normalizadas que se calculan una vez por columna:
+
+    tabla.fecha(row, col)     -> (datetime | None, año)   ver parse_fecha
+    tabla.codigo(row, col)    -> código limpio (str)      ver clean_codigo
+    tabla.numero(row, col)    -> float                    ver to_float
+    tabla.find_column(...)    -> columna por encabezado exacto
+    tabla.find_header(...)    -> columna por encabezado que contiene el alias
+
+Las hojas no se modifican después de la ingesta: el merge solo lee sus entradas.
+"""
+
+from __future__ import annotations
+
+from collections import namedtuple
+from datetime import datetime
+from io import BytesIO
+from math import isinf, isnan
+from pathlib import Path
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple, Union
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.cell.read_only import EmptyCell
+from openpyxl.worksheet._read_only import ReadOnlyWorksheet
+
+
+CeldaLeida = namedtuple("CeldaLeida", ["row", "column", "value"])
+
+
+def parse_fecha(fecha_value) -> Tuple[Optional[datetime], int]:
+    """Parsea fecha de varios formatos. Retorna (datetime, año)."""
+    if fecha_value is None:
+        return None, 0
+
+    if isinstance(fecha_value, datetime):
+        return fecha_value, fecha_value.year
+
+    if isinstance(fecha_value, str):
+        fecha_str = fecha_value.strip()
+        # Formato dd/mm/yy o dd/mm/yyyy
+        try:
+            parts = fecha_str.split('/')
+            if len(parts) == 3:
+                day, month, year = int(parts[0]), int(parts[1]), int(parts[2])
+                # Ajustar año de 2 dígitos
+                if year < 100:
+                    year = 2000 + year if year < 50 else 1900 + year
+                return datetime(year, month, day), year
+        except Exception:
+            pass
+
+    return None, 0
+
+
+def clean_codigo(codigo) -> str:
+    """Limpia código de especie: quita puntos, ceros a izquierda, etc."""
+    if codigo is None:
+        return ""
+    codigo_str = str(codigo).strip()
+    # Quitar puntos
+    codigo_str = codigo_str.replace('.', '').replace(',', '')
+    # Quitar ceros a la izquierda
+    try:
+        return str(int(float(codigo_str)))
+    except Exception:
+        return codigo_str
+
+
+def to_float(value) -> float:
+    """Convierte un valor a float de forma segura."""
+    if value is None:
+        return 0.0
+    if isinstance(value, str):
+        # Si es fórmula, retornar 0
+        if value.startswith('='):
+            return 0.0
+        try:
+            return float(value.replace(',', '.').replace(' ', ''))
+        except Exception:
+            return 0.0
+    try:
+        return float(value)
+    except Exception:
+        return 0.0
+
+
+def valor_guardado(value):
+    """Valor de una celda tal como vuelve de un .xlsx escrito por openpyxl."""
+    if value == '':
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        # openpyxl escribe "%.16g" y al leer castea a int si no hay punto ni exponente
+        if isnan(value) or isinf(value):
+            return None
+        texto = "%.16g" % value
+        return float(texto) if any(c in texto for c in ".eE") else int(texto)
+    return value
+
+
+def _normalize_header(value) -> str:
+    return str(value or '').strip().lower()
+
+
+class SheetTable:
+    """Hoja de entrada leída una vez, con columnas tipadas bajo demanda."""
+
+    def __init__(self, title: str, rows: Sequence[tuple], max_row: int, max_column: int):
+        self.title = title
+        self.max_row = max_row
+        self.max_column = max_column
+        self._rows = [tuple(row) for row in rows]
+        self._columnas: Dict[Tuple[str, int], list] = {}
+        self._headers: Optional[List[str]] = None
+        self._header_lookups: Dict[Tuple[str, Tuple[str, ...]], Optional[int]] = {}
+
+    @classmethod
+    def from_worksheet(cls, ws) -> "SheetTable":
+        """Materializa una hoja de openpyxl (normal o read-only)."""
+        if not isinstance(ws, ReadOnlyWorksheet):
+            if not ws._cells:
+                return cls(ws.title, [], 1, 1)
+            return cls(ws.title, ws.iter_rows(values_only=True), ws.max_row, ws.max_column)
+
+        # En read-only la dimensión declarada en el XML puede quedar desactualizada:
+        # se recalcula con las celdas presentes, igual que en modo normal.
+        ws.reset_dimensions()
+        values: Dict[Tuple[int, int], object] = {}
+        for row in ws.iter_rows():
+            for cell in row:
+                if not isinstance(cell, EmptyCell):
+                    values[(cell.row, cell.column)] = cell.value
+        if not values:
+            return cls(ws.title, [], 1, 1)
+        max_row = max(row for row, _ in values)
+        max_column = max(column for _, column in values)
+        rows = [
+            tuple(values.get((row, column)) for column in range(1, max_column + 1))
+            for row in range(1, max_row + 1)
+        ]
+        return cls(ws.title, rows, max_row, max_column)
+
+    @classmethod
+    def from_values(cls, title: str, rows: Iterable[Sequence]) -> "SheetTable":
+        """
+        Arma la tabla desde filas ya en memoria (p. ej. una TableSheet del parser de
+        markdown), como quedaría al guardarla y releerla: '' se lee como None, los
+        números pasan por el mismo formato que usa openpyxl al escribir (ver
+        valor_guardado) y la dimensión llega hasta la última celda escrita.
+        """
+        rows = [list(row) for row in rows]
+        max_row = max((index for index, row in enumerate(rows, 1) if any(v is not None for v in row)), default=0)
+        max_column = max(
+            (column for row in rows for column, value in enumerate(row, 1) if value is not None),
+            default=0,
+        )
+        if not max_row:
+            return cls(title, [], 1, 1)
+        table = [
+            tuple(valor_guardado(value) for value in row[:max_column])
+            + (None,) * (max_column - min(len(row), max_column))
+            for row in rows[:max_row]
+        ]
+        return cls(title, table, max_row, max_column)
+
+    # --- Interfaz compatible con openpyxl (solo lectura) ---
+
+    def value(self, row: int, column: int):
+        if row < 1 or column < 1:
+            raise ValueError("Row or column values must be at least 1")
+        if row > len(self._rows):
+            return None
+        values = self._rows[row - 1]
+        return values[column - 1] if column <= len(values) else None
+
+    def cell(self, row: int, column: int) -> CeldaLeida:
+        return CeldaLeida(row, column, self.value(row, column))
+
+    def iter_rows(self, min_row: int = None, max_row: int = None, min_col: int = None,
+                  max_col: int = None, values_only: bool = False) -> Iterator[tuple]:
+        if not self._rows and not any([min_row, max_row, min_col, max_col]):
+            return
+        min_row = min_row or 1
+        max_row = max_row or self.max_row
+        min_col = min_col or 1
+        max_col = max_col or self.max_column
+        for row in range(min_row, max_row + 1):
+            if values_only:
+                yield tuple(self.value(row, col) for col in range(min_col, max_col + 1))
+            else:
+                yield tuple(CeldaLeida(row, col, self.value(row, col)) for col in range(min_col, max_col + 1))
+
+    # --- Encabezados ---
+
+    @property
+    def headers(self) -> List[str]:
+        """Encabezados de la fila 1 normalizados (strip + lower), uno por columna."""
+        if self._headers is None:
+            self._headers = [_normalize_header(self.value(1, c)) for c in range(1, self.max_column + 1)]
+        return self._headers
+
+    def find_column(self, options: Iterable[str], default: Optional[int] = None) -> Optional[int]:
+        """Primera opción que coincide exactamente con un encabezado (1-based)."""
+        key = ('exacto', tuple(options))
+        if key not in self._header_lookups:
+            headers = self.headers
+            self._header_lookups[key] = next(
+                (headers.index(option) + 1 for option in key[1] if option in headers),
+                None,
+            )
+        found = self._header_lookups[key]
+        return found if found is not None else default
+
+    def find_header(self, aliases: Iterable[str], default: Optional[int] = None) -> Optional[int]:
+        """Primer encabezado igual a un alias o que lo contiene (ver _find_header_column)."""
+        key = ('contiene', tuple(alias.lower() for alias in aliases))
+        if key not in self._header_lookups:
+            self._header_lookups[key] = next(
+                (
+                    index
+                    for index, header in enumerate(self.headers, start=1)
+                    if any(alias == header or alias in header for alias in key[1])
+                ),
+                None,
+            )
+        found = self._header_lookups[key]
+        return found if found is not None else default
+
+    # --- Columnas tipadas ---
+
+    def _columna(self, tipo: str, column: int, parser: Callable) -> list:
+        key = (tipo, column)
+        columna = self._columnas.get(key)
+        if columna is None:
+            columna = [parser(self.value(row, column)) for row in range(1, len(self._rows) + 1)]
+            self._columnas[key] = columna
+        return columna
+
+    def _tipado(self, tipo: str, row: int, column: int, parser: Callable):
+        if row < 1 or column < 1:
+            raise ValueError("Row or column values must be at least 1")
+        if row > len(self._rows):
+            return parser(None)
+        return self._columna(tipo, column, parser)[row - 1]
+
+    def fecha(self, row: int, column: int) -> Tuple[Optional[datetime], int]:
+        return self._tipado('fecha', row, column, parse_fecha)
+
+    def codigo(self, row: int, column: int) -> str:
+        return self._tipado('codigo', row, column, clean_codigo)
+
+    def numero(self, row: int, column: int) -> float:
+        return self._tipado('numero', row, column, to_float)
+
+
+class InputWorkbook:
+    """Conjunto de SheetTable con la interfaz de lectura de un Workbook."""
+
+    def __init__(self, tables: Iterable[SheetTable], active_title: Optional[str] = None):
+        self._tables: Dict[str, SheetTable] = {table.title: table for table in tables}
+        self._active_title = active_title if active_title in self._tables else next(iter(self._tables), None)
+
+    @classmethod
+    def from_workbook(cls, wb: Workbook) -> "InputWorkbook":
+        active = wb.active
+        return cls(
+            (SheetTable.from_worksheet(ws) for ws in wb.worksheets),
+            active.title if active is not None else None,
+        )
+
+    @classmethod
+    def from_sheets(cls, sheets: Iterable) -> "InputWorkbook":
+        """Desde hojas en memoria con `title` e `iter_rows()` (TableBook del parser); activa la primera."""
+        return cls(SheetTable.from_values(sheet.title, sheet.iter_rows()) for sheet in sheets)
+
+    @property
+    def sheetnames(self) -> List[str]:
+        return list(self._tables)
+
+    @property
+    def worksheets(self) -> List[SheetTable]:
+        return list(self._tables.values())
+
+    @property
+    def active(self) -> Optional[SheetTable]:
+        return self._tables.get(self._active_title) if self._active_title else None
+
+    def __getitem__(self, name: str) -> SheetTable:
+        try:
+            return self._tables[name]
+        except KeyError:
+            raise KeyError(f"Worksheet {name} does not exist.") from None
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._tables
+
+    def __iter__(self) -> Iterator[SheetTable]:
+        return iter(self._tables.values())
+
+
+def load_input_workbook(path: Union[str, Path]) -> InputWorkbook:
+    """Lee un Excel de entrada en modo read-only, una pasada por hoja."""
+    wb = load_workbook(path, read_only=True)
+    try:
+        return InputWorkbook.from_workbook(wb)
+    finally:
+        wb.close()
+
+
+InputSource = Union[str, Path, bytes, InputWorkbook, Workbook]
+
+
+def open_input_workbook(source: InputSource) -> InputWorkbook:
+    """
+    Entrada del merge desde una ruta, los bytes de un .xlsx, un Workbook de openpyxl
+    o un InputWorkbook ya armado (se usa tal cual).
+    """
+    if isinstance(source, InputWorkbook):
+        return source
+    if isinstance(source, Workbook):
+        return InputWorkbook.from_workbook(source)
+    if isinstance(source, (bytes, bytearray)):
+        wb = load_workbook(BytesIO(source), read_only=True)
+        try:
+            return InputWorkbook.from_workbook(wb)
+        finally:
+            wb.close()
+    return load_input_workbook(source)
+
+
+def as_sheet_table(ws) -> SheetTable:
+    """Devuelve ws como SheetTable (las hojas openpyxl sueltas se materializan)."""
+    if isinstance(ws, SheetTable):
+        return ws
+    return SheetTable.from_worksheet(ws)
@@ -0,0 +1,441 @@
+"""
+Cola de trabajos local (SQLite) con un pool acotado de workers.
+
+La app encola un caso y vuelve enseguida; un worker lo toma, reporta progreso como
+eventos y guarda el resultado bajo el id del trabajo:
+
+    cola = JobQueue("jobs.sqlite")
+    pool = WorkerPool(cola, {"caso": procesar_caso}, workers=2).start()
+    job_id = cola.submit("caso", payload, key=hash_de_las_entradas)
+    cola.get(job_id).estado        # pendiente -> corriendo -> terminado | error | cancelado
+    cola.events(job_id)            # eventos de progreso para la UI
+    cola.result(job_id)            # lo que devolvió el handler
+
+Como los trabajos viven en SQLite, refrescar el navegador no pierde el caso: alcanza
+con el job id. `workers` acota cuántos casos corren a la vez en el proceso, sin
+importar cuántos usuarios encolen. Con `key`, volver a encolar las mismas entradas
+devuelve el trabajo existente en lugar de correrlo otra vez (uno terminado solo
+mientras tenga menos de `max_age` y su resultado siga sirviendo, ver submit). Con
+`retention`, el pool borra los trabajos finalizados viejos al arrancar y cada hora.
+
+La cancelación es cooperativa: `cancel(job_id)` marca el trabajo y el handler la ve
+la próxima vez que reporta progreso (JobContext.progress lanza JobCancelled).
+"""
+
+from __future__ import annotations
+
+import pickle
+import sqlite3
+import threading
+import time
+import traceback
+import uuid
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+PENDIENTE = "pendiente"
+CORRIENDO = "corriendo"
+TERMINADO = "terminado"
+ERROR = "error"
+CANCELADO = "cancelado"
+
+ACTIVOS = (PENDIENTE, CORRIENDO)
+FINALES = (TERMINADO, ERROR, CANCELADO)
+
+# Cada cuánto el pool vuelve a borrar trabajos vencidos (ver WorkerPool.retention)
+PURGE_INTERVAL = 3600.0
+
+
+class JobCancelled(Exception):
+    """El trabajo se canceló mientras corría (ver JobContext.progress)."""
+
+
+@dataclass(frozen=True)
+class Job:
+    """Estado de un trabajo; progreso y mensaje son los del último evento."""
+
+    id: str
+    kind: str
+    estado: str
+    key: Optional[str]
+    creado: str
+    iniciado: Optional[str]
+    terminado: Optional[str]
+    progreso: float
+    mensaje: str
+    error: Optional[str]
+    cancelar: bool
+
+    @property
+    def activo(self) -> bool:
+        return self.estado in ACTIVOS
+
+
+@dataclass(frozen=True)
+class JobEvent:
+    seq: int
+    job_id: str
+    creado: str
+    progreso: float
+    mensaje: str
+
+
+def _ahora() -> str:
+    return datetime.now().isoformat(timespec='milliseconds')
+
+
+class JobQueue:
+    """Trabajos, eventos y resultados en una base SQLite local (un proceso de app por base)."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS jobs (
+            id TEXT PRIMARY KEY,
+            kind TEXT NOT NULL,
+            estado TEXT NOT NULL,
+            key TEXT,
+            payload BLOB,
+            resultado BLOB,
+            error TEXT,
+            progreso REAL NOT NULL DEFAULT 0,
+            mensaje TEXT NOT NULL DEFAULT '',
+            cancelar INTEGER NOT NULL DEFAULT 0,
+            creado TEXT NOT NULL,
+            iniciado TEXT,
+            terminado TEXT
+        );
+        CREATE INDEX IF NOT EXISTS jobs_estado ON jobs (estado, creado);
+        CREATE INDEX IF NOT EXISTS jobs_key ON jobs (kind, key);
+        CREATE TABLE IF NOT EXISTS eventos (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            job_id TEXT NOT NULL,
+            creado TEXT NOT NULL,
+            progreso REAL NOT NULL,
+            mensaje TEXT NOT NULL
+        );
+        CREATE INDEX IF NOT EXISTS eventos_job ON eventos (job_id, seq);
+    """
+
+    _JOB_COLUMNS = "id, kind, estado, key, creado, iniciado, terminado, progreso, mensaje, error, cancelar"
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            # WAL: la UI lee estado y eventos mientras los workers escriben
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=30)
+
+    @staticmethod
+    def _job(row) -> Job:
+        *campos, cancelar = row
+        return Job(*campos, bool(cancelar))
+
+    # --- Lado de la app ---
+
+    def submit(
+        self,
+        kind: str,
+        payload: Any,
+        key: Optional[str] = None,
+        max_age: Optional[timedelta] = None,
+        reusable: Optional[Callable[[Any], bool]] = None,
+    ) -> str:
+        """
+        Encola un trabajo y devuelve su id. Si `key` coincide con un trabajo del mismo
+        tipo pendiente, corriendo o terminado, devuelve ese id sin encolar de nuevo.
+
+        Un trabajo terminado se reutiliza solo si terminó hace menos de `max_age` y
+        `reusable(resultado)` es verdadero (p. ej. sus archivos de salida siguen en
+        disco); si no, deja de ser candidato para esa key y se encola uno nuevo.
+
+        La búsqueda y el alta van en una misma transacción IMMEDIATE (como claim): dos
+        submits simultáneos con la misma key no encolan dos trabajos.
+        """
+        datos = pickle.dumps(payload)
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            if key is not None:
+                limite = (datetime.now() - max_age).isoformat(timespec='milliseconds') if max_age else ''
+                existente = conn.execute(
+                    "SELECT id, estado, resultado FROM jobs WHERE kind = ? AND key = ? "
+                    "AND (estado IN (?, ?) OR (estado = ? AND terminado >= ?)) "
+                    "ORDER BY creado DESC LIMIT 1",
+                    (kind, key, PENDIENTE, CORRIENDO, TERMINADO, limite),
+                ).fetchone()
+                if existente is not None:
+                    job_id, estado, resultado = existente
+                    if estado != TERMINADO or reusable is None or reusable(pickle.loads(resultado)):
+                        conn.rollback()
+                        return job_id
+                    conn.execute("UPDATE jobs SET key = NULL WHERE id = ?", (job_id,))
+            job_id = uuid.uuid4().hex
+            conn.execute(
+                "INSERT INTO jobs (id, kind, estado, key, payload, creado) VALUES (?, ?, ?, ?, ?, ?)",
+                (job_id, kind, PENDIENTE, key, datos, _ahora()),
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return job_id
+
+    def get(self, job_id: str) -> Optional[Job]:
+        with self._connect() as conn:
+            row = conn.execute(f"SELECT {self._JOB_COLUMNS} FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return self._job(row) if row else None
+
+    def jobs(self, estado: Optional[str] = None) -> List[Job]:
+        """Trabajos (opcionalmente de un estado), del más viejo al más nuevo."""
+        query = f"SELECT {self._JOB_COLUMNS} FROM jobs"
+        params: tuple = ()
+        if estado is not None:
+            query += " WHERE estado = ?"
+            params = (estado,)
+        with self._connect() as conn:
+            rows = conn.execute(query + " ORDER BY creado, rowid", params).fetchall()
+        return [self._job(row) for row in rows]
+
+    def position(self, job_id: str) -> int:
+        """Trabajos pendientes por delante (0 si ya corre, terminó o es el próximo)."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT COUNT(*) FROM jobs j, jobs yo WHERE yo.id = ? AND yo.estado = ? "
+                "AND j.estado = ? AND (j.creado < yo.creado OR (j.creado = yo.creado AND j.rowid < yo.rowid))",
+                (job_id, PENDIENTE, PENDIENTE),
+            ).fetchone()
+        return int(row[0])
+
+    def events(self, job_id: str, after: int = 0) -> List[JobEvent]:
+        """Eventos de progreso del trabajo con seq > after, en orden."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT seq, job_id, creado, progreso, mensaje FROM eventos "
+                "WHERE job_id = ? AND seq > ? ORDER BY seq",
+                (job_id, after),
+            ).fetchall()
+        return [JobEvent(*row) for row in rows]
+
+    def result(self, job_id: str) -> Any:
+        """Resultado del handler; KeyError si el trabajo no existe o no terminó bien."""
+        with self._connect() as conn:
+            row = conn.execute("SELECT estado, resultado FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        if row is None or row[0] != TERMINADO:
+            raise KeyError(f"El trabajo {job_id} no tiene resultado ({row[0] if row else 'inexistente'})")
+        return pickle.loads(row[1])
+
+    def cancel(self, job_id: str) -> bool:
+        """
+        Cancela un trabajo pendiente en el acto; uno que corre queda marcado y se detiene
+        en su próximo reporte de progreso. Devuelve False si ya había terminado.
+        """
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET estado = ?, terminado = ?, payload = NULL WHERE id = ? AND estado = ?",
+                (CANCELADO, _ahora(), job_id, PENDIENTE),
+            )
+            if cursor.rowcount:
+                return True
+            cursor = conn.execute(
+                "UPDATE jobs SET cancelar = 1 WHERE id = ? AND estado = ?", (job_id, CORRIENDO)
+            )
+            return bool(cursor.rowcount)
+
+    def purge(self, before: datetime) -> List[str]:
+        """Borra trabajos finalizados antes de `before` (con sus eventos y resultados); devuelve sus ids."""
+        limite = before.isoformat(timespec='milliseconds')
+        with self._connect() as conn:
+            ids = [
+                row[0]
+                for row in conn.execute(
+                    "SELECT id FROM jobs WHERE estado IN (?, ?, ?) AND terminado < ?", (*FINALES, limite)
+                )
+            ]
+            conn.executemany("DELETE FROM eventos WHERE job_id = ?", [(job_id,) for job_id in ids])
+            conn.executemany("DELETE FROM jobs WHERE id = ?", [(job_id,) for job_id in ids])
+        return ids
+
+    # --- Lado de los workers ---
+
+    def claim(self) -> Optional[Tuple[Job, Any]]:
+        """Toma el pendiente más viejo y lo pasa a corriendo (atómico entre workers)."""
+        conn = self._connect()
+        try:
+            conn.execute("BEGIN IMMEDIATE")
+            row = conn.execute(
+                "SELECT id, payload FROM jobs WHERE estado = ? ORDER BY creado, rowid LIMIT 1", (PENDIENTE,)
+            ).fetchone()
+            if row is None:
+                conn.rollback()
+                return None
+            job_id, payload = row
+            conn.execute(
+                "UPDATE jobs SET estado = ?, iniciado = ? WHERE id = ?", (CORRIENDO, _ahora(), job_id)
+            )
+            conn.commit()
+        finally:
+            conn.close()
+        return self.get(job_id), pickle.loads(payload)
+
+    def report(self, job_id: str, progreso: float, mensaje: str) -> bool:
+        """Registra un evento de progreso; devuelve True si se pidió cancelar el trabajo."""
+        with self._connect() as conn:
+            ahora = _ahora()
+            conn.execute(
+                "INSERT INTO eventos (job_id, creado, progreso, mensaje) VALUES (?, ?, ?, ?)",
+                (job_id, ahora, progreso, mensaje),
+            )
+            conn.execute("UPDATE jobs SET progreso = ?, mensaje = ? WHERE id = ?", (progreso, mensaje, job_id))
+            row = conn.execute("SELECT cancelar FROM jobs WHERE id = ?", (job_id,)).fetchone()
+        return bool(row and row[0])
+
+    def finish(self, job_id: str, resultado: Any) -> None:
+        self._close(job_id, TERMINADO, resultado=pickle.dumps(resultado), progreso=1.0)
+
+    def fail(self, job_id: str, error: str) -> None:
+        self._close(job_id, ERROR, error=error)
+
+    def mark_cancelled(self, job_id: str) -> None:
+        self._close(job_id, CANCELADO)
+
+    def _close(self, job_id: str, estado: str, resultado: bytes = None, error: str = None,
+               progreso: Optional[float] = None) -> None:
+        with self._connect() as conn:
+            conn.execute(
+                "UPDATE jobs SET estado = ?, resultado = ?, error = ?, terminado = ?, payload = NULL, "
+                "progreso = COALESCE(?, progreso) WHERE id = ?",
+                (estado, resultado, error, _ahora(), progreso, job_id),
+            )
+
+    def requeue_running(self) -> int:
+        """Vuelve a pendiente lo que quedó corriendo (p. ej. el proceso se reinició a mitad)."""
+        with self._connect() as conn:
+            cursor = conn.execute(
+                "UPDATE jobs SET estado = ?, iniciado = NULL, cancelar = 0 WHERE estado = ?",
+                (PENDIENTE, CORRIENDO),
+            )
+            # Un trabajo cancelado a mitad no se reanuda
+            conn.execute(
+                "UPDATE jobs SET estado = ?, terminado = ?, payload = NULL WHERE estado = ? AND cancelar = 1",
+                (CANCELADO, _ahora(), PENDIENTE),
+            )
+            return cursor.rowcount
+
+
+class JobContext:
+    """Lo que recibe el handler junto al payload: id del trabajo y reporte de progreso."""
+
+    def __init__(self, queue: JobQueue, job: Job):
+        self.queue = queue
+        self.job = job
+
+    @property
+    def job_id(self) -> str:
+        return self.job.id
+
+    def progress(self, progreso: float, mensaje: str = "") -> None:
+        """Reporta progreso (0..1); lanza JobCancelled si se pidió cancelar."""
+        if self.queue.report(self.job.id, progreso, mensaje):
+            raise JobCancelled(self.job.id)
+
+
+Handler = Callable[[Any, JobContext], Any]
+
+
+class WorkerPool:
+    """
+    `workers` threads que toman trabajos de la cola y corren el handler de su tipo.
+
+    Son threads del mismo proceso: comparten los recursos ya cargados (AuxDataStore,
+    cliente Datalab) y el límite de workers es el de casos simultáneos.
+
+    Con `retention`, los trabajos finalizados hace más de ese tiempo se borran al
+    arrancar y cada PURGE_INTERVAL segundos; `on_purge` recibe los ids borrados
+    (para limpiar lo que el handler dejó fuera de la base).
+    """
+
+    def __init__(self, queue: JobQueue, handlers: Dict[str, Handler], workers: int = 2,
+                 poll_interval: float = 0.5, retention: Optional[timedelta] = None,
+                 on_purge: Optional[Callable[[List[str]], None]] = None):
+        if workers < 1:
+            raise ValueError("workers debe ser >= 1")
+        self.queue = queue
+        self.handlers = dict(handlers)
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.retention = retention
+        self.on_purge = on_purge
+        self._stop = threading.Event()
+        self._threads: List[threading.Thread] = []
+        self._purge_lock = threading.Lock()
+        self._next_purge = 0.0
+
+    def start(self) -> "WorkerPool":
+        if self._threads:
+            return self
+        self._stop.clear()
+        self.queue.requeue_running()
+        self.purge()
+        for index in range(self.workers):
+            thread = threading.Thread(target=self._loop, name=f"job-worker-{index}", daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Deja de tomar trabajos y espera a que terminen los que están corriendo."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+        self._threads = []
+
+    @property
+    def running(self) -> bool:
+        return any(thread.is_alive() for thread in self._threads)
+
+    def purge(self) -> List[str]:
+        """Borra los trabajos finalizados hace más de `retention` (nada si es None)."""
+        if self.retention is None:
+            return []
+        with self._purge_lock:
+            self._next_purge = time.monotonic() + PURGE_INTERVAL
+            ids = self.queue.purge(datetime.now() - self.retention)
+        if ids and self.on_purge is not None:
+            self.on_purge(ids)
+        return ids
+
+    def _loop(self) -> None:
+        while not self._stop.is_set():
+            if self.retention is not None and time.monotonic() >= self._next_purge:
+                self.purge()
+            if not self.run_one():
+                self._stop.wait(self.poll_interval)
+
+    def run_one(self) -> bool:
+        """Corre el próximo trabajo pendiente en este thread; False si no había ninguno."""
+        claimed = self.queue.claim()
+        if claimed is None:
+            return False
+        job, payload = claimed
+        handler = self.handlers.get(job.kind)
+        if handler is None:
+            self.queue.fail(job.id, f"Sin handler para trabajos '{job.kind}'")
+            return True
+        try:
+            resultado = handler(payload, JobContext(self.queue, job))
+        except JobCancelled:
+            self.queue.mark_cancelled(job.id)
+        except Exception as e:
+            self.queue.fail(job.id, f"{type(e).__name__}: {e}\n{traceback.format_exc()}")
+        else:
+            try:
+                self.queue.finish(job.id, resultado)
+            except Exception as e:
+                # Resultado que no se puede guardar (no picklable, base bloqueada): que no quede corriendo
+                self.queue.fail(job.id, f"No se pudo guardar el resultado: {type(e).__name__}: {e}")
+        return True
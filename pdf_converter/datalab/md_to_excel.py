@@ -13,6 +13,8 @@ from openpyxl import Workbook
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from rich.console import Console
 
+from .tracing import span
+
 console = Console()
 
 
@@ -60,6 +62,133 @@ class TableData:
             self.metadata = {}
 
 
+POSITION_DATE_HEADER = "__position_date"
+
+
+def clean_cell_value(value: str) -> str:
+    """Clean a parsed markdown cell (HTML tags, escaped characters)."""
+    if not value:
+        return ""
+
+    # Remove HTML tags like <b>, </b>
+    value = re.sub(r'<[^>]+>', '', value)
+
+    # Clean up escaped characters
+    value = value.replace('\\$', '$')
+    value = value.replace('<br>', ' ')
+
+    return value.strip()
+
+
+class _TableCell:
+    """Cell handle returned by TableSheet.cell (only `.value` is supported)."""
+
+    __slots__ = ("_row", "_index")
+
+    def __init__(self, row: list, index: int):
+        self._row = row
+        self._index = index
+
+    @property
+    def value(self):
+        return self._row[self._index]
+
+    @value.setter
+    def value(self, value):
+        self._row[self._index] = value
+
+
+class TableSheet:
+    """
+    In-memory sheet over the rows of a parsed table.
+
+    Implements the part of the openpyxl Worksheet API the postprocessors use
+    (`cell`, `max_row`, `max_column`, `delete_rows`, `title`) so they can run
+    before anything is written to openpyxl. As in openpyxl, accessing a cell
+    creates it and extends `max_row`/`max_column`.
+    """
+
+    def __init__(self, title: str, grid: list[list]):
+        self.title = title
+        self._grid = grid
+        self._trim()
+        self._max_column = max((len(row) for row in grid), default=0)
+
+    @classmethod
+    def from_table(cls, table: TableData) -> "TableSheet":
+        """Lay out a table exactly as ExcelExporter used to write it (header row + cleaned values)."""
+        headers = list(table.headers)
+        fecha = None
+        if table.section in {"Posicion Inicial", "Posicion Final"} and table.metadata.get("fecha"):
+            fecha = table.metadata.get("fecha")
+            headers.append(POSITION_DATE_HEADER)
+        grid = [headers]
+        for row_data in table.rows:
+            row = [clean_cell_value(value) for value in row_data]
+            if fecha:
+                row.extend([None] * (len(table.headers) + 1 - len(row)))
+                row[len(table.headers)] = fecha
+            grid.append(row)
+        return cls(table.section[:31], grid)
+
+    @property
+    def max_row(self) -> int:
+        return max(len(self._grid), 1)
+
+    @property
+    def max_column(self) -> int:
+        return max(self._max_column, 1)
+
+    def cell(self, row: int, column: int, value=None) -> _TableCell:
+        while len(self._grid) < row:
+            self._grid.append([])
+        cells = self._grid[row - 1]
+        if len(cells) < column:
+            cells.extend([None] * (column - len(cells)))
+            self._max_column = max(self._max_column, column)
+        handle = _TableCell(cells, column - 1)
+        if value is not None:
+            handle.value = value
+        return handle
+
+    def delete_rows(self, idx: int, amount: int = 1) -> None:
+        del self._grid[idx - 1:idx - 1 + amount]
+        self._trim()
+        self._max_column = max((len(row) for row in self._grid), default=0)
+
+    def _trim(self) -> None:
+        # Rows without cells do not count towards max_row
+        while self._grid and not self._grid[-1]:
+            self._grid.pop()
+
+    def iter_rows(self):
+        """Rows as tuples padded to max_column (values only)."""
+        width = self.max_column
+        for row in self._grid:
+            yield tuple(row) + (None,) * (width - len(row))
+
+
+class TableBook:
+    """Ordered TableSheets by name, the `wb.sheetnames` / `wb[name]` subset of an openpyxl Workbook."""
+
+    def __init__(self, tables: dict[str, TableData]):
+        self._sheets = {table.section[:31]: TableSheet.from_table(table) for table in tables.values()}
+
+    @property
+    def sheetnames(self) -> list[str]:
+        return list(self._sheets)
+
+    @property
+    def worksheets(self) -> list[TableSheet]:
+        return list(self._sheets.values())
+
+    def __getitem__(self, name: str) -> TableSheet:
+        return self._sheets[name]
+
+    def __contains__(self, name: str) -> bool:
+        return name in self._sheets
+
+
 class MarkdownTableParser:
     """Parse markdown tables into structured data."""
 
@@ -1000,56 +1129,41 @@ class ExcelExporter:
     
     def add_table(self, table: TableData):
         """Add a table as a new worksheet."""
-        ws = self.wb.create_sheet(title=table.section[:31])  # Excel sheet name limit
-        metadata_col = None
-        if table.section in {"Posicion Inicial", "Posicion Final"} and table.metadata.get("fecha"):
-            metadata_col = len(table.headers) + 1
-        
+        self.add_sheet(TableSheet.from_table(table))
+
+    def add_sheet(self, sheet: TableSheet):
+        """Write an in-memory sheet (already post-processed) as a new worksheet."""
+        ws = self.wb.create_sheet(title=sheet.title)
+        rows = sheet.iter_rows()
+        headers = list(next(rows, ()))
+
         # Write headers
-        for col, header in enumerate(table.headers, 1):
+        for col, header in enumerate(headers, 1):
+            if header is None:
+                continue
             cell = ws.cell(row=1, column=col, value=header)
             cell.font = self.header_font
             cell.fill = self.header_fill
             cell.alignment = self.header_alignment
             cell.border = self.border
+            if header == POSITION_DATE_HEADER:
+                ws.column_dimensions[cell.column_letter].hidden = True
 
-        if metadata_col:
-            cell = ws.cell(row=1, column=metadata_col, value="__position_date")
-            cell.font = self.header_font
-            cell.fill = self.header_fill
-            cell.alignment = self.header_alignment
-            cell.border = self.border
-            ws.column_dimensions[cell.column_letter].hidden = True
-        
         # Write data rows
-        for row_idx, row_data in enumerate(table.rows, 2):
+        for row_idx, row_data in enumerate(rows, 2):
             for col_idx, value in enumerate(row_data, 1):
-                cell = ws.cell(row=row_idx, column=col_idx, value=self._clean_value(value))
+                if value is None:
+                    continue
+                cell = ws.cell(row=row_idx, column=col_idx, value=value)
                 cell.border = self.border
-                
+
                 # Right-align numeric values
-                if self._is_numeric(value):
+                if isinstance(value, (int, float)) or (isinstance(value, str) and self._is_numeric(value)):
                     cell.alignment = Alignment(horizontal="right")
-            if metadata_col:
-                ws.cell(row=row_idx, column=metadata_col, value=table.metadata.get("fecha"))
-        
+
         # Auto-width columns
-        self._auto_width(ws, table.headers)
-    
-    def _clean_value(self, value: str) -> str:
-        """Clean cell value."""
-        if not value:
-            return ""
-        
-        # Remove HTML tags like <b>, </b>
-        value = re.sub(r'<[^>]+>', '', value)
-        
-        # Clean up escaped characters
-        value = value.replace('\\$', '$')
-        value = value.replace('<br>', ' ')
-        
-        return value.strip()
-    
+        self._auto_width(ws, [str(h) if h is not None else "" for h in headers])
+
     def _is_numeric(self, value: str) -> bool:
         """Check if value looks numeric."""
         if not value:
@@ -1077,6 +1191,70 @@ class ExcelExporter:
         self.wb.save(output_path)
 
 
+def build_table_book(
+    tables: dict[str, TableData],
+    format_type: str,
+    apply_postprocess: bool = True,
+) -> TableBook:
+    """
+    Lay out parsed tables as in-memory sheets and run the format post-processing on them.
+
+    Gallo sections without rows are dropped (Visual keeps every expected section).
+    """
+    if format_type != "visual":
+        tables = {section: table for section, table in tables.items() if table.rows}
+    book = TableBook(tables)
+
+    if apply_postprocess:
+        from .postprocess import postprocess_gallo_workbook, postprocess_visual_workbook
+
+        if format_type == "gallo":
+            postprocess_gallo_workbook(book, tables)
+        else:
+            postprocess_visual_workbook(book)
+    return book
+
+
+def markdown_to_table_book(content: str, apply_postprocess: bool = True) -> TableBook:
+    """
+    Parse Datalab markdown into post-processed in-memory sheets.
+
+    Returns an empty TableBook when the markdown has no tables.
+    """
+    console.print(f"[cyan]📊 Parsing markdown tables...[/cyan]")
+
+    parser = MarkdownTableParser(content)
+    with span("markdown.parse", "parse", chars=len(content)):
+        tables = parser.parse()
+    format_type = parser.format_type
+
+    if not tables:
+        console.print("[yellow]⚠️ No tables found in markdown[/yellow]")
+        return TableBook({})
+
+    console.print(f"[green]✓ Found {len(tables)} sections ({format_type} format)[/green]")
+    for section, data in tables.items():
+        console.print(f"  • {section}: {len(data.rows)} rows")
+
+    return build_table_book(tables, format_type, apply_postprocess)
+
+
+def table_book_to_workbook(book: TableBook) -> Workbook:
+    """
+    Write in-memory sheets to a styled openpyxl Workbook.
+
+    An empty book becomes a single "SinDatos" sheet so downstream readers never
+    get a workbook without worksheets.
+    """
+    exporter = ExcelExporter()
+    if not book.sheetnames:
+        exporter.wb.create_sheet("SinDatos")
+        return exporter.wb
+    for sheet in book.worksheets:
+        exporter.add_sheet(sheet)
+    return exporter.wb
+
+
 def convert_markdown_to_excel(
     markdown_path: str,
     output_path: Optional[str] = None,
@@ -1102,52 +1280,23 @@ def convert_markdown_to_excel(
     if not output_path:
         output_path = str(md_path.with_suffix('.xlsx'))
     
-    console.print(f"[cyan]📊 Parsing markdown tables...[/cyan]")
-    
     # Read markdown
     with open(md_path, 'r', encoding='utf-8') as f:
         content = f.read()
     
-    # Parse tables
-    parser = MarkdownTableParser(content)
-    tables = parser.parse()
-    format_type = parser.format_type
-    
-    if not tables:
-        console.print("[yellow]⚠️ No tables found in markdown[/yellow]")
-        # Guardar un Excel vacío para evitar errores downstream
-        exporter = ExcelExporter()
-        exporter.wb.create_sheet("SinDatos")
-        exporter.save(output_path)
-        return output_path
-    
-    console.print(f"[green]✓ Found {len(tables)} sections ({format_type} format)[/green]")
-    for section, data in tables.items():
-        console.print(f"  • {section}: {len(data.rows)} rows")
-    
-    # Export to Excel
-    console.print(f"\n[cyan]📝 Creating Excel file...[/cyan]")
-    
-    exporter = ExcelExporter()
-    for table in tables.values():
-        if format_type == "visual":
-            exporter.add_table(table)
-        elif table.rows:
-            exporter.add_table(table)
-    
-    # Apply post-processing if enabled
-    if apply_postprocess:
-        from .postprocess import postprocess_gallo_workbook, postprocess_visual_workbook
-        
-        if format_type == "gallo":
-            postprocess_gallo_workbook(exporter.wb, tables)
-        else:
-            postprocess_visual_workbook(exporter.wb)
+    book = markdown_to_table_book(content, apply_postprocess)
+
+    # Export to Excel (once, after post-processing)
+    if book.sheetnames:
+        console.print(f"\n[cyan]📝 Creating Excel file...[/cyan]")
     
-    exporter.save(output_path)
-    console.print(f"[green]✓ Saved to: {output_path}[/green]")
+    with span("excel.build", "parse"):
+        wb = table_book_to_workbook(book)
     
-    return output_path
+    with span("excel.save", "parse"):
+        wb.save(output_path)
+    if book.sheetnames:
+        console.print(f"[green]✓ Saved to: {output_path}[/green]")
     
     return output_path
 
@@ -8,9 +8,30 @@ from openpyxl.utils import get_column_letter
 from openpyxl.styles import Font, Alignment, PatternFill
 from pathlib import Path
 from datetime import datetime, date
-from typing import Dict, Iterable, List, Optional, Tuple
+from typing import Dict, Iterable, List, Optional, Tuple, Union
 import re
 
+from .formulas import cell, contains_any, fn, formula, group, if_error, sheet_range, sum_exprs, vlookup
+from .fx_rates import PERIOD_START_FILE, FxRateStore, PeriodStartRate
+from .position_ledger import Operacion, PositionLedger, opening_positions, openings_by_year
+from .input_tables import (
+    InputSource,
+    InputWorkbook,
+    SheetTable,
+    as_sheet_table,
+    clean_codigo,
+    load_input_workbook,
+    open_input_workbook,
+    parse_fecha,
+    to_float,
+)
+from .tracing import span
+
+
+def _source_path(source: InputSource) -> Optional[Path]:
+    """Ruta de una entrada del merge, o None si vino en memoria."""
+    return Path(source) if isinstance(source, (str, Path)) and source else None
+
 
 class GalloVisualMerger:
     """
@@ -47,8 +68,17 @@ class GalloVisualMerger:
                              'títulos públicos', 'titulos publicos', 'titulo publico',
                              'letras del tesoro', 'letra del tesoro', 'letras']
 
-    # Para Excel 2007+ (incluye 2013), las fórmulas en XLSX deben almacenarse en inglés (invariante)
-    USE_INVARIANT_FORMULAS = True
+    # Para Excel 2007+ (incluye 2013), las fórmulas en XLSX se almacenan en inglés (invariante):
+    # se arman con pdf_converter.datalab.formulas y se renderizan con formula()
+
+    # Año fiscal por defecto; la posición inicial se valúa al cierre del año anterior
+    ANIO_PERIODO = 2025
+    # Año que procesa cada instancia (ver __init__ y merge_years)
+    anio = ANIO_PERIODO
+
+    # Cotizaciones del dólar al inicio del período (31/12 del año anterior), desde aux_data
+    COTIZACION_INICIO_PERIODO = PeriodStartRate("Dolar MEP")
+    COTIZACION_INICIO_PERIODO_CABLE = PeriodStartRate("Dolar Cable")
     
     def _es_tipo_precio_cada_100(self, tipo_instrumento: str) -> bool:
         """Verifica si el tipo de instrumento expresa precio cada 100 unidades."""
@@ -106,7 +136,7 @@ class GalloVisualMerger:
         if sheet_name not in self.visual_wb.sheetnames:
             return []
 
-        visual_ws = self.visual_wb[sheet_name]
+        visual_ws = self._input_sheet(self.visual_wb, sheet_name)
         adjustments = []
 
         for row in range(2, visual_ws.max_row + 1):
@@ -115,8 +145,8 @@ class GalloVisualMerger:
                 continue
 
             concertacion_raw = visual_ws.cell(row, 4).value
-            concertacion, year = self._parse_fecha(concertacion_raw)
-            if year != 2025:
+            concertacion, year = visual_ws.fecha(row, 4)
+            if year != self.anio:
                 continue
 
             cod_instrum = visual_ws.cell(row, 3).value
@@ -124,7 +154,7 @@ class GalloVisualMerger:
                 continue
 
             liquidacion_raw = visual_ws.cell(row, 5).value
-            liquidacion, _ = self._parse_fecha(liquidacion_raw)
+            liquidacion, _ = visual_ws.fecha(row, 5)
 
             adjustments.append({
                 'origen': f'Visual-{sheet_name}',
@@ -608,32 +638,31 @@ class GalloVisualMerger:
 
         return self._normalize_nominal_price(price_num, tipo_instrumento)
 
+    def _especies_visual_lookup(self, key, area: str, column: int):
+        """BUSCARV a EspeciesVisual con "" si no encuentra (columna Tipo Instrumento, Moneda, etc.)."""
+        return if_error(vlookup(key, sheet_range("EspeciesVisual", area), column), "")
+
+    def _cotizacion_historica_lookup(self, fecha_ref):
+        """BUSCARV de la cotización del día en la hoja Cotizacion Dolar Historica."""
+        return vlookup(fecha_ref, sheet_range("Cotizacion Dolar Historica", "A:B"), 2)
+
     def _build_ars_nominal_formula(self, row_out: int) -> str:
         """Fórmula de Precio Nominal para Resultado Ventas ARS usando TC fuente de Visual cuando aplica."""
-        tipo_checks = (
-            f'O(ESNUMERO(HALLAR("OBLIGACION";MAYUSC(B{row_out})));'
-            f'ESNUMERO(HALLAR("TITULO";MAYUSC(B{row_out})));'
-            f'ESNUMERO(HALLAR("TÍTULO";MAYUSC(B{row_out})));'
-            f'ESNUMERO(HALLAR("LETRA";MAYUSC(B{row_out}))))'
-        )
-        is_visual = f'ESNUMERO(HALLAR("VISUAL";MAYUSC(A{row_out})))'
-        is_dollar_source = (
-            f'O(ESNUMERO(HALLAR("DOLAR";MAYUSC(G{row_out})));'
-            f'ESNUMERO(HALLAR("DÓLAR";MAYUSC(G{row_out})));'
-            f'ESNUMERO(HALLAR("USD";MAYUSC(G{row_out})));'
-            f'ESNUMERO(HALLAR("MEP";MAYUSC(G{row_out})));'
-            f'ESNUMERO(HALLAR("CABLE";MAYUSC(G{row_out}))))'
-        )
-        base_price = f'SI(Y({is_visual};{is_dollar_source};M{row_out}>0);J{row_out}*M{row_out};J{row_out})'
-        visual_raw_nominal = (
-            f'Y({is_visual};{tipo_checks};'
-            f'O('
-            f'Y(NO({is_dollar_source});ABS(J{row_out})<20);'
-            f'Y(NO({is_dollar_source});ABS(J{row_out})>=100);'
-            f'Y({is_dollar_source};ABS(J{row_out})<2)'
-            f'))'
+        J, M = cell("J", row_out), cell("M", row_out)
+        tipo_checks = contains_any(["OBLIGACION", "TITULO", "TÍTULO", "LETRA"], fn.UPPER(cell("B", row_out)))
+        is_visual = fn.ISNUMBER(fn.SEARCH("VISUAL", fn.UPPER(cell("A", row_out))))
+        is_dollar_source = contains_any(["DOLAR", "DÓLAR", "USD", "MEP", "CABLE"], fn.UPPER(cell("G", row_out)))
+        base_price = fn.IF(fn.AND(is_visual, is_dollar_source, M.gt(0)), J * M, J)
+        visual_raw_nominal = fn.AND(
+            is_visual,
+            tipo_checks,
+            fn.OR(
+                fn.AND(fn.NOT(is_dollar_source), fn.ABS(J).lt(20)),
+                fn.AND(fn.NOT(is_dollar_source), fn.ABS(J).ge(100)),
+                fn.AND(is_dollar_source, fn.ABS(J).lt(2)),
+            ),
         )
-        return f'=SI({visual_raw_nominal};{base_price};SI({tipo_checks};{base_price}/100;{base_price}))'
+        return formula(fn.IF(visual_raw_nominal, base_price, fn.IF(tipo_checks, base_price / 100, base_price)))
 
     def _build_resultado_currency_overrides(self, boletos_ws) -> Dict[str, str]:
         """Asigna una única hoja ARS/USD por código para mantener íntegro el running stock."""
@@ -678,12 +707,16 @@ class GalloVisualMerger:
     
     def __init__(
         self,
-        gallo_path: str = None,
-        visual_path: str = None,
+        gallo_path: InputSource = None,
+        visual_path: InputSource = None,
         aux_data_dir: str = None,
-        precio_tenencias_path: str = None,
+        precio_tenencias_path: InputSource = None,
         prefer_precio_tenencias_usd_cost_basis: bool = True,
         precio_tenencias_usd_basis_fallback_codes: Optional[Iterable[str]] = None,
+        aux_store: Optional["AuxDataStore"] = None,
+        comitente: Optional[str] = None,
+        position_ledger: Optional[PositionLedger] = None,
+        anio: Optional[int] = None,
     ):
         """
         Inicializa el merger con las rutas a los archivos.
@@ -693,17 +726,25 @@ class GalloVisualMerger:
             visual_path: Ruta al Excel generado de Visual
             aux_data_dir: Directorio con hojas auxiliares (default: pdf_converter/datalab/aux_data)
             precio_tenencias_path: Ruta al Excel generado desde el PDF de Precio Tenencias (opcional)
+                Las tres entradas aceptan también bytes de un .xlsx, un Workbook o un InputWorkbook
+                ya armado en memoria (ver open_input_workbook y case_pipeline.run_case).
             prefer_precio_tenencias_usd_cost_basis: prioriza Precio Tenencias como base fiscal en
                 renta fija USD cuando existe; Posición Gallo USD queda como fallback por código.
             precio_tenencias_usd_basis_fallback_codes: códigos que deben seguir usando la base USD directa
                 de Posición Gallo aun con la prioridad Precio Tenencias activa.
+            aux_store: hojas auxiliares ya cargadas (ver AuxDataStore) para reutilizar entre merges;
+                si se indica, aux_data_dir se ignora.
+            comitente: número de comitente del caso (clave del ledger de posiciones).
+            position_ledger: ledger de cierres anuales (ver position_ledger); con comitente,
+                la posición inicial sintética parte del último cierre guardado.
+            anio: año fiscal a procesar (default: ANIO_PERIODO). Para varios años ver merge_years.
         """
         if not visual_path:
             raise ValueError("visual_path es obligatorio")
 
-        self.gallo_path = Path(gallo_path) if gallo_path else None
-        self.visual_path = Path(visual_path)
-        self.precio_tenencias_path = Path(precio_tenencias_path) if precio_tenencias_path else None
+        self.gallo_path = _source_path(gallo_path)
+        self.visual_path = _source_path(visual_path)
+        self.precio_tenencias_path = _source_path(precio_tenencias_path)
         self.prefer_precio_tenencias_usd_cost_basis = prefer_precio_tenencias_usd_cost_basis
         self.precio_tenencias_usd_basis_fallback_codes = {
             self._clean_codigo(str(code))
@@ -711,38 +752,51 @@ class GalloVisualMerger:
             if code
         }
         
-        if aux_data_dir is None:
-            aux_data_dir = Path(__file__).parent / 'aux_data'
-        self.aux_data_dir = Path(aux_data_dir)
-        
-        # Cargar workbooks
-        self.gallo_wb = load_workbook(gallo_path) if gallo_path else self._create_empty_gallo_workbook()
-        self.visual_wb = load_workbook(visual_path)
-        self.precio_tenencias_wb = load_workbook(precio_tenencias_path) if precio_tenencias_path else None
+        if aux_store is None:
+            aux_store = AuxDataStore(aux_data_dir)
+        self.aux_store = aux_store
+        self.anio = anio or self.ANIO_PERIODO
+        self._anios_corrida: Optional[Tuple[int, int]] = None  # (primero, último) en merge_years
+        self._aperturas: Dict[int, dict] = {}  # anio -> estados de apertura precalculados
+        self._operaciones_stock: Optional[List[Operacion]] = None
+        self.comitente = str(comitente) if comitente else None
+        self.position_ledger = position_ledger
+        self.aux_data_dir = aux_store.aux_data_dir
+        
+        # Cargar workbooks de entrada: read-only, una pasada por hoja (ver input_tables)
+        self.gallo_wb = (
+            open_input_workbook(gallo_path) if gallo_path
+            else InputWorkbook.from_workbook(self._create_empty_gallo_workbook())
+        )
+        self.visual_wb = open_input_workbook(visual_path)
+        self.precio_tenencias_wb = (
+            open_input_workbook(precio_tenencias_path) if precio_tenencias_path else None
+        )
         self._gallo_position_dates = self._load_gallo_position_dates()
         
-        # Cargar hojas auxiliares
-        self.especies_visual = self._load_aux('EspeciesVisual.xlsx')
-        self.especies_gallo = self._load_aux('EspeciesGallo.xlsx')
-        self.cotizacion_dolar = self._load_aux('Cotizacion_Dolar_Historica.xlsx')
-        self.precios_iniciales = self._load_aux('PreciosInicialesEspecies.xlsx')
-        
-        # Cache de mapeos
-        self._especies_visual_cache = {}
-        self._especies_gallo_cache = {}
-        self._cotizacion_cache = {}
-        self._precios_iniciales_cache = {}
-        self._precios_iniciales_by_codigo = {}  # codigo -> {ticker, precio}
+        # Hojas auxiliares y sus caches: compartidas con el store, solo lectura
+        self.especies_visual = aux_store.especies_visual
+        self.especies_gallo = aux_store.especies_gallo
+        self.cotizacion_dolar = aux_store.cotizacion_dolar
+        self.precios_iniciales = aux_store.precios_iniciales
+        self._especies_visual_cache = aux_store.especies_visual_cache
+        self._especies_gallo_cache = aux_store.especies_gallo_cache
+        self._cotizacion_cache = aux_store.cotizacion_cache
+        self._fx_rates = aux_store.fx_rates
+        self._precios_iniciales_cache = aux_store.precios_iniciales_cache
+        self._precios_iniciales_by_codigo = aux_store.precios_iniciales_by_codigo  # codigo -> {ticker, precio}
+        # Ratio cache (needed by _build_precio_tenencias_cache)
+        self._ratios_cedears_cache = aux_store.ratios_cedears_cache
+        
+        # Cache de mapeos del caso
         self._precio_tenencias_by_codigo = {}
         self._precio_tenencias_by_ticker = {}
         self._precio_tenencias_qty_by_codigo = {}
         self._precio_tenencias_qty_by_ticker = {}
         self._precio_tenencias_zero_cost_codes = set()
         self._precio_tenencias_zero_cost_tickers = set()
-        self._ratios_cedears_cache = {}
         
-        # Load ratio cache first (needed by _build_precio_tenencias_cache)
-        self._ratios_cedears_cache = self._load_ratio_cache()
+        self._gallo_transacciones_index = None  # ver _buscar_codigo_especie
         
         # Construir caches
         self._build_caches()
@@ -752,7 +806,7 @@ class GalloVisualMerger:
         for sheet_name in ("Posicion Inicial", "Posicion Final"):
             if sheet_name not in self.gallo_wb.sheetnames:
                 continue
-            ws = self.gallo_wb[sheet_name]
+            ws = self._input_sheet(self.gallo_wb, sheet_name)
             metadata_col = self._find_header_column(ws, ["__position_date", "fecha posicion", "fecha posición"])
             if not metadata_col:
                 continue
@@ -789,84 +843,22 @@ class GalloVisualMerger:
         wb = Workbook()
         wb.active.title = 'EMPTY_GALLO'
         return wb
-    
-    def _load_aux(self, filename: str) -> Workbook:
-        """Carga un archivo auxiliar."""
-        path = self.aux_data_dir / filename
-        if not path.exists():
-            raise FileNotFoundError(f"Archivo auxiliar no encontrado: {path}")
-        return load_workbook(path)
+
+    def _input_sheet(self, wb, sheet_name: str) -> SheetTable:
+        """Hoja de un workbook de entrada como SheetTable (KeyError si no existe)."""
+        return as_sheet_table(wb[sheet_name])
+
+    def _precio_tenencias_source(self) -> SheetTable:
+        """Hoja PrecioTenenciasIniciales del PDF de Precio Tenencias (o la activa)."""
+        if 'PrecioTenenciasIniciales' in self.precio_tenencias_wb.sheetnames:
+            return self._input_sheet(self.precio_tenencias_wb, 'PrecioTenenciasIniciales')
+        return as_sheet_table(self.precio_tenencias_wb.active)
     
     def _build_caches(self):
-        """Construye caches para búsquedas rápidas."""
-        # Cache EspeciesVisual: codigo -> {nombre, moneda_emision, tipo_especie, ...}
-        ws = self.especies_visual.active
-        for row in range(2, ws.max_row + 1):
-            codigo = ws.cell(row, 3).value  # Columna C = codigo
-            if codigo:
-                codigo_clean = self._clean_codigo(codigo)
-                self._especies_visual_cache[codigo_clean] = {
-                    'codigo': codigo,
-                    'moneda_emision': ws.cell(row, 7).value,  # Col G
-                    'ticker': ws.cell(row, 8).value,  # Col H
-                    'nombre_con_moneda': ws.cell(row, 17).value,  # Col Q
-                    'tipo_especie': ws.cell(row, 18).value,  # Col R
-                }
-        
-        # Cache EspeciesGallo: codigo -> {nombre, ticker, moneda_emision}
-        ws = self.especies_gallo.active
-        for row in range(2, ws.max_row + 1):
-            codigo = ws.cell(row, 1).value  # Columna A
-            if codigo:
-                codigo_clean = self._clean_codigo(codigo)
-                self._especies_gallo_cache[codigo_clean] = {
-                    'codigo': codigo,
-                    'nombre': ws.cell(row, 2).value,  # Col B
-                    'ticker': ws.cell(row, 10).value,  # Col J
-                    'moneda_emision': ws.cell(row, 14).value,  # Col N
-                }
-        
-        # Cache Cotización Dólar: (fecha, tipo_dolar) -> cotizacion
-        ws = self.cotizacion_dolar.active
-        for row in range(2, ws.max_row + 1):
-            fecha = ws.cell(row, 1).value
-            cotizacion = ws.cell(row, 2).value
-            tipo_dolar = ws.cell(row, 3).value
-            if fecha and cotizacion:
-                # Normalizar fecha
-                if isinstance(fecha, datetime):
-                    fecha_key = fecha.date()
-                else:
-                    fecha_key = fecha
-                self._cotizacion_cache[(fecha_key, tipo_dolar)] = cotizacion
-        
-        # Cache Precios Iniciales: ticker -> {codigo, precio}
-        # Col A = codigo, Col B = nombre, Col C = ticker/ORDEN, Col G = precio
-        ws = self.precios_iniciales.active
-        for row in range(2, ws.max_row + 1):
-            codigo = ws.cell(row, 1).value  # Col A = codigo especie
-            ticker = ws.cell(row, 3).value  # Col C = ORDEN/ticker
-            precio = ws.cell(row, 7).value  # Col G = precio
-            if ticker:
-                ticker_key = str(ticker).upper().strip()
-                self._precios_iniciales_cache[ticker_key] = {
-                    'codigo': int(codigo) if codigo else None,
-                    'precio': precio if precio else 0
-                }
-            # Cache adicional por código
-            if codigo:
-                codigo_clean = self._clean_codigo(codigo)
-                self._precios_iniciales_by_codigo[codigo_clean] = {
-                    'ticker': ticker_key if ticker else None,
-                    'precio': precio if precio else 0
-                }
+        """Construye caches para búsquedas rápidas propias del caso."""
         # Cache PrecioTenencias (si existe)
         if self.precio_tenencias_wb:
-            if 'PrecioTenenciasIniciales' in self.precio_tenencias_wb.sheetnames:
-                ws_precio = self.precio_tenencias_wb['PrecioTenenciasIniciales']
-            else:
-                ws_precio = self.precio_tenencias_wb.active
-            self._build_precio_tenencias_cache(ws_precio)
+            self._build_precio_tenencias_cache(self._precio_tenencias_source())
 
     def _build_precio_tenencias_cache(self, ws):
         """Construye cache de PrecioTenenciasIniciales por código y ticker.
@@ -876,7 +868,8 @@ class GalloVisualMerger:
         workbook-level `Precio Ajustado` column only as auxiliary reference and
         cache the raw unit price here.
         """
-        headers = [str(ws.cell(1, c).value or '').strip().lower() for c in range(1, ws.max_column + 1)]
+        ws = as_sheet_table(ws)
+        headers = ws.headers
 
         def find_col(keyword: str):
             for idx, h in enumerate(headers, start=1):
@@ -940,50 +933,12 @@ class GalloVisualMerger:
                 if zero_cost_recovered:
                     self._precio_tenencias_zero_cost_tickers.add(ticker_key)
 
-    def _normalize_ratio_key(self, val: str) -> str:
+    @staticmethod
+    def _normalize_ratio_key(val: str) -> str:
         if not val:
             return ""
         return re.sub(r"[^A-Z0-9]", "", str(val).strip().upper())
 
-    def _load_ratio_cache(self) -> dict:
-        try:
-            aux_path = self.aux_data_dir / 'RatiosCedearsAcciones.xlsx'
-            if not aux_path.exists():
-                return {}
-            wb_ratios = load_workbook(aux_path)
-            ws_ratios = wb_ratios.active
-            cache = {}
-            for r in range(2, ws_ratios.max_row + 1):
-                nombre = ws_ratios.cell(r, 1).value
-                ratio_val = ws_ratios.cell(r, 2).value
-                key = ws_ratios.cell(r, 3).value
-                if ratio_val is None:
-                    continue
-                try:
-                    ratio_num = float(ratio_val)
-                except Exception:
-                    continue
-                if key:
-                    normalized_key = self._normalize_ratio_key(key)
-                    if normalized_key:
-                        cache[normalized_key] = ratio_num
-                if nombre:
-                    nombre_str = str(nombre).strip()
-                    nombre_key = self._normalize_ratio_key(nombre_str.split()[0])
-                    if nombre_key:
-                        cache.setdefault(nombre_key, ratio_num)
-                    # Extract stock ticker from Nombre (format: "Company Name TICKER EXCHANGE")
-                    tokens = nombre_str.split()
-                    if len(tokens) >= 2:
-                        # Second-to-last token is usually the ticker symbol
-                        ticker_candidate = tokens[-2]
-                        ticker_key = self._normalize_ratio_key(ticker_candidate)
-                        if ticker_key and len(ticker_key) <= 6:
-                            cache.setdefault(ticker_key, ratio_num)
-            return cache
-        except Exception:
-            return {}
-
     def _get_ratio_for_especie(self, ticker: str, especie: str) -> float:
         if not self._ratios_cedears_cache:
             return 0.0
@@ -1010,18 +965,10 @@ class GalloVisualMerger:
         return (str(data.get('moneda_emision', '')).strip() == "Dolar Cable (exterior)" and
                 str(data.get('tipo_especie', '')).strip() == "Acciones")
     
-    def _clean_codigo(self, codigo) -> str:
+    @staticmethod
+    def _clean_codigo(codigo) -> str:
         """Limpia código de especie: quita puntos, ceros a izquierda, etc."""
-        if codigo is None:
-            return ""
-        codigo_str = str(codigo).strip()
-        # Quitar puntos
-        codigo_str = codigo_str.replace('.', '').replace(',', '')
-        # Quitar ceros a la izquierda
-        try:
-            return str(int(float(codigo_str)))
-        except:
-            return codigo_str
+        return clean_codigo(codigo)
     
     def _split_especie(self, especie: str) -> Tuple[str, str]:
         """Divide especie en Ticker y resto del nombre."""
@@ -1081,32 +1028,12 @@ class GalloVisualMerger:
     
     def _parse_fecha(self, fecha_value) -> Tuple[datetime, int]:
         """Parsea fecha de varios formatos. Retorna (datetime, año)."""
-        if fecha_value is None:
-            return None, 0
-        
-        if isinstance(fecha_value, datetime):
-            return fecha_value, fecha_value.year
-        
-        if isinstance(fecha_value, str):
-            fecha_str = fecha_value.strip()
-            # Formato dd/mm/yy o dd/mm/yyyy
-            try:
-                parts = fecha_str.split('/')
-                if len(parts) == 3:
-                    day, month, year = int(parts[0]), int(parts[1]), int(parts[2])
-                    # Ajustar año de 2 dígitos
-                    if year < 100:
-                        year = 2000 + year if year < 50 else 1900 + year
-                    return datetime(year, month, day), year
-            except:
-                pass
-        
-        return None, 0
+        return parse_fecha(fecha_value)
     
-    def _is_year_2025(self, fecha_value) -> bool:
-        """Verifica si una fecha corresponde a 2025."""
+    def _is_year_periodo(self, fecha_value) -> bool:
+        """Verifica si una fecha corresponde al año del período."""
         _, year = self._parse_fecha(fecha_value)
-        return year == 2025
+        return year == self.anio
     
     def _buscar_codigo_especie(self, especie: str, tipo_especie: str = None) -> Tuple[str, str]:
         """
@@ -1115,30 +1042,39 @@ class GalloVisualMerger:
         """
         especie_upper = str(especie).upper().strip()
         
-        # Primero buscar en transacciones de Gallo
+        # Primero buscar en transacciones de Gallo (índice construido una sola vez por caso)
+        if self._gallo_transacciones_index is None:
+            self._gallo_transacciones_index = self._build_gallo_transacciones_index()
+        codigo = self._gallo_transacciones_index.buscar(especie_upper)
+        if codigo:
+            return codigo, "Gallo"
+        
+        # Fallback: buscar en EspeciesGallo por nombre similar
+        codigo = self.aux_store.especies_gallo_nombre_index.buscar(especie_upper)
+        if codigo:
+            return codigo, "EspeciesGallo"
+        
+        return "", "NoEncontrado"
+    
+    def _build_gallo_transacciones_index(self) -> "EspecieNombreIndex":
+        """Indexa (Col C = especie -> Col B = cod_especie) de todas las hojas de transacciones de Gallo."""
+        entradas = []
         for sheet_name in self.gallo_wb.sheetnames:
             if sheet_name in ['Posicion Inicial', 'Posicion Final', 'Resultados']:
                 continue
             try:
                 ws = self.gallo_wb[sheet_name]
-                for row in range(2, min(ws.max_row + 1, 500)):  # Limitar búsqueda
-                    cod = ws.cell(row, 2).value  # Col B = cod_especie
-                    esp = ws.cell(row, 3).value  # Col C = especie
-                    if esp and self._match_especie(especie_upper, str(esp).upper()):
-                        if cod:
-                            return self._clean_codigo(cod), "Gallo"
-            except:
+                for row in ws.iter_rows(min_row=2, max_col=3, values_only=True):
+                    cod = row[1] if len(row) > 1 else None
+                    esp = row[2] if len(row) > 2 else None
+                    if esp and cod:
+                        entradas.append((str(esp).upper(), self._clean_codigo(cod)))
+            except Exception:
                 continue
-        
-        # Fallback: buscar en EspeciesGallo por nombre similar
-        for codigo, data in self._especies_gallo_cache.items():
-            nombre = data.get('nombre', '')
-            if nombre and self._match_especie(especie_upper, str(nombre).upper()):
-                return codigo, "EspeciesGallo"
-        
-        return "", "NoEncontrado"
+        return EspecieNombreIndex(entradas)
     
-    def _match_especie(self, especie1: str, especie2: str) -> bool:
+    @staticmethod
+    def _match_especie(especie1: str, especie2: str) -> bool:
         """Verifica si dos especies hacen match (fuzzy)."""
         # Limpieza básica
         e1 = especie1.replace('-', ' ').replace('/', ' ').strip()
@@ -1165,24 +1101,51 @@ class GalloVisualMerger:
         
         return False
     
+    # Tipos probados en orden para una cotización diaria: MEP primero, igual que el
+    # BUSCARV(fecha; 'Cotizacion Dolar Historica'!A:B) de las fórmulas.
+    TIPOS_COTIZACION = ["Dolar MEP (local)", "Dolar MEP", "Dolar Cable"]
+
     def _get_cotizacion(self, fecha, tipo_moneda: str) -> float:
         """Obtiene cotización del dólar para una fecha y tipo."""
+        return self._get_cotizaciones([fecha], tipo_moneda)[0]
+
+    def _get_cotizaciones(self, fechas: List, tipo_moneda: str) -> List[float]:
+        """
+        Cotizaciones de una columna de fechas en una búsqueda vectorizada por tipo.
+
+        Primero busca el dato exacto del día (ver TIPOS_COTIZACION); si falta (feriado,
+        fin de semana) usa la última cotización MEP anterior. Sin fecha válida retorna 1.0.
+        """
         if tipo_moneda == "Pesos":
-            return 1.0
-        
-        # Normalizar fecha
-        if isinstance(fecha, datetime):
-            fecha_key = fecha.date()
-        else:
-            fecha_key = fecha
-        
-        # Buscar en cache con diferentes variantes del tipo
-        for tipo_key in ["Dolar MEP (local)", "Dolar MEP", "Dolar Cable", tipo_moneda]:
-            if (fecha_key, tipo_key) in self._cotizacion_cache:
-                return self._cotizacion_cache[(fecha_key, tipo_key)]
-        
-        return 1.0
-    
+            return [1.0] * len(fechas)
+
+        cotizaciones = [None] * len(fechas)
+        for tipo_key in self.TIPOS_COTIZACION + [tipo_moneda]:
+            faltantes = [i for i, cotizacion in enumerate(cotizaciones) if cotizacion is None]
+            if not faltantes:
+                break
+            for i, cotizacion in zip(faltantes, self._fx_rates.values_for([fechas[i] for i in faltantes], tipo_key)):
+                cotizaciones[i] = cotizacion
+        faltantes = [i for i, cotizacion in enumerate(cotizaciones) if cotizacion is None]
+        if faltantes:
+            previas = self._fx_rates.values_for([fechas[i] for i in faltantes], self.TIPOS_COTIZACION[0], as_of=True)
+            for i, cotizacion in zip(faltantes, previas):
+                cotizaciones[i] = cotizacion
+        return [1.0 if cotizacion is None else cotizacion for cotizacion in cotizaciones]
+
+    def _cotizaciones_por_fila(self, ws, col_fecha: int, col_moneda: Optional[int] = None,
+                               tipo_default: str = "Dolar MEP") -> Dict[int, float]:
+        """Cotización de cada fila de ws (fecha en col_fecha, tipo en col_moneda) agrupando por tipo."""
+        filas_por_tipo: Dict[str, List[int]] = {}
+        for row in range(2, ws.max_row + 1):
+            moneda = ws.cell(row, col_moneda).value if col_moneda else None
+            filas_por_tipo.setdefault(str(moneda) if moneda else tipo_default, []).append(row)
+        cotizaciones = {}
+        for tipo, filas in filas_por_tipo.items():
+            fechas = [ws.cell(row, col_fecha).value for row in filas]
+            cotizaciones.update(zip(filas, self._get_cotizaciones(fechas, tipo)))
+        return cotizaciones
+
     def _generate_ticker_variations(self, ticker: str) -> List[str]:
         """
         Genera variaciones de ticker cambiando 0↔O para manejar errores de OCR.
@@ -1217,9 +1180,9 @@ class GalloVisualMerger:
         if ticker_upper in ['PESOS', '$']:
             return 1.0
         if ticker_upper in ['DOLARES', 'USD', 'U$S', 'DOLAR']:
-            return 1167.806
+            return self.COTIZACION_INICIO_PERIODO
         if 'CABLE' in ticker_upper:
-            return 1148.93
+            return self.COTIZACION_INICIO_PERIODO_CABLE
         
         # Primero probar ticker exacto
         data = self._precios_iniciales_cache.get(ticker_upper, {})
@@ -1380,9 +1343,9 @@ class GalloVisualMerger:
         if not self.precio_tenencias_wb:
             return row_out
 
-        src_ws = self.precio_tenencias_wb['PrecioTenenciasIniciales'] if 'PrecioTenenciasIniciales' in self.precio_tenencias_wb.sheetnames else self.precio_tenencias_wb.active
+        src_ws = self._precio_tenencias_source()
         existing_codes = existing_codes or set()
-        headers = [str(src_ws.cell(1, c).value or '').strip().lower() for c in range(1, src_ws.max_column + 1)]
+        headers = src_ws.headers
 
         def find_exact(*names: str) -> Optional[int]:
             normalized = {str(name).strip().lower() for name in names if name}
@@ -1403,12 +1366,12 @@ class GalloVisualMerger:
 
         for row in range(2, src_ws.max_row + 1):
             codigo_raw = src_ws.cell(row, col_cod).value
-            codigo_clean = self._clean_codigo(codigo_raw)
+            codigo_clean = src_ws.codigo(row, col_cod)
             if not codigo_clean or codigo_clean in existing_codes:
                 continue
 
-            cantidad = self._to_float(src_ws.cell(row, col_cantidad).value)
-            precio_tenencia = self._to_float(src_ws.cell(row, col_precio).value)
+            cantidad = src_ws.numero(row, col_cantidad)
+            precio_tenencia = src_ws.numero(row, col_precio)
             zero_cost_recovered = self._has_zero_cost_precio_tenencia(codigo_clean)
             if zero_cost_recovered:
                 precio_tenencia = 0
@@ -1417,7 +1380,7 @@ class GalloVisualMerger:
 
             ticker = src_ws.cell(row, col_ticker).value if col_ticker else ''
             especie = src_ws.cell(row, col_especie).value if col_especie else ''
-            importe_invertido_raw = self._to_float(src_ws.cell(row, col_importe).value) if col_importe else 0
+            importe_invertido_raw = src_ws.numero(row, col_importe) if col_importe else 0
             importe_invertido = 0 if zero_cost_recovered else abs(importe_invertido_raw)
             visual_data = self._especies_visual_cache.get(codigo_clean, {})
             ticker = ticker or visual_data.get('ticker') or ''
@@ -1484,7 +1447,12 @@ class GalloVisualMerger:
         
         return ''
     
-    def merge(self, output_mode: str = "both", auto_fallback_usd_basis_on_validation: bool = True) -> Tuple[Workbook, Workbook]:
+    def merge(
+        self,
+        output_mode: str = "both",
+        auto_fallback_usd_basis_on_validation: bool = True,
+        formulas_path: Optional[Union[str, Path]] = None,
+    ) -> Tuple[Workbook, Workbook]:
         """
         Ejecuta el merge completo y retorna el/los workbook(s) consolidado(s).
         
@@ -1493,6 +1461,9 @@ class GalloVisualMerger:
                         o "both" (ambas versiones, default)
             auto_fallback_usd_basis_on_validation: si una base Precio Tenencias en USD dispara
                         validación económica, reintenta ese código con Posición Gallo USD.
+            formulas_path: si se indica, el workbook de fórmulas se guarda ahí y se libera
+                        antes de armar la copia de valores (se relee del archivo), así nunca
+                        hay dos workbooks del merge en memoria. Retorna (None, wb_values).
         
         Returns:
             Tuple (wb_formulas, wb_values). Si output_mode != "both", 
@@ -1502,47 +1473,64 @@ class GalloVisualMerger:
         # Eliminar hoja default
         wb.remove(wb.active)
         
-        # Crear hojas en orden
-        self._create_posicion_inicial(wb)
-        self._create_posicion_final(wb)
-        self._create_boletos(wb)
-        self._create_cauciones_tomadoras(wb)  # Cauciones Tomadoras
-        self._create_cauciones_colocadoras(wb)  # Cauciones Colocadoras
-        self._create_rentas_dividendos_gallo(wb)
-        self._create_resultado_ventas_ars(wb)
-        self._create_resultado_ventas_usd(wb)
-        self._create_rentas_dividendos_ars(wb)
-        self._create_rentas_dividendos_usd(wb)
-        self._create_fci(wb)
-        self._create_opciones(wb)
-        self._create_futuros(wb)
-        self._create_pagare_cpd(wb)
-        self._create_resumen(wb)
-        self._create_posicion_titulos(wb)  # Copia directa de Visual
-        
-        # Agregar hojas auxiliares
-        self._add_aux_sheets(wb)
-        self._add_precio_tenencias_sheet(wb)
-        self._add_ratios_cedears_sheet(wb)
-
-        if self.USE_INVARIANT_FORMULAS:
-            self._normalize_formulas_to_english(wb)
-        
-        if output_mode == "formulas":
+        # Crear hojas en orden (cada paso queda como span "merge.<paso>" si hay tracer activo)
+        build_steps = (
+            self._create_posicion_inicial,
+            self._create_posicion_final,
+            self._create_boletos,
+            self._create_cauciones_tomadoras,  # Cauciones Tomadoras
+            self._create_cauciones_colocadoras,  # Cauciones Colocadoras
+            self._create_rentas_dividendos_gallo,
+            self._create_resultado_ventas_ars,
+            self._create_resultado_ventas_usd,
+            self._create_rentas_dividendos_ars,
+            self._create_rentas_dividendos_usd,
+            self._create_fci,
+            self._create_opciones,
+            self._create_futuros,
+            self._create_pagare_cpd,
+            self._create_resumen,
+            self._create_posicion_titulos,  # Copia directa de Visual
+            # Agregar hojas auxiliares
+            self._add_aux_sheets,
+            self._add_precio_tenencias_sheet,
+            self._add_ratios_cedears_sheet,
+        )
+        for step in build_steps:
+            with span(f"merge.{step.__name__.lstrip('_')}", "merge"):
+                step(wb)
+
+        if formulas_path is not None:
+            with span("merge.save_formulas", "merge"):
+                wb.save(formulas_path)
+            if output_mode == "formulas":
+                return (None, None)
+            del wb
+            with span("merge.load_values_copy", "merge"):
+                wb_values = load_workbook(formulas_path)
+            wb = None
+        elif output_mode == "formulas":
             return (wb, None)
-        
-        # Crear copia para materializar valores
-        wb_values = self._deep_copy_workbook(wb)
+        else:
+            # Crear copia para materializar valores
+            with span("merge.deep_copy_workbook", "merge"):
+                wb_values = self._deep_copy_workbook(wb)
         
         # Materializar todas las fórmulas en la copia
         self._materialize_formulas(wb_values)
 
         if auto_fallback_usd_basis_on_validation and self.prefer_precio_tenencias_usd_cost_basis:
-            fallback_codes = self._usd_basis_fallback_codes_from_validation(wb_values)
+            with span("merge.usd_basis_fallback_check", "merge"):
+                fallback_codes = self._usd_basis_fallback_codes_from_validation(wb_values)
             new_codes = fallback_codes - self.precio_tenencias_usd_basis_fallback_codes
             if new_codes:
                 self.precio_tenencias_usd_basis_fallback_codes.update(new_codes)
-                return self.merge(output_mode=output_mode, auto_fallback_usd_basis_on_validation=False)
+                del wb_values
+                return self.merge(
+                    output_mode=output_mode,
+                    auto_fallback_usd_basis_on_validation=False,
+                    formulas_path=formulas_path,
+                )
         
         if output_mode == "values":
             return (None, wb_values)
@@ -1570,50 +1558,6 @@ class GalloVisualMerger:
                 fallback_codes.add(self._clean_codigo(str(code)))
         return fallback_codes
 
-    def _normalize_formulas_to_english(self, wb: Workbook):
-        """
-        Convierte fórmulas a formato invariante (inglés + separador coma + punto decimal)
-        para compatibilidad con Excel 2007+.
-        """
-        func_map = {
-            "SI(": "IF(",
-            "ESERROR(": "ISERROR(",
-            "BUSCARV(": "VLOOKUP(",
-            "HALLAR(": "SEARCH(",
-            "ESNUMERO(": "ISNUMBER(",
-            "O(": "OR(",
-            "MINUSC(": "LOWER(",
-            "IZQUIERDA(": "LEFT(",
-        }
-
-        def _replace_functions(segment: str) -> str:
-            for es, en in func_map.items():
-                segment = re.sub(rf"\b{re.escape(es)}", en, segment, flags=re.IGNORECASE)
-            return segment
-
-        def _normalize_formula(formula: str) -> str:
-            # Separar por comillas para no tocar strings literales
-            parts = formula.split('"')
-            for i in range(0, len(parts), 2):
-                part = parts[i]
-                part = _replace_functions(part)
-                # Booleanos ES -> EN
-                part = re.sub(r"\bFALSO\b", "FALSE", part, flags=re.IGNORECASE)
-                part = re.sub(r"\bVERDADERO\b", "TRUE", part, flags=re.IGNORECASE)
-                # Decimal coma -> punto (solo entre dígitos)
-                part = re.sub(r"(?<=\d),(?=\d)", ".", part)
-                # Separador de argumentos -> coma
-                part = part.replace(";", ",")
-                parts[i] = part
-            return '"'.join(parts)
-
-        for ws in wb.worksheets:
-            for row in ws.iter_rows():
-                for cell in row:
-                    val = cell.value
-                    if isinstance(val, str) and val.startswith('='):
-                        cell.value = _normalize_formula(val)
-    
     def _materialize_formulas(self, wb: Workbook):
         """
         Convierte todas las fórmulas de Excel a valores calculados en Python.
@@ -1621,29 +1565,36 @@ class GalloVisualMerger:
         """
         # 0. Materializar fórmulas en Posicion Inicial y Final (PRIMERO, porque Resultado Ventas las usa)
         if 'Posicion Inicial Gallo' in wb.sheetnames:
-            self._materialize_posicion(wb['Posicion Inicial Gallo'])
+            with span("merge.materialize_posicion", "merge", sheet="Posicion Inicial Gallo"):
+                self._materialize_posicion(wb['Posicion Inicial Gallo'])
         if 'Posicion Final Gallo' in wb.sheetnames:
-            self._materialize_posicion(wb['Posicion Final Gallo'])
+            with span("merge.materialize_posicion", "merge", sheet="Posicion Final Gallo"):
+                self._materialize_posicion(wb['Posicion Final Gallo'])
         
         # 1. Materializar fórmulas en Boletos
         if 'Boletos' in wb.sheetnames:
-            self._materialize_boletos(wb['Boletos'])
+            with span("merge.materialize_boletos", "merge"):
+                self._materialize_boletos(wb['Boletos'])
         
         # 2. Materializar fórmulas en Rentas y Dividendos Gallo
         if 'Rentas y Dividendos Gallo' in wb.sheetnames:
-            self._materialize_rentas_dividendos_gallo(wb['Rentas y Dividendos Gallo'])
+            with span("merge.materialize_rentas_dividendos_gallo", "merge"):
+                self._materialize_rentas_dividendos_gallo(wb['Rentas y Dividendos Gallo'])
         
         # 3. Materializar fórmulas en Resultado Ventas ARS
         if 'Resultado Ventas ARS' in wb.sheetnames:
-            self._materialize_resultado_ventas(wb['Resultado Ventas ARS'], "ARS")
+            with span("merge.materialize_resultado_ventas", "merge", moneda="ARS"):
+                self._materialize_resultado_ventas(wb['Resultado Ventas ARS'], "ARS")
         
         # 4. Materializar fórmulas en Resultado Ventas USD
         if 'Resultado Ventas USD' in wb.sheetnames:
-            self._materialize_resultado_ventas(wb['Resultado Ventas USD'], "USD")
+            with span("merge.materialize_resultado_ventas", "merge", moneda="USD"):
+                self._materialize_resultado_ventas(wb['Resultado Ventas USD'], "USD")
 
         # 5. Materializar Resumen (usa valores ya calculados)
         if 'Resumen' in wb.sheetnames:
-            self._materialize_resumen(wb)
+            with span("merge.materialize_resumen", "merge"):
+                self._materialize_resumen(wb)
 
     def _materialize_resumen(self, wb: Workbook):
         """Calcula valores del Resumen a partir de hojas ya materializadas."""
@@ -1700,6 +1651,8 @@ class GalloVisualMerger:
         ws.cell(3, 11, (ventas_usd or 0) + (fci_usd or 0) + (opciones_usd or 0) + (rentas_usd or 0) + (dividendos_usd or 0) + (pagare_cpd_usd or 0) + (futuros_usd or 0) + (cauciones_tom_usd or 0) + (cauciones_col_usd or 0))
 
     def _find_header_column(self, ws, aliases: List[str]) -> Optional[int]:
+        if isinstance(ws, SheetTable):
+            return ws.find_header(aliases)
         alias_list = [a.lower() for a in aliases]
         for c in range(1, ws.max_column + 1):
             header = str(ws.cell(1, c).value or '').strip().lower()
@@ -1769,6 +1722,7 @@ class GalloVisualMerger:
             ws.cell(1, col_precio_nominal, 'Precio Nominal')
             ws.cell(1, col_precio_nominal).font = Font(bold=True)
         
+        cotizaciones = self._cotizaciones_por_fila(ws, col_fecha=2, col_moneda=5)
         for row in range(2, ws.max_row + 1):
             # Col G = Cod.Instrum (valor directo)
             cod_instrum = ws.cell(row, 7).value
@@ -1805,13 +1759,7 @@ class GalloVisualMerger:
             # Col L (12): Tipo Cambio - Si es fórmula, calcular
             cell_val = ws.cell(row, 12).value
             if isinstance(cell_val, str) and cell_val.startswith('='):
-                moneda = ws.cell(row, 5).value  # Col E = Moneda
-                fecha = ws.cell(row, 2).value   # Col B = Fecha Concertación
-                if moneda == "Pesos":
-                    tc = 1.0
-                else:
-                    tc = self._get_cotizacion(fecha, str(moneda) if moneda else "Dolar MEP")
-                ws.cell(row, 12, tc)
+                ws.cell(row, 12, cotizaciones[row])  # 1 si Col E = Pesos, sino cotización de Col B
             
             # Obtener precio original (Col K, 11)
             precio_original = ws.cell(row, 11).value
@@ -1926,6 +1874,7 @@ class GalloVisualMerger:
         - Q (17): Neto Calculado = Para amortización: M*(-1), para otros: J-O+P
         - S (19): Moneda Emisión = VLOOKUP a EspeciesVisual
         """
+        cotizaciones = self._cotizaciones_por_fila(ws, col_fecha=2, col_moneda=5)
         for row in range(2, ws.max_row + 1):
             # Col G (7) = Cod.Instrum
             cod_instrum = ws.cell(row, 7).value
@@ -1945,13 +1894,7 @@ class GalloVisualMerger:
             # Col L (12): Tipo Cambio
             cell_val = ws.cell(row, 12).value
             if isinstance(cell_val, str) and cell_val.startswith('='):
-                moneda = ws.cell(row, 5).value  # Col E = Moneda
-                fecha = ws.cell(row, 2).value   # Col B = Fecha
-                if moneda == "Pesos":
-                    tc = 1.0
-                else:
-                    tc = self._get_cotizacion(fecha, str(moneda) if moneda else "Dolar MEP")
-                ws.cell(row, 12, tc)
+                ws.cell(row, 12, cotizaciones[row])  # 1 si Col E = Pesos, sino cotización de Col B
             
             # Col Q (17): Neto Calculado
             cell_val = ws.cell(row, 17).value
@@ -2007,6 +1950,8 @@ class GalloVisualMerger:
         stock_cantidad = 0.0
         stock_precio = 0.0  # Este será el precio nominal promedio
         prev_cod_instrum = None
+        # Valor USD del día (Col E = Concertación) para toda la hoja en una búsqueda
+        cotizaciones_usd = self._cotizaciones_por_fila(ws, col_fecha=5) if moneda_tipo != "ARS" else {}
         
         for row in range(2, ws.max_row + 1):
             # Leer valores de la fila actual
@@ -2076,14 +2021,12 @@ class GalloVisualMerger:
                 # Materializar P (Valor USD Día) - si es fórmula, calcular VLOOKUP
                 valor_usd_dia_cell = ws.cell(row, 16).value
                 if isinstance(valor_usd_dia_cell, str) and valor_usd_dia_cell.startswith('='):
-                    fecha = ws.cell(row, 5).value  # Col E = Concertación
-                    valor_usd_dia = self._get_cotizacion(fecha, "Dolar MEP")
+                    valor_usd_dia = cotizaciones_usd[row]
                     ws.cell(row, 16, valor_usd_dia)
                 else:
                     valor_usd_dia = self._to_float(valor_usd_dia_cell)
                 if valor_usd_dia == 0:
-                    fecha = ws.cell(row, 5).value
-                    valor_usd_dia = self._get_cotizacion(fecha, "Dolar MEP")
+                    valor_usd_dia = cotizaciones_usd[row]
                     ws.cell(row, 16, valor_usd_dia)
                 
                 # Materializar O (Tipo Cambio) - 1 para dolar, sino 1/P
@@ -2293,30 +2236,8 @@ class GalloVisualMerger:
     
     def _to_float(self, value) -> float:
         """Convierte un valor a float de forma segura."""
-        if value is None:
-            return 0.0
-        if isinstance(value, str):
-            # Si es fórmula, retornar 0
-            if value.startswith('='):
-                return 0.0
-            try:
-                return float(value.replace(',', '.').replace(' ', ''))
-            except:
-                return 0.0
-        try:
-            return float(value)
-        except:
-            return 0.0
+        return to_float(value)
 
-    def _fmt_num_es(self, value: float) -> str:
-        """Formatea un número para fórmulas en Excel ES (coma decimal)."""
-        try:
-            num = float(value)
-        except:
-            return "0"
-        s = f"{num}".replace(".", ",")
-        return s
-    
     def _deep_copy_workbook(self, wb: Workbook) -> Workbook:
         """Crea una copia profunda del workbook guardando a BytesIO y recargando."""
         from io import BytesIO
@@ -2325,9 +2246,6 @@ class GalloVisualMerger:
         buffer.seek(0)
         return load_workbook(buffer)
     
-    # Cotización del dólar MEP al inicio del período (31/12/2024)
-    COTIZACION_INICIO_PERIODO = 1167.806
-    
     def _get_posicion_inicial(
         self,
         wb: Workbook,
@@ -2449,13 +2367,14 @@ class GalloVisualMerger:
         return None
 
     def _compute_synthetic_initial_positions(self) -> dict:
-        """Compute initial positions from ALL pre-2025 historical operations in Gallo.
+        """Compute initial positions from ALL pre-period historical operations in Gallo.
 
         For securities that have transactions in Gallo but no row in
         Posicion Inicial, we build a running weighted-average stock from
-        every pre-2025 operation (COMPRA, VENTA, TRF TITULOS, CANJE,
+        every pre-period operation (COMPRA, VENTA, TRF TITULOS, CANJE,
         LICITACION, AMORTIZACION, etc.) to derive the correct cost basis
-        at 01/01/2025.
+        at 01/01 of the period year. With a position_ledger and comitente the
+        replay starts from the last stored year-end closing (see position_ledger).
 
         Returns:
             dict keyed by cleaned cod_instrum -> {
@@ -2465,16 +2384,40 @@ class GalloVisualMerger:
                 'tipo_especie': str,      # sheet name (e.g. 'Renta Fija Dolares')
             }
         """
-        from collections import defaultdict
+        estados = self._aperturas.get(self.anio)
+        if estados is None:
+            estados = opening_positions(
+                self._operaciones_apertura(self.anio),
+                self.anio,
+                comitente=self.comitente,
+                ledger=self.position_ledger,
+            )
+
+        result = {}
+        for cod, estado in estados.items():
+            if estado.cantidad > 0 and estado.precio_per100 > 0:
+                # Determine if this security's sheet uses USD pricing
+                is_usd_sheet = any(tok in estado.tipo_especie.lower()
+                                   for tok in ['dolar', 'exterior'])
+                result[cod] = {
+                    'cantidad': estado.cantidad,
+                    'precio_per100': estado.precio_per100,
+                    'especie': estado.especie,
+                    'tipo_especie': estado.tipo_especie,
+                    'is_usd': is_usd_sheet,
+                }
+
+        return result
 
-        # Collect all pre-2025 operations grouped by security
-        ops_by_cod: dict = defaultdict(list)
+    def _collect_gallo_stock_operations(self) -> List[Operacion]:
+        """Stock-moving Gallo transactions of every year, deduplicated, in sheet order."""
+        operaciones: List[Operacion] = []
         seen = set()
 
         for sheet_name in self.gallo_wb.sheetnames:
             if any(skip in sheet_name for skip in ['Posicion', 'Posición', 'Resultado', 'Cauciones', 'Totales']):
                 continue
-            gallo_ws = self.gallo_wb[sheet_name]
+            gallo_ws = self._input_sheet(self.gallo_wb, sheet_name)
             for row in range(2, gallo_ws.max_row + 1):
                 tipo_fila = gallo_ws.cell(row, 1).value
                 if not tipo_fila or str(tipo_fila).lower().strip() != 'transaccion':
@@ -2485,9 +2428,7 @@ class GalloVisualMerger:
                 if not operacion or not fecha:
                     continue
 
-                # Only pre-2025 operations
-                if self._is_year_2025(fecha):
-                    continue
+                fecha_dt, year = gallo_ws.fecha(row, 4)
 
                 operacion_lower = str(operacion).lower().strip()
                 # Accept buy/sell/trf/canje/amort — anything that moves stock
@@ -2495,13 +2436,12 @@ class GalloVisualMerger:
                 if not any(op in operacion_lower for op in ops_validas):
                     continue
 
-                cod_especie = gallo_ws.cell(row, 2).value
                 especie = gallo_ws.cell(row, 3).value
                 numero = gallo_ws.cell(row, 6).value
-                cantidad = self._to_float(gallo_ws.cell(row, 7).value)
-                precio = self._to_float(gallo_ws.cell(row, 8).value)
+                cantidad = gallo_ws.numero(row, 7)
+                precio = gallo_ws.numero(row, 8)
 
-                cod_clean = self._clean_codigo(cod_especie)
+                cod_clean = gallo_ws.codigo(row, 2)
                 if not cod_clean:
                     continue
 
@@ -2512,50 +2452,169 @@ class GalloVisualMerger:
                     continue
                 seen.add(dedup_key)
 
-                fecha_dt, _ = self._parse_fecha(fecha)
-                ops_by_cod[cod_clean].append({
-                    'fecha': fecha_dt,
-                    'operacion': operacion_lower,
-                    'cantidad': cantidad,
-                    'precio': precio,
-                    'especie': especie,
-                    'tipo_especie': sheet_name,
-                })
+                operaciones.append(Operacion(
+                    cod=cod_clean,
+                    fecha=fecha_dt,
+                    anio=year,
+                    operacion=operacion_lower,
+                    cantidad=cantidad,
+                    precio=precio,
+                    especie=especie,
+                    tipo_especie=sheet_name,
+                ))
 
-        # For each security, compute running stock through chronological operations
-        result = {}
-        for cod, ops in ops_by_cod.items():
-            ops.sort(key=lambda o: (o['fecha'] or datetime(1900, 1, 1), 0 if o['cantidad'] >= 0 else 1))
-            stock_qty = 0.0
-            stock_price = 0.0  # weighted average in per-100 terms
-
-            for op in ops:
-                qty = op['cantidad']
-                px = op['precio']
-
-                if qty > 0:  # Buy-like: COMPRA, TRF, CANJE, LICITACION
-                    valor_anterior = stock_qty * stock_price
-                    valor_nuevo = qty * px
-                    stock_qty += qty
-                    if stock_qty > 0:
-                        stock_price = (valor_anterior + valor_nuevo) / stock_qty
-                elif qty < 0:  # Sell-like: VENTA, AMORTIZACION
-                    stock_qty += qty  # qty is negative
-                    # Price doesn't change on sales
-
-            if stock_qty > 0 and stock_price > 0:
-                # Determine if this security's sheet uses USD pricing
-                is_usd_sheet = any(tok in ops[-1]['tipo_especie'].lower()
-                                   for tok in ['dolar', 'exterior'])
-                result[cod] = {
-                    'cantidad': stock_qty,
-                    'precio_per100': stock_price,
-                    'especie': ops[-1]['especie'],
-                    'tipo_especie': ops[-1]['tipo_especie'],
-                    'is_usd': is_usd_sheet,
-                }
+        return operaciones
 
-        return result
+    def _gallo_stock_operations(self) -> List[Operacion]:
+        """Operaciones de stock de Gallo, leídas una sola vez por merger (todas las corridas/años)."""
+        if self._operaciones_stock is None:
+            self._operaciones_stock = self._collect_gallo_stock_operations()
+        return self._operaciones_stock
+
+    def _anio_snapshot(self, sheet_name: str) -> int:
+        """
+        Año fiscal al que corresponde la Posicion Inicial/Final de Gallo.
+
+        Usa la fecha del snapshot si el Excel la trae (metadata o columna "fecha"; una
+        posición al 31/12 es la apertura del año siguiente). Sin fecha se asume que el
+        resumen de Gallo es el del último año de merge_years.
+        """
+        fecha = self._gallo_position_dates.get(sheet_name) or self._fecha_columna_snapshot(sheet_name)
+        if fecha is None:
+            return self._anios_corrida[1]
+        if sheet_name == 'Posicion Inicial' and (fecha.month, fecha.day) == (12, 31):
+            return fecha.year + 1
+        return fecha.year
+
+    def _fecha_columna_snapshot(self, sheet_name: str) -> Optional[date]:
+        """Primera fecha de la columna "fecha" de la Posicion Inicial/Final de Gallo."""
+        if sheet_name not in self.gallo_wb.sheetnames:
+            return None
+        ws = self._input_sheet(self.gallo_wb, sheet_name)
+        col = ws.find_column(['fecha'])
+        if not col:
+            return None
+        for row in range(2, ws.max_row + 1):
+            parsed = self._parse_date_value(ws.cell(row, col).value)
+            if parsed:
+                return parsed
+        return None
+
+    def _snapshot_aplica(self, sheet_name: str) -> bool:
+        """Un merge de un solo año usa siempre los snapshots de Gallo (comportamiento histórico)."""
+        if self._anios_corrida is None:
+            return True
+        return self._anio_snapshot(sheet_name) == self.anio
+
+    def _semilla_posicion_inicial(self, anio_snapshot: int) -> List[Operacion]:
+        """
+        Posicion Inicial de Gallo como operaciones de apertura al 31/12 del año previo.
+
+        Precio en las unidades de las transacciones de Gallo: USD para hojas en dólares,
+        pesos para el resto, y cada 100 nominales en renta fija.
+        """
+        if 'Posicion Inicial' not in self.gallo_wb.sheetnames:
+            return []
+        gallo_ws = self._input_sheet(self.gallo_wb, 'Posicion Inicial')
+        fecha = datetime(anio_snapshot - 1, 12, 31)
+        semilla = []
+        for row in range(2, gallo_ws.max_row + 1):
+            tipo_especie = str(gallo_ws.cell(row, 1).value or '')
+            especie_full = gallo_ws.cell(row, 2).value
+            cantidad = gallo_ws.numero(row, 5)
+            if not especie_full or cantidad <= 0:
+                continue
+            ticker, especie = self._split_especie(especie_full)
+            if self._is_moneda(ticker):
+                continue
+            codigo = self._get_codigo_from_ticker(ticker) or self._buscar_codigo_especie(especie_full, tipo_especie)[0]
+            cod_clean = self._clean_codigo(codigo) if codigo else ''
+            if not cod_clean:
+                continue
+
+            tipo_lower = tipo_especie.lower()
+            es_usd = any(tok in tipo_lower for tok in ['dolar', 'exterior'])
+            importe = gallo_ws.numero(row, 9 if es_usd else 7)
+            precio = importe / cantidad * (100 if 'renta fija' in tipo_lower else 1)
+            semilla.append(Operacion(
+                cod=cod_clean,
+                fecha=fecha,
+                anio=fecha.year,
+                operacion='posicion inicial',
+                cantidad=cantidad,
+                precio=precio,
+                especie=especie,
+                tipo_especie=tipo_especie,
+            ))
+        return semilla
+
+    def _operaciones_apertura(self, anio: int) -> List[Operacion]:
+        """
+        Operaciones que definen la apertura de `anio`.
+
+        Hasta el año de la Posicion Inicial de Gallo es toda la historia. Para años
+        posteriores la Posicion Inicial reemplaza la historia previa de sus especies,
+        así el stock que no operó se arrastra de un período al siguiente.
+        """
+        operaciones = self._gallo_stock_operations()
+        if self._anios_corrida is None:
+            return operaciones
+        anio_snapshot = self._anio_snapshot('Posicion Inicial')
+        if anio <= anio_snapshot:
+            return operaciones
+        semilla = self._semilla_posicion_inicial(anio_snapshot)
+        cods = {op.cod for op in semilla}
+        return semilla + [op for op in operaciones if op.cod not in cods or op.anio >= anio_snapshot]
+
+    def merge_years(
+        self,
+        anios: Iterable[int],
+        output_mode: str = "both",
+        auto_fallback_usd_basis_on_validation: bool = True,
+    ) -> Dict[int, Tuple[Workbook, Workbook]]:
+        """
+        Ejecuta el merge para varios años fiscales con una sola carga de los inputs.
+
+        Las operaciones de Gallo se leen y ordenan una vez; la apertura de cada año
+        arrastra el stock del anterior (ver position_ledger.openings_by_year). La
+        Posicion Inicial/Final de Gallo se usa en el año al que corresponde.
+
+        Returns:
+            dict anio -> (wb_formulas, wb_values), como merge().
+        """
+        anios = sorted(set(anios))
+        if not anios:
+            return {}
+        anio_original = self.anio
+        fallback_codes = set(self.precio_tenencias_usd_basis_fallback_codes)
+        self._anios_corrida = (anios[0], anios[-1])
+        try:
+            # Años hasta el de la Posicion Inicial usan toda la historia; los siguientes, la semilla
+            anio_snapshot = self._anio_snapshot('Posicion Inicial')
+            for grupo in ([a for a in anios if a <= anio_snapshot], [a for a in anios if a > anio_snapshot]):
+                if grupo:
+                    self._aperturas.update(openings_by_year(
+                        self._operaciones_apertura(grupo[0]),
+                        grupo,
+                        comitente=self.comitente,
+                        ledger=self.position_ledger,
+                    ))
+
+            results = {}
+            for anio in anios:
+                self.anio = anio
+                self.precio_tenencias_usd_basis_fallback_codes = set(fallback_codes)
+                with span("merge.year", "merge", anio=anio):
+                    results[anio] = self.merge(
+                        output_mode=output_mode,
+                        auto_fallback_usd_basis_on_validation=auto_fallback_usd_basis_on_validation,
+                    )
+            return results
+        finally:
+            self.anio = anio_original
+            self._anios_corrida = None
+            self._aperturas = {}
+            self.precio_tenencias_usd_basis_fallback_codes = fallback_codes
 
     def _create_posicion_inicial(self, wb: Workbook):
         """Crea hoja Posicion Inicial Gallo con las mismas columnas que Posicion Final."""
@@ -2574,12 +2633,18 @@ class GalloVisualMerger:
             ws.cell(1, col).font = Font(bold=True)
         
         row_out = 2
-        gallo_ws = self.gallo_wb['Posicion Inicial'] if 'Posicion Inicial' in self.gallo_wb.sheetnames else None
-        if not gallo_ws:
+        # La Posicion Inicial de Gallo (y Precio Tenencias) es la del año del resumen; en los
+        # demás años de merge_years la apertura sale solo de la historia (ver _operaciones_apertura)
+        aplica_snapshot = self._snapshot_aplica('Posicion Inicial')
+        gallo_ws = (
+            self._input_sheet(self.gallo_wb, 'Posicion Inicial')
+            if aplica_snapshot and 'Posicion Inicial' in self.gallo_wb.sheetnames else None
+        )
+        if not gallo_ws and aplica_snapshot:
             self._append_precio_tenencias_initial_positions(ws, row_out)
             return
 
-        for row in range(2, gallo_ws.max_row + 1):
+        for row in (range(2, gallo_ws.max_row + 1) if gallo_ws else ()):
             tipo_especie = gallo_ws.cell(row, 1).value
             especie_full = gallo_ws.cell(row, 2).value
             
@@ -2648,11 +2713,9 @@ class GalloVisualMerger:
             precio_inicial = self._get_precio_inicial(ticker)
             
             # Para TIT.PRIVADOS EXTERIOR, precio viene en USD - convertir a ARS
-            # Usamos cotización del dólar cable al 31/12/2024 (inicio del año)
+            # con la cotización del dólar cable al inicio del período
             if es_tit_privados_ext and precio_inicial > 0:
-                # Cotización dólar cable al inicio del período (usamos el valor fijo)
-                cotizacion_usd = 1148.93  # Dólar Cable 31/12/2024
-                precio_inicial = precio_inicial * cotizacion_usd
+                precio_inicial = precio_inicial * self.COTIZACION_INICIO_PERIODO_CABLE
             
             # Algunas posiciones USD Gallo ya traen el precio unitario en USD.
             # Priorizar ese valor evita mezclar una base en pesos de PrecioTenencias con ventas USD.
@@ -2702,7 +2765,7 @@ class GalloVisualMerger:
             ws.cell(row_out, 19, importe_usd)
             ws.cell(row_out, 20, porc_usd)
             # Col U (21): Tipo Instrumento = VLOOKUP desde EspeciesVisual usando Codigo especie (col D)
-            tipo_instrumento = f'=SI(ESERROR(BUSCARV(D{row_out};EspeciesVisual!C:R;16;FALSO));"";BUSCARV(D{row_out};EspeciesVisual!C:R;16;FALSO))'
+            tipo_instrumento = formula(self._especies_visual_lookup(cell("D", row_out), "C:R", 16))
             ws.cell(row_out, 21, tipo_instrumento)
             # Col V (22): Precio Nominal = Precio a Utilizar normalizado
             ws.cell(row_out, 22, self._normalize_initial_cost_price(
@@ -2713,9 +2776,9 @@ class GalloVisualMerger:
             
             row_out += 1
 
-        # --- Synthetic initial positions from pre-2025 historical operations ---
+        # --- Synthetic initial positions from pre-period historical operations ---
         # For securities that have transactions in Gallo but no Posicion Inicial
-        # entry, compute cost basis from all pre-2025 ops (TRF TITULOS, COMPRA, etc.)
+        # entry, compute cost basis from all pre-period ops (TRF TITULOS, COMPRA, etc.)
         existing_codes = set()
         for r in range(2, row_out):
             cod_val = ws.cell(r, 4).value
@@ -2749,7 +2812,7 @@ class GalloVisualMerger:
             ws.cell(row_out, 3, data['especie'])
             ws.cell(row_out, 4, cod_num)
             ws.cell(row_out, 5, "Synthetic-from-history")
-            ws.cell(row_out, 6, "Computed from pre-2025 ops (TRF/COMPRA/CANJE)")
+            ws.cell(row_out, 6, f"Computed from pre-{self.anio} ops (TRF/COMPRA/CANJE)")
             ws.cell(row_out, 7, "")  # detalle
             ws.cell(row_out, 8, "")  # custodia
             ws.cell(row_out, 9, data['cantidad'])
@@ -2758,13 +2821,13 @@ class GalloVisualMerger:
             ws.cell(row_out, 12, 0)  # PreciosIniciales - not used
             ws.cell(row_out, 13, "")  # precio costo
             ws.cell(row_out, 14, "Synthetic-from-history")  # origen
-            ws.cell(row_out, 15, f"PPP from {len(synthetic)} pre-2025 ops")
+            ws.cell(row_out, 15, f"PPP from {len(synthetic)} pre-{self.anio} ops")
             ws.cell(row_out, 16, precio_per100)  # Precio a Utilizar — ARS per-100 for USD sheets
             ws.cell(row_out, 17, 0)  # importe_pesos
             ws.cell(row_out, 18, 0)  # porc_cartera_pesos
             ws.cell(row_out, 19, 0)  # importe_dolares
             ws.cell(row_out, 20, 0)  # porc_cartera_dolares
-            tipo_inst_formula = f'=SI(ESERROR(BUSCARV(D{row_out};EspeciesVisual!C:R;16;FALSO));"";BUSCARV(D{row_out};EspeciesVisual!C:R;16;FALSO))'
+            tipo_inst_formula = formula(self._especies_visual_lookup(cell("D", row_out), "C:R", 16))
             ws.cell(row_out, 21, tipo_inst_formula)
             ws.cell(row_out, 22, precio_nominal)  # Precio Nominal (already normalized)
 
@@ -2786,9 +2849,11 @@ class GalloVisualMerger:
             ws.cell(1, col, header)
             ws.cell(1, col).font = Font(bold=True)
         
-        # Copiar datos de Gallo
+        # Copiar datos de Gallo (solo en el año al que corresponde el snapshot)
+        if not self._snapshot_aplica('Posicion Final'):
+            return
         try:
-            gallo_ws = self.gallo_wb['Posicion Final']
+            gallo_ws = self._input_sheet(self.gallo_wb, 'Posicion Final')
         except KeyError:
             return
         
@@ -2856,8 +2921,7 @@ class GalloVisualMerger:
             
             # Para TIT.PRIVADOS EXTERIOR, precio viene en USD - convertir a ARS
             if es_tit_privados_ext and precio_inicial > 0:
-                cotizacion_usd = 1148.93  # Dólar Cable 31/12/2024
-                precio_inicial = precio_inicial * cotizacion_usd
+                precio_inicial = precio_inicial * self.COTIZACION_INICIO_PERIODO_CABLE
             
             # Precio a utilizar = precio tenencia inicial
             precio_a_utilizar = precio_inicial
@@ -2884,7 +2948,7 @@ class GalloVisualMerger:
             ws.cell(row_out, 19, importe_usd)
             ws.cell(row_out, 20, porc_usd)
             # Col U (21): Tipo Instrumento = VLOOKUP desde EspeciesVisual usando Codigo especie (col D)
-            tipo_instrumento = f'=SI(ESERROR(BUSCARV(D{row_out};EspeciesVisual!C:R;16;FALSO));"";BUSCARV(D{row_out};EspeciesVisual!C:R;16;FALSO))'
+            tipo_instrumento = formula(self._especies_visual_lookup(cell("D", row_out), "C:R", 16))
             ws.cell(row_out, 21, tipo_instrumento)
             # Col V (22): Precio Nominal = Precio a Utilizar normalizado
             ws.cell(row_out, 22, self._normalize_initial_cost_price(
@@ -2916,14 +2980,14 @@ class GalloVisualMerger:
         visual_dedupe_keys = set()
 
         try:
-            visual_boletos_for_dedupe = self.visual_wb['Boletos']
+            visual_boletos_for_dedupe = self._input_sheet(self.visual_wb, 'Boletos')
             for _row in range(2, visual_boletos_for_dedupe.max_row + 1):
                 _operacion = visual_boletos_for_dedupe.cell(_row, 6).value
                 if not _operacion:
                     continue
                 _fecha = visual_boletos_for_dedupe.cell(_row, 2).value
-                _, _year = self._parse_fecha(_fecha)
-                if _year != 2025:
+                _, _year = visual_boletos_for_dedupe.fecha(_row, 2)
+                if _year != self.anio:
                     continue
                 visual_dedupe_keys.add(self._build_trade_dedupe_key(
                     _fecha,
@@ -2947,35 +3011,29 @@ class GalloVisualMerger:
                 continue
             
             try:
-                gallo_ws = self.gallo_wb[sheet_name]
+                gallo_ws = self._input_sheet(self.gallo_wb, sheet_name)
             except:
                 continue
 
-            gallo_headers = [str(gallo_ws.cell(1, c).value or '').strip().lower() for c in range(1, gallo_ws.max_column + 1)]
+            gallo_headers = gallo_ws.headers
             is_normalized_gallo_boletos = (
                 sheet_name.lower() == 'boletos'
                 and any(header in gallo_headers for header in ['tipo operación', 'tipo operacion', 'operación', 'operacion'])
                 and any(header in gallo_headers for header in ['cod.instrum', 'cód.', 'cod.', 'cód', 'cod'])
             )
             if is_normalized_gallo_boletos:
-                def find_gallo_col(options, default=None):
-                    for option in options:
-                        if option in gallo_headers:
-                            return gallo_headers.index(option) + 1
-                    return default
-
-                col_fecha = find_gallo_col(['concertación', 'concertacion', 'fecha'], 2)
-                col_liq = find_gallo_col(['liquidación', 'liquidacion', 'liquid.', 'liq.'], 3)
-                col_boleto = find_gallo_col(['nro. boleto', 'boleto'], 4)
-                col_moneda = find_gallo_col(['moneda', 'mon.'], 5)
-                col_operacion = find_gallo_col(['tipo operación', 'tipo operacion', 'operación', 'operacion'], 6)
-                col_codigo = find_gallo_col(['cod.instrum', 'cód.', 'cod.', 'cód', 'cod'], 7)
-                col_instrumento = find_gallo_col(['instrumento crudo', 'instrumento'], 8)
-                col_cantidad = find_gallo_col(['cantidad'], 9)
-                col_precio = find_gallo_col(['precio', 'precio nom.', 'precio nominal'], 10)
-                col_tc = find_gallo_col(['tipo cambio', 'tipo de cambio', 't.c.'], 11)
-                col_interes = find_gallo_col(['interés', 'interes'], 13)
-                col_gastos = find_gallo_col(['gastos'], 14)
+                col_fecha = gallo_ws.find_column(['concertación', 'concertacion', 'fecha'], 2)
+                col_liq = gallo_ws.find_column(['liquidación', 'liquidacion', 'liquid.', 'liq.'], 3)
+                col_boleto = gallo_ws.find_column(['nro. boleto', 'boleto'], 4)
+                col_moneda = gallo_ws.find_column(['moneda', 'mon.'], 5)
+                col_operacion = gallo_ws.find_column(['tipo operación', 'tipo operacion', 'operación', 'operacion'], 6)
+                col_codigo = gallo_ws.find_column(['cod.instrum', 'cód.', 'cod.', 'cód', 'cod'], 7)
+                col_instrumento = gallo_ws.find_column(['instrumento crudo', 'instrumento'], 8)
+                col_cantidad = gallo_ws.find_column(['cantidad'], 9)
+                col_precio = gallo_ws.find_column(['precio', 'precio nom.', 'precio nominal'], 10)
+                col_tc = gallo_ws.find_column(['tipo cambio', 'tipo de cambio', 't.c.'], 11)
+                col_interes = gallo_ws.find_column(['interés', 'interes'], 13)
+                col_gastos = gallo_ws.find_column(['gastos'], 14)
 
                 for row in range(2, gallo_ws.max_row + 1):
                     operacion = gallo_ws.cell(row, col_operacion).value
@@ -2983,8 +3041,8 @@ class GalloVisualMerger:
                         continue
 
                     fecha = gallo_ws.cell(row, col_fecha).value
-                    fecha_dt, year = self._parse_fecha(fecha)
-                    if year != 2025:
+                    fecha_dt, year = gallo_ws.fecha(row, col_fecha)
+                    if year != self.anio:
                         continue
 
                     cod_especie = gallo_ws.cell(row, col_codigo).value
@@ -3002,7 +3060,7 @@ class GalloVisualMerger:
                         continue
                     seen_gallo_transactions.add(('normalized', trade_key))
 
-                    cod_clean = self._clean_codigo(cod_especie)
+                    cod_clean = gallo_ws.codigo(row, col_codigo)
                     try:
                         cod_num = int(cod_clean) if cod_clean else None
                     except:
@@ -3066,8 +3124,9 @@ class GalloVisualMerger:
                 if not any(op in operacion_lower for op in operaciones_validas):
                     continue
                 
-                # Filtrar solo 2025
-                if not self._is_year_2025(fecha):
+                # Filtrar solo el año del período
+                fecha_dt, year = gallo_ws.fecha(row, 4)
+                if year != self.anio:
                     continue
                 
                 # Extraer datos
@@ -3116,14 +3175,11 @@ class GalloVisualMerger:
                     gastos = 0
                 
                 # Código limpio y forzar a número
-                cod_clean = self._clean_codigo(cod_especie)
+                cod_clean = gallo_ws.codigo(row, 2)
                 try:
                     cod_num = int(cod_clean) if cod_clean else None
                 except:
                     cod_num = cod_clean
-                
-                # Convertir fecha a datetime para Excel
-                fecha_dt, _ = self._parse_fecha(fecha)
 
                 dedupe_key = (
                     sheet_name,
@@ -3132,8 +3188,8 @@ class GalloVisualMerger:
                     str(cod_num or '').strip(),
                     str(moneda or '').strip().lower(),
                     operacion_lower,
-                    self._to_float(cantidad),
-                    self._to_float(precio),
+                    gallo_ws.numero(row, 7),
+                    gallo_ws.numero(row, 8),
                     self._to_float(gastos),
                     str(especie or '').strip().upper(),
                 )
@@ -3167,7 +3223,7 @@ class GalloVisualMerger:
         
         # Agregar transacciones de Visual
         try:
-            visual_boletos = self.visual_wb['Boletos']
+            visual_boletos = self._input_sheet(self.visual_wb, 'Boletos')
 
             # --- Ejercicio dedup pre-pass ---
             # Exercise boletos can appear duplicated in Visual with the same boleto
@@ -3187,7 +3243,7 @@ class GalloVisualMerger:
                 if _bol in (None, ''):
                     continue
                 _bol_key = str(_bol).strip()
-                _qty_val = self._to_float(visual_boletos.cell(_row, 9).value)
+                _qty_val = visual_boletos.numero(_row, 9)
                 ejercicio_groups.setdefault(_bol_key, []).append((_row, _qty_val))
 
             _ejercicio_skip_rows: set = set()
@@ -3226,12 +3282,12 @@ class GalloVisualMerger:
                     continue
                 
                 # Parsear fecha
-                fecha_dt, year = self._parse_fecha(concertacion)
-                if year != 2025:
+                fecha_dt, year = visual_boletos.fecha(row, 2)
+                if year != self.anio:
                     continue
                 
                 # Código limpio y forzar a número
-                cod_clean = self._clean_codigo(cod_instrum)
+                cod_clean = visual_boletos.codigo(row, 7)
                 try:
                     cod_num = int(cod_clean) if cod_clean else None
                 except:
@@ -3243,10 +3299,10 @@ class GalloVisualMerger:
                 # When OCR drops a cell (e.g. Precio), all subsequent columns shift
                 # left: the TC value lands in the Precio slot, Bruto in the TC slot, etc.
                 # Detect this by checking if the "Precio" looks like a TC (>200 for USD).
-                _pr = self._to_float(precio)
-                _tc = self._to_float(tipo_cambio_fuente)
-                _br = self._to_float(bruto_fuente)
-                _qt = self._to_float(cantidad)
+                _pr = visual_boletos.numero(row, 10)
+                _tc = visual_boletos.numero(row, 11)
+                _br = visual_boletos.numero(row, 12)
+                _qt = visual_boletos.numero(row, 9)
                 if (self._is_dollar_related(moneda)
                         and self._es_tipo_precio_cada_100(tipo_instrumento)
                         and abs(_pr) > 200
@@ -3320,10 +3376,10 @@ class GalloVisualMerger:
         for row_out, trans in enumerate(all_transactions, start=2):
             # Fórmulas con row_out correcto
             # Tipo de Instrumento: usa VLOOKUP si no viene de Visual
-            tipo_instrumento = f'=SI(ESERROR(BUSCARV(G{row_out};EspeciesVisual!C:R;16;FALSO));"";BUSCARV(G{row_out};EspeciesVisual!C:R;16;FALSO))' if not trans['tipo_instrumento_val'] else trans['tipo_instrumento_val']
+            tipo_instrumento = formula(self._especies_visual_lookup(cell("G", row_out), "C:R", 16)) if not trans['tipo_instrumento_val'] else trans['tipo_instrumento_val']
             
             # InstrumentoConMoneda
-            instrumento_con_moneda = f'=SI(ESERROR(BUSCARV(G{row_out};EspeciesVisual!C:Q;15;FALSO));"";BUSCARV(G{row_out};EspeciesVisual!C:Q;15;FALSO))'
+            instrumento_con_moneda = formula(self._especies_visual_lookup(cell("G", row_out), "C:Q", 15))
             
             # Tipo Cambio: fórmula simplificada compatible con Excel 2013 español
             # Usa el TC crudo de Visual cuando existe; si no, cae al histórico.
@@ -3331,19 +3387,25 @@ class GalloVisualMerger:
             if self._is_visual_origin(trans.get('origen')) and tipo_cambio_fuente > 0:
                 tipo_cambio = tipo_cambio_fuente
             else:
-                tipo_cambio = f'=SI(E{row_out}="Pesos";1;SI(ESERROR(BUSCARV(B{row_out};\'Cotizacion Dolar Historica\'!A:B;2;FALSO));0;BUSCARV(B{row_out};\'Cotizacion Dolar Historica\'!A:B;2;FALSO)))'
+                tipo_cambio = formula(fn.IF(cell("E", row_out).eq("Pesos"), 1, if_error(self._cotizacion_historica_lookup(cell("B", row_out)), 0)))
             
             # Precio Nominal: dividir por 100 si es ON, Títulos Públicos o Letras del Tesoro
             # Busca en el Tipo de Instrumento (col A) si contiene Obligacion, Titulo/Título o Letra
             if 'gallo-boletos-normalized' in str(trans.get('origen') or '').lower():
                 precio_nominal = self._to_float(trans.get('precio'))
             else:
-                precio_nominal = f'=SI(O(ESNUMERO(HALLAR("Obligacion";A{row_out}));ESNUMERO(HALLAR("Titulo";A{row_out}));ESNUMERO(HALLAR("Título";A{row_out}));ESNUMERO(HALLAR("Letra";A{row_out})));K{row_out}/100;K{row_out})'
+                precio = cell("K", row_out)
+                precio_nominal = formula(fn.IF(
+                    contains_any(["Obligacion", "Titulo", "Título", "Letra"], cell("A", row_out)),
+                    precio / 100,
+                    precio,
+                ))
             
             # Bruto y Neto usan Precio Nominal (col T) en lugar de Precio (col K)
-            bruto = f'=J{row_out}*T{row_out}'
-            neto = f'=SI(J{row_out}>0;J{row_out}*T{row_out}+O{row_out};J{row_out}*T{row_out}-O{row_out})'
-            moneda_emision = f'=SI(ESERROR(BUSCARV(G{row_out};EspeciesVisual!C:Q;5;FALSO));"";BUSCARV(G{row_out};EspeciesVisual!C:Q;5;FALSO))'
+            cantidad, nominal, gastos = cell("J", row_out), cell("T", row_out), cell("O", row_out)
+            bruto = formula(cantidad * nominal)
+            neto = formula(fn.IF(cantidad.gt(0), cantidad * nominal + gastos, cantidad * nominal - gastos))
+            moneda_emision = formula(self._especies_visual_lookup(cell("G", row_out), "C:Q", 5))
             
             ws.cell(row_out, 1, tipo_instrumento)
             ws.cell(row_out, 2, trans['fecha'])
@@ -3418,22 +3480,14 @@ class GalloVisualMerger:
         visual_sheet_name = sheet_name  # "Cauciones Tomadoras" o "Cauciones Colocadoras"
         visual_caucion_keys = set()
         if visual_sheet_name in self.visual_wb.sheetnames:
-            visual_ws = self.visual_wb[visual_sheet_name]
-            visual_headers = [str(visual_ws.cell(1, c).value or '').strip().lower() for c in range(1, visual_ws.max_column + 1)]
-
-            def _find_visual_col(options, default_idx):
-                for i, header in enumerate(visual_headers, start=1):
-                    if any(option in header for option in options):
-                        return i
-                return default_idx
-
-            v_col_fecha = _find_visual_col(['concert'], 1)
-            v_col_liq = _find_visual_col(['liquid'], 3)
-            v_col_op = _find_visual_col(['operaci'], 4)
-            v_col_bol = _find_visual_col(['# boleto', 'nro. boleto', 'boleto'], 5)
-            v_col_contado = _find_visual_col(['contado'], 6)
-            v_col_futuro = _find_visual_col(['futuro'], 7)
-            v_col_tc = _find_visual_col(['tipo de cambio', 'tipo cambio'], 8)
+            visual_ws = self._input_sheet(self.visual_wb, visual_sheet_name)
+            v_col_fecha = visual_ws.find_header(['concert'], 1)
+            v_col_liq = visual_ws.find_header(['liquid'], 3)
+            v_col_op = visual_ws.find_header(['operaci'], 4)
+            v_col_bol = visual_ws.find_header(['# boleto', 'nro. boleto', 'boleto'], 5)
+            v_col_contado = visual_ws.find_header(['contado'], 6)
+            v_col_futuro = visual_ws.find_header(['futuro'], 7)
+            v_col_tc = visual_ws.find_header(['tipo de cambio', 'tipo cambio'], 8)
 
             for row in range(2, visual_ws.max_row + 1):
                 fecha = visual_ws.cell(row, v_col_fecha).value
@@ -3441,7 +3495,7 @@ class GalloVisualMerger:
                 if not fecha or not operacion:
                     continue
 
-                tipo_cambio_num = self._to_float(visual_ws.cell(row, v_col_tc).value)
+                tipo_cambio_num = visual_ws.numero(row, v_col_tc)
                 moneda = 'Dolar MEP' if tipo_cambio_num > 1 else 'Pesos'
                 visual_caucion_keys.add(self._build_caucion_dedupe_key(
                     fecha,
@@ -3464,17 +3518,17 @@ class GalloVisualMerger:
                 tipo_cambio = 1
             elif 'dolar' in gallo_sheet_name.lower():
                 moneda = "Dolar MEP"
-                tipo_cambio = 1167.806  # Cotización dólar al 31/12/2024
+                tipo_cambio = self.COTIZACION_INICIO_PERIODO  # Cotización dólar al cierre del año anterior
             else:
                 moneda = "Pesos"
                 tipo_cambio = 1
             
             try:
-                gallo_ws = self.gallo_wb[gallo_sheet_name]
+                gallo_ws = self._input_sheet(self.gallo_wb, gallo_sheet_name)
             except:
                 continue
 
-            gallo_headers = [str(gallo_ws.cell(1, c).value or '').strip().lower() for c in range(1, gallo_ws.max_column + 1)]
+            gallo_headers = gallo_ws.headers
             is_normalized_gallo_cauciones = (
                 any(header in gallo_headers for header in ['concertación', 'concertacion'])
                 and any('operaci' in header for header in gallo_headers)
@@ -3485,26 +3539,20 @@ class GalloVisualMerger:
                 if gallo_sheet_name.strip().lower() != sheet_name.strip().lower():
                     continue
 
-                def find_gallo_col(options, default_idx):
-                    for i, header in enumerate(gallo_headers, start=1):
-                        if any(option in header for option in options):
-                            return i
-                    return default_idx
-
-                col_fecha = find_gallo_col(['concert'], 1)
-                col_plazo = find_gallo_col(['plaz'], 2)
-                col_liq = find_gallo_col(['liquid'], 3)
-                col_op = find_gallo_col(['operaci'], 4)
-                col_bol = find_gallo_col(['# boleto', 'nro. boleto', 'boleto'], 5)
-                col_contado = find_gallo_col(['contado'], 6)
-                col_futuro = find_gallo_col(['futuro'], 7)
-                col_tc = find_gallo_col(['tipo de cambio', 'tipo cambio', 't.c.'], 8)
-                col_tasa = find_gallo_col(['tasa'], 9)
-                col_ib = find_gallo_col(['int. bruto', 'interés bruto', 'interes bruto'], 10)
-                col_id = find_gallo_col(['int. dev', 'interés deveng', 'interes deveng'], 11)
-                col_ara = find_gallo_col(['arancel'], 12)
-                col_der = find_gallo_col(['derech'], 13)
-                col_cf = find_gallo_col(['costo fin', 'costo financiero'], 14)
+                col_fecha = gallo_ws.find_header(['concert'], 1)
+                col_plazo = gallo_ws.find_header(['plaz'], 2)
+                col_liq = gallo_ws.find_header(['liquid'], 3)
+                col_op = gallo_ws.find_header(['operaci'], 4)
+                col_bol = gallo_ws.find_header(['# boleto', 'nro. boleto', 'boleto'], 5)
+                col_contado = gallo_ws.find_header(['contado'], 6)
+                col_futuro = gallo_ws.find_header(['futuro'], 7)
+                col_tc = gallo_ws.find_header(['tipo de cambio', 'tipo cambio', 't.c.'], 8)
+                col_tasa = gallo_ws.find_header(['tasa'], 9)
+                col_ib = gallo_ws.find_header(['int. bruto', 'interés bruto', 'interes bruto'], 10)
+                col_id = gallo_ws.find_header(['int. dev', 'interés deveng', 'interes deveng'], 11)
+                col_ara = gallo_ws.find_header(['arancel'], 12)
+                col_der = gallo_ws.find_header(['derech'], 13)
+                col_cf = gallo_ws.find_header(['costo fin', 'costo financiero'], 14)
 
                 for row in range(2, gallo_ws.max_row + 1):
                     fecha = gallo_ws.cell(row, col_fecha).value
@@ -3513,10 +3561,11 @@ class GalloVisualMerger:
                     if not fecha or not operacion:
                         continue
 
-                    if not self._is_year_2025(liquidacion):
+                    liq_dt, liq_year = gallo_ws.fecha(row, col_liq)
+                    if liq_year != self.anio:
                         continue
 
-                    tipo_cambio_num = self._to_float(gallo_ws.cell(row, col_tc).value) or 1
+                    tipo_cambio_num = gallo_ws.numero(row, col_tc) or 1
                     moneda = 'Dolar MEP' if tipo_cambio_num > 1 else 'Pesos'
                     caucion_key = self._build_caucion_dedupe_key(
                         fecha,
@@ -3533,20 +3582,20 @@ class GalloVisualMerger:
 
                     auditoria = f"Origen: Gallo-{gallo_sheet_name}-normalized"
                     all_cauciones.append({
-                        'fecha': self._parse_fecha(fecha)[0] or fecha,
+                        'fecha': gallo_ws.fecha(row, col_fecha)[0] or fecha,
                         'plazo': gallo_ws.cell(row, col_plazo).value,
-                        'liquidacion': self._parse_fecha(liquidacion)[0] or liquidacion,
+                        'liquidacion': liq_dt or liquidacion,
                         'operacion': operacion,
                         'boleto': gallo_ws.cell(row, col_bol).value,
                         'contado': gallo_ws.cell(row, col_contado).value,
                         'futuro': gallo_ws.cell(row, col_futuro).value,
                         'tipo_cambio': tipo_cambio_num,
                         'tasa': gallo_ws.cell(row, col_tasa).value,
-                        'interes_bruto': self._to_float(gallo_ws.cell(row, col_ib).value),
-                        'interes_devengado': self._to_float(gallo_ws.cell(row, col_id).value),
-                        'aranceles': self._to_float(gallo_ws.cell(row, col_ara).value),
-                        'derechos': self._to_float(gallo_ws.cell(row, col_der).value),
-                        'costo_financiero': self._to_float(gallo_ws.cell(row, col_cf).value),
+                        'interes_bruto': gallo_ws.numero(row, col_ib),
+                        'interes_devengado': gallo_ws.numero(row, col_id),
+                        'aranceles': gallo_ws.numero(row, col_ara),
+                        'derechos': gallo_ws.numero(row, col_der),
+                        'costo_financiero': gallo_ws.numero(row, col_cf),
                         'moneda': moneda,
                         'origen': f"Gallo-{gallo_sheet_name}",
                         'auditoria': auditoria,
@@ -3582,13 +3631,13 @@ class GalloVisualMerger:
                 if tipo_filtro not in operacion_upper:
                     continue
                 
-                # Filtrar solo 2025 usando vencimiento (col E del origen visual del usuario)
-                if not self._is_year_2025(vencimiento):
+                # Filtrar solo el año del período usando vencimiento (col E del origen visual del usuario)
+                venc_dt, venc_year = gallo_ws.fecha(row, 5)
+                if venc_year != self.anio:
                     continue
                 
                 # Parsear fechas
-                fecha_dt, _ = self._parse_fecha(fecha)
-                venc_dt, _ = self._parse_fecha(vencimiento)
+                fecha_dt, _ = gallo_ws.fecha(row, 4)
 
                 # Calcular plazo (diferencia en días)
                 plazo = 0
@@ -3654,29 +3703,22 @@ class GalloVisualMerger:
         
         # Agregar cauciones de Visual (si existen hojas correspondientes)
         if visual_sheet_name in self.visual_wb.sheetnames:
-            visual_ws = self.visual_wb[visual_sheet_name]
+            visual_ws = self._input_sheet(self.visual_wb, visual_sheet_name)
 
             # Mapeo robusto por encabezados para evitar corrimientos OCR
-            v_headers = [str(visual_ws.cell(1, c).value or '').strip().lower() for c in range(1, visual_ws.max_column + 1)]
-            def _find_col(options, default_idx):
-                for i, h in enumerate(v_headers, start=1):
-                    if any(opt in h for opt in options):
-                        return i
-                return default_idx
-
-            col_fecha = _find_col(['concert'], 1)
-            col_plazo = _find_col(['plaz'], 2)
-            col_liq = _find_col(['liquid'], 3)
-            col_op = _find_col(['operaci'], 4)
-            col_bol = _find_col(['# boleto', 'nro. boleto', 'boleto'], 5)
-            col_contado = _find_col(['contado'], 6)
-            col_futuro = _find_col(['futuro'], 7)
-            col_tc = _find_col(['tipo de cambio', 'tipo cambio'], 8)
-            col_tasa = _find_col(['tasa'], 9)
-            col_ib = _find_col(['interés bruto', 'interes bruto'], 10)
-            col_id = _find_col(['interés deveng', 'interes deveng'], 11)
-            col_ara = _find_col(['arancel'], 12)
-            col_der = _find_col(['derech'], 13)
+            col_fecha = visual_ws.find_header(['concert'], 1)
+            col_plazo = visual_ws.find_header(['plaz'], 2)
+            col_liq = visual_ws.find_header(['liquid'], 3)
+            col_op = visual_ws.find_header(['operaci'], 4)
+            col_bol = visual_ws.find_header(['# boleto', 'nro. boleto', 'boleto'], 5)
+            col_contado = visual_ws.find_header(['contado'], 6)
+            col_futuro = visual_ws.find_header(['futuro'], 7)
+            col_tc = visual_ws.find_header(['tipo de cambio', 'tipo cambio'], 8)
+            col_tasa = visual_ws.find_header(['tasa'], 9)
+            col_ib = visual_ws.find_header(['interés bruto', 'interes bruto'], 10)
+            col_id = visual_ws.find_header(['interés deveng', 'interes deveng'], 11)
+            col_ara = visual_ws.find_header(['arancel'], 12)
+            col_der = visual_ws.find_header(['derech'], 13)
             
             for row in range(2, visual_ws.max_row + 1):
                 # Estructura esperada de Visual cauciones:
@@ -3720,12 +3762,12 @@ class GalloVisualMerger:
                 
                 # Determinar moneda (asumimos Pesos por default, o buscar en columna si existe)
                 moneda = "Pesos"
-                tipo_cambio_num = self._to_float(tipo_cambio)
+                tipo_cambio_num = visual_ws.numero(row, col_tc)
                 if tipo_cambio_num > 1:
                     moneda = "Dolar MEP"
                 
-                fecha_dt, _ = self._parse_fecha(fecha)
-                liq_dt, _ = self._parse_fecha(liquidacion)
+                fecha_dt, _ = visual_ws.fecha(row, col_fecha)
+                liq_dt, _ = visual_ws.fecha(row, col_liq)
                 
                 auditoria = f"Origen: Visual-{visual_sheet_name}"
                 
@@ -3804,7 +3846,7 @@ class GalloVisualMerger:
                 continue
             
             try:
-                gallo_ws = self.gallo_wb[sheet_name]
+                gallo_ws = self._input_sheet(self.gallo_wb, sheet_name)
             except:
                 continue
             
@@ -3833,8 +3875,9 @@ class GalloVisualMerger:
                 gastos_pesos = gallo_ws.cell(row, 13).value
                 gastos_usd = gallo_ws.cell(row, 14).value
                 
-                # Filtrar solo 2025
-                if not self._is_year_2025(fecha):
+                # Filtrar solo el año del período
+                fecha_dt, year = gallo_ws.fecha(row, 4)
+                if year != self.anio:
                     continue
                 
                 # Determinar moneda basándose en nombre de hoja
@@ -3878,7 +3921,7 @@ class GalloVisualMerger:
                         precio = 1
                 
                 # Código limpio y forzar a número
-                cod_clean = self._clean_codigo(cod_especie)
+                cod_clean = gallo_ws.codigo(row, 2)
                 try:
                     cod_num = int(cod_clean) if cod_clean else None
                 except:
@@ -3888,9 +3931,6 @@ class GalloVisualMerger:
                 bruto = importe if importe else (cantidad * precio if cantidad and precio else 0)
                 bruto = abs(float(bruto)) if bruto else 0
                 
-                # Parsear fecha
-                fecha_dt, _ = self._parse_fecha(fecha)
-                
                 auditoria = f"Origen: Gallo-{sheet_name} | Operación: {operacion}"
                 
                 all_rentas.append({
@@ -3917,7 +3957,7 @@ class GalloVisualMerger:
         visual_sheets = [('Rentas Dividendos ARS', 'Pesos'), ('Rentas Dividendos USD', 'Dolar')]
         for visual_sheet_name, moneda_default in visual_sheets:
             try:
-                visual_ws = self.visual_wb[visual_sheet_name]
+                visual_ws = self._input_sheet(self.visual_wb, visual_sheet_name)
             except KeyError:
                 continue
             
@@ -3939,13 +3979,13 @@ class GalloVisualMerger:
                 if not tipo_operacion:
                     continue
                 
-                # Parsear fecha y filtrar 2025
-                fecha_dt, year = self._parse_fecha(concertacion)
-                if year != 2025:
+                # Parsear fecha y filtrar el año del período
+                fecha_dt, year = visual_ws.fecha(row, 5)
+                if year != self.anio:
                     continue
                 
                 # Código limpio y convertir a número
-                cod_clean = self._clean_codigo(cod_instrum)
+                cod_clean = visual_ws.codigo(row, 2)
                 try:
                     cod_num = int(cod_clean) if cod_clean else None
                 except (ValueError, TypeError):
@@ -3997,13 +4037,13 @@ class GalloVisualMerger:
         # Escribir transacciones ordenadas con fórmulas correctas
         for row_out, renta in enumerate(all_rentas, start=2):
             # Fórmulas con row_out correcto
-            tipo_instrumento = renta['tipo_instrumento_val'] if renta['tipo_instrumento_val'] else f'=SI(ESERROR(BUSCARV(G{row_out};EspeciesVisual!C:R;16;FALSO));"";BUSCARV(G{row_out};EspeciesVisual!C:R;16;FALSO))'
-            instrumento_con_moneda = f'=SI(ESERROR(BUSCARV(G{row_out};EspeciesVisual!C:Q;15;FALSO));"";BUSCARV(G{row_out};EspeciesVisual!C:Q;15;FALSO))'
-            tipo_cambio = f'=SI(E{row_out}="Pesos";1;SI(ESERROR(BUSCARV(B{row_out};\'Cotizacion Dolar Historica\'!A:B;2;FALSO));0;BUSCARV(B{row_out};\'Cotizacion Dolar Historica\'!A:B;2;FALSO)))'
-            moneda_emision = f'=SI(ESERROR(BUSCARV(G{row_out};EspeciesVisual!C:Q;5;FALSO));"";BUSCARV(G{row_out};EspeciesVisual!C:Q;5;FALSO))'
+            tipo_instrumento = renta['tipo_instrumento_val'] if renta['tipo_instrumento_val'] else formula(self._especies_visual_lookup(cell("G", row_out), "C:R", 16))
+            instrumento_con_moneda = formula(self._especies_visual_lookup(cell("G", row_out), "C:Q", 15))
+            tipo_cambio = formula(fn.IF(cell("E", row_out).eq("Pesos"), 1, if_error(self._cotizacion_historica_lookup(cell("B", row_out)), 0)))
+            moneda_emision = formula(self._especies_visual_lookup(cell("G", row_out), "C:Q", 5))
             
             # Neto calculado: M - N - O - P (siempre la misma fórmula)
-            neto = f'=M{row_out}-N{row_out}-O{row_out}-P{row_out}'
+            neto = formula(cell("M", row_out) - cell("N", row_out) - cell("O", row_out) - cell("P", row_out))
             
             ws.cell(row_out, 1, tipo_instrumento)
             ws.cell(row_out, 2, renta['fecha'])
@@ -4157,15 +4197,11 @@ class GalloVisualMerger:
             return (cod, concert, liquid, buy_sell, tx.get('_idx', 0))
 
         transactions.sort(key=_sort_key)
-        
-        def _si_error(expr: str, fallback: str) -> str:
-            return f'SI(ESERROR({expr});{fallback};{expr})'
-
-        def _si_error(expr: str, fallback: str) -> str:
-            return f'SI(ESERROR({expr});{fallback};{expr})'
 
         # Escribir transacciones con VALORES (no fórmulas excepto para cálculos)
         for row_out, trans in enumerate(transactions, start=2):
+            I, N, Q, R, S, T, V = (cell(col, row_out) for col in ("I", "N", "Q", "R", "S", "T", "V"))
+            AA = cell("AA", row_out)
             # Columnas A-N: Valores directos
             ws.cell(row_out, 1, trans['origen'])
             ws.cell(row_out, 2, trans['tipo_instrumento'])
@@ -4178,13 +4214,13 @@ class GalloVisualMerger:
             ws.cell(row_out, 9, trans['cantidad'])
             ws.cell(row_out, 10, trans['precio'])
             # Col K: Bruto = Cantidad * Precio Nominal (col AA) - FÓRMULA
-            ws.cell(row_out, 11, f'=I{row_out}*AA{row_out}')
+            ws.cell(row_out, 11, formula(I * AA))
             ws.cell(row_out, 12, trans['interes'])
             ws.cell(row_out, 13, trans['tipo_cambio'])  # Valor 1, no fórmula
             ws.cell(row_out, 14, trans['gastos'])
             
             # Col O: IVA = SI(N>0, N*0.1736, N*-0.1736) basado en Gastos (col N)
-            ws.cell(row_out, 15, f'=SI(N{row_out}>0;N{row_out}*0,1736;N{row_out}*-0,1736)')
+            ws.cell(row_out, 15, formula(fn.IF(N.gt(0), N * 0.1736, N * -0.1736)))
             
             # Col P: Resultado (vacío por ahora)
             ws.cell(row_out, 16, "")
@@ -4215,62 +4251,50 @@ class GalloVisualMerger:
                             break
             
             # Col Q: Cantidad Stock Inicial (siempre desde Posicion Inicial Gallo)
+            D = cell("D", row_out)
+            gallo_qty_lookup = if_error(vlookup(D, sheet_range("Posicion Inicial Gallo", "D:I"), 6), 0)
+            if use_precio_tenencias:
+                tenencias_qty_lookup = if_error(vlookup(D, sheet_range("PrecioTenenciasIniciales", "A:D"), 4), 0)
+                qty_lookup = fn.IF(tenencias_qty_lookup.gt(gallo_qty_lookup), tenencias_qty_lookup, gallo_qty_lookup)
+            else:
+                qty_lookup = gallo_qty_lookup
+            # Col R: Precio Stock Inicial - Usa col V (19 desde D) = Precio Nominal
+            # Con fallback a PrecioTenenciasIniciales y luego PreciosInicialesEspecies
+            pos_lookup_gallo = if_error(vlookup(D, sheet_range("Posicion Inicial Gallo", "D:V"), 19), 0)
+            fallback_precio = if_error(vlookup(D, sheet_range("PreciosInicialesEspecies", "A:I"), 9), 0)
+            if use_precio_tenencias:
+                fallback_precio = if_error(vlookup(D, sheet_range("PrecioTenenciasIniciales", "A:G"), 7), fallback_precio)
+            precio_lookup = fn.IF(pos_lookup_gallo.eq(0), fallback_precio, pos_lookup_gallo)
             if row_out == 2:
-                gallo_qty_lookup = _si_error(f"BUSCARV(D{row_out};'Posicion Inicial Gallo'!D:I;6;FALSO)", "0")
-                if use_precio_tenencias:
-                    tenencias_qty_lookup = _si_error(f"BUSCARV(D{row_out};PrecioTenenciasIniciales!A:D;4;FALSO)", "0")
-                    qty_lookup = f'SI({tenencias_qty_lookup}>{gallo_qty_lookup};{tenencias_qty_lookup};{gallo_qty_lookup})'
-                else:
-                    qty_lookup = gallo_qty_lookup
-                ws.cell(row_out, 17, f'={qty_lookup}')
-                # Col R: Precio Stock Inicial - Usa col V (19 desde D) = Precio Nominal
-                # Con fallback a PrecioTenenciasIniciales y luego PreciosInicialesEspecies
-                pos_lookup_gallo = _si_error(f"BUSCARV(D{row_out};'Posicion Inicial Gallo'!D:V;19;FALSO)", "0")
-                if use_precio_tenencias:
-                    fallback_precio = _si_error(
-                        f"BUSCARV(D{row_out};PrecioTenenciasIniciales!A:G;7;FALSO)",
-                        _si_error(f"BUSCARV(D{row_out};PreciosInicialesEspecies!A:I;9;FALSO)", "0")
-                    )
-                else:
-                    fallback_precio = _si_error(f"BUSCARV(D{row_out};PreciosInicialesEspecies!A:I;9;FALSO)", "0")
-                ws.cell(row_out, 18, f'=SI({pos_lookup_gallo}=0;{fallback_precio};{pos_lookup_gallo})')
+                ws.cell(row_out, 17, formula(qty_lookup))
+                ws.cell(row_out, 18, formula(precio_lookup))
                 explicacion_q = f"BUSCARV(D{row_out}→Posicion Inicial Gallo col V=Precio Nominal, fallback PrecioTenenciasIniciales/PreciosInicialesEspecies)"
             else:
                 prev = row_out - 1
-                gallo_qty_lookup = _si_error(f"BUSCARV(D{row_out};'Posicion Inicial Gallo'!D:I;6;FALSO)", "0")
-                if use_precio_tenencias:
-                    tenencias_qty_lookup = _si_error(f"BUSCARV(D{row_out};PrecioTenenciasIniciales!A:D;4;FALSO)", "0")
-                    qty_lookup = f'SI({tenencias_qty_lookup}>{gallo_qty_lookup};{tenencias_qty_lookup};{gallo_qty_lookup})'
-                else:
-                    qty_lookup = gallo_qty_lookup
-                ws.cell(row_out, 17, f'=SI(D{row_out}=D{prev};V{prev};{qty_lookup})')
-                # Col R: Con fallback
-                pos_lookup_gallo = _si_error(f"BUSCARV(D{row_out};'Posicion Inicial Gallo'!D:V;19;FALSO)", "0")
-                if use_precio_tenencias:
-                    fallback_precio = _si_error(
-                        f"BUSCARV(D{row_out};PrecioTenenciasIniciales!A:G;7;FALSO)",
-                        _si_error(f"BUSCARV(D{row_out};PreciosInicialesEspecies!A:I;9;FALSO)", "0")
-                    )
-                else:
-                    fallback_precio = _si_error(f"BUSCARV(D{row_out};PreciosInicialesEspecies!A:I;9;FALSO)", "0")
-                ws.cell(row_out, 18, f'=SI(D{row_out}=D{prev};W{prev};SI({pos_lookup_gallo}=0;{fallback_precio};{pos_lookup_gallo}))')
+                misma_especie = D.eq(cell("D", prev))
+                ws.cell(row_out, 17, formula(fn.IF(misma_especie, cell("V", prev), qty_lookup)))
+                ws.cell(row_out, 18, formula(fn.IF(misma_especie, cell("W", prev), precio_lookup)))
                 explicacion_q = f"SI D{row_out}=D{prev}: W{prev}, SINO: BUSCARV(D{row_out}→Posicion Inicial Gallo col V=Precio Nominal, fallback PrecioTenenciasIniciales/PreciosInicialesEspecies)"
             
             # Col S: Costo por venta = Cantidad * Precio Stock (si venta, cantidad < 0)
-            ws.cell(row_out, 19, f'=SI(I{row_out}<0;I{row_out}*R{row_out};0)')
+            ws.cell(row_out, 19, formula(fn.IF(I.lt(0), I * R, 0)))
             
             # Col T: Neto Calculado = Bruto + Interés
-            ws.cell(row_out, 20, f'=K{row_out}+L{row_out}')
+            ws.cell(row_out, 20, formula(cell("K", row_out) + cell("L", row_out)))
             
             # Col U: Resultado Calculado = |Neto| - |Costo|
-            ws.cell(row_out, 21, f'=SI(I{row_out}<0;SI(O(S{row_out}<>0;Q{row_out}>0);ABS(T{row_out})-ABS(S{row_out});0);0)')
+            ws.cell(row_out, 21, formula(fn.IF(I.lt(0), fn.IF(fn.OR(S.ne(0), Q.gt(0)), fn.ABS(T) - fn.ABS(S), 0), 0)))
             
             # Col V: Cantidad Stock Final = Cantidad + Stock Inicial
-            ws.cell(row_out, 22, f'=I{row_out}+Q{row_out}')
+            ws.cell(row_out, 22, formula(I + Q))
             
             # Col W: Precio Stock Final (promedio ponderado si compra, mantiene si venta)
             # IMPORTANTE: Usar AA (Precio Nominal) en vez de J (Precio) para ON/TP/Letras
-            ws.cell(row_out, 23, f'=SI(V{row_out}=0;0;SI(I{row_out}>0;SI((I{row_out}+Q{row_out})=0;0;(I{row_out}*AA{row_out}+Q{row_out}*R{row_out})/(I{row_out}+Q{row_out}));R{row_out}))')
+            ws.cell(row_out, 23, formula(fn.IF(
+                V.eq(0),
+                0,
+                fn.IF(I.gt(0), fn.IF(group(I + Q).eq(0), 0, (I * AA + Q * R) / (I + Q)), R),
+            )))
             
             # Col X: Explicación Q (específica para esta fila)
             ws.cell(row_out, 24, explicacion_q)
@@ -4305,9 +4329,6 @@ class GalloVisualMerger:
         for col, header in enumerate(headers, 1):
             ws.cell(1, col, header)
             ws.cell(1, col).font = Font(bold=True)
-        
-        def _si_error(expr: str, fallback: str) -> str:
-            return f'SI(ESERROR({expr});{fallback};{expr})'
 
         # Recolectar transacciones de Boletos con moneda contiene "Dolar"
         boletos_ws = wb['Boletos']
@@ -4367,8 +4388,7 @@ class GalloVisualMerger:
             if tipo_cambio is None:
                 tipo_cambio = self._to_float(tipo_cambio_boletos)
             if not tipo_cambio and isinstance(concertacion, datetime):
-                fecha_key = concertacion.strftime('%Y-%m-%d') if hasattr(concertacion, 'strftime') else str(concertacion)
-                tipo_cambio = self._cotizacion_cache.get(fecha_key, 1) or 1
+                tipo_cambio = self._get_cotizacion(concertacion, "Dolar MEP")
             if not tipo_cambio:
                 tipo_cambio = 1
             
@@ -4452,7 +4472,8 @@ class GalloVisualMerger:
             
             # Col L: Precio Standarizado en USD = K * O (Precio Std * Tipo Cambio)
             # O = 1 si moneda incluye "dolar", sino 1/P
-            ws.cell(row_out, 12, f'=K{row_out}*O{row_out}')
+            I, O, P, T, U = (cell(col, row_out) for col in ("I", "O", "P", "T", "U"))
+            ws.cell(row_out, 12, formula(cell("K", row_out) * O))
             
             # Col M: Bruto en USD = Cantidad * Precio Nominal (col AC=29)
             bruto_fuente = self._to_float(trans.get('bruto_fuente'))
@@ -4468,7 +4489,7 @@ class GalloVisualMerger:
             if preserve_micro_source:
                 ws.cell(row_out, 13, bruto_fuente)
             else:
-                ws.cell(row_out, 13, f'=I{row_out}*AC{row_out}')
+                ws.cell(row_out, 13, formula(I * cell("AC", row_out)))
             
             # Col N: Interés
             ws.cell(row_out, 14, trans['interes'])
@@ -4478,22 +4499,20 @@ class GalloVisualMerger:
             if 'dolar' in str(moneda_val).lower():
                 ws.cell(row_out, 15, 1)  # Operaciones en dólares: tipo cambio = 1
             else:
-                ws.cell(row_out, 15, f'=SI(P{row_out}=0;1;1/P{row_out})')  # Pesos: 1/ValorUSDDia
+                ws.cell(row_out, 15, formula(fn.IF(P.eq(0), 1, 1 / P)))  # Pesos: 1/ValorUSDDia
             
             # Col P: Valor USD Dia - preferir TC bruto de Visual cuando exista; si no, usar histórico.
             visual_tc = self._meaningful_fx_rate(trans.get('tipo_cambio'))
             if self._is_visual_origin(origen_val) and visual_tc > 0:
                 ws.cell(row_out, 16, visual_tc)
             else:
-                ws.cell(row_out, 16, f'={_si_error(f"BUSCARV(E{row_out};'Cotizacion Dolar Historica'!A:B;2;FALSO)", "0")}')
-            
-            gastos_fuente_formula = self._fmt_num_es(self._to_float(trans['gastos']))
+                ws.cell(row_out, 16, formula(if_error(self._cotizacion_historica_lookup(cell("E", row_out)), 0)))
 
             # Col Q: Gastos USD visibles, calculados desde el gasto fuente y el factor O.
-            ws.cell(row_out, 17, f'=ABS({gastos_fuente_formula}*O{row_out})')
+            ws.cell(row_out, 17, formula(fn.ABS(self._to_float(trans['gastos']) * O)))
 
             # Col R: IVA USD = Q * 0.1736
-            ws.cell(row_out, 18, f'=Q{row_out}*0,1736')
+            ws.cell(row_out, 18, formula(cell("Q", row_out) * 0.1736))
             
             # Col S: Resultado (vacío)
             ws.cell(row_out, 19, "")
@@ -4502,58 +4521,53 @@ class GalloVisualMerger:
             cod = trans['cod_instrum']
             
             # Col T: Cantidad Stock Inicial - siempre desde Posicion Inicial Gallo
+            D = cell("D", row_out)
+            qty_lookup = if_error(vlookup(D, sheet_range("Posicion Inicial Gallo", "D:I"), 6), 0)
+            # Col U: Precio Stock USD
+            # Primero intenta VLOOKUP a Posicion / cotización día
+            # Si es 0, usa fallback a PrecioTenenciasIniciales y luego PreciosInicialesEspecies
+            pos_lookup_gallo = if_error(vlookup(D, sheet_range("Posicion Inicial Gallo", "D:V"), 19), 0)
+            fallback_precio = if_error(vlookup(D, sheet_range("PreciosInicialesEspecies", "A:J"), 10), 0)
+            if use_precio_tenencias:
+                fallback_precio = if_error(vlookup(D, sheet_range("PrecioTenenciasIniciales", "A:G"), 7), fallback_precio)
+            # Las acciones del exterior ya llegan a Posición Gallo con precio unitario en USD.
+            if self._position_price_is_already_usd(self._clean_codigo(str(cod))):
+                precio_lookup = fn.IF(pos_lookup_gallo.eq(0), fallback_precio, pos_lookup_gallo)
+            else:
+                precio_lookup = fn.IF(P.eq(0), 0, fn.IF(pos_lookup_gallo.eq(0), fallback_precio, pos_lookup_gallo / P))
             if row_out == 2:
-                ws.cell(row_out, 20, f'={_si_error(f"BUSCARV(D{row_out};\'Posicion Inicial Gallo\'!D:I;6;FALSO)", "0")}')
-                # Col U: Precio Stock USD
-                # Primero intenta VLOOKUP a Posicion / cotización día
-                # Si es 0, usa fallback a PrecioTenenciasIniciales y luego PreciosInicialesEspecies
-                pos_lookup_gallo = _si_error(f"BUSCARV(D{row_out};'Posicion Inicial Gallo'!D:V;19;FALSO)", "0")
-                if use_precio_tenencias:
-                    fallback_precio = _si_error(
-                        f"BUSCARV(D{row_out};PrecioTenenciasIniciales!A:G;7;FALSO)",
-                        _si_error(f"BUSCARV(D{row_out};PreciosInicialesEspecies!A:J;10;FALSO)", "0")
-                    )
-                else:
-                    fallback_precio = _si_error(f"BUSCARV(D{row_out};PreciosInicialesEspecies!A:J;10;FALSO)", "0")
-                # Las acciones del exterior ya llegan a Posición Gallo con precio unitario en USD.
-                if self._position_price_is_already_usd(self._clean_codigo(str(cod))):
-                    ws.cell(row_out, 21, f'=SI({pos_lookup_gallo}=0;{fallback_precio};{pos_lookup_gallo})')
-                else:
-                    ws.cell(row_out, 21, f'=SI(P{row_out}=0;0;SI({pos_lookup_gallo}=0;{fallback_precio};{pos_lookup_gallo}/P{row_out}))')
+                ws.cell(row_out, 20, formula(qty_lookup))
+                ws.cell(row_out, 21, formula(precio_lookup))
                 explicacion_t = f"T=BUSCARV(D{row_out}→Posicion Inicial Gallo col V=Precio Nominal, fallback PrecioTenenciasIniciales/PreciosInicialesEspecies)"
             else:
                 prev = row_out - 1
-                ws.cell(row_out, 20, f'=SI(D{row_out}=D{prev};Y{prev};{_si_error(f"BUSCARV(D{row_out};\'Posicion Inicial Gallo\'!D:I;6;FALSO)", "0")})')
-                # Col U: Con fallback
-                pos_lookup_gallo = _si_error(f"BUSCARV(D{row_out};'Posicion Inicial Gallo'!D:V;19;FALSO)", "0")
-                if use_precio_tenencias:
-                    fallback_precio = _si_error(
-                        f"BUSCARV(D{row_out};PrecioTenenciasIniciales!A:G;7;FALSO)",
-                        _si_error(f"BUSCARV(D{row_out};PreciosInicialesEspecies!A:J;10;FALSO)", "0")
-                    )
-                else:
-                    fallback_precio = _si_error(f"BUSCARV(D{row_out};PreciosInicialesEspecies!A:J;10;FALSO)", "0")
-                if self._position_price_is_already_usd(self._clean_codigo(str(cod))):
-                    ws.cell(row_out, 21, f'=SI(D{row_out}=D{prev};Z{prev};SI({pos_lookup_gallo}=0;{fallback_precio};{pos_lookup_gallo}))')
-                else:
-                    ws.cell(row_out, 21, f'=SI(D{row_out}=D{prev};Z{prev};SI(P{row_out}=0;0;SI({pos_lookup_gallo}=0;{fallback_precio};{pos_lookup_gallo}/P{row_out})))')
+                misma_especie = D.eq(cell("D", prev))
+                ws.cell(row_out, 20, formula(fn.IF(misma_especie, cell("Y", prev), qty_lookup)))
+                ws.cell(row_out, 21, formula(fn.IF(misma_especie, cell("Z", prev), precio_lookup)))
                 explicacion_t = f"SI D{row_out}=D{prev}: Z{prev}, SINO: BUSCARV(col V=Precio Nominal (Posicion Inicial Gallo), fallback PrecioTenenciasIniciales/PreciosInicialesEspecies)"
             
             # Col V: Costo por venta = Cantidad * Precio Stock USD (si venta)
-            ws.cell(row_out, 22, f'=SI(I{row_out}<0;I{row_out}*U{row_out};0)')
+            V, W = cell("V", row_out), cell("W", row_out)
+            ws.cell(row_out, 22, formula(fn.IF(I.lt(0), I * U, 0)))
             
             # Col W: Neto Calculado = Bruto USD +/- Gastos USD según signo económico
-            ws.cell(row_out, 23, f'=SI(I{row_out}<0;M{row_out}+Q{row_out};M{row_out}+Q{row_out})')
+            neto = cell("M", row_out) + cell("Q", row_out)
+            ws.cell(row_out, 23, formula(fn.IF(I.lt(0), neto, neto)))
             
             # Col X: Resultado Calculado = |Neto| - |Costo|
-            ws.cell(row_out, 24, f'=SI(I{row_out}<0;SI(O(V{row_out}<>0;T{row_out}>0);ABS(W{row_out})-ABS(V{row_out});0);0)')
+            ws.cell(row_out, 24, formula(fn.IF(I.lt(0), fn.IF(fn.OR(V.ne(0), T.gt(0)), fn.ABS(W) - fn.ABS(V), 0), 0)))
             
             # Col Y: Cantidad Stock Final = Cantidad + Stock Inicial
-            ws.cell(row_out, 25, f'=I{row_out}+T{row_out}')
+            ws.cell(row_out, 25, formula(I + T))
             
             # Col Z: Precio Stock Final (promedio ponderado)
             # IMPORTANTE: Usar AC (Precio Nominal) en vez de L (Precio Std USD) para ON/TP/Letras
-            ws.cell(row_out, 26, f'=SI(Y{row_out}=0;0;SI(I{row_out}>0;SI((I{row_out}+T{row_out})=0;0;(I{row_out}*AC{row_out}+T{row_out}*U{row_out})/(I{row_out}+T{row_out}));U{row_out}))')
+            AC = cell("AC", row_out)
+            ws.cell(row_out, 26, formula(fn.IF(
+                cell("Y", row_out).eq(0),
+                0,
+                fn.IF(I.gt(0), fn.IF(group(I + T).eq(0), 0, (I * AC + T * U) / (I + T)), U),
+            )))
             
             # Col AA: Explicación T-Z
             cantidad_val = trans['cantidad'] or 0
@@ -4565,9 +4579,11 @@ class GalloVisualMerger:
             
             # Col AC (29): Precio Nominal = Precio Standarizado en USD (L) /100 si es ON, Títulos Públicos o Letras
             if preserve_micro_source:
-                ws.cell(row_out, 29, f'=SI(I{row_out}=0;0;ABS(M{row_out}/I{row_out}))')
+                ws.cell(row_out, 29, formula(fn.IF(I.eq(0), 0, fn.ABS(cell("M", row_out) / I))))
             else:
-                ws.cell(row_out, 29, f'=SI(O(ESNUMERO(HALLAR("Obligacion";B{row_out}));ESNUMERO(HALLAR("Titulo";B{row_out}));ESNUMERO(HALLAR("Título";B{row_out}));ESNUMERO(HALLAR("Letra";B{row_out})));SI(ABS(L{row_out})>=10;L{row_out}/100;L{row_out});L{row_out})')
+                L = cell("L", row_out)
+                es_nominal_100 = contains_any(["Obligacion", "Titulo", "Título", "Letra"], cell("B", row_out))
+                ws.cell(row_out, 29, formula(fn.IF(es_nominal_100, fn.IF(fn.ABS(L).ge(10), L / 100, L), L)))
     
     def _create_rentas_dividendos_ars(self, wb: Workbook):
         """Crea hoja Rentas Dividendos ARS con valores reales filtrados y ordenados.
@@ -4888,31 +4904,38 @@ class GalloVisualMerger:
             ws.cell(1, col, header)
             ws.cell(1, col).font = Font(bold=True)
         
-        # Fila ARS
-        ws.cell(2, 1, "ARS")
-        ws.cell(2, 2, "=SUM('Resultado Ventas ARS'!U:U)")
-        ws.cell(2, 3, '=SUMIF(FCI!C:C,"*Peso*",FCI!K:K)+SUMIF(FCI!C:C,"ARS",FCI!K:K)')
-        ws.cell(2, 4, '=SUMIF(Opciones!C:C,"*Peso*",Opciones!K:K)+SUMIF(Opciones!C:C,"ARS",Opciones!K:K)')
-        ws.cell(2, 5, "=SUMAR.SI.CONJUNTO('Rentas Dividendos ARS'!M:M;'Rentas Dividendos ARS'!C:C;\"Rentas\";'Rentas Dividendos ARS'!J:J;\"*Peso*\")+SUMAR.SI.CONJUNTO('Rentas Dividendos ARS'!M:M;'Rentas Dividendos ARS'!C:C;\"Rentas\";'Rentas Dividendos ARS'!J:J;\"ARS\")")
-        ws.cell(2, 6, "=SUMAR.SI.CONJUNTO('Rentas Dividendos ARS'!M:M;'Rentas Dividendos ARS'!C:C;\"Dividendos\";'Rentas Dividendos ARS'!J:J;\"*Peso*\")+SUMAR.SI.CONJUNTO('Rentas Dividendos ARS'!M:M;'Rentas Dividendos ARS'!C:C;\"Dividendos\";'Rentas Dividendos ARS'!J:J;\"ARS\")")
-        ws.cell(2, 7, '=SUMIF(Pagare_CPD!G:G,"*Peso*",Pagare_CPD!M:M)+SUMIF(Pagare_CPD!G:G,"ARS",Pagare_CPD!M:M)')
-        ws.cell(2, 8, '=SUMIF(Futuros!A:A,"ARS",Futuros!D:D)+SUMIF(Futuros!A:A,"*Peso*",Futuros!D:D)')
-        ws.cell(2, 9, "=SUMIF('Cauciones Tomadoras'!O:O,\"Pesos\",'Cauciones Tomadoras'!N:N)")
-        ws.cell(2, 10, "=SUMIF('Cauciones Colocadoras'!O:O,\"Pesos\",'Cauciones Colocadoras'!N:N)")
-        ws.cell(2, 11, "=B2+C2+D2+E2+F2+G2+H2+I2+J2")
-        
-        # Fila USD
-        ws.cell(3, 1, "USD")
-        ws.cell(3, 2, "=SUM('Resultado Ventas USD'!X:X)")
-        ws.cell(3, 3, '=SUMIF(FCI!C:C,"*Dolar*",FCI!K:K)+SUMIF(FCI!C:C,"USD",FCI!K:K)')
-        ws.cell(3, 4, '=SUMIF(Opciones!C:C,"*Dolar*",Opciones!K:K)+SUMIF(Opciones!C:C,"USD",Opciones!K:K)')
-        ws.cell(3, 5, "=SUMAR.SI.CONJUNTO('Rentas Dividendos USD'!M:M;'Rentas Dividendos USD'!C:C;\"Rentas\";'Rentas Dividendos USD'!J:J;\"*Dolar*\")+SUMAR.SI.CONJUNTO('Rentas Dividendos USD'!M:M;'Rentas Dividendos USD'!C:C;\"Rentas\";'Rentas Dividendos USD'!J:J;\"USD\")")
-        ws.cell(3, 6, "=SUMAR.SI.CONJUNTO('Rentas Dividendos USD'!M:M;'Rentas Dividendos USD'!C:C;\"Dividendos\";'Rentas Dividendos USD'!J:J;\"*Dolar*\")+SUMAR.SI.CONJUNTO('Rentas Dividendos USD'!M:M;'Rentas Dividendos USD'!C:C;\"Dividendos\";'Rentas Dividendos USD'!J:J;\"USD\")")
-        ws.cell(3, 7, '=SUMIF(Pagare_CPD!G:G,"*Dolar*",Pagare_CPD!M:M)+SUMIF(Pagare_CPD!G:G,"USD",Pagare_CPD!M:M)')
-        ws.cell(3, 8, '=SUMIF(Futuros!A:A,"USD",Futuros!D:D)+SUMIF(Futuros!A:A,"*Dolar*",Futuros!D:D)')
-        ws.cell(3, 9, "=SUMIF('Cauciones Tomadoras'!O:O,\"*Dolar*\",'Cauciones Tomadoras'!N:N)")
-        ws.cell(3, 10, "=SUMIF('Cauciones Colocadoras'!O:O,\"*Dolar*\",'Cauciones Colocadoras'!N:N)")
-        ws.cell(3, 11, "=B3+C3+D3+E3+F3+G3+H3+I3+J3")
+        def _sumif(hoja, criterio_col, criterios, suma_col):
+            rango, suma = sheet_range(hoja, criterio_col), sheet_range(hoja, suma_col)
+            return sum_exprs(fn.SUMIF(rango, criterio, suma) for criterio in criterios)
+
+        def _rentas(hoja, concepto, monedas):
+            return sum_exprs(
+                fn.SUMIFS(
+                    sheet_range(hoja, "M:M"),
+                    sheet_range(hoja, "C:C"), concepto,
+                    sheet_range(hoja, "J:J"), moneda,
+                )
+                for moneda in monedas
+            )
+
+        # (fila, moneda, columna de resultado, criterios de moneda, criterios de Futuros, moneda de cauciones)
+        filas = [
+            (2, "ARS", "U:U", ["*Peso*", "ARS"], ["ARS", "*Peso*"], "Pesos"),
+            (3, "USD", "X:X", ["*Dolar*", "USD"], ["USD", "*Dolar*"], "*Dolar*"),
+        ]
+        for row, moneda, resultado_col, patrones, patrones_futuros, moneda_caucion in filas:
+            rentas_hoja = f"Rentas Dividendos {moneda}"
+            ws.cell(row, 1, moneda)
+            ws.cell(row, 2, formula(fn.SUM(sheet_range(f"Resultado Ventas {moneda}", resultado_col))))
+            ws.cell(row, 3, formula(_sumif("FCI", "C:C", patrones, "K:K")))
+            ws.cell(row, 4, formula(_sumif("Opciones", "C:C", patrones, "K:K")))
+            ws.cell(row, 5, formula(_rentas(rentas_hoja, "Rentas", patrones)))
+            ws.cell(row, 6, formula(_rentas(rentas_hoja, "Dividendos", patrones)))
+            ws.cell(row, 7, formula(_sumif("Pagare_CPD", "G:G", patrones, "M:M")))
+            ws.cell(row, 8, formula(_sumif("Futuros", "A:A", patrones_futuros, "D:D")))
+            ws.cell(row, 9, formula(_sumif("Cauciones Tomadoras", "O:O", [moneda_caucion], "N:N")))
+            ws.cell(row, 10, formula(_sumif("Cauciones Colocadoras", "O:O", [moneda_caucion], "N:N")))
+            ws.cell(row, 11, formula(sum_exprs(cell(col, row) for col in "BCDEFGHIJ")))
     
     def _sum_column(self, wb: Workbook, sheet_name: str, col: int, moneda_filter: str = None) -> float:
         """Suma una columna de una hoja, opcionalmente filtrando por moneda."""
@@ -5061,7 +5084,7 @@ class GalloVisualMerger:
 
         src_name = next((name for name in source_candidates if name in self.visual_wb.sheetnames), None)
         if src_name:
-            src_ws = self.visual_wb[src_name]
+            src_ws = self._input_sheet(self.visual_wb, src_name)
             max_col = src_ws.max_column
             for col in range(1, max_col + 1):
                 header = src_ws.cell(1, col).value
@@ -5147,14 +5170,14 @@ class GalloVisualMerger:
             return text
 
         if 'Pagare_CPD' in self.visual_wb.sheetnames:
-            visual_ws = self.visual_wb['Pagare_CPD']
+            visual_ws = self._input_sheet(self.visual_wb, 'Pagare_CPD')
             for row in range(2, visual_ws.max_row + 1):
                 if not any(visual_ws.cell(row, col).value not in (None, '') for col in range(1, visual_ws.max_column + 1)):
                     continue
 
                 concertacion = visual_ws.cell(row, 2).value
-                fecha_dt, year = self._parse_fecha(concertacion)
-                if year and year != 2025:
+                fecha_dt, year = visual_ws.fecha(row, 2)
+                if year and year != self.anio:
                     continue
 
                 rows_out.append({
@@ -5181,7 +5204,7 @@ class GalloVisualMerger:
             if any(skip in sheet_name for skip in ['Posicion', 'Resultado', 'Posición']):
                 continue
 
-            gallo_ws = self.gallo_wb[sheet_name]
+            gallo_ws = self._input_sheet(self.gallo_wb, sheet_name)
             moneda = 'Pesos'
             if 'exterior' in sheet_lower:
                 moneda = 'Dolar Cable'
@@ -5194,8 +5217,8 @@ class GalloVisualMerger:
                 if not operacion:
                     continue
 
-                fecha_dt, year = self._parse_fecha(fecha)
-                if year and year != 2025:
+                fecha_dt, year = gallo_ws.fecha(row, 4)
+                if year and year != self.anio:
                     continue
 
                 codigo = gallo_ws.cell(row, 2).value
@@ -5271,7 +5294,7 @@ class GalloVisualMerger:
         
         if visual_sheet_name:
             # Usar datos de Visual (fuente correcta)
-            visual_ws = self.visual_wb[visual_sheet_name]
+            visual_ws = self._input_sheet(self.visual_wb, visual_sheet_name)
             
             # Copiar encabezados de Visual
             for col in range(1, visual_ws.max_column + 1):
@@ -5366,7 +5389,7 @@ class GalloVisualMerger:
         if 'PrecioTenenciasIniciales' in wb.sheetnames:
             return
 
-        ws_src = self.precio_tenencias_wb['PrecioTenenciasIniciales'] if 'PrecioTenenciasIniciales' in self.precio_tenencias_wb.sheetnames else self.precio_tenencias_wb.active
+        ws_src = self._precio_tenencias_source()
         ws_dst = wb.create_sheet('PrecioTenenciasIniciales')
 
         # Copy original data
@@ -5427,10 +5450,9 @@ class GalloVisualMerger:
         if 'RatiosCedearsAcciones' in wb.sheetnames:
             return
         try:
-            aux_path = self.aux_data_dir / 'RatiosCedearsAcciones.xlsx'
-            if not aux_path.exists():
+            wb_ratios = self.aux_store.ratios_cedears
+            if wb_ratios is None:
                 return
-            wb_ratios = load_workbook(aux_path)
             ws_src = wb_ratios.active
             ws_dst = wb.create_sheet('RatiosCedearsAcciones')
             for row in ws_src.iter_rows():
@@ -5464,7 +5486,7 @@ class GalloVisualMerger:
         ws.cell(1, 10, 'Precio Nominal USD')
         
         # Cotización inicio período (para fórmulas)
-        cotiz = self._fmt_num_es(self.COTIZACION_INICIO_PERIODO)
+        cotiz = float(self.COTIZACION_INICIO_PERIODO)
         
         # Lista de tipos que requieren división por 100 (para la fórmula)
         # Usamos matching parcial como en _es_tipo_precio_cada_100
@@ -5477,14 +5499,281 @@ class GalloVisualMerger:
             if codigo:
                 # Col H: Tipo Instrumento - VLOOKUP a EspeciesVisual
                 # EspeciesVisual: Col C=Código, Col R=Tipo Especie (offset 16)
-                ws.cell(row, 8, f'=SI(ESERROR(BUSCARV(A{row};EspeciesVisual!C:R;16;FALSO));"";BUSCARV(A{row};EspeciesVisual!C:R;16;FALSO))')
+                ws.cell(row, 8, formula(self._especies_visual_lookup(cell("A", row), "C:R", 16)))
                 
                 # Col I: Precio Nominal - dividir por 100 si tipo lo requiere
-                # Usamos HALLAR para detectar si H contiene alguno de los tipos
-                ws.cell(row, 9, f'=SI(O(ESNUMERO(HALLAR("obligacion";MINUSC(H{row})));ESNUMERO(HALLAR("titulo";MINUSC(H{row})));ESNUMERO(HALLAR("letra";MINUSC(H{row}))));G{row}/100;G{row})')
+                # Usamos SEARCH para detectar si H contiene alguno de los tipos
+                G = cell("G", row)
+                requiere_100 = contains_any(["obligacion", "titulo", "letra"], fn.LOWER(cell("H", row)))
+                ws.cell(row, 9, formula(fn.IF(requiere_100, G / 100, G)))
                 
                 # Col J: Precio Nominal USD = I / cotización
-                ws.cell(row, 10, f'=I{row}/{cotiz}')
+                ws.cell(row, 10, formula(cell("I", row) / cotiz))
+
+
+class EspecieNombreIndex:
+    """
+    Índice invertido de nombres de especie para el match fuzzy de
+    GalloVisualMerger._match_especie.
+
+    Indexa los trigramas de cada nombre normalizado y de su "resto sin ticker".
+    Si un texto contiene a otro, contiene todos sus trigramas, así que los
+    candidatos salen de intersecciones (consulta contenida en el nombre) y de
+    conteos por entrada (nombre contenido en la consulta). Los textos de menos
+    de tres caracteres no tienen trigramas y se verifican siempre. Cada
+    candidato se confirma con _match_especie y gana el de menor posición, de
+    modo que el resultado es el mismo que recorrer las entradas en orden.
+    """
+
+    def __init__(self, entradas: Iterable[Tuple[str, str]]):
+        self._nombres: List[str] = []
+        self._valores: List[str] = []
+        self._completo = _TrigramPostings()
+        self._resto = _TrigramPostings()
+        for nombre, valor in entradas:
+            posicion = len(self._nombres)
+            self._nombres.append(nombre)
+            self._valores.append(valor)
+            normalizado = self._normalizar(nombre)
+            self._completo.add(posicion, normalizado)
+            resto = self._resto_sin_ticker(normalizado)
+            if resto is not None:
+                self._resto.add(posicion, resto)
+
+    def __len__(self) -> int:
+        return len(self._nombres)
+
+    @staticmethod
+    def _normalizar(texto: str) -> str:
+        return texto.replace('-', ' ').replace('/', ' ').strip()
+
+    @staticmethod
+    def _resto_sin_ticker(normalizado: str) -> Optional[str]:
+        words = normalizado.split()
+        if len(words) > 1:
+            return ' '.join(words[1:])
+        return None
+
+    def buscar(self, especie_upper: str) -> str:
+        """Valor de la primera entrada que hace match con especie_upper ('' si ninguna)."""
+        normalizado = self._normalizar(especie_upper)
+        candidatos = self._completo.candidatos(normalizado, len(self._nombres))
+        resto = self._resto_sin_ticker(normalizado)
+        if resto is not None:
+            candidatos |= self._resto.candidatos(resto, len(self._nombres))
+        for posicion in sorted(candidatos):
+            if GalloVisualMerger._match_especie(especie_upper, self._nombres[posicion]):
+                return self._valores[posicion]
+        return ""
+
+
+class _TrigramPostings:
+    """Posting lists de trigramas -> posiciones, más las entradas sin trigramas."""
+
+    def __init__(self):
+        self._postings: Dict[str, List[int]] = {}
+        self._trigram_count: Dict[int, int] = {}
+        self._cortos: List[int] = []
+
+    @staticmethod
+    def _trigramas(texto: str) -> set:
+        return {texto[i:i + 3] for i in range(len(texto) - 2)}
+
+    def add(self, posicion: int, texto: str):
+        trigramas = self._trigramas(texto)
+        if not trigramas:
+            self._cortos.append(posicion)
+            return
+        self._trigram_count[posicion] = len(trigramas)
+        for trigrama in trigramas:
+            self._postings.setdefault(trigrama, []).append(posicion)
+
+    def candidatos(self, consulta: str, total: int) -> set:
+        """Posiciones que pueden contener a la consulta o estar contenidas en ella."""
+        trigramas = self._trigramas(consulta)
+        if not trigramas:
+            # Consulta corta: puede ser substring de cualquier entrada
+            return set(range(total))
+
+        listas = sorted((self._postings.get(t, ()) for t in trigramas), key=len)
+        contienen = set(listas[0])
+        for lista in listas[1:]:
+            if not contienen:
+                break
+            contienen.intersection_update(lista)
+
+        compartidos: Dict[int, int] = {}
+        for lista in listas:
+            for posicion in lista:
+                compartidos[posicion] = compartidos.get(posicion, 0) + 1
+        contenidas = {
+            posicion for posicion, count in compartidos.items()
+            if count == self._trigram_count[posicion]
+        }
+        return contienen | contenidas | set(self._cortos)
+
+
+class AuxDataStore:
+    """
+    Hojas auxiliares (EspeciesVisual, EspeciesGallo, Cotización Dólar, PreciosIniciales,
+    RatiosCedears) cargadas una sola vez junto con sus caches de búsqueda.
+
+    Es independiente del caso: un mismo store puede pasarse a varios GalloVisualMerger
+    (por ejemplo, cacheado como recurso en la app o compartido por los workers de la
+    cola). Las hojas se materializan al cargar como InputWorkbook (filas en tuplas):
+    leerlas no crea celdas, así varios merges concurrentes pueden copiarlas sin pisarse.
+    """
+
+    FILES = {
+        'especies_visual': 'EspeciesVisual.xlsx',
+        'especies_gallo': 'EspeciesGallo.xlsx',
+        'cotizacion_dolar': 'Cotizacion_Dolar_Historica.xlsx',
+        'precios_iniciales': 'PreciosInicialesEspecies.xlsx',
+    }
+    RATIOS_FILE = 'RatiosCedearsAcciones.xlsx'
+
+    def __init__(self, aux_data_dir: str = None):
+        if aux_data_dir is None:
+            aux_data_dir = Path(__file__).parent / 'aux_data'
+        self.aux_data_dir = Path(aux_data_dir)
+
+        self.especies_visual = self._load_aux(self.FILES['especies_visual'])
+        self.especies_gallo = self._load_aux(self.FILES['especies_gallo'])
+        self.cotizacion_dolar = self._load_aux(self.FILES['cotizacion_dolar'])
+        self.precios_iniciales = self._load_aux(self.FILES['precios_iniciales'])
+        ratios_path = self.aux_data_dir / self.RATIOS_FILE
+        try:
+            self.ratios_cedears = load_input_workbook(ratios_path) if ratios_path.exists() else None
+        except Exception:
+            self.ratios_cedears = None
+
+        self.especies_visual_cache = {}
+        self.especies_gallo_cache = {}
+        self.cotizacion_cache = {}
+        self.precios_iniciales_cache = {}
+        self.precios_iniciales_by_codigo = {}  # codigo -> {ticker, precio}
+        self.ratios_cedears_cache = self._load_ratio_cache()
+        self._build_caches()
+        self.fx_rates = FxRateStore.from_rows(
+            self.cotizacion_dolar.active.iter_rows(min_row=2, max_col=3, values_only=True),
+            FxRateStore.load_period_start(self.aux_data_dir / PERIOD_START_FILE),
+        )
+        self.especies_gallo_nombre_index = EspecieNombreIndex(
+            (str(data['nombre']).upper(), codigo)
+            for codigo, data in self.especies_gallo_cache.items()
+            if data.get('nombre')
+        )
+
+    def _load_aux(self, filename: str) -> InputWorkbook:
+        """Carga un archivo auxiliar (solo lectura)."""
+        path = self.aux_data_dir / filename
+        if not path.exists():
+            raise FileNotFoundError(f"Archivo auxiliar no encontrado: {path}")
+        return load_input_workbook(path)
+
+    def _build_caches(self):
+        """Construye caches para búsquedas rápidas."""
+        clean_codigo = GalloVisualMerger._clean_codigo
+
+        # Cache EspeciesVisual: codigo -> {nombre, moneda_emision, tipo_especie, ...}
+        ws = self.especies_visual.active
+        for row in range(2, ws.max_row + 1):
+            codigo = ws.cell(row, 3).value  # Columna C = codigo
+            if codigo:
+                codigo_clean = clean_codigo(codigo)
+                self.especies_visual_cache[codigo_clean] = {
+                    'codigo': codigo,
+                    'moneda_emision': ws.cell(row, 7).value,  # Col G
+                    'ticker': ws.cell(row, 8).value,  # Col H
+                    'nombre_con_moneda': ws.cell(row, 17).value,  # Col Q
+                    'tipo_especie': ws.cell(row, 18).value,  # Col R
+                }
+
+        # Cache EspeciesGallo: codigo -> {nombre, ticker, moneda_emision}
+        ws = self.especies_gallo.active
+        for row in range(2, ws.max_row + 1):
+            codigo = ws.cell(row, 1).value  # Columna A
+            if codigo:
+                codigo_clean = clean_codigo(codigo)
+                self.especies_gallo_cache[codigo_clean] = {
+                    'codigo': codigo,
+                    'nombre': ws.cell(row, 2).value,  # Col B
+                    'ticker': ws.cell(row, 10).value,  # Col J
+                    'moneda_emision': ws.cell(row, 14).value,  # Col N
+                }
+
+        # Cache Cotización Dólar: (fecha, tipo_dolar) -> cotizacion
+        ws = self.cotizacion_dolar.active
+        for row in range(2, ws.max_row + 1):
+            fecha = ws.cell(row, 1).value
+            cotizacion = ws.cell(row, 2).value
+            tipo_dolar = ws.cell(row, 3).value
+            if fecha and cotizacion:
+                # Normalizar fecha
+                if isinstance(fecha, datetime):
+                    fecha_key = fecha.date()
+                else:
+                    fecha_key = fecha
+                self.cotizacion_cache[(fecha_key, tipo_dolar)] = cotizacion
+
+        # Cache Precios Iniciales: ticker -> {codigo, precio}
+        # Col A = codigo, Col B = nombre, Col C = ticker/ORDEN, Col G = precio
+        ws = self.precios_iniciales.active
+        for row in range(2, ws.max_row + 1):
+            codigo = ws.cell(row, 1).value  # Col A = codigo especie
+            ticker = ws.cell(row, 3).value  # Col C = ORDEN/ticker
+            precio = ws.cell(row, 7).value  # Col G = precio
+            if ticker:
+                ticker_key = str(ticker).upper().strip()
+                self.precios_iniciales_cache[ticker_key] = {
+                    'codigo': int(codigo) if codigo else None,
+                    'precio': precio if precio else 0
+                }
+            # Cache adicional por código
+            if codigo:
+                codigo_clean = clean_codigo(codigo)
+                self.precios_iniciales_by_codigo[codigo_clean] = {
+                    'ticker': ticker_key if ticker else None,
+                    'precio': precio if precio else 0
+                }
+
+    def _load_ratio_cache(self) -> dict:
+        if self.ratios_cedears is None:
+            return {}
+        normalize_ratio_key = GalloVisualMerger._normalize_ratio_key
+        try:
+            ws_ratios = self.ratios_cedears.active
+            cache = {}
+            for r in range(2, ws_ratios.max_row + 1):
+                nombre = ws_ratios.cell(r, 1).value
+                ratio_val = ws_ratios.cell(r, 2).value
+                key = ws_ratios.cell(r, 3).value
+                if ratio_val is None:
+                    continue
+                try:
+                    ratio_num = float(ratio_val)
+                except Exception:
+                    continue
+                if key:
+                    normalized_key = normalize_ratio_key(key)
+                    if normalized_key:
+                        cache[normalized_key] = ratio_num
+                if nombre:
+                    nombre_str = str(nombre).strip()
+                    nombre_key = normalize_ratio_key(nombre_str.split()[0])
+                    if nombre_key:
+                        cache.setdefault(nombre_key, ratio_num)
+                    # Extract stock ticker from Nombre (format: "Company Name TICKER EXCHANGE")
+                    tokens = nombre_str.split()
+                    if len(tokens) >= 2:
+                        # Second-to-last token is usually the ticker symbol
+                        ticker_candidate = tokens[-2]
+                        ticker_key = normalize_ratio_key(ticker_candidate)
+                        if ticker_key and len(ticker_key) <= 6:
+                            cache.setdefault(ticker_key, ratio_num)
+            return cache
+        except Exception:
+            return {}
 
 
 def merge_gallo_visual(gallo_path: str = None, visual_path: str = None, output_path: str = None,
@@ -0,0 +1,415 @@
+"""
+Extracción local de tablas para PDFs digitales (con capa de texto), sin Datalab.
+
+Los reportes de Gallo y Visual que salen directo del sistema del broker ya traen el
+texto: en lugar de mandarlos al OCR remoto (pago y de minutos), las tablas se leen con
+PyMuPDF (`page.find_tables`) y se escriben en el mismo markdown que devuelve Datalab
+con `paginate=True`, así `MarkdownTableParser` los procesa sin cambios:
+
+    - `{N}------` antes de cada página
+    - títulos (texto en negrita o más grande) como `##`/`###`
+    - tablas markdown con el header como primera fila
+    - celdas en negrita (categorías, monedas) como `<b>..</b>`
+
+    markdown, extractor = route_pdf(pdf_bytes, ocr=lambda rango: datalab_markdown(rango))
+    reporte = check_parity(pdf_path, Path("X.datalab.md").read_text())
+    reporte.ok, reporte.accuracy
+
+`route_pdf` decide por página: un PDF digital se lee entero localmente, uno escaneado
+va entero a Datalab y uno mixto (anexos escaneados) manda al OCR solo sus páginas de
+imagen con `page_range`; el resultado se une en orden de página (`hybrid_markdown`),
+así el costo y la demora crecen con las páginas escaneadas y no con el total.
+
+El default de convert_source / convert_pdf_to_excel sigue siendo "datalab": "auto" se
+activa explícitamente. La paridad de los tests se mide sobre PDFs renderizados desde el
+propio markdown; antes de usarlo por defecto hay que medir check_parity con reportes
+reales del broker y su markdown de Datalab cacheado.
+"""
+
+from __future__ import annotations
+
+import re
+from collections import Counter
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple, Union
+
+import fitz  # PyMuPDF
+
+from .md_to_excel import MarkdownTableParser, TableBook, markdown_to_table_book
+from .tracing import span
+
+
+PdfInput = Union[str, Path, bytes]
+
+# Extractores aceptados por convert_pdf_to_excel / run_case
+EXTRACTOR_AUTO = "auto"
+EXTRACTOR_NATIVE = "native"
+EXTRACTOR_DATALAB = "datalab"
+EXTRACTORS = (EXTRACTOR_AUTO, EXTRACTOR_NATIVE, EXTRACTOR_DATALAB)
+# Resultado de "auto" con páginas digitales y escaneadas mezcladas
+EXTRACTOR_HYBRID = "hybrid"
+
+# Mismo umbral que PDFReader._detect_ocr_need
+MIN_TEXT_CHARS = 100
+
+PAGE_SEPARATOR = "-" * 48
+_SEPARATOR_LINE = re.compile(r"^\{(\d+)\}-{3,}[ \t]*$", re.MULTILINE)
+
+# OCR remoto: recibe un page_range de Datalab (None = todo el documento) y devuelve markdown
+OcrCall = Callable[[Optional[str]], str]
+
+
+def open_pdf(pdf: PdfInput) -> fitz.Document:
+    """Abre un PDF desde ruta o bytes."""
+    if isinstance(pdf, (bytes, bytearray)):
+        return fitz.open(stream=bytes(pdf), filetype="pdf")
+    return fitz.open(str(pdf))
+
+
+def page_needs_ocr(page: fitz.Page) -> bool:
+    """Página escaneada: casi sin texto pero con imágenes (criterio de PDFReader)."""
+    return len(page.get_text().strip()) < MIN_TEXT_CHARS and bool(page.get_images())
+
+
+def is_digital_pdf(pdf: PdfInput) -> bool:
+    """True si ninguna página necesita OCR; un archivo que no abre como PDF no es digital."""
+    try:
+        doc = open_pdf(pdf)
+    except (fitz.FileDataError, RuntimeError, ValueError):
+        return False
+    with doc:
+        return len(doc) > 0 and not any(page_needs_ocr(page) for page in doc)
+
+
+def scanned_pages(pdf: PdfInput) -> List[int]:
+    """Índices (base 0) de las páginas que necesitan OCR."""
+    with open_pdf(pdf) as doc:
+        return [index for index, page in enumerate(doc) if page_needs_ocr(page)]
+
+
+def page_range(pages: Iterable[int]) -> str:
+    """Índices de página en el formato `page_range` de Datalab: [0, 2, 3, 4, 6] -> "0,2-4,6"."""
+    parts: List[str] = []
+    for page in sorted(set(pages)):
+        if parts and page == last + 1:
+            start = parts[-1].split("-")[0]
+            parts[-1] = f"{start}-{page}"
+        else:
+            parts.append(str(page))
+        last = page
+    return ",".join(parts)
+
+
+def split_pages(markdown: str, pages: List[int]) -> Dict[int, str]:
+    """
+    Parte el markdown paginado de Datalab en {página: markdown}.
+
+    Datalab numera con el índice original de la página; si los números no coinciden con
+    las páginas pedidas, se asignan en orden. Sin separadores, todo va a la primera.
+    """
+    matches = list(_SEPARATOR_LINE.finditer(markdown))
+    if not matches:
+        return {pages[0]: markdown.strip()} if pages else {}
+    chunks = [
+        markdown[match.end():matches[n + 1].start() if n + 1 < len(matches) else len(markdown)].strip()
+        for n, match in enumerate(matches)
+    ]
+    numbers = [int(match.group(1)) for match in matches]
+    if sorted(numbers) != sorted(pages):
+        numbers = pages[:len(chunks)]
+    return dict(zip(numbers, chunks))
+
+
+def pdf_to_markdown(pdf: PdfInput, pages: Optional[Iterable[int]] = None) -> str:
+    """
+    Escribe el PDF como el markdown paginado de Datalab.
+
+    Una tabla que sigue en la página siguiente (la página arranca con el mismo header)
+    se une a la anterior, como la lee Datalab; el separador de esa página queda después.
+
+    Args:
+        pdf: ruta o bytes del PDF.
+        pages: índices de página (base 0) a extraer; por defecto todas.
+    """
+    with open_pdf(pdf) as doc:
+        indices = list(range(len(doc)) if pages is None else pages)
+        with span("native.extract", "ocr", pages=len(indices)):
+            extracted = [(index, page_blocks(doc[index])) for index in indices]
+    return _pages_markdown(extracted)
+
+
+def hybrid_markdown(pdf: PdfInput, ocr: OcrCall) -> str:
+    """
+    Markdown del PDF página por página: las que tienen texto se extraen localmente y
+    solo las escaneadas van al OCR, en un único pedido con su `page_range`.
+
+    Args:
+        pdf: ruta o bytes del PDF.
+        ocr: recibe el page_range ("1,4-5") y devuelve el markdown paginado de Datalab.
+    """
+    with open_pdf(pdf) as doc:
+        scanned = [index for index, page in enumerate(doc) if page_needs_ocr(page)]
+        with span("native.extract", "ocr", pages=len(doc) - len(scanned)):
+            extracted = [
+                (index, None if index in scanned else page_blocks(doc[index]))
+                for index in range(len(doc))
+            ]
+
+    ocr_pages = split_pages(ocr(page_range(scanned)), scanned) if scanned else {}
+    return _pages_markdown([
+        (index, [_OcrPage(ocr_pages.get(index, ""))] if blocks is None else blocks)
+        for index, blocks in extracted
+    ])
+
+
+def route_pdf(pdf: PdfInput, ocr: OcrCall, extractor: str = EXTRACTOR_AUTO) -> Tuple[str, str]:
+    """
+    Elige cómo leer el PDF y devuelve (markdown, extractor usado).
+
+    - "datalab": todo el documento al OCR.
+    - "native": todo local; falla si hay páginas escaneadas o no hay tablas.
+    - "auto": digital -> local (si no aparecen tablas, Datalab); todo escaneado ->
+      Datalab; mixto -> EXTRACTOR_HYBRID (solo las páginas escaneadas van al OCR).
+
+    Args:
+        ocr: recibe un page_range (None = documento completo) y devuelve el markdown de Datalab.
+    """
+    if extractor not in EXTRACTORS:
+        raise ValueError(f"Extractor desconocido: {extractor}")
+    if extractor == EXTRACTOR_DATALAB:
+        return ocr(None), EXTRACTOR_DATALAB
+
+    try:
+        with open_pdf(pdf) as doc:
+            total = len(doc)
+            scanned = [index for index, page in enumerate(doc) if page_needs_ocr(page)]
+    except (fitz.FileDataError, RuntimeError, ValueError):
+        total, scanned = 0, []
+
+    if total and not scanned:
+        markdown = pdf_to_markdown(pdf)
+        if _has_table_rows(markdown):
+            return markdown, EXTRACTOR_NATIVE
+    if extractor == EXTRACTOR_NATIVE:
+        raise ValueError("El PDF no es digital o no tiene tablas reconocibles")
+    if not scanned or len(scanned) == total:
+        return ocr(None), EXTRACTOR_DATALAB
+    return hybrid_markdown(pdf, ocr), EXTRACTOR_HYBRID
+
+
+def page_markdown(page: fitz.Page) -> str:
+    """Markdown de una página: títulos, líneas de texto y tablas en orden de lectura."""
+    return _blocks_markdown(page_blocks(page))
+
+
+def page_blocks(page: fitz.Page) -> List[Union[str, "_Table"]]:
+    """
+    Bloques de la página en orden de lectura: tablas (`_Table`) y líneas de texto,
+    con los títulos (negrita o letra más grande que el cuerpo) como `##`/`###`.
+    """
+    spans = _page_spans(page)
+    body_size = _body_font_size(spans)
+    tables = page.find_tables().tables
+    table_boxes = [fitz.Rect(table.bbox) for table in tables]
+
+    blocks: List[Tuple[float, float, Union[str, _Table]]] = []
+    for table, box in zip(tables, table_boxes):
+        blocks.append((box.y0, box.x0, _read_table(table, spans)))
+
+    for block in page.get_text("dict")["blocks"]:
+        for line in block.get("lines", []):
+            line_spans = [s for s in line["spans"] if s["text"].strip()]
+            if not line_spans:
+                continue
+            rect = fitz.Rect(line["bbox"])
+            center = fitz.Point((rect.x0 + rect.x1) / 2, (rect.y0 + rect.y1) / 2)
+            if any(center in box for box in table_boxes):
+                continue
+            text = " ".join("".join(s["text"] for s in line_spans).split())
+            size = max(s["size"] for s in line_spans)
+            if size > body_size * 1.2:
+                text = f"## {text}"
+            elif all(_is_bold(s) for s in line_spans):
+                text = f"### {text}"
+            blocks.append((rect.y0, rect.x0, text))
+
+    blocks.sort(key=lambda block: (round(block[0], 1), block[1]))
+    return [block for _, _, block in blocks]
+
+
+@dataclass(frozen=True)
+class CellMismatch:
+    sheet: str
+    row: int
+    column: int
+    expected: str
+    actual: str
+
+
+@dataclass(frozen=True)
+class ParityReport:
+    """Diferencias entre las hojas de la extracción local y las del markdown de Datalab."""
+
+    cells_compared: int
+    missing_sheets: Tuple[str, ...] = ()
+    extra_sheets: Tuple[str, ...] = ()
+    mismatches: Tuple[CellMismatch, ...] = ()
+
+    @property
+    def ok(self) -> bool:
+        return not (self.missing_sheets or self.extra_sheets or self.mismatches)
+
+    @property
+    def accuracy(self) -> float:
+        """Fracción de celdas de Datalab que la extracción local reproduce exactamente."""
+        if not self.cells_compared:
+            return 1.0 if self.ok else 0.0
+        return 1 - len(self.mismatches) / self.cells_compared
+
+    def summary(self, max_mismatches: int = 10) -> List[str]:
+        lines = [f"celdas comparadas: {self.cells_compared}, exactitud: {self.accuracy:.2%}"]
+        if self.missing_sheets:
+            lines.append(f"hojas faltantes: {', '.join(self.missing_sheets)}")
+        if self.extra_sheets:
+            lines.append(f"hojas de más: {', '.join(self.extra_sheets)}")
+        for mismatch in self.mismatches[:max_mismatches]:
+            lines.append(
+                f"{mismatch.sheet}!R{mismatch.row}C{mismatch.column}: "
+                f"datalab={mismatch.expected!r} local={mismatch.actual!r}"
+            )
+        if len(self.mismatches) > max_mismatches:
+            lines.append(f"... y {len(self.mismatches) - max_mismatches} diferencias más")
+        return lines
+
+
+def compare_table_books(native: TableBook, reference: TableBook) -> ParityReport:
+    """Compara celda a celda las hojas (ya post-procesadas) de ambas extracciones."""
+    missing = tuple(name for name in reference.sheetnames if name not in native)
+    extra = tuple(name for name in native.sheetnames if name not in reference)
+    mismatches: List[CellMismatch] = []
+    compared = 0
+
+    for name in reference.sheetnames:
+        if name not in native:
+            continue
+        expected_rows = list(reference[name].iter_rows())
+        actual_rows = list(native[name].iter_rows())
+        for row_index in range(max(len(expected_rows), len(actual_rows))):
+            expected = expected_rows[row_index] if row_index < len(expected_rows) else ()
+            actual = actual_rows[row_index] if row_index < len(actual_rows) else ()
+            for col_index in range(max(len(expected), len(actual))):
+                want = _cell_text(expected, col_index)
+                got = _cell_text(actual, col_index)
+                compared += 1
+                if want != got:
+                    mismatches.append(CellMismatch(name, row_index + 1, col_index + 1, want, got))
+
+    return ParityReport(compared, missing, extra, tuple(mismatches))
+
+
+def check_parity(pdf: PdfInput, reference_markdown: str) -> ParityReport:
+    """Extrae el PDF localmente y lo compara con el markdown cacheado de Datalab."""
+    native = markdown_to_table_book(pdf_to_markdown(pdf))
+    reference = markdown_to_table_book(reference_markdown)
+    return compare_table_books(native, reference)
+
+
+def _has_table_rows(markdown: str) -> bool:
+    return any(table.rows for table in MarkdownTableParser(markdown).parse().values())
+
+
+def _cell_text(row, index: int) -> str:
+    if index >= len(row):
+        return ""
+    value = row[index]
+    return "" if value is None else str(value).strip()
+
+
+def _is_bold(text_span: dict) -> bool:
+    return bool(text_span["flags"] & fitz.TEXT_FONT_BOLD) or "bold" in text_span["font"].lower()
+
+
+def _page_spans(page: fitz.Page) -> List[dict]:
+    return [
+        text_span
+        for block in page.get_text("dict")["blocks"]
+        for line in block.get("lines", [])
+        for text_span in line["spans"]
+        if text_span["text"].strip()
+    ]
+
+
+def _body_font_size(spans: List[dict]) -> float:
+    """Tamaño de letra con más caracteres en la página (el del cuerpo)."""
+    sizes = Counter()
+    for text_span in spans:
+        sizes[round(text_span["size"], 1)] += len(text_span["text"])
+    return sizes.most_common(1)[0][0] if sizes else 0.0
+
+
+@dataclass
+class _Table:
+    header: str
+    rows: List[str] = field(default_factory=list)
+
+    def markdown(self) -> str:
+        width = self.header.count("|") - 1
+        return "\n".join([self.header, "|" + "---|" * width, *self.rows])
+
+
+def _read_table(table, spans: List[dict]) -> _Table:
+    lines = []
+    for row_index, (cells, row) in enumerate(zip(table.extract(), table.rows)):
+        row_spans = [s for s in spans if row.bbox[1] <= (s["bbox"][1] + s["bbox"][3]) / 2 <= row.bbox[3]]
+        values = []
+        for text, box in zip(cells, row.cells):
+            value = " ".join((text or "").split()).replace("|", "/")
+            # Datalab marca en negrita las filas de categoría/moneda, no el header
+            if value and box is not None and row_index > 0 and _cell_is_bold(box, row_spans):
+                value = f"<b>{value}</b>"
+            values.append(value)
+        lines.append("| " + " | ".join(values) + " |")
+    return _Table(lines[0], lines[1:])
+
+
+@dataclass
+class _OcrPage:
+    """Página que leyó Datalab: corta cualquier continuación de tabla."""
+
+    text: str
+
+    def markdown(self) -> str:
+        return self.text
+
+
+def _pages_markdown(pages: List[Tuple[int, list]]) -> str:
+    # Las continuaciones se unen antes de escribir: modifican la tabla de la página anterior
+    previous: Optional[_Table] = None
+    for _, blocks in pages:
+        first = next((block for block in blocks if not _is_plain_text(block)), None)
+        if isinstance(first, _Table) and previous is not None and first.header == previous.header:
+            previous.rows.extend(first.rows)
+            blocks.remove(first)
+            if not any(not _is_plain_text(block) for block in blocks):
+                continue
+        last = next((block for block in reversed(blocks) if not _is_plain_text(block)), None)
+        if last is not None:
+            previous = last if isinstance(last, _Table) else None
+
+    pages_md = [f"{{{index}}}{PAGE_SEPARATOR}\n\n{_blocks_markdown(blocks)}" for index, blocks in pages]
+    return "\n\n".join(pages_md) + "\n"
+
+
+def _is_plain_text(block) -> bool:
+    """Línea suelta (pie, número de página): no corta la continuación de una tabla."""
+    return isinstance(block, str) and not block.startswith("#")
+
+
+def _blocks_markdown(blocks) -> str:
+    return "\n\n".join(block if isinstance(block, str) else block.markdown() for block in blocks)
+
+
+def _cell_is_bold(box, spans: List[dict]) -> bool:
+    inside = [s for s in spans if box[0] <= (s["bbox"][0] + s["bbox"][2]) / 2 <= box[2]]
+    return bool(inside) and all(_is_bold(s) for s in inside)
@@ -0,0 +1,278 @@
+"""
+Ledger persistente de posiciones por comitente (cantidad y costo PPP al cierre de cada año).
+
+La posición inicial sintética de un año N se arma reproduciendo todas las operaciones
+de Gallo anteriores a N (ver GalloVisualMerger._compute_synthetic_initial_positions).
+Con historia larga eso se repite en cada merge y de nuevo al año siguiente. El ledger
+guarda en SQLite el estado al cierre de cada año, indexado por un hash del contenido
+de las operaciones hasta ese año:
+
+    ledger = PositionLedger("ledger.sqlite")
+    estados = opening_positions(operaciones, 2025, comitente="13353", ledger=ledger)
+
+Si el ledger tiene un cierre cuyo hash coincide con las operaciones del input, se parte
+de ese estado y solo se reproducen las operaciones posteriores. Un hash distinto (input
+corregido, OCR distinto) invalida el cierre y se recalcula desde el principio.
+
+El hash incluye LEDGER_VERSION: al cambiar replay_operations o las reglas del costo PPP
+hay que subirla, así los cierres calculados con la lógica anterior dejan de usarse.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import sqlite3
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple, Union
+
+import numpy as np
+
+
+# Versión de la lógica de replay/costo PPP; subirla invalida todos los cierres guardados
+LEDGER_VERSION = 1
+
+
+@dataclass(frozen=True)
+class Operacion:
+    """Operación de Gallo que mueve stock (compra, venta, trf, canje, licitación, amortización)."""
+
+    cod: str
+    fecha: Optional[datetime]
+    anio: int
+    operacion: str
+    cantidad: float
+    precio: float
+    especie: object
+    tipo_especie: str
+
+
+@dataclass(frozen=True)
+class EstadoPosicion:
+    """Stock acumulado de una especie y su precio promedio ponderado (en términos per-100)."""
+
+    cantidad: float
+    precio_per100: float
+    especie: object
+    tipo_especie: str
+
+
+def _orden(op: Operacion) -> tuple:
+    # Cronológico; en la misma fecha las entradas antes que las salidas
+    return (op.fecha or datetime(1900, 1, 1), 0 if op.cantidad >= 0 else 1)
+
+
+def replay_operations(
+    operaciones: Iterable[Operacion],
+    estados: Optional[Dict[str, EstadoPosicion]] = None,
+    ordenadas: bool = False,
+) -> Dict[str, EstadoPosicion]:
+    """
+    Aplica las operaciones (por especie, en orden cronológico) sobre los estados dados.
+
+    Con ordenadas=True se asume que ya vienen en orden (ver openings_by_year) y no se reordenan.
+    """
+    por_cod: Dict[str, List[Operacion]] = defaultdict(list)
+    for op in operaciones:
+        por_cod[op.cod].append(op)
+
+    result = dict(estados or {})
+    for cod, ops in por_cod.items():
+        if not ordenadas:
+            ops.sort(key=_orden)
+        previo = result.get(cod)
+        stock_qty = previo.cantidad if previo else 0.0
+        stock_price = previo.precio_per100 if previo else 0.0
+
+        for op in ops:
+            qty = op.cantidad
+            if qty > 0:  # Entrada: COMPRA, TRF, CANJE, LICITACION
+                valor_anterior = stock_qty * stock_price
+                valor_nuevo = qty * op.precio
+                stock_qty += qty
+                if stock_qty > 0:
+                    stock_price = (valor_anterior + valor_nuevo) / stock_qty
+            elif qty < 0:  # Salida: VENTA, AMORTIZACION (el precio no cambia)
+                stock_qty += qty
+
+        result[cod] = EstadoPosicion(stock_qty, stock_price, ops[-1].especie, ops[-1].tipo_especie)
+    return result
+
+
+_SIN_FECHA = datetime(1900, 1, 1)
+_SEGUNDO = timedelta(seconds=1)
+
+
+def _hash_columnas(hasher, ops: List[Operacion]) -> None:
+    # Por columnas: fechas (segundos) y números como arrays binarios, textos en un solo
+    # join. Mismo contenido exacto que hashear cada operación, sin un repr por fila.
+    hasher.update(np.array([((op.fecha or _SIN_FECHA) - _SIN_FECHA) // _SEGUNDO for op in ops], dtype=np.int64).tobytes())
+    hasher.update(np.array([op.cantidad for op in ops], dtype=np.float64).tobytes())
+    hasher.update(np.array([op.precio for op in ops], dtype=np.float64).tobytes())
+    textos = '\x1f'.join([f'{op.cod}\x1e{op.operacion}\x1e{op.especie}\x1e{op.tipo_especie}' for op in ops])
+    hasher.update(textos.encode('utf-8', 'surrogatepass'))
+
+
+class ContentHashes:
+    """
+    Hash acumulado de las operaciones hasta cada año (las sin fecha cuentan como año 0),
+    partiendo de LEDGER_VERSION. Se calcula por columnas (ver _hash_columnas): tiene que
+    costar bastante menos que el replay que permite saltear.
+    """
+
+    def __init__(self, operaciones: Iterable[Operacion]):
+        por_anio: Dict[int, List[Operacion]] = defaultdict(list)
+        for op in operaciones:
+            por_anio[op.anio].append(op)
+        hasher = hashlib.sha256(f"ledger-v{LEDGER_VERSION}\n".encode('utf-8'))
+        self._vacio = hasher.hexdigest()
+        self._cortes: List[Tuple[int, str]] = []
+        for anio in sorted(por_anio):
+            _hash_columnas(hasher, por_anio[anio])
+            self._cortes.append((anio, hasher.copy().hexdigest()))
+
+    def through(self, anio: int) -> str:
+        """Hash de todas las operaciones con año <= anio."""
+        digest = self._vacio
+        for corte, valor in self._cortes:
+            if corte > anio:
+                break
+            digest = valor
+        return digest
+
+
+class PositionLedger:
+    """Cierres anuales por comitente en una base SQLite local."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS cierres (
+            comitente TEXT NOT NULL,
+            anio INTEGER NOT NULL,
+            content_hash TEXT NOT NULL,
+            creado TEXT NOT NULL,
+            PRIMARY KEY (comitente, anio)
+        );
+        CREATE TABLE IF NOT EXISTS posiciones (
+            comitente TEXT NOT NULL,
+            anio INTEGER NOT NULL,
+            cod TEXT NOT NULL,
+            cantidad REAL NOT NULL,
+            precio_per100 REAL NOT NULL,
+            especie,
+            tipo_especie TEXT,
+            PRIMARY KEY (comitente, anio, cod)
+        );
+    """
+
+    def __init__(self, path: Union[str, Path]):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            conn.executescript(self._SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=30)
+
+    def cierres(self, comitente: str) -> List[Tuple[int, str]]:
+        """Años cerrados del comitente con su hash, del más reciente al más antiguo."""
+        with self._connect() as conn:
+            rows = conn.execute(
+                "SELECT anio, content_hash FROM cierres WHERE comitente = ? ORDER BY anio DESC",
+                (str(comitente),),
+            ).fetchall()
+        return [(int(anio), content_hash) for anio, content_hash in rows]
+
+    def load(self, comitente: str, anio: int, content_hash: str) -> Optional[Dict[str, EstadoPosicion]]:
+        """Estados al cierre de `anio`, o None si no hay cierre o el hash no coincide."""
+        with self._connect() as conn:
+            cierre = conn.execute(
+                "SELECT content_hash FROM cierres WHERE comitente = ? AND anio = ?",
+                (str(comitente), anio),
+            ).fetchone()
+            if cierre is None or cierre[0] != content_hash:
+                return None
+            rows = conn.execute(
+                "SELECT cod, cantidad, precio_per100, especie, tipo_especie FROM posiciones "
+                "WHERE comitente = ? AND anio = ?",
+                (str(comitente), anio),
+            ).fetchall()
+        return {cod: EstadoPosicion(cantidad, precio, especie, tipo) for cod, cantidad, precio, especie, tipo in rows}
+
+    def store(self, comitente: str, anio: int, content_hash: str, estados: Dict[str, EstadoPosicion]) -> None:
+        """Guarda (o reemplaza) el cierre de `anio` del comitente."""
+        with self._connect() as conn:
+            conn.execute("DELETE FROM posiciones WHERE comitente = ? AND anio = ?", (str(comitente), anio))
+            conn.execute(
+                "INSERT OR REPLACE INTO cierres (comitente, anio, content_hash, creado) VALUES (?, ?, ?, ?)",
+                (str(comitente), anio, content_hash, datetime.now().isoformat(timespec='seconds')),
+            )
+            conn.executemany(
+                "INSERT INTO posiciones (comitente, anio, cod, cantidad, precio_per100, especie, tipo_especie) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (str(comitente), anio, cod, e.cantidad, e.precio_per100, e.especie, e.tipo_especie)
+                    for cod, e in estados.items()
+                ],
+            )
+
+
+def opening_positions(
+    operaciones: Iterable[Operacion],
+    anio: int,
+    comitente: Optional[str] = None,
+    ledger: Optional[PositionLedger] = None,
+) -> Dict[str, EstadoPosicion]:
+    """Estados al 01/01 de `anio` a partir de las operaciones anteriores (ver openings_by_year)."""
+    return openings_by_year(operaciones, [anio], comitente=comitente, ledger=ledger)[anio]
+
+
+def openings_by_year(
+    operaciones: Iterable[Operacion],
+    anios: Iterable[int],
+    comitente: Optional[str] = None,
+    ledger: Optional[PositionLedger] = None,
+) -> Dict[int, Dict[str, EstadoPosicion]]:
+    """
+    Estados al 01/01 de cada año pedido, en una sola pasada cronológica.
+
+    Las operaciones se ordenan una vez y el stock se arrastra de un año al siguiente.
+    Con ledger y comitente se parte del último cierre guardado que coincida con el input
+    (anterior al primer año pedido) y solo se reproducen las operaciones posteriores; al
+    terminar se guardan los cierres de cada anio-1 y, si hay operaciones del último año
+    pedido, el de ese año.
+    """
+    anios = sorted(set(anios))
+    operaciones = sorted(operaciones, key=_orden)
+    primero, ultimo = anios[0], anios[-1]
+    use_ledger = ledger is not None and bool(comitente)
+    hashes = ContentHashes(operaciones) if use_ledger else None
+
+    estados: Dict[str, EstadoPosicion] = {}
+    base_anio = None
+    if use_ledger:
+        for cierre, content_hash in ledger.cierres(comitente):
+            if cierre < primero and content_hash == hashes.through(cierre):
+                base = ledger.load(comitente, cierre, content_hash)
+                if base is not None:
+                    estados, base_anio = base, cierre
+                    break
+
+    por_anio: Dict[int, List[Operacion]] = defaultdict(list)
+    for op in operaciones:
+        if (base_anio is None or op.anio > base_anio) and op.anio <= ultimo:
+            por_anio[op.anio].append(op)
+
+    aperturas: Dict[int, Dict[str, EstadoPosicion]] = {}
+    pendientes = sorted(por_anio)
+    for anio in anios:
+        while pendientes and pendientes[0] < anio:
+            estados = replay_operations(por_anio[pendientes.pop(0)], estados, ordenadas=True)
+        aperturas[anio] = estados
+        if use_ledger and base_anio != anio - 1:
+            ledger.store(comitente, anio - 1, hashes.through(anio - 1), estados)
+
+    if use_ledger and por_anio.get(ultimo):
+        ledger.store(comitente, ultimo, hashes.through(ultimo), replay_operations(por_anio[ultimo], estados, ordenadas=True))
+    return aperturas
@@ -1,6 +1,10 @@
 """
 Post-processing for Datalab-extracted financial data.
 Transforms raw extracted data to match the expected Excel format.
+
+The sheet functions only use `cell`, `max_row`, `max_column`, `delete_rows` and
+`title`, so they run either on openpyxl worksheets or on the in-memory TableSheets
+that md_to_excel builds from the parsed tables before writing the Excel once.
 """
 
 import re
@@ -10,6 +14,8 @@ from openpyxl import Workbook, load_workbook
 from openpyxl.worksheet.worksheet import Worksheet
 from rich.console import Console
 
+from .tracing import traced
+
 console = Console()
 
 # Sheet total names mapping
@@ -1384,12 +1390,13 @@ def process_position_sheet(ws: Worksheet, sheet_name: str, metadata: dict = None
     return ws
 
 
+@traced("postprocess.gallo", "postprocess")
 def postprocess_gallo_workbook(wb: Workbook, tables: dict = None) -> Workbook:
     """
     Apply all Gallo format post-processing to a workbook.
     
     Args:
-        wb: The workbook to process
+        wb: The workbook to process (openpyxl Workbook or md_to_excel.TableBook)
         tables: Optional dict of TableData objects with metadata
     """
     console.print("\n[cyan]📐 Post-processing Gallo format...[/cyan]")
@@ -1971,9 +1978,10 @@ def process_precio_tenencias_sheet(ws: Worksheet) -> None:
             ws.cell(row=row_idx, column=col_idx, value=value)
 
 
+@traced("postprocess.visual", "postprocess")
 def postprocess_visual_workbook(wb: Workbook) -> Workbook:
     """
-    Apply Visual format post-processing to a workbook.
+    Apply Visual format post-processing to a workbook (openpyxl Workbook or md_to_excel.TableBook).
     """
     console.print("\n[cyan]📐 Post-processing Visual format...[/cyan]")
 
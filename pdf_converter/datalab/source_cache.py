@@ -0,0 +1,87 @@
+"""
+Cache de fuentes convertidas (SQLite), compartido por los workers de la cola de casos.
+
+El OCR de Datalab se paga por página: si un caso cambia solo el PDF de Precio
+Tenencias, Gallo y Visual no tienen que volver a pasar por OCR. Cada fuente se guarda
+por (formato, sha256 del PDF, versión del pipeline):
+
+    cache = SourceCache("fuentes.sqlite", max_age=timedelta(hours=24))
+    convertida = cache.get("gallo", digest, version)
+    if convertida is None:
+        convertida = convert_source("gallo", CaseSource.pdf(pdf_bytes), cliente)
+        cache.put("gallo", digest, version, convertida)
+
+La versión (ver case_pipeline.pipeline_version) invalida las entradas al cambiar el
+parser o los datos auxiliares; `max_age` acota cuánto vive una entrada y put() borra
+las vencidas, así la base no crece sin límite.
+"""
+
+from __future__ import annotations
+
+import pickle
+import sqlite3
+from datetime import datetime, timedelta
+from pathlib import Path
+from typing import Optional, Union
+
+from .case_pipeline import ConvertedSource
+
+
+def _ahora() -> str:
+    return datetime.now().isoformat(timespec='milliseconds')
+
+
+class SourceCache:
+    """ConvertedSource por formato + hash del archivo + versión, en una base SQLite local."""
+
+    _SCHEMA = """
+        CREATE TABLE IF NOT EXISTS fuentes (
+            formato TEXT NOT NULL,
+            sha256 TEXT NOT NULL,
+            version TEXT NOT NULL,
+            convertida BLOB NOT NULL,
+            creado TEXT NOT NULL,
+            PRIMARY KEY (formato, sha256, version)
+        );
+        CREATE INDEX IF NOT EXISTS fuentes_creado ON fuentes (creado);
+    """
+
+    def __init__(self, path: Union[str, Path], max_age: Optional[timedelta] = None):
+        self.path = Path(path)
+        self.max_age = max_age
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with self._connect() as conn:
+            # WAL: varios workers leen mientras otro guarda
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.executescript(self._SCHEMA)
+
+    def _connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(str(self.path), timeout=30)
+
+    def _limite(self) -> str:
+        return (datetime.now() - self.max_age).isoformat(timespec='milliseconds') if self.max_age else ''
+
+    def get(self, formato: str, digest: str, version: str) -> Optional[ConvertedSource]:
+        """La fuente convertida, o None si no está, es de otra versión o está vencida."""
+        with self._connect() as conn:
+            row = conn.execute(
+                "SELECT convertida FROM fuentes WHERE formato = ? AND sha256 = ? AND version = ? AND creado >= ?",
+                (formato, digest, version, self._limite()),
+            ).fetchone()
+        return pickle.loads(row[0]) if row else None
+
+    def put(self, formato: str, digest: str, version: str, convertida: ConvertedSource) -> None:
+        """Guarda (o reemplaza) la fuente y borra las entradas vencidas."""
+        with self._connect() as conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO fuentes (formato, sha256, version, convertida, creado) VALUES (?, ?, ?, ?, ?)",
+                (formato, digest, version, pickle.dumps(convertida), _ahora()),
+            )
+        self.purge()
+
+    def purge(self) -> int:
+        """Borra las entradas más viejas que `max_age` (nada si es None)."""
+        if self.max_age is None:
+            return 0
+        with self._connect() as conn:
+            return conn.execute("DELETE FROM fuentes WHERE creado < ?", (self._limite(),)).rowcount
@@ -0,0 +1,793 @@
+"""
+Generador de carteras sintéticas en el markdown que produce el OCR de Datalab.
+
+Produce los tres reportes de un caso (Gallo, Visual y Precio Tenencias) con el mismo
+layout de tablas que consume `MarkdownTableParser`: secciones `###`, filas de categoría
+en negrita, marcadores de moneda, encabezados repetidos por página y filas de metadata
+de página en Gallo. Los instrumentos salen del catálogo real (EspeciesVisual) para que
+el merge recorra los mismos caminos de lookup que con un cliente real.
+
+Uso típico:
+
+    spec = reference_spec().scaled(10)
+    portfolio = generate_portfolio(spec)
+    paths = portfolio.write("tmp/bench", "SYNTH_10X")
+"""
+
+from __future__ import annotations
+
+import io
+import random
+import re
+from dataclasses import asdict, dataclass, replace
+from datetime import date, timedelta
+from pathlib import Path
+from typing import Iterable, Optional
+from xml.sax.saxutils import escape
+
+from openpyxl import load_workbook
+
+
+AUX_DATA_DIR = Path(__file__).parent / "aux_data"
+SMOKE_BASELINE_DIR = Path(__file__).resolve().parents[2] / "SMOKE_BASELINE"
+
+# Tipo de Especie (EspeciesVisual) -> (sección Gallo ARS, sección Gallo USD, tipo en Resultado Ventas)
+_CATALOG_TYPES = {
+    "Acciones": ("TIT.PRIVADOS EXENTOS", None, "Acciones"),
+    "Cedears": ("TIT.PRIVADOS EXENTOS", None, "Cedears"),
+    "Títulos Públicos": ("RENTA FIJA EN PESOS", "RENTA FIJA EN DOLARES", "Títulos Públicos"),
+    "Obligaciones Negociables": ("RENTA FIJA EN PESOS", "RENTA FIJA EN DOLARES", "Obligaciones Negociables"),
+    "Letras del Tesoro nac": ("RENTA FIJA EN PESOS", "RENTA FIJA EN DOLARES", "Letras del Tesoro nac"),
+}
+_CATALOG_CURRENCIES = {"Pesos": "ARS", "Dolar MEP (local)": "USD"}
+# Palabras que postprocess interpreta como categoría/total dentro de la columna Especie.
+_RESERVED_NAME_TOKENS = ("TOTAL", "CASH", "RENTA FIJA", "PRIVADOS", "INCREMENTOS", "DECREMENTOS")
+
+_VISUAL_MONEDA = {"ARS": "Pesos", "USD": "Dolar MEP (local)"}
+_RESUMEN_HEADERS = ["Moneda", "Ventas", "FCI", "Opciones", "Rentas", "Dividendos Ef.", "CPD", "Pagarés",
+                    "Futuros", "Cau (int)", "Cau (CF)", "Total"]
+_FX_BASE = 1050.0
+_GALLO_VISUAL_SWITCH_MONTH = 6  # Gallo cubre enero-mayo del primer año; Visual el resto
+
+
+@dataclass(frozen=True)
+class SyntheticInstrument:
+    code: int
+    description: str
+    ticker: str
+    tipo: str
+    currency: str
+    gallo_section: str
+    base_price: float
+
+    @property
+    def is_equity(self) -> bool:
+        return self.tipo in {"Acciones", "Cedears"}
+
+    @property
+    def visual_name(self) -> str:
+        return f"{self.description} - {_VISUAL_MONEDA[self.currency]}"
+
+
+@dataclass(frozen=True)
+class PortfolioSpec:
+    """Tamaño y forma de la cartera; `scaled()` multiplica los volúmenes."""
+
+    instruments: int = 40
+    trades: int = 260
+    cauciones: int = 500
+    rentas: int = 10
+    currencies: tuple[str, ...] = ("ARS", "USD")
+    years: tuple[int, ...] = (2025,)
+    comitente: str = "99001"
+    client_name: str = "SINTETICO, CLIENTE PRUEBA"
+    seed: int = 13353
+    rows_per_page: int = 40
+
+    def scaled(self, factor: float) -> "PortfolioSpec":
+        def scale(value: int) -> int:
+            return max(1, int(round(value * factor)))
+
+        return replace(
+            self,
+            instruments=scale(self.instruments),
+            trades=scale(self.trades),
+            cauciones=scale(self.cauciones),
+            rentas=scale(self.rentas),
+        )
+
+    def to_dict(self) -> dict:
+        return asdict(self)
+
+
+@dataclass(frozen=True)
+class SyntheticPortfolio:
+    spec: PortfolioSpec
+    gallo_markdown: str
+    visual_markdown: str
+    precio_tenencias_markdown: str
+
+    def write(self, directory: str | Path, prefix: str = "SYNTH") -> dict[str, Path]:
+        """Escribe los tres `.datalab.md`; devuelve {'gallo'|'visual'|'precio_tenencias': path}."""
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        paths = {}
+        for kind, content in (
+            ("gallo", self.gallo_markdown),
+            ("visual", self.visual_markdown),
+            ("precio_tenencias", self.precio_tenencias_markdown),
+        ):
+            path = directory / f"{prefix}_{kind}.datalab.md"
+            path.write_text(content, encoding="utf-8")
+            paths[kind] = path
+        return paths
+
+
+@dataclass
+class _Trade:
+    instrument: SyntheticInstrument
+    day: date
+    quantity: float  # positivo compra, negativo venta
+    price: float
+    boleto: int
+    cost: float = 0.0  # costo promedio de lo vendido (solo ventas)
+
+    @property
+    def bruto(self) -> float:
+        return round(self.quantity * self.price, 2)
+
+    @property
+    def gastos(self) -> float:
+        return round(abs(self.bruto) * 0.0025, 2)
+
+    @property
+    def resultado(self) -> float:
+        if self.quantity >= 0:
+            return 0.0
+        return round(abs(self.bruto) - self.cost - self.gastos, 2)
+
+
+# ----------------------------------------------------------------------------
+# Catálogo y spec de referencia
+# ----------------------------------------------------------------------------
+
+def load_instrument_catalog(aux_data_dir: str | Path | None = None) -> list[SyntheticInstrument]:
+    """Instrumentos operables de EspeciesVisual (acciones, cedears, bonos, ONs, letras)."""
+    path = Path(aux_data_dir or AUX_DATA_DIR) / "EspeciesVisual.xlsx"
+    wb = load_workbook(path, read_only=True, data_only=True)
+    try:
+        catalog = []
+        seen: set[int] = set()
+        for row in wb.active.iter_rows(min_row=3, values_only=True):
+            description, tipo, code, moneda, ticker = row[0], row[1], row[2], row[6], row[7]
+            if tipo not in _CATALOG_TYPES or moneda not in _CATALOG_CURRENCIES:
+                continue
+            try:
+                code = int(code)
+            except (TypeError, ValueError):
+                continue
+            description = " ".join(str(description or "").split())
+            if not description or code in seen or "/" in description:
+                continue
+            if any(token in description.upper() for token in _RESERVED_NAME_TOKENS):
+                continue
+            currency = _CATALOG_CURRENCIES[moneda]
+            gallo_ars, gallo_usd, _ = _CATALOG_TYPES[tipo]
+            gallo_section = gallo_usd if currency == "USD" else gallo_ars
+            if gallo_section is None:
+                continue
+            seen.add(code)
+            equity = tipo in {"Acciones", "Cedears"}
+            if equity:
+                base_price = 500.0 + (code * 37) % 45_000
+            else:
+                base_price = 0.5 + ((code * 13) % 1_500) / 1_000 if currency == "USD" else 50.0 + (code * 7) % 1_500
+            catalog.append(SyntheticInstrument(
+                code=code,
+                description=description,
+                ticker=str(ticker or description.split()[0]).strip(),
+                tipo=tipo,
+                currency=currency,
+                gallo_section=gallo_section,
+                base_price=float(base_price),
+            ))
+        return catalog
+    finally:
+        wb.close()
+
+
+def _count_rows(path: Path, sheets: Iterable[str]) -> int:
+    wb = load_workbook(path, read_only=True)
+    try:
+        total = 0
+        for name in sheets:
+            if name in wb.sheetnames:
+                total += max(0, (wb[name].max_row or 1) - 1)
+        return total
+    finally:
+        wb.close()
+
+
+def reference_spec(baseline_root: str | Path | None = None) -> PortfolioSpec:
+    """
+    Spec 1× medido sobre el caso aprobado más grande con inputs congelados en SMOKE_BASELINE.
+
+    Si no hay inputs congelados disponibles devuelve `PortfolioSpec()` (valores del caso
+    STURMAN 11688 al momento de escribir el generador).
+    """
+    root = Path(baseline_root or SMOKE_BASELINE_DIR)
+    best: Optional[PortfolioSpec] = None
+    best_size = -1
+    for visual_path in sorted(root.glob("*/*_visual_frozen.xlsx")):
+        prefix = visual_path.name[: -len("visual_frozen.xlsx")]
+        gallo_path = visual_path.with_name(f"{prefix}gallo_frozen.xlsx")
+        precio_path = visual_path.with_name(f"{prefix}precio_tenencias_frozen.xlsx")
+        boletos = _count_rows(visual_path, ["Boletos"])
+        cauciones = _count_rows(visual_path, ["Cauciones Tomadoras", "Cauciones Colocadoras"])
+        rentas = _count_rows(visual_path, ["Rentas Dividendos ARS", "Rentas Dividendos USD"])
+        gallo_trades = gallo_cauciones = 0
+        if gallo_path.exists():
+            gallo_trades = _count_rows(gallo_path, ["Tit.Privados Exentos", "Tit.Privados Exterior", "Renta Fija Pesos", "Renta Fija Dolares"])
+            gallo_cauciones = _count_rows(gallo_path, ["Cauciones Pesos", "Cauciones Dolares"])
+        instruments = _count_rows(precio_path, ["PrecioTenenciasIniciales"]) if precio_path.exists() else 0
+        size = boletos + cauciones + rentas + gallo_trades + gallo_cauciones
+        if size > best_size:
+            best_size = size
+            best = PortfolioSpec(
+                instruments=max(instruments, 1),
+                trades=max(boletos + gallo_trades, 1),
+                cauciones=max(cauciones + gallo_cauciones, 1),
+                rentas=max(rentas, 1),
+            )
+    return best or PortfolioSpec()
+
+
+# ----------------------------------------------------------------------------
+# Formato de números/fechas como los imprime cada sistema
+# ----------------------------------------------------------------------------
+
+def _ar(value: float, decimals: int = 2) -> str:
+    """Formato Visual: 1.234.567,89 y negativos entre paréntesis."""
+    text = f"{abs(value):,.{decimals}f}".replace(",", "_").replace(".", ",").replace("_", ".")
+    return f"({text})" if value < 0 else text
+
+
+def _us(value: float, decimals: int = 2) -> str:
+    """Formato Gallo: 1,234,567.89 con signo negativo al final."""
+    text = f"{abs(value):,.{decimals}f}"
+    return f"{text}-" if value < 0 else text
+
+
+def _int_ar(value: int) -> str:
+    return f"{value:,}".replace(",", ".")
+
+
+def _visual_date(day: date) -> str:
+    return f"{day.day}/{day.month}/{day.year}"
+
+
+def _gallo_date(day: date) -> str:
+    return day.strftime("%d/%m/%y")
+
+
+def _row(cells: Iterable[object]) -> str:
+    return "| " + " | ".join("" if cell is None else str(cell) for cell in cells) + " |"
+
+
+def _separator(width: int) -> str:
+    return "|" + "---|" * width
+
+
+class _PagedTable:
+    """
+    Emite una tabla markdown partida en páginas como la devuelve Datalab (paginate=True):
+    cada página repite el encabezado de sección, el header y las filas de contexto vigentes.
+    """
+
+    def __init__(self, out: list[str], heading: str, headers: list[str], rows_per_page: int, pages: list[int]):
+        self.out = out
+        self.heading = heading
+        self.headers = headers
+        self.rows_per_page = max(5, rows_per_page)
+        self.pages = pages
+        self.context: list[list[object]] = []
+        self.rows_on_page = 0
+        self._open_page()
+
+    def _open_page(self) -> None:
+        self.out.extend(["", self.heading, "", _row(self.headers), _separator(len(self.headers))])
+        for cells in self.context:
+            self.out.append(_row(cells))
+        self.rows_on_page = 0
+
+    def _blank(self, first: object) -> list[object]:
+        return [first] + [""] * (len(self.headers) - 1)
+
+    def set_context(self, level: int, label: str) -> None:
+        """Fila de contexto en negrita (moneda/categoría/instrumento) en el nivel dado."""
+        cells = self._blank(f"<b>{label}</b>")
+        del self.context[level:]
+        self.context.append(cells)
+        self.out.append(_row(cells))
+
+    def add(self, cells: list[object]) -> None:
+        if self.rows_on_page >= self.rows_per_page:
+            self.pages[0] += 1
+            self.out.extend(["", f"{{{self.pages[0]}}}------------------------------------------------"])
+            self._open_page()
+        self.out.append(_row(cells))
+        self.rows_on_page += 1
+
+
+# ----------------------------------------------------------------------------
+# Generación
+# ----------------------------------------------------------------------------
+
+def _pick_instruments(spec: PortfolioSpec, catalog: list[SyntheticInstrument], rng: random.Random) -> list[SyntheticInstrument]:
+    pool = [instrument for instrument in catalog if instrument.currency in spec.currencies]
+    if not pool:
+        raise ValueError(f"El catálogo no tiene instrumentos en {spec.currencies}")
+    pool.sort(key=lambda instrument: instrument.code)
+    rng.shuffle(pool)
+    # Con más instrumentos que el catálogo se reutilizan códigos (carteras grandes operan
+    # muchas veces los mismos papeles); el volumen de filas sigue escalando igual.
+    return [pool[i % len(pool)] for i in range(spec.instruments)] if spec.instruments > len(pool) else pool[: spec.instruments]
+
+
+def _period(spec: PortfolioSpec) -> tuple[date, date, date]:
+    start = date(min(spec.years), 1, 1)
+    end = date(max(spec.years), 12, 31)
+    switch = date(min(spec.years), _GALLO_VISUAL_SWITCH_MONTH, 1)
+    return start, switch, end
+
+
+def _random_business_day(rng: random.Random, start: date, end: date) -> date:
+    span_days = max(0, (end - start).days)
+    day = start + timedelta(days=rng.randint(0, span_days))
+    while day.weekday() >= 5:
+        day -= timedelta(days=1)
+    return max(day, start)
+
+
+def _build_trades(
+    spec: PortfolioSpec,
+    instruments: list[SyntheticInstrument],
+    initial_qty: dict[int, float],
+    rng: random.Random,
+) -> list[_Trade]:
+    start, _, end = _period(spec)
+    holdings = {instrument.code: initial_qty.get(instrument.code, 0.0) for instrument in instruments}
+    avg_cost = {instrument.code: instrument.base_price for instrument in instruments}
+    days = sorted(_random_business_day(rng, start + timedelta(days=1), end) for _ in range(spec.trades))
+    trades = []
+    boleto = 40_000
+    for day in days:
+        instrument = rng.choice(instruments)
+        boleto += rng.randint(1, 400)
+        drift = 1 + 0.6 * ((day - start).days / 365.0)
+        price = round(instrument.base_price * drift * rng.uniform(0.92, 1.08), 4)
+        held = holdings[instrument.code]
+        lot = rng.randint(1, 40) * (100 if instrument.is_equity else 10_000)
+        if held > 0 and rng.random() < 0.45:
+            quantity = -min(held, lot)
+            trade = _Trade(instrument, day, quantity, price, boleto, cost=round(abs(quantity) * avg_cost[instrument.code], 2))
+        else:
+            quantity = float(lot)
+            total_cost = held * avg_cost[instrument.code] + quantity * price
+            avg_cost[instrument.code] = total_cost / (held + quantity)
+            trade = _Trade(instrument, day, quantity, price, boleto)
+        holdings[instrument.code] = held + quantity
+        trades.append(trade)
+    return trades
+
+
+def _final_holdings(initial_qty: dict[int, float], trades: list[_Trade], until: Optional[date] = None) -> dict[int, float]:
+    holdings = dict(initial_qty)
+    for trade in trades:
+        if until is None or trade.day < until:
+            holdings[trade.instrument.code] = holdings.get(trade.instrument.code, 0.0) + trade.quantity
+    return holdings
+
+
+def generate_portfolio(
+    spec: Optional[PortfolioSpec] = None,
+    catalog: Optional[list[SyntheticInstrument]] = None,
+) -> SyntheticPortfolio:
+    """Genera los tres markdowns de un caso sintético (determinístico para un mismo `seed`)."""
+    spec = spec or PortfolioSpec()
+    rng = random.Random(spec.seed)
+    catalog = catalog if catalog is not None else load_instrument_catalog()
+    instruments = _pick_instruments(spec, catalog, rng)
+    unique = {instrument.code: instrument for instrument in instruments}
+
+    initial_qty = {
+        code: float(rng.randint(0, 30) * (100 if instrument.is_equity else 10_000))
+        for code, instrument in unique.items()
+    }
+    trades = _build_trades(spec, list(unique.values()), initial_qty, rng)
+    _, switch, _ = _period(spec)
+    gallo_trades = [trade for trade in trades if trade.day < switch]
+    visual_trades = [trade for trade in trades if trade.day >= switch]
+
+    return SyntheticPortfolio(
+        spec=spec,
+        gallo_markdown=_gallo_markdown(spec, unique, initial_qty, gallo_trades, trades, rng),
+        visual_markdown=_visual_markdown(spec, unique, initial_qty, visual_trades, trades, rng),
+        precio_tenencias_markdown=_precio_tenencias_markdown(spec, unique, initial_qty, rng),
+    )
+
+
+def _gallo_markdown(
+    spec: PortfolioSpec,
+    instruments: dict[int, SyntheticInstrument],
+    initial_qty: dict[int, float],
+    trades: list[_Trade],
+    all_trades: list[_Trade],
+    rng: random.Random,
+) -> str:
+    start, switch, _ = _period(spec)
+    period_end = switch - timedelta(days=1)
+    out = [
+        "Industrial Valores S.A.",
+        "",
+        f"Comitente: {spec.comitente} {spec.client_name}",
+        f"Desde Fecha: {_gallo_date(start)} Hasta Fecha: {_gallo_date(period_end)}",
+    ]
+    metadata_rows = [
+        [f"Comitente: {spec.comitente} {spec.client_name}", "", "", f"Fecha: {_gallo_date(period_end)}", "", ""],
+        [f"Desde Fecha: {_gallo_date(start)}", "", f"Hasta Fecha: {_gallo_date(period_end)}", "", "Hoja: 1", ""],
+    ]
+
+    by_section: dict[str, list[_Trade]] = {}
+    for trade in trades:
+        by_section.setdefault(trade.instrument.gallo_section, []).append(trade)
+
+    # Resultados totales
+    out.extend(["", "## RESULTADOS TOTALES", "", _row(["Tipo de Activo", "Resultado PESOS", "Resultado USD"]), _separator(3)])
+    for section, section_trades in by_section.items():
+        total = sum(trade.resultado for trade in section_trades)
+        pesos, usd = (total, "") if "DOLARES" not in section else ("", total)
+        out.append(_row([f"{section} (Enajenacion)", _us(pesos) if pesos != "" else "", _us(usd) if usd != "" else ""]))
+    caucion_rows = max(1, int(spec.cauciones * 0.4))
+    caucion_interes = -round(caucion_rows * 35_000.0, 2)
+    out.append(_row(["CAUCIONES EN PESOS (Enajenacion)", _us(caucion_interes), ""]))
+
+    headers = ["Especie", "Fecha", "Operacion", "Numero", "Cantidad", "Precio", "Importe", "Costo",
+               "Resultado en Pesos", "Resultado en USD", "Gastos en Pesos", "Gastos en USD"]
+    for section, section_trades in by_section.items():
+        usd = "DOLARES" in section
+        out.extend(["", f"### {section}", "", _row(headers), _separator(len(headers))])
+        section_totals = [0.0, 0.0, 0.0]
+        rows_on_page = 0
+        by_code: dict[int, list[_Trade]] = {}
+        for trade in section_trades:
+            by_code.setdefault(trade.instrument.code, []).append(trade)
+        for code, code_trades in by_code.items():
+            instrument = instruments[code]
+            first = True
+            totals = [0.0, 0.0, 0.0]
+            for trade in code_trades:
+                if rows_on_page >= spec.rows_per_page:
+                    out.extend(_row(cells) for cells in metadata_rows)
+                    rows_on_page = 0
+                operacion = ("CPRA CABLE" if usd else "COMPRA") if trade.quantity > 0 else "VENTA"
+                importe = trade.bruto if trade.quantity > 0 else -abs(trade.bruto)
+                costo = trade.cost if trade.quantity < 0 else None
+                resultado = trade.resultado if trade.quantity < 0 else None
+                out.append(_row([
+                    f"{code:05d} {instrument.description}" if first else "",
+                    _gallo_date(trade.day),
+                    operacion,
+                    trade.boleto,
+                    _us(trade.quantity),
+                    f"{trade.price:.3f}",
+                    _us(importe),
+                    _us(costo) if costo is not None else "",
+                    _us(resultado) if resultado is not None and not usd else "",
+                    _us(resultado) if resultado is not None and usd else "",
+                    _us(trade.gastos) if not usd else "",
+                    _us(trade.gastos) if usd else "",
+                ]))
+                first = False
+                rows_on_page += 1
+                if trade.quantity < 0:
+                    totals[0] += importe
+                    totals[1] += trade.cost
+                    totals[2] += trade.resultado
+            if any(totals):
+                out.append(_row(["Total Enajenacion", "", "", "", "", "", _us(totals[0]), _us(totals[1]),
+                                 _us(totals[2]) if not usd else "", _us(totals[2]) if usd else "", "", ""]))
+                section_totals = [a + b for a, b in zip(section_totals, totals)]
+        out.append(_row([f"TOTAL {section}", "", "", "", "", "", _us(section_totals[0]), _us(section_totals[1]),
+                         _us(section_totals[2]) if not usd else "", _us(section_totals[2]) if usd else "", "", ""]))
+
+    # Cauciones tomadoras en pesos
+    caucion_headers = ["Especie", "Fecha", "Vcto.", "Operacion", "Numero", "Colocado", "Al Vencimiento",
+                       "Interes en Pesos", "Interes en USD", "Gastos en Pesos", "Gastos en USD"]
+    out.extend(["", "### CAUCIONES EN PESOS", "", _row(caucion_headers), _separator(len(caucion_headers))])
+    numero = 46_000
+    days = sorted(_random_business_day(rng, start + timedelta(days=1), period_end) for _ in range(caucion_rows))
+    for i, day in enumerate(days):
+        plazo = rng.choice([1, 1, 1, 3, 4, 7])
+        colocado = round(rng.uniform(1_000_000, 80_000_000), 2)
+        interes = round(colocado * rng.uniform(0.25, 0.45) * plazo / 365, 2)
+        numero += rng.randint(1, 500)
+        out.append(_row([
+            "01000 VARIAS" if i == 0 else "",
+            _gallo_date(day), _gallo_date(day + timedelta(days=plazo)), "TOM CAU TER", numero,
+            _us(-colocado), _us(-(colocado + interes)), _us(-interes), "", _us(round(interes * 0.12, 2)), "",
+        ]))
+    out.append(_row(["TOTAL CAUCIONES EN PESOS", "", "", "", "", "", "", _us(caucion_interes), "", "", ""]))
+
+    position_headers = ["Especie", "Detalle", "Custodia", "Cantidad", "Precio", "Importe en Pesos",
+                        "% de Cartera", "Importe en Dolares", "% de Cartera"]
+    for label, holdings, drift in (
+        (f"POSICION AL {_gallo_date(start)}", initial_qty, 1.0),
+        (f"POSICION AL {_gallo_date(period_end)}", _final_holdings(initial_qty, all_trades, switch), 1.2),
+    ):
+        out.extend(["", f"### {label}", "", _row(position_headers), _separator(len(position_headers))])
+        grouped: dict[str, list[tuple[SyntheticInstrument, float]]] = {}
+        for code, qty in sorted(holdings.items()):
+            if qty <= 0:
+                continue
+            instrument = instruments[code]
+            category = "TITULOS PRIVADOS LOCALES" if instrument.is_equity else instrument.gallo_section
+            grouped.setdefault(category, []).append((instrument, qty))
+        total_pesos = 0.0
+        for category, positions in grouped.items():
+            out.append(_row([category] + [""] * 8))
+            for instrument, qty in positions:
+                price = instrument.base_price * drift
+                pesos = qty * price * (_FX_BASE if instrument.currency == "USD" else 1.0)
+                total_pesos += pesos
+                out.append(_row([
+                    f"{instrument.ticker} {instrument.description}", "", "CAJA VALORES",
+                    _us(qty), f"{price:.3f}", _us(pesos), "1.00", _us(pesos / _FX_BASE), "1.00",
+                ]))
+        out.append(_row(["CASH"] + [""] * 8))
+        out.append(_row(["PESOS", "Cuenta Corriente", "", _us(125_000.0), "", _us(125_000.0), "0.10", _us(125_000.0 / _FX_BASE), "0.10"]))
+        out.append(_row(["", f"TOTAL {label}", "", "", "", _us(total_pesos + 125_000.0), "", _us((total_pesos + 125_000.0) / _FX_BASE), ""]))
+    return "\n".join(out) + "\n"
+
+
+def _visual_markdown(
+    spec: PortfolioSpec,
+    instruments: dict[int, SyntheticInstrument],
+    initial_qty: dict[int, float],
+    trades: list[_Trade],
+    all_trades: list[_Trade],
+    rng: random.Random,
+) -> str:
+    start, switch, end = _period(spec)
+    out = [
+        f"REPORTE DE GANANCIAS / Periodo Junio 1 - Diciembre 31, {end.year}",
+        f"{spec.comitente} - {spec.client_name}",
+    ]
+    pages = [1]
+
+    # Boletos por tipo de instrumento
+    boletos = _PagedTable(out, "### Boletos", [
+        "Concertación", "Liquidación", "Nro. Boleto", "Moneda", "Tipo Operación", "Cod.Instru", "Instrumento",
+        "Cantidad", "Precio", "Tipo Cambio", "Bruto", "Interés", "Gastos", "Neto",
+    ], spec.rows_per_page, pages)
+    by_tipo: dict[str, list[_Trade]] = {}
+    for trade in trades:
+        by_tipo.setdefault(_CATALOG_TYPES[trade.instrument.tipo][2], []).append(trade)
+    for tipo, tipo_trades in by_tipo.items():
+        boletos.set_context(0, tipo)
+        for trade in tipo_trades:
+            venta = trade.quantity < 0
+            bruto = -abs(trade.bruto) if venta else abs(trade.bruto)
+            neto = bruto + trade.gastos if venta else bruto + trade.gastos
+            boletos.add([
+                _visual_date(trade.day), _visual_date(trade.day + timedelta(days=1)), trade.boleto,
+                _VISUAL_MONEDA[trade.instrument.currency], "Venta Contado" if venta else "Compra Contado",
+                trade.instrument.code, trade.instrument.description, _ar(trade.quantity, 0), _ar(trade.price, 4),
+                _ar(1.0), _ar(bruto), _ar(0.0), _ar(-trade.gastos if venta else trade.gastos), _ar(neto),
+            ])
+
+    # Resultado Ventas, por moneda -> tipo -> instrumento
+    ventas = _PagedTable(out, "### Resultado Ventas", [
+        "Concertación", "Liquidación", "Moneda", "Tipo Operación", "Cantidad", "Precio", "Bruto", "Interés",
+        "Tipo de Cambio", "Gastos", "IVA", "Resultado",
+    ], spec.rows_per_page, pages)
+    for currency in spec.currencies:
+        currency_trades = [trade for trade in trades if trade.instrument.currency == currency]
+        if not currency_trades:
+            continue
+        ventas.set_context(0, currency)
+        grouped: dict[str, dict[int, list[_Trade]]] = {}
+        for trade in currency_trades:
+            grouped.setdefault(_CATALOG_TYPES[trade.instrument.tipo][2], {}).setdefault(trade.instrument.code, []).append(trade)
+        for index, (tipo, by_code) in enumerate(grouped.items(), start=1):
+            ventas.set_context(1, f"{index} / {tipo}")
+            for code, code_trades in by_code.items():
+                ventas.set_context(2, f"{instruments[code].visual_name} / {_int_ar(code)}")
+                for trade in code_trades:
+                    venta = trade.quantity < 0
+                    ventas.add([
+                        _visual_date(trade.day), _visual_date(trade.day + timedelta(days=1)),
+                        _VISUAL_MONEDA[currency], "Venta Contado" if venta else "Compra Contado",
+                        _ar(trade.quantity, 0), _ar(trade.price, 4), _ar(abs(trade.bruto) if venta else -abs(trade.bruto)),
+                        _ar(0.0), _ar(1.0), _ar(-trade.gastos), _ar(round(trade.gastos * 0.21, 2)),
+                        _ar(trade.resultado),
+                    ])
+
+    # Rentas y Dividendos
+    rentas = _PagedTable(out, "### Rentas y Dividendos", [
+        "Concertación", "Liquidación", "Nro. NDC", "Tipo Operación", "Cantidad", "Moneda", "Tipo de Cambio",
+        "Gastos", "Importe",
+    ], spec.rows_per_page, pages)
+    holders = sorted(code for code, qty in _final_holdings(initial_qty, all_trades).items() if qty > 0) or sorted(instruments)
+    ndc = 10_000
+    renta_events = []
+    for _ in range(spec.rentas):
+        instrument = instruments[rng.choice(holders)]
+        renta_events.append((instrument, _random_business_day(rng, switch, end)))
+    for currency in spec.currencies:
+        events = [event for event in renta_events if event[0].currency == currency]
+        if not events:
+            continue
+        rentas.set_context(0, currency)
+        for categoria in ("Rentas", "Dividendos"):
+            category_events = [event for event in events if (categoria == "Dividendos") == event[0].is_equity]
+            if not category_events:
+                continue
+            rentas.set_context(1, categoria)
+            for instrument, day in sorted(category_events, key=lambda event: (event[0].tipo, event[0].code, event[1])):
+                rentas.set_context(2, _CATALOG_TYPES[instrument.tipo][2])
+                rentas.set_context(3, f"{instrument.visual_name} / {_int_ar(instrument.code)}")
+                ndc += rng.randint(1, 300)
+                importe = round(rng.uniform(50, 25_000), 2)
+                rentas.add([
+                    _visual_date(day), _visual_date(day), ndc, "Dividendo" if instrument.is_equity else "Renta", "",
+                    _VISUAL_MONEDA[currency], "1,0000000000", _ar(round(importe * 0.01, 2)), _ar(importe),
+                ])
+
+    # Cauciones
+    caucion_headers = ["Concertación", "Pla", "Liquidación", "Operación", "# Boleto", "Contado", "Futuro",
+                       "Tipo de cambio", "Tasa (%)", "Interés Bruto", "Interés Devenga", "Aranceles", "Derechos"]
+    visual_cauciones = max(1, spec.cauciones - max(1, int(spec.cauciones * 0.4)))
+    colocadoras = max(1, visual_cauciones // 50)
+    for heading, operacion, count, last_header in (
+        ("### Cauciones tomadoras", "Apertura Tomador Cauci", visual_cauciones - colocadoras, "Costo financiero"),
+        ("### Cauciones colocadoras", "Apertura Colocador", colocadoras, "Interés Neto"),
+    ):
+        if count <= 0:
+            continue
+        table = _PagedTable(out, heading, caucion_headers + [last_header], spec.rows_per_page, pages)
+        table.set_context(0, "1 / Pesos")
+        boleto = 60_000
+        for day in sorted(_random_business_day(rng, switch, end) for _ in range(count)):
+            plazo = rng.choice([1, 1, 1, 3, 4, 7])
+            contado = round(rng.uniform(1_000_000, 110_000_000), 2)
+            tasa = round(rng.uniform(25, 50), 2)
+            interes = round(contado * tasa / 100 * plazo / 365, 2)
+            aranceles = round(interes * 0.09, 2)
+            derechos = round(interes * 0.008, 2)
+            neto = interes - aranceles - derechos
+            boleto += rng.randint(1, 600)
+            table.add([
+                _visual_date(day), plazo, _visual_date(day + timedelta(days=plazo)), operacion, _int_ar(boleto),
+                _ar(contado), _ar(contado + interes), _ar(1.0), _ar(tasa), _ar(interes), _ar(interes),
+                _ar(aranceles), _ar(derechos), _ar(-neto if "Tomador" in operacion else neto),
+            ])
+
+    # Resumen
+    ventas_total = {currency: sum(trade.resultado for trade in trades if trade.instrument.currency == currency)
+                    for currency in ("ARS", "USD")}
+    out.extend(["", "### Resumen", "", _row(_RESUMEN_HEADERS), _separator(len(_RESUMEN_HEADERS))])
+    for currency in ("ARS", "USD"):
+        values = [ventas_total[currency], 0, 0, 0, 0, 0, 0, 0, 0, 0]
+        out.append(_row([currency] + [_ar(value) for value in values] + [_ar(sum(values))]))
+
+    # Posición de títulos al cierre
+    out.extend(["", "### Posición de Títulos", "", _row(["Instrumento", "Código", "Ticker", "Cantidad", "Importe", "Moneda"]), _separator(6)])
+    for code, qty in sorted(_final_holdings(initial_qty, all_trades).items()):
+        if qty <= 0:
+            continue
+        instrument = instruments[code]
+        out.append(_row([
+            instrument.description, code, instrument.ticker, _ar(qty, 0),
+            _ar(qty * instrument.base_price * 1.4), _VISUAL_MONEDA[instrument.currency],
+        ]))
+    return "\n".join(out) + "\n"
+
+
+def _precio_tenencias_markdown(
+    spec: PortfolioSpec,
+    instruments: dict[int, SyntheticInstrument],
+    initial_qty: dict[int, float],
+    rng: random.Random,
+) -> str:
+    out = [
+        f"{spec.comitente} - {spec.client_name}",
+        "",
+        "## Precio Tenencias",
+        "",
+        _row(["Especie", "Cantidad", "Importe invertido", "Resultado"]),
+        _separator(4),
+    ]
+    for code, instrument in sorted(instruments.items()):
+        qty = initial_qty.get(code, 0.0)
+        invertido = round(qty * instrument.base_price * rng.uniform(0.85, 1.0), 2)
+        resultado = round(qty * instrument.base_price - invertido, 2)
+        out.append(_row([
+            f"{code:05d} {instrument.ticker} {instrument.description}",
+            _int_ar(int(qty)), _ar(invertido), _ar(resultado),
+        ]))
+    return "\n".join(out) + "\n"
+
+
+# ----------------------------------------------------------------------------
+# PDF digital
+# ----------------------------------------------------------------------------
+
+_PAGE_SEPARATOR = re.compile(r"^\{\d+\}-{3,}$")
+
+
+def render_pdf(markdown: str) -> bytes:
+    """
+    Dibuja un markdown de la cartera como PDF digital (con capa de texto), una página
+    por separador `{N}----`: secciones `#` en negrita, tablas con grilla y celdas
+    `<b>..</b>` en negrita. Sirve para probar la extracción local sin PDFs reales.
+    """
+    from reportlab.lib import colors
+    from reportlab.lib.pagesizes import A3, A4
+    from reportlab.lib.styles import ParagraphStyle
+    from reportlab.lib.units import mm
+    from reportlab.platypus import PageBreak, Paragraph, SimpleDocTemplate, Spacer, Table, TableStyle
+
+    body = ParagraphStyle("body", fontName="Helvetica", fontSize=6, leading=7.5)
+    bold = ParagraphStyle("bold", parent=body, fontName="Helvetica-Bold")
+    heading = ParagraphStyle("heading", parent=bold, fontSize=9, leading=12, spaceBefore=4, spaceAfter=3)
+
+    def cell(text: str) -> Paragraph:
+        match = re.fullmatch(r"<b>(.*)</b>", text)
+        style = bold if match else body
+        return Paragraph(escape(match.group(1) if match else text), style)
+
+    story: list = []
+    table_rows: list[list[str]] = []
+
+    def flush_table() -> None:
+        if not table_rows:
+            return
+        table = Table([[cell(text) for text in row] for row in table_rows], repeatRows=1)
+        table.setStyle(TableStyle([
+            ("GRID", (0, 0), (-1, -1), 0.3, colors.grey),
+            ("VALIGN", (0, 0), (-1, -1), "TOP"),
+            ("FONTNAME", (0, 0), (-1, 0), "Helvetica-Bold"),
+        ]))
+        story.append(table)
+        story.append(Spacer(1, 3 * mm))
+        table_rows.clear()
+
+    for line in markdown.splitlines():
+        line = line.strip()
+        if line.startswith("|"):
+            cells = [value.strip() for value in line.strip("|").split("|")]
+            if not all(set(value) <= {"-", ":"} and value for value in cells):
+                table_rows.append(cells)
+            continue
+        flush_table()
+        if _PAGE_SEPARATOR.match(line):
+            story.append(PageBreak())
+        elif line.startswith("#"):
+            story.append(Paragraph(escape(line.lstrip("#").strip()), heading))
+        elif line:
+            story.append(Paragraph(escape(line), body))
+    flush_table()
+
+    buffer = io.BytesIO()
+    doc = SimpleDocTemplate(
+        buffer,
+        # Ancho de A4 apaisado y alto de A3: cada página del markdown entra en una hoja
+        pagesize=(A4[1], A3[1]),
+        leftMargin=8 * mm,
+        rightMargin=8 * mm,
+        topMargin=8 * mm,
+        bottomMargin=8 * mm,
+    )
+    doc.build(story)
+    return buffer.getvalue()
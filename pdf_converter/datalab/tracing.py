@@ -0,0 +1,356 @@
+"""
+Tracing liviano por etapas del pipeline (OCR -> parseo -> postproceso -> merge -> validación -> PDF).
+
+Uso típico:
+
+    tracer = Tracer("KOLTAN_13353")
+    with activate(tracer):
+        ...  # código instrumentado con `with span("merge.boletos"):`
+    tracer.write_chrome_trace("trace.json")   # abrir en chrome://tracing o Perfetto
+
+Sin un tracer activo `span()` no registra nada, así que el código instrumentado
+puede correr fuera de un trace sin costo apreciable.
+
+`Tracer(..., memory=True)` registra además el pico de memoria de cada span: RSS del
+proceso (muestreado en un hilo aparte mientras el tracer está activo) y heap de Python
+(tracemalloc). tracemalloc hace más lenta cada asignación, así que es opcional.
+"""
+
+from __future__ import annotations
+
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Iterator, Optional
+
+
+MB = 1024 * 1024
+# Intervalo del muestreo de RSS mientras hay un tracer con memory=True activo
+MEMORY_SAMPLE_INTERVAL = 0.01
+# Etapas por debajo de este tiempo en el baseline no se comparan: el ruido domina.
+MIN_COMPARABLE_MS = 250.0
+
+
+@dataclass(frozen=True)
+class MemoryPeak:
+    """
+    Memoria del proceso durante un span, en MB. rss_peak_mb es None donde no se puede
+    leer el RSS (sin /proc); heap_delta_mb es lo que la etapa dejó vivo al terminar.
+    """
+
+    rss_peak_mb: Optional[float]
+    heap_peak_mb: float
+    heap_delta_mb: float
+
+    def to_dict(self) -> dict[str, Any]:
+        return {"rss_peak_mb": self.rss_peak_mb, "heap_peak_mb": self.heap_peak_mb, "heap_delta_mb": self.heap_delta_mb}
+
+
+@dataclass(frozen=True)
+class SpanRecord:
+    name: str
+    category: str
+    start_us: float
+    duration_us: float
+    thread_id: int
+    depth: int
+    args: dict[str, Any] = field(default_factory=dict)
+    memory: Optional[MemoryPeak] = None
+
+    @property
+    def duration_ms(self) -> float:
+        return self.duration_us / 1000.0
+
+    def to_chrome_event(self, pid: int) -> dict[str, Any]:
+        event = {
+            "name": self.name,
+            "cat": self.category,
+            "ph": "X",
+            "ts": round(self.start_us, 3),
+            "dur": round(self.duration_us, 3),
+            "pid": pid,
+            "tid": self.thread_id,
+        }
+        args = {**self.args, **self.memory.to_dict()} if self.memory else self.args
+        if args:
+            event["args"] = args
+        return event
+
+
+class _MemoryWindow:
+    """Picos acumulados de un span abierto (mutable: lo actualiza el monitor)."""
+
+    __slots__ = ("rss_peak", "heap_start", "heap_peak")
+
+    def __init__(self, rss: Optional[int], heap: int):
+        self.rss_peak = rss
+        self.heap_start = heap
+        self.heap_peak = heap
+
+
+class MemoryMonitor:
+    """
+    Muestrea RSS y tracemalloc y reparte cada pico entre todos los spans abiertos.
+
+    tracemalloc y el RSS son del proceso entero, así que hay un solo monitor: los spans
+    de casos que corren en paralelo (p. ej. los workers de la app) ven la memoria de todos.
+    """
+
+    def __init__(self, interval: float = MEMORY_SAMPLE_INTERVAL):
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._windows: list[_MemoryWindow] = []
+        self._users = 0
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+        self._owns_tracemalloc = False
+
+    def start(self) -> None:
+        """Arranca tracemalloc y el hilo de muestreo (con conteo: se puede anidar)."""
+        with self._lock:
+            self._users += 1
+            if self._users > 1:
+                return
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._owns_tracemalloc = True
+            self._stop = threading.Event()
+            self._thread = threading.Thread(target=self._run, args=(self._stop,), name="memory-monitor", daemon=True)
+            self._thread.start()
+
+    def stop(self) -> None:
+        with self._lock:
+            self._users -= 1
+            if self._users > 0:
+                return
+            thread, self._thread = self._thread, None
+            self._stop.set()
+        if thread is not None:
+            thread.join()
+        with self._lock:
+            if self._owns_tracemalloc and self._users == 0:
+                tracemalloc.stop()
+                self._owns_tracemalloc = False
+
+    def open(self) -> _MemoryWindow:
+        with self._lock:
+            self._sample()
+            window = _MemoryWindow(current_rss(), tracemalloc.get_traced_memory()[0])
+            self._windows.append(window)
+            return window
+
+    def close(self, window: _MemoryWindow) -> MemoryPeak:
+        with self._lock:
+            self._sample()
+            self._windows.remove(window)
+            heap = tracemalloc.get_traced_memory()[0]
+        return MemoryPeak(
+            rss_peak_mb=None if window.rss_peak is None else round(window.rss_peak / MB, 1),
+            heap_peak_mb=round(window.heap_peak / MB, 1),
+            heap_delta_mb=round((heap - window.heap_start) / MB, 1) + 0.0,
+        )
+
+    def _sample(self) -> None:
+        # Se llama con el lock tomado; reset_peak hace que cada pico se cuente una sola vez
+        rss = current_rss()
+        heap_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        for window in self._windows:
+            if rss is not None:
+                window.rss_peak = max(window.rss_peak or 0, rss)
+            window.heap_peak = max(window.heap_peak, heap_peak)
+
+    def _run(self, stop: threading.Event) -> None:
+        while not stop.wait(self.interval):
+            with self._lock:
+                self._sample()
+
+
+_PAGE_SIZE = os.sysconf("SC_PAGE_SIZE") if hasattr(os, "sysconf") else 4096
+
+
+def current_rss() -> Optional[int]:
+    """RSS actual del proceso en bytes, o None si el sistema no expone /proc."""
+    try:
+        with open("/proc/self/statm", "rb") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Tracer:
+    """
+    Acumula spans de un caso; thread-safe para etapas que corren en paralelo.
+    Con memory=True cada span guarda su MemoryPeak (ver MemoryMonitor).
+    """
+
+    def __init__(self, name: str = "pipeline", memory: bool = False):
+        self.name = name
+        self.memory = memory
+        self.spans: list[SpanRecord] = []
+        self._origin = time.perf_counter()
+        self._lock = threading.Lock()
+        self._depth = threading.local()
+
+    @contextmanager
+    def span(self, name: str, category: str = "pipeline", **args: Any) -> Iterator[None]:
+        depth = getattr(self._depth, "value", 0)
+        self._depth.value = depth + 1
+        window = _MEMORY_MONITOR.open() if self.memory else None
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            ended = time.perf_counter()
+            memory = _MEMORY_MONITOR.close(window) if window is not None else None
+            self._depth.value = depth
+            record = SpanRecord(
+                name=name,
+                category=category,
+                start_us=(started - self._origin) * 1e6,
+                duration_us=(ended - started) * 1e6,
+                thread_id=threading.get_ident(),
+                depth=depth,
+                args={key: _json_safe(value) for key, value in args.items()},
+                memory=memory,
+            )
+            with self._lock:
+                self.spans.append(record)
+
+    def summary(self) -> list[dict[str, Any]]:
+        """
+        Tiempo total por nombre de span, en el orden en que cada etapa arrancó.
+
+        Returns:
+            Lista de dicts con 'stage', 'depth', 'calls' y 'total_ms'; con memory=True
+            también 'rss_peak_mb' y 'heap_peak_mb' (máximo entre las llamadas).
+        """
+        with self._lock:
+            spans = sorted(self.spans, key=lambda record: record.start_us)
+        rows: dict[str, dict[str, Any]] = {}
+        for record in spans:
+            row = rows.setdefault(
+                record.name,
+                {"stage": record.name, "depth": record.depth, "calls": 0, "total_ms": 0.0},
+            )
+            row["calls"] += 1
+            row["total_ms"] += record.duration_ms
+            if record.memory is not None:
+                for key in ("rss_peak_mb", "heap_peak_mb"):
+                    value = getattr(record.memory, key)
+                    if value is not None:
+                        row[key] = max(row.get(key, value), value)
+        for row in rows.values():
+            row["total_ms"] = round(row["total_ms"], 3)
+        return list(rows.values())
+
+    def to_chrome_trace(self) -> dict[str, Any]:
+        """Trace en formato JSON de Chrome trace viewer (eventos 'X' + metadata)."""
+        pid = os.getpid()
+        with self._lock:
+            spans = sorted(self.spans, key=lambda record: record.start_us)
+        events: list[dict[str, Any]] = [
+            {"name": "process_name", "ph": "M", "pid": pid, "tid": 0, "args": {"name": self.name}},
+        ]
+        events.extend(record.to_chrome_event(pid) for record in spans)
+        return {"traceEvents": events, "displayTimeUnit": "ms", "otherData": {"case": self.name}}
+
+    def write_chrome_trace(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(json.dumps(self.to_chrome_trace(), indent=1, ensure_ascii=False), encoding="utf-8")
+        return path
+
+
+def _shared(attribute: str, factory: Callable[[], Any]) -> Any:
+    # convert_with_datalab.py importa el paquete como `datalab` (agrega pdf_converter/ al
+    # sys.path): ambas copias del módulo tienen que ver el mismo tracer activo y monitor.
+    for alias in ("pdf_converter.datalab.tracing", "datalab.tracing"):
+        existing = getattr(sys.modules.get(alias), attribute, None)
+        if existing is not None:
+            return existing
+    return factory()
+
+
+_ACTIVE_TRACER: ContextVar[Optional[Tracer]] = _shared(
+    "_ACTIVE_TRACER", lambda: ContextVar("datalab_active_tracer", default=None)
+)
+_MEMORY_MONITOR: MemoryMonitor = _shared("_MEMORY_MONITOR", MemoryMonitor)
+
+
+def current_tracer() -> Optional[Tracer]:
+    return _ACTIVE_TRACER.get()
+
+
+@contextmanager
+def activate(tracer: Optional[Tracer]) -> Iterator[Optional[Tracer]]:
+    """
+    Hace de `tracer` el destino de todos los `span()` dentro del bloque; si el tracer
+    mide memoria, el muestreo de RSS corre mientras el bloque está abierto.
+    """
+    token = _ACTIVE_TRACER.set(tracer)
+    sampling = tracer is not None and tracer.memory
+    if sampling:
+        _MEMORY_MONITOR.start()
+    try:
+        yield tracer
+    finally:
+        if sampling:
+            _MEMORY_MONITOR.stop()
+        _ACTIVE_TRACER.reset(token)
+
+
+@contextmanager
+def span(name: str, category: str = "pipeline", **args: Any) -> Iterator[None]:
+    """Registra un span en el tracer activo; no-op si no hay ninguno."""
+    tracer = _ACTIVE_TRACER.get()
+    if tracer is None:
+        yield
+        return
+    with tracer.span(name, category, **args):
+        yield
+
+
+def traced(name: str, category: str = "pipeline") -> Callable[[Callable[..., Any]], Callable[..., Any]]:
+    """Decorador: envuelve cada llamada a la función en `span(name)`."""
+    def decorator(func: Callable[..., Any]) -> Callable[..., Any]:
+        @functools.wraps(func)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            if _ACTIVE_TRACER.get() is None:
+                return func(*args, **kwargs)
+            with span(name, category):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def slower_stages(
+    label: str,
+    timings: Iterable[tuple[str, float, float]],
+    tolerance: float = 1.25,
+    min_ms: float = MIN_COMPARABLE_MS,
+    tag: str = "SLOWER",
+) -> list[str]:
+    """
+    Compara (etapa, ms actual, ms baseline) y devuelve una línea por cada etapa que
+    tarda más de `tolerance` veces el baseline. Usado por los benchmarks y el audit.
+    """
+    return [
+        f"{tag} {label} {stage} {previous_ms:.0f}ms->{current_ms:.0f}ms (x{current_ms / previous_ms:.2f})"
+        for stage, current_ms, previous_ms in timings
+        if previous_ms >= min_ms and current_ms > previous_ms * tolerance
+    ]
+
+
+def _json_safe(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    return str(value)
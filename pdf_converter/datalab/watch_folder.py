@@ -0,0 +1,228 @@
+"""
+Modo carpeta vigilada: convierte cada PDF nuevo que aparece en una carpeta.
+
+    watcher = FolderWatcher(Path("entrada"), convertir, workers=2)
+    watcher.run()            # hasta Ctrl+C o watcher.stop() desde otro thread
+    watcher.run(once=True)   # procesa lo que hay y termina
+
+Se usa polling y no eventos del sistema de archivos porque la carpeta suele ser un
+recurso compartido de red, donde inotify no avisa. Un PDF se toma recién cuando su
+tamaño y fecha no cambiaron durante `settle_seconds` y termina en %%EOF: un archivo
+que todavía se está copiando no cumple ninguna de las dos cosas. Uno que sigue sin
+%%EOF después de `stalled_seconds` quietos se pasa igual a `convert` (una copia que
+se cortó queda registrada con su error en lugar de esperar para siempre).
+
+Junto a cada PDF queda <nombre>.status.json con el estado (procesando -> terminado |
+error), lo que devolvió `convert` y el tamaño/fecha del PDF procesado. Mientras el PDF
+no cambie no se vuelve a convertir, tampoco si falló (para reintentar alcanza con
+borrar el status o volver a copiar el PDF). Un status que quedó en "procesando" por
+un corte del proceso se retoma en la próxima corrida.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+
+PROCESANDO = "procesando"
+TERMINADO = "terminado"
+ERROR = "error"
+
+STATUS_SUFFIX = ".status.json"
+# Bytes del final del archivo donde se busca la marca de fin de un PDF completo
+EOF_TAIL_BYTES = 1024
+
+Converter = Callable[[Path], Dict[str, Any]]
+Listener = Callable[[Path, Dict[str, Any]], None]
+
+
+def status_path(pdf: Path) -> Path:
+    return pdf.with_suffix(STATUS_SUFFIX)
+
+
+def read_status(pdf: Path) -> Optional[Dict[str, Any]]:
+    try:
+        return json.loads(status_path(pdf).read_text(encoding="utf-8"))
+    except (OSError, ValueError):
+        return None
+
+
+def write_status(pdf: Path, status: Dict[str, Any]) -> Path:
+    """Escribe el status de forma atómica (quien lo lea nunca ve un JSON a medio escribir)."""
+    path = status_path(pdf)
+    temporary = path.with_name(f".{path.name}.tmp")
+    temporary.write_text(json.dumps(status, indent=2, ensure_ascii=False, default=str), encoding="utf-8")
+    os.replace(temporary, path)
+    return path
+
+
+def is_complete_pdf(path: Path) -> bool:
+    """El archivo termina con %%EOF (una copia a medias todavía no lo tiene)."""
+    try:
+        with open(path, "rb") as f:
+            f.seek(0, os.SEEK_END)
+            f.seek(max(0, f.tell() - EOF_TAIL_BYTES))
+            return b"%%EOF" in f.read()
+    except OSError:
+        return False
+
+
+@dataclass(frozen=True)
+class FileSignature:
+    """Tamaño y fecha de modificación: si cambian, el archivo se está escribiendo o es otro."""
+
+    size: int
+    mtime_ns: int
+
+    @classmethod
+    def of(cls, path: Path) -> Optional["FileSignature"]:
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        return cls(stat.st_size, stat.st_mtime_ns)
+
+    def matches(self, status: Optional[Dict[str, Any]]) -> bool:
+        return bool(status) and status.get("size") == self.size and status.get("mtime_ns") == self.mtime_ns
+
+
+class FolderWatcher:
+    """
+    Vigila `folder` y pasa cada PDF estable a `convert` en un pool de `workers` threads.
+
+    Son threads del mismo proceso: `convert` puede reusar clientes y caches ya cargados
+    (cliente Datalab, parser). Nunca hay más de `workers` PDFs en curso; los demás
+    esperan al próximo poll.
+    """
+
+    def __init__(
+        self,
+        folder: Union[str, Path],
+        convert: Converter,
+        workers: int = 2,
+        poll_interval: float = 2.0,
+        settle_seconds: float = 5.0,
+        stalled_seconds: float = 120.0,
+        on_status: Optional[Listener] = None,
+    ):
+        if workers < 1:
+            raise ValueError("workers debe ser >= 1")
+        self.folder = Path(folder)
+        self.convert = convert
+        self.workers = workers
+        self.poll_interval = poll_interval
+        self.settle_seconds = settle_seconds
+        self.stalled_seconds = stalled_seconds
+        self.on_status = on_status
+        self._executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="watch-worker")
+        self._in_flight: Dict[Path, Future] = {}
+        # Última firma vista de cada PDF y desde cuándo no cambia
+        self._seen: Dict[Path, Tuple[FileSignature, float]] = {}
+        self._stop = threading.Event()
+
+    def scan(self) -> Tuple[List[Path], List[Path]]:
+        """
+        Recorre la carpeta una vez.
+
+        Returns:
+            (listos, esperando): PDFs estables sin procesar y PDFs nuevos que todavía
+            no se asentaron (o no terminan en %%EOF).
+        """
+        now = time.monotonic()
+        ready: List[Path] = []
+        waiting: List[Path] = []
+        present = set()
+        for path in sorted(self.folder.iterdir()):
+            if path.suffix.lower() != ".pdf" or path.name.startswith((".", "~$")) or not path.is_file():
+                continue
+            present.add(path)
+            if path in self._in_flight:
+                continue
+            signature = FileSignature.of(path)
+            if signature is None:
+                continue
+            status = read_status(path)
+            if signature.matches(status) and status.get("estado") in (TERMINADO, ERROR):
+                continue
+
+            previous = self._seen.get(path)
+            if previous is None or previous[0] != signature:
+                self._seen[path] = (signature, now)
+                waiting.append(path)
+            elif now - previous[1] >= self.settle_seconds and (
+                now - previous[1] >= self.stalled_seconds or is_complete_pdf(path)
+            ):
+                ready.append(path)
+            else:
+                waiting.append(path)
+        for path in set(self._seen) - present:
+            del self._seen[path]
+        return ready, waiting
+
+    def poll(self) -> int:
+        """Un ciclo: descarta los terminados y lanza los PDFs listos que entren en el pool."""
+        for path in [path for path, future in self._in_flight.items() if future.done()]:
+            del self._in_flight[path]
+        ready, _ = self.scan()
+        launched = 0
+        for path in ready:
+            if len(self._in_flight) >= self.workers:
+                break
+            signature, _ = self._seen.pop(path)
+            self._in_flight[path] = self._executor.submit(self._process, path, signature)
+            launched += 1
+        return launched
+
+    def run(self, once: bool = False) -> None:
+        """
+        Vigila hasta stop(). Con once=True termina cuando no queda nada por procesar
+        (espera a que se asienten los PDFs que se estaban copiando).
+        """
+        self._stop.clear()
+        try:
+            while not self._stop.is_set():
+                self.poll()
+                if once and not self._in_flight:
+                    ready, waiting = self.scan()
+                    if not ready and not waiting:
+                        break
+                self._stop.wait(self.poll_interval)
+        finally:
+            self._executor.shutdown(wait=True)
+
+    def stop(self) -> None:
+        """Deja de tomar PDFs; run() vuelve cuando terminan los que están en curso."""
+        self._stop.set()
+
+    def _process(self, path: Path, signature: FileSignature) -> Dict[str, Any]:
+        started = time.perf_counter()
+        status: Dict[str, Any] = {
+            "input": path.name,
+            "size": signature.size,
+            "mtime_ns": signature.mtime_ns,
+            "iniciado": datetime.now().isoformat(timespec="seconds"),
+        }
+        self._publish(path, {**status, "estado": PROCESANDO})
+        try:
+            status.update(self.convert(path))
+            status["estado"] = TERMINADO
+        except Exception as e:
+            status["estado"] = ERROR
+            status["error"] = f"{type(e).__name__}: {e}"
+        status["terminado"] = datetime.now().isoformat(timespec="seconds")
+        status["segundos"] = round(time.perf_counter() - started, 2)
+        self._publish(path, status)
+        return status
+
+    def _publish(self, path: Path, status: Dict[str, Any]) -> None:
+        write_status(path, status)
+        if self.on_status is not None:
+            self.on_status(path, status)
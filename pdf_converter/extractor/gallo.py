@@ -62,18 +62,27 @@ class GalloExtractor:
     # Sections that are caución-based
     CAUCION_SECTIONS = ["cauciones_pesos", "cauciones_dolares"]
     
-    def __init__(self, pdf_path: str, llm_client: LLMClient, max_pages_per_chunk: int = 5):
+    def __init__(
+        self,
+        pdf_path: str,
+        llm_client: LLMClient,
+        max_pages_per_chunk: Optional[int] = None,
+        max_tokens_input: int = 80000
+    ):
         """
         Initialize the Gallo extractor.
         
         Args:
             pdf_path: Path to the PDF file
             llm_client: LLMClient instance for AI extraction
-            max_pages_per_chunk: Maximum pages to process per LLM call
+            max_pages_per_chunk: Optional cap on pages per LLM call (chunks are packed by token budget)
+            max_tokens_input: Input token budget per LLM call
         """
         self.pdf_reader = PDFReader(pdf_path)
         self.llm = llm_client
-        self.chunked_extractor = ChunkedExtractor(llm_client, max_pages_per_chunk)
+        self.chunked_extractor = ChunkedExtractor(
+            llm_client, max_pages_per_chunk, max_tokens_input=max_tokens_input
+        )
         self.context = ExtractionContext()
         self.section_detector = SectionDetector("gallo")
         
@@ -201,14 +210,11 @@ class GalloExtractor:
         self.context.reset_section(section.section_key)
         
         all_rows = []
-        current_page = section.start_page
-        
-        while current_page <= section.end_page:
-            chunk_end = min(
-                current_page + self.chunked_extractor.max_pages_per_chunk - 1,
-                section.end_page
-            )
-            
+        chunks = self.chunked_extractor.plan_chunks(
+            self.pdf_reader, section.start_page, section.end_page,
+            get_schema("gallo", section.section_key), GALLO_PROMPTS["transacciones"]
+        )
+        for current_page, chunk_end in chunks:
             console.print(f"  [dim]Pages {current_page + 1}-{chunk_end + 1}...[/dim]")
             
             # Get text for this chunk
@@ -245,9 +251,7 @@ class GalloExtractor:
             else:
                 console.print(f"  [yellow]Warning: Chunk extraction failed[/yellow]")
             
-            # Move to next chunk
-            current_page = chunk_end + 1
-            self.context.add_processed_pages(list(range(current_page - 1, chunk_end + 1)))
+            self.context.add_processed_pages(list(range(current_page, chunk_end + 1)))
         
         return all_rows
     
@@ -266,14 +270,11 @@ class GalloExtractor:
             currency_key = "pesos"
         
         all_rows = []
-        current_page = section.start_page
-        
-        while current_page <= section.end_page:
-            chunk_end = min(
-                current_page + self.chunked_extractor.max_pages_per_chunk - 1,
-                section.end_page
-            )
-            
+        chunks = self.chunked_extractor.plan_chunks(
+            self.pdf_reader, section.start_page, section.end_page,
+            get_schema("gallo", section.section_key), GALLO_PROMPTS["cauciones"]
+        )
+        for current_page, chunk_end in chunks:
             console.print(f"  [dim]Pages {current_page + 1}-{chunk_end + 1}...[/dim]")
             
             text = self.pdf_reader.extract_pages_text(current_page, chunk_end)
@@ -297,8 +298,6 @@ class GalloExtractor:
                     rows = result.data[key]
                     self.context.update(rows)
                     all_rows.extend(rows)
-            
-            current_page = chunk_end + 1
         
         return all_rows
     
@@ -315,14 +314,11 @@ class GalloExtractor:
             position_key = "final"
         
         all_rows = []
-        current_page = section.start_page
-        
-        while current_page <= section.end_page:
-            chunk_end = min(
-                current_page + self.chunked_extractor.max_pages_per_chunk - 1,
-                section.end_page
-            )
-            
+        chunks = self.chunked_extractor.plan_chunks(
+            self.pdf_reader, section.start_page, section.end_page,
+            get_schema("gallo", section.section_key), GALLO_PROMPTS["posicion"]
+        )
+        for current_page, chunk_end in chunks:
             console.print(f"  [dim]Pages {current_page + 1}-{chunk_end + 1}...[/dim]")
             
             text = self.pdf_reader.extract_pages_text(current_page, chunk_end)
@@ -340,8 +336,6 @@ class GalloExtractor:
                 key = f"posicion_{position_key}"
                 if key in result.data:
                     all_rows.extend(result.data[key])
-            
-            current_page = chunk_end + 1
         
         return all_rows
     
@@ -51,18 +51,27 @@ class VisualExtractor:
         "posicion_titulos",
     ]
     
-    def __init__(self, pdf_path: str, llm_client: LLMClient, max_pages_per_chunk: int = 5):
+    def __init__(
+        self,
+        pdf_path: str,
+        llm_client: LLMClient,
+        max_pages_per_chunk: Optional[int] = None,
+        max_tokens_input: int = 80000
+    ):
         """
         Initialize the Visual extractor.
         
         Args:
             pdf_path: Path to the PDF file
             llm_client: LLMClient instance for AI extraction
-            max_pages_per_chunk: Maximum pages to process per LLM call
+            max_pages_per_chunk: Optional cap on pages per LLM call (chunks are packed by token budget)
+            max_tokens_input: Input token budget per LLM call
         """
         self.pdf_reader = PDFReader(pdf_path)
         self.llm = llm_client
-        self.chunked_extractor = ChunkedExtractor(llm_client, max_pages_per_chunk)
+        self.chunked_extractor = ChunkedExtractor(
+            llm_client, max_pages_per_chunk, max_tokens_input=max_tokens_input
+        )
         self.context = ExtractionContext()
         self.section_detector = SectionDetector("visual")
         
@@ -130,14 +139,11 @@ class VisualExtractor:
         self.context.reset_section("boletos")
         
         all_rows = []
-        current_page = section.start_page
-        
-        while current_page <= section.end_page:
-            chunk_end = min(
-                current_page + self.chunked_extractor.max_pages_per_chunk - 1,
-                section.end_page
-            )
-            
+        chunks = self.chunked_extractor.plan_chunks(
+            self.pdf_reader, section.start_page, section.end_page,
+            get_schema("visual", section.section_key), VISUAL_PROMPTS["boletos"]
+        )
+        for current_page, chunk_end in chunks:
             console.print(f"  [dim]Pages {current_page + 1}-{chunk_end + 1}...[/dim]")
             
             text = self.pdf_reader.extract_pages_text(current_page, chunk_end)
@@ -149,8 +155,6 @@ class VisualExtractor:
                 rows = result.data["boletos"]
                 self.context.update(rows)
                 all_rows.extend(rows)
-            
-            current_page = chunk_end + 1
         
         return all_rows
     
@@ -167,14 +171,11 @@ class VisualExtractor:
         self.context.reset_section(section.section_key)
         
         all_rows = []
-        current_page = section.start_page
-        
-        while current_page <= section.end_page:
-            chunk_end = min(
-                current_page + self.chunked_extractor.max_pages_per_chunk - 1,
-                section.end_page
-            )
-            
+        chunks = self.chunked_extractor.plan_chunks(
+            self.pdf_reader, section.start_page, section.end_page,
+            get_schema("visual", section.section_key), VISUAL_PROMPTS["resultado_ventas"]
+        )
+        for current_page, chunk_end in chunks:
             console.print(f"  [dim]Pages {current_page + 1}-{chunk_end + 1}...[/dim]")
             
             text = self.pdf_reader.extract_pages_text(current_page, chunk_end)
@@ -198,8 +199,6 @@ class VisualExtractor:
                     rows = result.data[key]
                     self.context.update(rows)
                     all_rows.extend(rows)
-            
-            current_page = chunk_end + 1
         
         return all_rows
     
@@ -216,14 +215,11 @@ class VisualExtractor:
         self.context.reset_section(section.section_key)
         
         all_rows = []
-        current_page = section.start_page
-        
-        while current_page <= section.end_page:
-            chunk_end = min(
-                current_page + self.chunked_extractor.max_pages_per_chunk - 1,
-                section.end_page
-            )
-            
+        chunks = self.chunked_extractor.plan_chunks(
+            self.pdf_reader, section.start_page, section.end_page,
+            get_schema("visual", section.section_key), VISUAL_PROMPTS["rentas_dividendos"]
+        )
+        for current_page, chunk_end in chunks:
             console.print(f"  [dim]Pages {current_page + 1}-{chunk_end + 1}...[/dim]")
             
             text = self.pdf_reader.extract_pages_text(current_page, chunk_end)
@@ -247,22 +243,17 @@ class VisualExtractor:
                     rows = result.data[key]
                     self.context.update(rows)
                     all_rows.extend(rows)
-            
-            current_page = chunk_end + 1
         
         return all_rows
     
     def _extract_posicion_titulos(self, section: SectionBoundary) -> list[dict]:
         """Extract posicion de titulos section."""
         all_rows = []
-        current_page = section.start_page
-        
-        while current_page <= section.end_page:
-            chunk_end = min(
-                current_page + self.chunked_extractor.max_pages_per_chunk - 1,
-                section.end_page
-            )
-            
+        chunks = self.chunked_extractor.plan_chunks(
+            self.pdf_reader, section.start_page, section.end_page,
+            get_schema("visual", section.section_key), VISUAL_PROMPTS["posicion_titulos"]
+        )
+        for current_page, chunk_end in chunks:
             console.print(f"  [dim]Pages {current_page + 1}-{chunk_end + 1}...[/dim]")
             
             text = self.pdf_reader.extract_pages_text(current_page, chunk_end)
@@ -272,8 +263,6 @@ class VisualExtractor:
             
             if result.success and "posicion_titulos" in result.data:
                 all_rows.extend(result.data["posicion_titulos"])
-            
-            current_page = chunk_end + 1
         
         return all_rows
     
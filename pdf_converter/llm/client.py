@@ -12,6 +12,32 @@ from rich.console import Console
 
 console = Console()
 
+# Token estimation for chunk planning. Report text is dense with numbers and
+# dates, which tokenize worse than prose, so stay on the conservative side.
+CHARS_PER_TOKEN = 3.0
+# Fraction of max_tokens_output a chunk may be planned to use (estimates are rough)
+OUTPUT_HEADROOM = 0.8
+# Room for the continuation hint and page markers added around the page text
+PROMPT_EXTRA_TOKENS = 300
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count of a text."""
+    return int(len(text) / CHARS_PER_TOKEN) + 1
+
+
+def estimate_page_tokens(page_text: str, schema: list) -> tuple[int, int]:
+    """
+    Estimate (input, output) tokens for one page of a section.
+    
+    The output repeats the page values as JSON, plus the schema keys, quotes
+    and braces once per row. Every line with a digit counts as a row.
+    """
+    input_tokens = estimate_tokens(page_text)
+    rows = sum(1 for line in page_text.splitlines() if any(c.isdigit() for c in line))
+    row_overhead = estimate_tokens(json.dumps(dict.fromkeys(schema, ""))) if schema else 0
+    return input_tokens, input_tokens + rows * row_overhead
+
 
 @dataclass
 class ExtractionResult:
@@ -326,12 +352,72 @@ class ChunkedExtractor:
     def __init__(
         self,
         llm_client: LLMClient,
-        max_pages_per_chunk: int = 5,
-        overlap_pages: int = 1
+        max_pages_per_chunk: Optional[int] = None,
+        overlap_pages: int = 1,
+        max_tokens_input: int = 80000
     ):
+        """
+        Args:
+            llm_client: LLMClient used for the calls (its max_tokens_output is the output budget)
+            max_pages_per_chunk: Optional hard cap on pages per call; None packs by tokens only
+            overlap_pages: Unused, chunks do not overlap (kept for callers)
+            max_tokens_input: Input budget per call
+        """
         self.llm = llm_client
         self.max_pages_per_chunk = max_pages_per_chunk
         self.overlap_pages = overlap_pages
+        self.max_tokens_input = max_tokens_input
+    
+    def plan_chunks(
+        self,
+        pdf_reader,
+        start_page: int,
+        end_page: int,
+        schema: list,
+        prompt_template: str = ""
+    ) -> list[tuple[int, int]]:
+        """
+        Split a page range into the fewest consecutive chunks that fit the token budgets.
+        
+        Each page's input and output tokens are estimated from its extracted text
+        and the section schema (see estimate_page_tokens); pages are added to the
+        current chunk until the next one would overflow max_tokens_input or
+        OUTPUT_HEADROOM of the client's max_tokens_output. A page that exceeds a
+        budget on its own still gets its own chunk.
+        
+        Args:
+            pdf_reader: PDFReader instance
+            start_page: Start page (0-indexed)
+            end_page: End page (0-indexed, inclusive)
+            schema: Column list of the section (extractor/schemas.py)
+            prompt_template: Prompt template the page text is inserted into
+        
+        Returns:
+            List of (chunk_start, chunk_end) pages, 0-indexed and inclusive
+        """
+        input_budget = self.max_tokens_input - estimate_tokens(prompt_template) - PROMPT_EXTRA_TOKENS
+        output_budget = int(self.llm.max_tokens_output * OUTPUT_HEADROOM)
+        
+        chunks = []
+        chunk_start = start_page
+        used_input = used_output = 0
+        for page in range(start_page, end_page + 1):
+            page_input, page_output = estimate_page_tokens(pdf_reader.extract_page_text(page), schema)
+            full = (
+                used_input + page_input > input_budget
+                or used_output + page_output > output_budget
+                or (self.max_pages_per_chunk and page - chunk_start >= self.max_pages_per_chunk)
+            )
+            if page > chunk_start and full:
+                chunks.append((chunk_start, page - 1))
+                chunk_start = page
+                used_input = used_output = 0
+            used_input += page_input
+            used_output += page_output
+        
+        if start_page <= end_page:
+            chunks.append((chunk_start, end_page))
+        return chunks
     
     def extract_section(
         self,
@@ -340,7 +426,8 @@ class ChunkedExtractor:
         end_page: int,
         prompt_template: str,
         section_key: str,
-        context_builder: callable = None
+        context_builder: callable = None,
+        schema: Optional[list] = None
     ) -> list:
         """
         Extract a section spanning multiple pages with chunking.
@@ -352,6 +439,7 @@ class ChunkedExtractor:
             prompt_template: Prompt template with {text} placeholder
             section_key: Key to extract from JSON response
             context_builder: Optional function to build continuation context
+            schema: Column list of the section, for the chunk token estimates
         
         Returns:
             List of all extracted rows
@@ -359,10 +447,7 @@ class ChunkedExtractor:
         all_rows = []
         context = ""
         
-        current_page = start_page
-        while current_page <= end_page:
-            chunk_end = min(current_page + self.max_pages_per_chunk - 1, end_page)
-            
+        for current_page, chunk_end in self.plan_chunks(pdf_reader, start_page, end_page, schema or [], prompt_template):
             console.print(f"  [dim]Processing pages {current_page + 1}-{chunk_end + 1}...[/dim]")
             
             # Extract text for this chunk
@@ -388,10 +473,5 @@ class ChunkedExtractor:
                 all_rows.extend(rows)
             else:
                 console.print(f"[yellow]Warning: Failed to extract chunk pages {current_page + 1}-{chunk_end + 1}[/yellow]")
-            
-            # Move to next chunk (with overlap)
-            current_page = chunk_end + 1 - self.overlap_pages
-            if current_page <= chunk_end:
-                current_page = chunk_end + 1
         
         return all_rows
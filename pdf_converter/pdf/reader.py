@@ -26,6 +26,9 @@ class PDFReader:
         
         self.doc = fitz.open(str(self.path))
         self.total_pages = len(self.doc)
+        # Page texts already extracted: section detection, chunk planning and
+        # the extraction itself all read the same pages
+        self._page_texts: dict[int, str] = {}
         self.is_ocr_needed = self._detect_ocr_need()
         
         if self.is_ocr_needed:
@@ -58,10 +61,12 @@ class PDFReader:
         if page_num < 0 or page_num >= self.total_pages:
             raise ValueError(f"Page {page_num} out of range (0-{self.total_pages-1})")
         
-        if self.is_ocr_needed:
-            return self._ocr_page(page_num)
-        else:
-            return self._extract_native(page_num)
+        if page_num not in self._page_texts:
+            if self.is_ocr_needed:
+                self._page_texts[page_num] = self._ocr_page(page_num)
+            else:
+                self._page_texts[page_num] = self._extract_native(page_num)
+        return self._page_texts[page_num]
     
     def _extract_native(self, page_num: int) -> str:
         """Native text extraction with pdfplumber for better table handling."""
@@ -1,14 +1,21 @@
 from __future__ import annotations
 
 import argparse
+import importlib
 import json
+import multiprocessing
+import sys
+import time
 from dataclasses import dataclass
 from pathlib import Path
+from queue import Empty
 from typing import Iterable
 
 from openpyxl import load_workbook
 
 from pdf_converter.datalab.economic_sanity import validate_workbook
+from pdf_converter.datalab.tracing import MIN_COMPARABLE_MS, Tracer, activate, slower_stages, span
+from run_smoke_suite import DEDICATED_SMOKE_MODULES, DEFAULT_SMOKE_TIMEOUT_S
 
 
 ROOT = Path(__file__).resolve().parent
@@ -21,6 +28,7 @@ class AuditTarget:
     bucket: str
     source: str
     expected_state: str = "review"
+    smoke_module: str | None = None
 
 
 def _existing_latest(paths: Iterable[Path]) -> Path | None:
@@ -31,23 +39,12 @@ def _existing_latest(paths: Iterable[Path]) -> Path | None:
 
 
 def smoke_baseline_targets(root: Path = ROOT) -> list[AuditTarget]:
-    from smoke_test_koltan_13353 import CONFIG as KOLTAN_CONFIG
-    from smoke_test_prida import CONFIG as PRIDA_CONFIG
-    from smoke_test_sigal import CONFIG as SIGAL_CONFIG
-    from smoke_test_sturman import CONFIG as STURMAN_CONFIG
-    from smoke_test_sturman_11688 import CONFIG as STURMAN_11688_CONFIG
-
-    configs = [
-        SIGAL_CONFIG,
-        PRIDA_CONFIG,
-        STURMAN_CONFIG,
-        STURMAN_11688_CONFIG,
-        KOLTAN_CONFIG,
-    ]
-    targets = [
-        AuditTarget(config.title, config.baseline_values, "approved-smoke", "smoke-baseline", "approved")
-        for config in configs
-    ]
+    targets = []
+    for module_name in DEDICATED_SMOKE_MODULES:
+        config = importlib.import_module(module_name).CONFIG
+        targets.append(
+            AuditTarget(config.title, config.baseline_values, "approved-smoke", "smoke-baseline", "approved", module_name)
+        )
     targets.extend(
         [
             AuditTarget(
@@ -155,6 +152,69 @@ def audit_target(target: AuditTarget, root: Path = ROOT) -> dict:
     }
 
 
+def _peak_rss_mb() -> float | None:
+    """Pico de RSS del proceso, o None donde no hay `resource` (Windows)."""
+    try:
+        import resource
+    except ImportError:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reporta KiB, macOS bytes.
+    return round(peak / (1024 * 1024) if sys.platform == "darwin" else peak / 1024, 1)
+
+
+def _regenerate_in_child(module_name: str, queue) -> None:
+    try:
+        config = importlib.import_module(module_name).CONFIG
+        tracer = Tracer(module_name)
+        started = time.perf_counter()
+        with activate(tracer):
+            with span("regenerate", "audit"):
+                config.run_pipeline()
+        wall_ms = (time.perf_counter() - started) * 1000.0
+        stages = {
+            row["stage"]: row["total_ms"]
+            for row in tracer.summary()
+            if row["depth"] <= 1 and row["stage"] != "regenerate"
+        }
+        queue.put({"wall_ms": round(wall_ms, 1), "peak_rss_mb": _peak_rss_mb(), "stages_ms": stages})
+    except Exception as exc:
+        queue.put({"error": f"{type(exc).__name__}: {exc}"})
+
+
+def measure_target_performance(target: AuditTarget, timeout_s: float = DEFAULT_SMOKE_TIMEOUT_S) -> dict | None:
+    """
+    Regenera el target desde sus inputs congelados en un proceso nuevo y devuelve
+    wall time, pico de RSS y tiempo por etapa del merge (spans de tracing).
+
+    Si el proceso no termina en `timeout_s` se lo mata y la medición queda como error,
+    igual que un proceso que muere sin dejar resultado.
+    """
+    if not target.smoke_module:
+        return None
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    process = context.Process(target=_regenerate_in_child, args=(target.smoke_module, queue))
+    process.start()
+    deadline = time.monotonic() + timeout_s
+    result: dict | None = None
+    while result is None:
+        try:
+            result = queue.get(timeout=min(1.0, max(0.0, deadline - time.monotonic())))
+        except Empty:
+            if not process.is_alive():
+                # El hijo pudo dejar el resultado justo antes de salir
+                try:
+                    result = queue.get(timeout=1.0)
+                except Empty:
+                    result = {"error": f"regeneration process exited with code {process.exitcode} without a result"}
+            elif time.monotonic() >= deadline:
+                process.terminate()
+                result = {"error": f"timeout after {timeout_s:.0f}s"}
+    process.join()
+    return result
+
+
 def build_targets(root: Path, include_under_review: bool, extra_paths: Iterable[Path]) -> list[AuditTarget]:
     targets = smoke_baseline_targets(root)
     if include_under_review:
@@ -221,6 +281,36 @@ def compare_to_baseline(rows: list[dict], baseline: dict) -> list[str]:
     return regressions
 
 
+def compare_performance_to_baseline(
+    rows: list[dict],
+    baseline: dict,
+    *,
+    time_tolerance: float = 1.25,
+    rss_tolerance: float = 1.2,
+    min_ms: float = MIN_COMPARABLE_MS,
+) -> list[str]:
+    baseline_rows = {_target_key(row): row for row in baseline.get("targets", [])}
+    regressions: list[str] = []
+    for row in rows:
+        current = row.get("performance") or {}
+        previous = (baseline_rows.get(_target_key(row)) or {}).get("performance") or {}
+        if current.get("error"):
+            regressions.append(f"PERF_FAILED {row['label']} {current['error']}")
+            continue
+        if not current or not previous or previous.get("error"):
+            continue
+        timings = [("wall", current.get("wall_ms", 0.0), previous.get("wall_ms", 0.0))]
+        previous_stages = previous.get("stages_ms", {}) or {}
+        for stage, current_ms in sorted((current.get("stages_ms", {}) or {}).items()):
+            timings.append((stage, current_ms, previous_stages.get(stage, 0.0)))
+        regressions.extend(slower_stages(row["label"], timings, time_tolerance, min_ms, tag="PERF_SLOWER"))
+        current_rss = float(current.get("peak_rss_mb", 0.0) or 0.0)
+        previous_rss = float(previous.get("peak_rss_mb", 0.0) or 0.0)
+        if previous_rss and current_rss > previous_rss * rss_tolerance:
+            regressions.append(f"PERF_RSS_INCREASE {row['label']} {previous_rss:.0f}MB->{current_rss:.0f}MB")
+    return regressions
+
+
 def print_report(rows: list[dict], summary: dict) -> None:
     print("Release audit")
     print(f"Targets: {summary['total']}")
@@ -236,6 +326,14 @@ def print_report(rows: list[dict], summary: dict) -> None:
         )
         if row.get("error"):
             print(f"  error: {row['error']}")
+        performance = row.get("performance")
+        if performance:
+            if performance.get("error"):
+                print(f"  performance error: {performance['error']}")
+            else:
+                peak_rss = performance.get("peak_rss_mb")
+                rss_text = f"{peak_rss:.0f}MB" if peak_rss is not None else "n/a"
+                print(f"  performance: wall={performance['wall_ms'] / 1000:.1f}s peak_rss={rss_text}")
         print(f"  path: {row['path']}")
 
 
@@ -246,12 +344,31 @@ def main() -> int:
     parser.add_argument("--json-output", type=Path, help="Optional path to save full audit JSON.")
     parser.add_argument("--compare-baseline", type=Path, help="Compare against a prior audit JSON and fail on new high/result triggers.")
     parser.add_argument("--fail-on-approved-high", action="store_true", help="Exit non-zero if approved targets have high triggers.")
+    parser.add_argument(
+        "--measure-performance",
+        action="store_true",
+        help="Regenerate each smoke baseline from its frozen inputs and record wall time, peak RSS and merge stage timings.",
+    )
+    parser.add_argument("--perf-tolerance", type=float, default=1.25, help="Allowed slowdown ratio per stage versus baseline (default 1.25).")
+    parser.add_argument("--rss-tolerance", type=float, default=1.2, help="Allowed peak RSS growth ratio versus baseline (default 1.2).")
+    parser.add_argument(
+        "--perf-timeout",
+        type=float,
+        default=DEFAULT_SMOKE_TIMEOUT_S,
+        help=f"Seconds allowed per regeneration before it is killed and reported as failed (default {DEFAULT_SMOKE_TIMEOUT_S:.0f}).",
+    )
+    parser.add_argument("--perf-warn-only", action="store_true", help="Report performance regressions without failing.")
     parser.add_argument("paths", nargs="*", type=Path, help="Extra workbook paths to audit.")
     args = parser.parse_args()
 
     root = args.root.resolve()
     targets = build_targets(root, include_under_review=not args.approved_only, extra_paths=args.paths)
     rows = [audit_target(target, root) for target in targets]
+    if args.measure_performance:
+        for target, row in zip(targets, rows):
+            performance = measure_target_performance(target, timeout_s=args.perf_timeout)
+            if performance is not None:
+                row["performance"] = performance
     summary = summarize(rows)
     output = {"summary": summary, "targets": rows}
 
@@ -267,6 +384,21 @@ def main() -> int:
                 print(f"  {regression}")
         else:
             print("\nAudit comparison: no new high/result triggers versus baseline.")
+        if args.measure_performance:
+            perf_regressions = compare_performance_to_baseline(
+                rows,
+                baseline,
+                time_tolerance=args.perf_tolerance,
+                rss_tolerance=args.rss_tolerance,
+            )
+            if perf_regressions:
+                print("\nPerformance regressions versus baseline:" + (" (warning only)" if args.perf_warn_only else ""))
+                for regression in perf_regressions:
+                    print(f"  {regression}")
+                if not args.perf_warn_only:
+                    regressions.extend(perf_regressions)
+            else:
+                print("\nPerformance comparison: no stage or peak RSS regression versus baseline.")
     if args.json_output:
         output_path = args.json_output if args.json_output.is_absolute() else root / args.json_output
         output_path.parent.mkdir(parents=True, exist_ok=True)
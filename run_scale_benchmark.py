@@ -0,0 +1,251 @@
+from __future__ import annotations
+
+import argparse
+import json
+import platform
+import tempfile
+import time
+from dataclasses import replace
+from pathlib import Path
+
+from openpyxl import load_workbook
+
+from pdf_converter.datalab.economic_sanity import validate_workbook
+from pdf_converter.datalab.excel_to_pdf import ExcelToPdfExporter
+from pdf_converter.datalab.md_to_excel import convert_markdown_to_excel
+from pdf_converter.datalab.merge_gallo_visual import AuxDataStore, GalloVisualMerger
+from pdf_converter.datalab.synthetic_portfolio import generate_portfolio, load_instrument_catalog, reference_spec
+from pdf_converter.datalab.tracing import MIN_COMPARABLE_MS, Tracer, activate, slower_stages, span
+
+
+ROOT = Path(__file__).resolve().parent
+STAGES = ("generate", "parse", "postprocess", "merge", "validate", "pdf")
+DEFAULT_SCALES = (1.0, 10.0, 100.0)
+
+
+def _stage_of(record) -> str | None:
+    name = record.name
+    if name in {"markdown.parse", "excel.build", "excel.save"}:
+        return "parse"
+    if name.startswith("postprocess.") and record.category == "postprocess":
+        return "postprocess"
+    if name.startswith("bench."):
+        stage = name.split(".", 1)[1]
+        if stage in {"generate", "merge", "validate", "pdf"}:
+            return stage
+    return None
+
+
+def stage_times(tracer: Tracer) -> dict[str, float]:
+    """Agrupa los spans del trace en las etapas del benchmark (ms)."""
+    totals = {stage: 0.0 for stage in STAGES}
+    for record in tracer.spans:
+        stage = _stage_of(record)
+        if stage:
+            totals[stage] += record.duration_ms
+    return {stage: round(value, 1) for stage, value in totals.items()}
+
+
+def stage_peaks(tracer: Tracer, metric: str = "heap_peak_mb") -> dict[str, float]:
+    """Pico de memoria (MB) de cada etapa del benchmark; requiere un Tracer con memory=True."""
+    peaks = {stage: 0.0 for stage in STAGES}
+    for record in tracer.spans:
+        stage = _stage_of(record)
+        value = getattr(record.memory, metric, None) if record.memory else None
+        if stage and value is not None:
+            peaks[stage] = max(peaks[stage], value)
+    return peaks
+
+
+def _row_counts(path: Path) -> dict[str, int]:
+    wb = load_workbook(path, read_only=True)
+    try:
+        return {ws.title: max(0, (ws.max_row or 1) - 1) for ws in wb.worksheets}
+    finally:
+        wb.close()
+
+
+def run_scale(
+    scale: float,
+    base_spec,
+    catalog,
+    aux_store: AuxDataStore,
+    workdir: Path,
+    include_pdf: bool = True,
+    trace_dir: Path | None = None,
+    memory: bool = False,
+    low_memory: bool = False,
+) -> dict:
+    spec = base_spec.scaled(scale)
+    label = f"SYNTH_{scale:g}X"
+    case_dir = workdir / label
+    tracer = Tracer(label, memory=memory)
+    started = time.perf_counter()
+    with activate(tracer):
+        with span("bench.generate", "bench", scale=scale):
+            portfolio = generate_portfolio(spec, catalog)
+            markdown_paths = portfolio.write(case_dir, label)
+
+        excel_paths = {
+            kind: Path(convert_markdown_to_excel(str(path), str(case_dir / f"{label}_{kind}.xlsx")))
+            for kind, path in markdown_paths.items()
+        }
+
+        with span("bench.merge", "bench"):
+            merger = GalloVisualMerger(
+                str(excel_paths["gallo"]),
+                str(excel_paths["visual"]),
+                precio_tenencias_path=str(excel_paths["precio_tenencias"]),
+                aux_store=aux_store,
+            )
+            formulas_path = case_dir / f"{label}_formulas.xlsx" if low_memory else None
+            _, wb_values = merger.merge(output_mode="both", formulas_path=formulas_path)
+            del merger
+
+        with span("bench.validate", "bench"):
+            report = validate_workbook(wb_values)
+
+        if include_pdf:
+            with span("bench.pdf", "bench"):
+                values_path = case_dir / f"{label}_values.xlsx"
+                wb_values.save(values_path)
+                if low_memory:
+                    wb_values = None
+                exporter = ExcelToPdfExporter(str(values_path), {"numero": spec.comitente, "nombre": spec.client_name})
+                exporter.export_to_pdf(str(case_dir / f"{label}.pdf"))
+    total_ms = (time.perf_counter() - started) * 1000.0
+
+    if trace_dir is not None:
+        tracer.write_chrome_trace(trace_dir / f"{label}_TRACE.json")
+
+    input_rows: dict[str, int] = {}
+    for kind, path in excel_paths.items():
+        for sheet, count in _row_counts(path).items():
+            if count:
+                input_rows[f"{kind}:{sheet}"] = count
+    run = {
+        "scale": scale,
+        "label": label,
+        "spec": spec.to_dict(),
+        "input_rows": input_rows,
+        "total_input_rows": sum(input_rows.values()),
+        "validation_issues": len(report.issues),
+        "stage_ms": stage_times(tracer),
+        "total_ms": round(total_ms, 1),
+        "low_memory": low_memory,
+    }
+    if memory:
+        run["stage_heap_peak_mb"] = stage_peaks(tracer)
+        run["stage_rss_peak_mb"] = stage_peaks(tracer, "rss_peak_mb")
+    return run
+
+
+def _run_key(run: dict) -> str:
+    return f"{float(run.get('scale', 0)):g}"
+
+
+def compare_to_baseline(runs: list[dict], baseline: dict, tolerance: float = 1.25, min_ms: float = MIN_COMPARABLE_MS) -> list[str]:
+    """Etapas que tardan más de `tolerance` veces lo registrado en el baseline para la misma escala."""
+    baseline_runs = {_run_key(run): run for run in baseline.get("runs", [])}
+    regressions: list[str] = []
+    for run in runs:
+        previous = baseline_runs.get(_run_key(run))
+        if not previous:
+            continue
+        comparisons = [(stage, run["stage_ms"].get(stage, 0.0), previous.get("stage_ms", {}).get(stage, 0.0)) for stage in STAGES]
+        comparisons.append(("total", run.get("total_ms", 0.0), previous.get("total_ms", 0.0)))
+        regressions.extend(slower_stages(run["label"], comparisons, tolerance, min_ms))
+    return regressions
+
+
+def print_report(runs: list[dict]) -> None:
+    print("Scale benchmark")
+    header = f"{'scale':>7} {'rows':>8} " + " ".join(f"{stage:>12}" for stage in STAGES) + f" {'total':>12}"
+    print(header)
+    for run in runs:
+        stages = " ".join(f"{run['stage_ms'][stage]:>10.0f}ms" for stage in STAGES)
+        print(f"{run['scale']:>6g}x {run['total_input_rows']:>8} {stages} {run['total_ms']:>10.0f}ms")
+    if any("stage_heap_peak_mb" in run for run in runs):
+        print("\nPeak memory per stage (Python heap / process RSS)")
+        print(f"{'scale':>7} {'':>8} " + " ".join(f"{stage:>12}" for stage in STAGES))
+        for run in runs:
+            if "stage_heap_peak_mb" not in run:
+                continue
+            heap, rss = run["stage_heap_peak_mb"], run["stage_rss_peak_mb"]
+            peaks = " ".join(f"{f'{heap[stage]:.0f}/{rss[stage]:.0f}MB':>12}" for stage in STAGES)
+            print(f"{run['scale']:>6g}x {'':>8} {peaks}")
+
+
+def main() -> int:
+    parser = argparse.ArgumentParser(description="Time parse/postprocess/merge/validate/PDF over synthetic portfolios scaled from the largest approved case.")
+    parser.add_argument("--root", type=Path, default=ROOT)
+    parser.add_argument("--scales", type=float, nargs="+", default=list(DEFAULT_SCALES), help="Multipliers over the 1x reference case.")
+    parser.add_argument("--seed", type=int, help="Override the generator seed.")
+    parser.add_argument("--skip-pdf", action="store_true", help="Skip PDF export (faster runs at large scales).")
+    parser.add_argument("--workdir", type=Path, help="Keep generated markdown/Excel/PDF here instead of a temp dir.")
+    parser.add_argument("--trace-dir", type=Path, help="Write a Chrome trace per scale into this folder.")
+    parser.add_argument("--memory", action="store_true", help="Also record peak Python heap (tracemalloc) and RSS per stage; slows allocation-heavy stages.")
+    parser.add_argument("--low-memory", action="store_true", help="Merge with the formulas workbook on disk so only one merged workbook is alive at a time.")
+    parser.add_argument("--json-output", type=Path, help="Optional path to save benchmark JSON.")
+    parser.add_argument("--compare-baseline", type=Path, help="Compare against a prior benchmark JSON and fail on slower stages.")
+    parser.add_argument("--tolerance", type=float, default=1.25, help="Allowed slowdown ratio versus baseline (default 1.25).")
+    args = parser.parse_args()
+
+    root = args.root.resolve()
+    base_spec = reference_spec(root / "SMOKE_BASELINE")
+    if args.seed is not None:
+        base_spec = replace(base_spec, seed=args.seed)
+    catalog = load_instrument_catalog()
+    aux_store = AuxDataStore()
+
+    runs: list[dict] = []
+    with tempfile.TemporaryDirectory(prefix="scale_bench_") as tmp:
+        workdir = args.workdir.resolve() if args.workdir else Path(tmp)
+        trace_dir = args.trace_dir.resolve() if args.trace_dir else None
+        for scale in args.scales:
+            runs.append(
+                run_scale(
+                    scale,
+                    base_spec,
+                    catalog,
+                    aux_store,
+                    workdir,
+                    include_pdf=not args.skip_pdf,
+                    trace_dir=trace_dir,
+                    memory=args.memory,
+                    low_memory=args.low_memory,
+                )
+            )
+
+    output = {
+        "generated_at": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "machine": platform.machine(),
+        "reference_spec": base_spec.to_dict(),
+        "runs": runs,
+    }
+    print()
+    print_report(runs)
+
+    regressions: list[str] = []
+    if args.compare_baseline:
+        baseline_path = args.compare_baseline if args.compare_baseline.is_absolute() else root / args.compare_baseline
+        baseline = json.loads(baseline_path.read_text(encoding="utf-8"))
+        regressions = compare_to_baseline(runs, baseline, tolerance=args.tolerance)
+        if regressions:
+            print("\nBenchmark regressions versus baseline:")
+            for regression in regressions:
+                print(f"  {regression}")
+        else:
+            print(f"\nBenchmark comparison: no stage slower than x{args.tolerance:g} versus baseline.")
+    if args.json_output:
+        output_path = args.json_output if args.json_output.is_absolute() else root / args.json_output
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        output_path.write_text(json.dumps(output, indent=2, ensure_ascii=False), encoding="utf-8")
+        print(f"\nSaved JSON: {output_path}")
+
+    return 1 if regressions else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -1,16 +1,55 @@
 from __future__ import annotations
 
+import argparse
+import contextlib
+import importlib
+import io
+import multiprocessing
+import os
+import subprocess
+import time
+from dataclasses import dataclass
 from pathlib import Path
+from queue import Empty
 from typing import Iterable
 import sys
 
 from compare_workbooks import compare_workbooks
-from smoke_test_common import SmokeTestConfig, run_smoke
+from smoke_test_common import run_smoke
 import verify_regression_cases as regression
 
 
 ROOT = Path(__file__).resolve().parent
 CANULLO_DIR = ROOT / "SMOKE_BASELINE" / "CANULLO_20260326_APPROVED"
+DEDICATED_SMOKE_MODULES = (
+    "smoke_test_sigal",
+    "smoke_test_prida",
+    "smoke_test_sturman",
+    "smoke_test_sturman_11688",
+    "smoke_test_koltan_13353",
+)
+# Cambios en estos paths invalidan todas las smokes (código del pipeline y del comparador).
+SHARED_SMOKE_PATHS = (
+    "pdf_converter/datalab/",
+    "smoke_test_common.py",
+    "workbook_diff.py",
+    "run_smoke_suite.py",
+)
+DEFAULT_SMOKE_TIMEOUT_S = 900.0
+
+
+@dataclass(frozen=True)
+class SmokeResult:
+    module: str
+    title: str
+    exit_code: int
+    duration_s: float
+    output: str = ""
+    error: str | None = None
+
+    @property
+    def passed(self) -> bool:
+        return self.exit_code == 0 and self.error is None
 
 
 def _assert(condition: bool, message: str, failures: list[str]) -> None:
@@ -61,41 +100,183 @@ def _print_section(title: str, lines: Iterable[str]) -> None:
         print(line)
 
 
-def _dedicated_smoke_configs() -> list[SmokeTestConfig]:
-    from smoke_test_koltan_13353 import CONFIG as KOLTAN_CONFIG
-    from smoke_test_prida import CONFIG as PRIDA_CONFIG
-    from smoke_test_sigal import CONFIG as SIGAL_CONFIG
-    from smoke_test_sturman import CONFIG as STURMAN_CONFIG
-    from smoke_test_sturman_11688 import CONFIG as STURMAN_11688_CONFIG
+SMOKE_LABELS = {
+    "SIGAL 10374": "SIGAL 10374: cell-by-cell OK",
+    "PRIDA 10488": "PRIDA 10488: cell-by-cell OK",
+    "J_STURMAN 2797": "STURMAN 2797: cell-by-cell OK",
+    "STURMAN 11688": "STURMAN 11688: cell-by-cell OK + micro-price guard + inflation guard",
+    "KOLTAN 13353": "KOLTAN 13353: cell-by-cell OK + inflation guard",
+}
 
-    return [
-        SIGAL_CONFIG,
-        PRIDA_CONFIG,
-        STURMAN_CONFIG,
-        STURMAN_11688_CONFIG,
-        KOLTAN_CONFIG,
-    ]
 
+def _smoke_worker(module: str, queue) -> None:
+    """Corre una smoke en un proceso aislado y devuelve su salida capturada."""
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))
+    buffer = io.StringIO()
+    started = time.perf_counter()
+    title = module
+    exit_code = 1
+    error = None
+    try:
+        with contextlib.redirect_stdout(buffer):
+            config = importlib.import_module(module).CONFIG
+            title = config.title
+            exit_code = run_smoke(config)
+    except BaseException as exc:  # el runner tiene que reportar cualquier caída del worker
+        error = f"{type(exc).__name__}: {exc}"
+    queue.put(SmokeResult(module, title, exit_code, time.perf_counter() - started, buffer.getvalue(), error))
+
+
+def run_smokes_parallel(
+    modules: Iterable[str],
+    *,
+    jobs: int | None = None,
+    timeout_s: float = DEFAULT_SMOKE_TIMEOUT_S,
+) -> list[SmokeResult]:
+    """
+    Ejecuta cada smoke en su propio proceso (spawn), con hasta `jobs` en paralelo y
+    un timeout por smoke. Devuelve los resultados en el orden de `modules`.
+
+    Un proceso que muere sin dejar resultado cuenta como falla, con cualquier exit code;
+    si el resultado llega después de registrar la caída, el resultado real la reemplaza.
+    """
+    modules = list(modules)
+    jobs = max(1, jobs or os.cpu_count() or 1)
+    context = multiprocessing.get_context("spawn")
+    queue = context.Queue()
+    pending = list(modules)
+    running: dict[str, tuple[multiprocessing.Process, float]] = {}
+    results: dict[str, SmokeResult] = {}
+
+    while pending or running:
+        while pending and len(running) < jobs:
+            module = pending.pop(0)
+            process = context.Process(target=_smoke_worker, args=(module, queue), name=module)
+            process.start()
+            running[module] = (process, time.perf_counter())
+
+        try:
+            result = queue.get(timeout=0.5)
+        except Empty:
+            result = None
+        if result is not None:
+            results[result.module] = result
+            entry = running.pop(result.module, None)
+            if entry is not None:
+                entry[0].join()
+
+        now = time.perf_counter()
+        for module, (process, started) in list(running.items()):
+            if module in results:
+                continue
+            if now - started > timeout_s:
+                process.terminate()
+                process.join()
+                running.pop(module)
+                results[module] = SmokeResult(module, module, 1, now - started, error=f"timeout after {timeout_s:.0f}s")
+            elif not process.is_alive():
+                running.pop(module)
+                results[module] = SmokeResult(
+                    module, module, 1, now - started, error=f"worker exited with code {process.exitcode} without a result"
+                )
+
+    # Resultados que el worker dejó en la cola justo antes de salir
+    while True:
+        try:
+            result = queue.get(timeout=0.5)
+        except Empty:
+            break
+        results[result.module] = result
+
+    return [results[module] for module in modules]
 
-def _run_dedicated_smokes(failures: list[str], passes: list[str]) -> None:
-    smoke_labels = {
-        "SIGAL 10374": "SIGAL 10374: cell-by-cell OK",
-        "PRIDA 10488": "PRIDA 10488: cell-by-cell OK",
-        "J_STURMAN 2797": "STURMAN 2797: cell-by-cell OK",
-        "STURMAN 11688": "STURMAN 11688: cell-by-cell OK + micro-price guard + inflation guard",
-        "KOLTAN 13353": "KOLTAN 13353: cell-by-cell OK + inflation guard",
-    }
-
-    for config in _dedicated_smoke_configs():
-        print(f"\n>>> Running dedicated smoke: {config.title}")
-        exit_code = run_smoke(config)
-        if exit_code != 0:
-            failures.append(f"{config.title} FAILED")
+
+def changed_paths(since: str, root: Path = ROOT) -> list[str] | None:
+    """Paths modificados respecto de `since` (más los no trackeados); None si git no está disponible."""
+    commands = (
+        ["git", "diff", "--name-only", since],
+        ["git", "ls-files", "--others", "--exclude-standard"],
+    )
+    paths: list[str] = []
+    for command in commands:
+        try:
+            completed = subprocess.run(command, cwd=root, capture_output=True, text=True, check=True)
+        except (OSError, subprocess.CalledProcessError):
+            return None
+        paths.extend(line.strip() for line in completed.stdout.splitlines() if line.strip())
+    return paths
+
+
+def _relative(path: Path, root: Path) -> str:
+    try:
+        return path.resolve().relative_to(root).as_posix()
+    except ValueError:
+        return path.as_posix()
+
+
+def select_affected_smokes(
+    changed: Iterable[str],
+    modules: Iterable[str] = DEDICATED_SMOKE_MODULES,
+    root: Path = ROOT,
+) -> list[str]:
+    """Smokes cuyos inputs, baseline, módulo o código compartido aparecen entre `changed`."""
+    changed = [path.replace("\\", "/") for path in changed]
+    modules = list(modules)
+    if any(path.startswith(SHARED_SMOKE_PATHS) for path in changed):
+        return modules
+
+    selected = []
+    for module in modules:
+        config = importlib.import_module(module).CONFIG
+        watched = [f"{module}.py", _relative(config.baseline_dir, root) + "/"]
+        watched.extend(_relative(path, root) for _, path in config.input_labels)
+        if any(path == item or (item.endswith("/") and path.startswith(item)) for path in changed for item in watched):
+            selected.append(module)
+    return selected
+
+
+def _run_dedicated_smokes(
+    failures: list[str],
+    passes: list[str],
+    modules: Iterable[str] = DEDICATED_SMOKE_MODULES,
+    *,
+    jobs: int | None = None,
+    timeout_s: float = DEFAULT_SMOKE_TIMEOUT_S,
+) -> list[SmokeResult]:
+    results = run_smokes_parallel(modules, jobs=jobs, timeout_s=timeout_s)
+    for result in results:
+        print(f"\n>>> Running dedicated smoke: {result.title}")
+        if result.output:
+            print(result.output, end="" if result.output.endswith("\n") else "\n")
+        if not result.passed:
+            if result.error:
+                print(f"ERROR: {result.error}")
+            failures.append(f"{result.title} FAILED")
             continue
-        passes.append(smoke_labels.get(config.title, f"{config.title}: OK"))
+        passes.append(SMOKE_LABELS.get(result.title, f"{result.title}: OK"))
+    return results
 
 
 def main() -> int:
+    parser = argparse.ArgumentParser(description="Run the release smoke suite (dedicated smokes in isolated parallel workers).")
+    parser.add_argument("--jobs", type=int, default=None, help="Parallel smoke workers (default: CPU count).")
+    parser.add_argument("--timeout", type=float, default=DEFAULT_SMOKE_TIMEOUT_S, help="Per-smoke timeout in seconds.")
+    parser.add_argument("--changed-only", action="store_true", help="Only run smokes whose inputs, baseline or relevant code changed.")
+    parser.add_argument("--since", default="HEAD", help="Git revision used by --changed-only (default: HEAD).")
+    args = parser.parse_args()
+
+    modules = list(DEDICATED_SMOKE_MODULES)
+    if args.changed_only:
+        changed = changed_paths(args.since)
+        if changed is None:
+            print("git not available: running every dedicated smoke.")
+        else:
+            modules = select_affected_smokes(changed, modules)
+            skipped = [module for module in DEDICATED_SMOKE_MODULES if module not in modules]
+            if skipped:
+                print(f"Skipping unchanged smokes: {', '.join(skipped)}")
+
     failures: list[str] = []
     passes = [
         "GLOZMAN: ARS/USD split consistente",
@@ -105,8 +286,8 @@ def main() -> int:
     _check_glozman(failures)
     _check_canullo_approved(failures)
 
-    if not failures:
-        _run_dedicated_smokes(failures, passes)
+    if not failures and modules:
+        _run_dedicated_smokes(failures, passes, modules, jobs=args.jobs, timeout_s=args.timeout)
 
     if failures:
         _print_section("SMOKE FAIL", failures)
@@ -10,6 +10,8 @@ from typing import Callable, Iterable, Sequence
 
 from openpyxl import load_workbook
 
+from workbook_diff import WorkbookSnapshot, diff_workbooks, file_sha256
+
 
 DEFAULT_AUX_SHEETS = {
     "EspeciesVisual",
@@ -106,97 +108,77 @@ def compare_workbooks(
     aux_sheets: set[str],
     float_rtol: float,
     float_atol: float,
+    data_only: bool = True,
 ) -> list[dict]:
-    diffs: list[dict] = []
-
-    baseline_sheets = set(baseline_workbook.sheetnames)
-    current_sheets = set(current_workbook.sheetnames)
+    """Acepta workbooks abiertos, `WorkbookSnapshot` o paths (los paths se leen en streaming, read-only)."""
 
-    for sheet_name in sorted(baseline_sheets - current_sheets):
-        diffs.append({"type": "SHEET_MISSING", "sheet": sheet_name})
-    for sheet_name in sorted(current_sheets - baseline_sheets):
-        diffs.append({"type": "SHEET_ADDED", "sheet": sheet_name})
+    def cells_equal(baseline_value, current_value, header) -> bool:
+        if values_equal(baseline_value, current_value, float_rtol=float_rtol, float_atol=float_atol):
+            return True
+        return header == "Auditoría" and values_equal(
+            _normalize_audit_value(baseline_value),
+            _normalize_audit_value(current_value),
+            float_rtol=float_rtol,
+            float_atol=float_atol,
+        )
+
+    sheet_diffs = diff_workbooks(
+        baseline_workbook,
+        current_workbook,
+        cells_equal,
+        size_only_sheets=aux_sheets,
+        quantum=float_atol,
+        zero_is_blank=True,
+        data_only=data_only,
+    )
 
-    for name in sorted(baseline_sheets & current_sheets):
-        baseline_sheet = baseline_workbook[name]
-        current_sheet = current_workbook[name]
+    diffs: list[dict] = []
+    for sheet_diff in sorted(sheet_diffs, key=lambda item: item.sheet):
+        name = sheet_diff.sheet
+        if sheet_diff.status == "missing":
+            diffs.append({"type": "SHEET_MISSING", "sheet": name})
+            continue
+        if sheet_diff.status == "added":
+            diffs.append({"type": "SHEET_ADDED", "sheet": name})
+            continue
 
+        (baseline_rows, baseline_cols), (current_rows, current_cols) = sheet_diff.baseline_shape, sheet_diff.current_shape
         if name in aux_sheets:
-            if (
-                baseline_sheet.max_row != current_sheet.max_row
-                or baseline_sheet.max_column != current_sheet.max_column
-            ):
+            if sheet_diff.status == "size_only":
                 diffs.append(
                     {
                         "type": "AUX_SIZE_CHANGE",
                         "sheet": name,
-                        "baseline": f"{baseline_sheet.max_row}x{baseline_sheet.max_column}",
-                        "current": f"{current_sheet.max_row}x{current_sheet.max_column}",
+                        "baseline": f"{baseline_rows}x{baseline_cols}",
+                        "current": f"{current_rows}x{current_cols}",
                     }
                 )
             print(f"  {name}: dims OK (skipped cell-by-cell)", flush=True)
             continue
 
-        max_row = max(baseline_sheet.max_row, current_sheet.max_row)
-        max_col = max(baseline_sheet.max_column, current_sheet.max_column)
-
-        if baseline_sheet.max_row != current_sheet.max_row:
-            diffs.append(
-                {
-                    "type": "ROW_COUNT",
-                    "sheet": name,
-                    "baseline": baseline_sheet.max_row,
-                    "current": current_sheet.max_row,
-                }
-            )
-
-        headers = [
-            baseline_sheet.cell(1, col).value or current_sheet.cell(1, col).value
-            for col in range(1, max_col + 1)
-        ]
-
-        sheet_diffs = 0
-        for row in range(1, max_row + 1):
-            for col in range(1, max_col + 1):
-                baseline_value = (
-                    baseline_sheet.cell(row, col).value
-                    if row <= baseline_sheet.max_row and col <= baseline_sheet.max_column
-                    else None
-                )
-                current_value = (
-                    current_sheet.cell(row, col).value
-                    if row <= current_sheet.max_row and col <= current_sheet.max_column
-                    else None
-                )
-                if not values_equal(
-                    baseline_value,
-                    current_value,
-                    float_rtol=float_rtol,
-                    float_atol=float_atol,
-                ):
-                    header = headers[col - 1] if col <= len(headers) else f"Col{col}"
-                    if header == "Auditoría" and values_equal(
-                        _normalize_audit_value(baseline_value),
-                        _normalize_audit_value(current_value),
-                        float_rtol=float_rtol,
-                        float_atol=float_atol,
-                    ):
-                        continue
-                    diffs.append(
-                        {
-                            "type": "CELL_DIFF",
-                            "sheet": name,
-                            "row": row,
-                            "col": col,
-                            "header": str(header),
-                            "baseline": repr(baseline_value),
-                            "current": repr(current_value),
-                        }
-                    )
-                    sheet_diffs += 1
-
-        cells = max_row * max_col
-        print(f"  {name}: {cells:,} cells, {sheet_diffs} diff(s)", flush=True)
+        if baseline_rows != current_rows:
+            diffs.append({"type": "ROW_COUNT", "sheet": name, "baseline": baseline_rows, "current": current_rows})
+        for cell in sheet_diff.cells:
+            diff = {
+                "type": "CELL_DIFF",
+                "sheet": name,
+                "row": cell.row,
+                "col": cell.col,
+                "header": cell.header,
+                "baseline": repr(cell.baseline),
+                "current": repr(cell.current),
+            }
+            if cell.current_row != cell.row:
+                diff["current_row"] = cell.current_row
+            diffs.append(diff)
+        for row in sheet_diff.rows_removed:
+            diffs.append({"type": "ROW_REMOVED", "sheet": name, "row": row, "baseline": repr(sheet_diff.baseline_rows[row])})
+        for row in sheet_diff.rows_added:
+            diffs.append({"type": "ROW_ADDED", "sheet": name, "row": row, "current": repr(sheet_diff.current_rows[row])})
+
+        cells = max(baseline_rows, current_rows) * max(baseline_cols, current_cols)
+        sheet_count = len(sheet_diff.cells) + len(sheet_diff.rows_removed) + len(sheet_diff.rows_added)
+        print(f"  {name}: {cells:,} cells, {sheet_count} diff(s)", flush=True)
 
     return diffs
 
@@ -221,6 +203,10 @@ def print_diff_report(diffs: Sequence[dict], *, total_cells: int) -> None:
                 )
             elif diff["type"] == "ROW_COUNT":
                 print(f"  Row count: {diff['baseline']}  ->  {diff['current']}")
+            elif diff["type"] == "ROW_REMOVED":
+                print(f"  Row {diff['row']} only in baseline: {diff['baseline']}")
+            elif diff["type"] == "ROW_ADDED":
+                print(f"  Row {diff['row']} only in current: {diff['current']}")
             else:
                 print(f"  {diff['type']}")
         if len(sheet_diffs) > 50:
@@ -256,6 +242,45 @@ class SmokeTestConfig:
     save_guards: Sequence[tuple[str, WorkbookGuard]] = ()
     run_guards: Sequence[tuple[str, WorkbookGuard]] = ()
     extra_save_actions: Sequence[ExtraSaveAction] = ()
+    baseline_compact: Path | None = None
+
+    @property
+    def compact_snapshot_path(self) -> Path:
+        return self.baseline_compact or self.baseline_dir / "baseline_snapshot.json.gz"
+
+
+def save_compact_snapshot(config: SmokeTestConfig, workbook) -> Path:
+    snapshot = WorkbookSnapshot.from_workbook(workbook, size_only_sheets=config.aux_sheets)
+    if config.baseline_values.exists():
+        snapshot.source_sha256 = file_sha256(config.baseline_values)
+    return snapshot.save(config.compact_snapshot_path)
+
+
+def load_compact_snapshot(config: SmokeTestConfig) -> WorkbookSnapshot | None:
+    """
+    El snapshot compacto si sigue correspondiendo al baseline xlsx; None si no hay
+    snapshot o si el xlsx cambió después de congelarlo (hay que usar el xlsx).
+    """
+    compact = config.compact_snapshot_path
+    if not compact.exists():
+        return None
+    snapshot = WorkbookSnapshot.load(compact)
+    if config.baseline_values.exists() and snapshot.source_sha256 != file_sha256(config.baseline_values):
+        print(f"WARNING: {compact.name} is stale for {config.baseline_values.name}; using the xlsx baseline.")
+        print(f"Run  python {Path(sys.argv[0]).name} --freeze-snapshot  to refresh it.")
+        return None
+    return snapshot
+
+
+def freeze_compact_snapshot(config: SmokeTestConfig) -> int:
+    """Genera el snapshot compacto a partir del baseline xlsx ya aprobado (sin re-correr el pipeline)."""
+    if not config.baseline_values.exists():
+        print(f"ERROR: baseline not found at {config.baseline_values}")
+        return 1
+    workbook = load_workbook(str(config.baseline_values), data_only=config.baseline_load_data_only)
+    path = save_compact_snapshot(config, workbook)
+    print(f"  Saved compact  : {path}")
+    return 0
 
 
 def save_baseline(config: SmokeTestConfig) -> int:
@@ -281,6 +306,7 @@ def save_baseline(config: SmokeTestConfig) -> int:
     with open(config.baseline_json, "w", encoding="utf-8") as handle:
         json.dump(snapshot, handle, indent=2, ensure_ascii=False, default=str)
     print(f"  Saved snapshot : {config.baseline_json}")
+    print(f"  Saved compact  : {save_compact_snapshot(config, workbook)}")
 
     lines = [
         f"{config.title} approved baseline - {datetime.now().strftime('%Y-%m-%d %H:%M')}",
@@ -303,21 +329,32 @@ def save_baseline(config: SmokeTestConfig) -> int:
 
 
 def run_smoke(config: SmokeTestConfig) -> int:
-    if not config.baseline_values.exists():
+    compact = config.compact_snapshot_path
+    if not compact.exists() and not config.baseline_values.exists():
         print(f"ERROR: baseline not found at {config.baseline_values}")
         print(f"Run  python {Path(sys.argv[0]).name} --save  first.")
         return 1
 
+    snapshot = load_compact_snapshot(config)
     print("=" * 70)
     print(f"SMOKE TEST - {config.title}")
     print("=" * 70)
-    print(f"Baseline : {config.baseline_values.name}")
+    print(f"Baseline : {(compact if snapshot is not None else config.baseline_values).name}")
     for label, path in config.input_labels:
         print(f"{label:<9}: {path.name}")
     print()
 
     print("Loading baseline ...", flush=True)
-    baseline = load_workbook(str(config.baseline_values), data_only=config.baseline_load_data_only)
+    if snapshot is not None:
+        baseline = snapshot
+        shapes = [sheet.shape for sheet in baseline.sheets.values()]
+    else:
+        baseline = config.baseline_values
+        workbook = load_workbook(str(baseline), read_only=True, data_only=config.baseline_load_data_only)
+        shapes = [(workbook[name].max_row, workbook[name].max_column) for name in workbook.sheetnames]
+        workbook.close()
+    sheet_count = len(shapes)
+    total = sum(rows * cols for rows, cols in shapes)
 
     print("Running pipeline ...", flush=True)
     current = config.run_pipeline()
@@ -336,14 +373,14 @@ def run_smoke(config: SmokeTestConfig) -> int:
         aux_sheets=config.aux_sheets,
         float_rtol=config.float_rtol,
         float_atol=config.float_atol,
+        data_only=config.baseline_load_data_only,
     )
 
-    total = sum(baseline[name].max_row * baseline[name].max_column for name in baseline.sheetnames)
     if not diffs:
         print()
         print("=" * 70)
         print("  PASS - 0 differences")
-        print(f"  Sheets : {len(baseline.sheetnames)}")
+        print(f"  Sheets : {sheet_count}")
         print(f"  Cells  : {total:,}")
         print("=" * 70)
         return 0
@@ -359,8 +396,15 @@ def run_cli(config: SmokeTestConfig) -> int:
         action="store_true",
         help="Save current pipeline output as approved baseline",
     )
+    parser.add_argument(
+        "--freeze-snapshot",
+        action="store_true",
+        help="Write the compact snapshot from the existing approved baseline xlsx",
+    )
     args = parser.parse_args()
 
     if args.save:
         return save_baseline(config)
+    if args.freeze_snapshot:
+        return freeze_compact_snapshot(config)
     return run_smoke(config)
\ No newline at end of file
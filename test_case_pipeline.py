@@ -0,0 +1,150 @@
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
+
+import fitz
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from pdf_converter.datalab.case_pipeline import CaseSource, run_case, workbook_bytes
+from pdf_converter.datalab.excel_to_pdf import ExcelToPdfExporter
+from pdf_converter.datalab.input_tables import InputWorkbook, SheetTable, load_input_workbook
+from pdf_converter.datalab.md_to_excel import convert_markdown_to_excel
+from pdf_converter.datalab.merge_gallo_visual import AuxDataStore, GalloVisualMerger
+from pdf_converter.datalab.synthetic_portfolio import PortfolioSpec, generate_portfolio
+
+
+def _values(wb):
+    return {ws.title: [[cell.value for cell in row] for row in ws.iter_rows()] for ws in wb.worksheets}
+
+
+@pytest.fixture(scope="module")
+def reference_case(tmp_path_factory):
+    """Portfolio sintético y su merge desde Excel guardados (el camino previo al pipeline en memoria)."""
+    tmp_path = tmp_path_factory.mktemp("reference")
+    portfolio = generate_portfolio(PortfolioSpec(instruments=8, trades=30, cauciones=10, rentas=3, seed=11))
+    paths = portfolio.write(tmp_path, "CASE")
+    store = AuxDataStore()
+
+    with redirect_stdout(io.StringIO()):
+        excels = {
+            kind: convert_markdown_to_excel(str(paths[kind]), str(tmp_path / f"{kind}.xlsx"))
+            for kind in ("gallo", "visual")
+        }
+        expected_formulas, expected_values = GalloVisualMerger(
+            excels["gallo"], excels["visual"], aux_store=store
+        ).merge(output_mode="both")
+    return portfolio, store, excels, expected_formulas, expected_values
+
+
+def test_tables_in_memory_match_reloaded_excel(tmp_path, reference_case):
+    portfolio, store, excels, expected_formulas, expected_values = reference_case
+
+    with redirect_stdout(io.StringIO()):
+        result = run_case(
+            CaseSource.markdown(portfolio.visual_markdown),
+            CaseSource.markdown(portfolio.gallo_markdown),
+            aux_store=store,
+            export_pdf=False,
+        )
+
+    # Las hojas en memoria son las mismas que se leerían del Excel guardado
+    for kind, source in result.sources.items():
+        reloaded = load_input_workbook(excels[kind])
+        assert source.workbook.sheetnames == reloaded.sheetnames
+        for table in reloaded:
+            in_memory = source.workbook[table.title]
+            assert (in_memory.max_row, in_memory.max_column) == (table.max_row, table.max_column)
+            assert list(in_memory.iter_rows(values_only=True)) == list(table.iter_rows(values_only=True))
+
+    assert _values(result.wb_formulas) == _values(expected_formulas)
+    merged = _values(result.wb_values)
+    merged.pop("Validacion")
+    assert merged == _values(expected_values)
+    assert result.pdf is None
+    assert not list(tmp_path.glob("CASE_Resumen_Impositivo*"))
+
+    outputs = result.save(tmp_path / "out", "nested/CASE")
+    assert outputs["merge_values"].read_bytes() == result.values_bytes()
+    assert outputs["visual"].name == "CASE_Visual_from_PDF.xlsx"
+    assert "pdf" not in outputs
+
+
+def test_concurrent_merges_share_the_aux_store(reference_case):
+    _portfolio, store, excels, _expected_formulas, expected_values = reference_case
+    # Hojas auxiliares de solo lectura: copiarlas desde varios threads no crea celdas
+    assert isinstance(store.especies_visual, InputWorkbook)
+
+    def merge_values(_):
+        return _values(GalloVisualMerger(excels["gallo"], excels["visual"], aux_store=store).merge(output_mode="values")[1])
+
+    with redirect_stdout(io.StringIO()), ThreadPoolExecutor(max_workers=3) as pool:
+        results = list(pool.map(merge_values, range(3)))
+
+    assert all(result == _values(expected_values) for result in results)
+
+
+def test_numbers_and_blanks_follow_the_xlsx_round_trip():
+    table = SheetTable.from_values("Hoja", [["a", "", 200.0], [23923.007999999998, None, ""], ["", None]])
+
+    # '' se escribe (con borde) y cuenta para la dimensión aunque se relea como None
+    assert (table.max_row, table.max_column) == (3, 3)
+    assert list(table.iter_rows(values_only=True)) == [("a", None, 200), (23923.008, None, None), (None, None, None)]
+    assert isinstance(table.value(1, 3), int)
+
+
+def test_pdf_exporter_reads_in_memory_workbook_like_saved_file(tmp_path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Resumen"
+    ws.append(["Concepto", "Importe", "Total"])
+    ws.append(["Ventas", 396.40000000000003, "=B2*2"])
+    ws.append(["", None, None])
+    path = tmp_path / "values.xlsx"
+    wb.save(path)
+
+    from_file = ExcelToPdfExporter(str(path))
+    in_memory = ExcelToPdfExporter(wb)
+
+    assert in_memory.excel_path is None
+    assert in_memory._get_sheet_data("Resumen") == from_file._get_sheet_data("Resumen")
+    assert in_memory._get_cell_value("Resumen", 2, 3) is None
+    assert ws["C2"].value == "=B2*2"
+
+
+def test_low_memory_case_streams_the_same_outputs_to_disk(tmp_path, reference_case):
+    portfolio, store, _, expected_formulas, expected_values = reference_case
+
+    with redirect_stdout(io.StringIO()):
+        result = run_case(
+            CaseSource.markdown(portfolio.visual_markdown),
+            CaseSource.markdown(portfolio.gallo_markdown),
+            aux_store=store,
+            output_dir=tmp_path,
+            case_prefix="CASE",
+            low_memory=True,
+        )
+
+    # Nada queda en memoria: los workbooks, el markdown y el PDF están en disco
+    assert result.wb_formulas is None and result.wb_values is None and result.pdf is None
+    assert all(source.tables is None and source.markdown is None for source in result.sources.values())
+    assert sorted(result.paths) == sorted([
+        "gallo", "gallo_markdown", "merge_formulas", "merge_values", "pdf", "validation", "visual", "visual_markdown",
+    ])
+    assert result.paths["merge_values"].name == "CASE_Resumen_Impositivo_FIXED_values.xlsx"
+
+    def reloaded(wb):
+        return _values(load_workbook(io.BytesIO(workbook_bytes(wb))))
+
+    assert _values(load_workbook(result.paths["merge_formulas"])) == reloaded(expected_formulas)
+    merged = _values(load_workbook(io.BytesIO(result.values_bytes())))
+    merged.pop("Validacion")
+    assert merged == reloaded(expected_values)
+    assert json.loads(result.paths["validation"].read_text(encoding="utf-8")) == result.validation_report.to_dict()
+    assert fitz.open(stream=result.pdf_bytes(), filetype="pdf").page_count > 0
+
+    # Guardar un caso low_memory en otro lugar copia sus archivos
+    copies = result.save(tmp_path / "copia", "OTRO")
+    assert copies["visual"].name == "OTRO_Visual_from_PDF.xlsx"
+    assert copies["merge_values"].read_bytes() == result.values_bytes()
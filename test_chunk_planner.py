@@ -0,0 +1,53 @@
+from pdf_converter.extractor.schemas import VISUAL_BOLETOS_SCHEMA, VISUAL_POSICION_TITULOS_SCHEMA
+from pdf_converter.llm.client import ChunkedExtractor, estimate_page_tokens
+
+
+class FakeLLM:
+    max_tokens_output = 16000
+
+
+class FakeReader:
+    def __init__(self, pages):
+        self.pages = pages
+        self.reads = []
+
+    def extract_page_text(self, page_num):
+        self.reads.append(page_num)
+        return self.pages[page_num]
+
+
+def _boletos_page(rows):
+    line = "03/01/2025 | 06/01/2025 | 40462 | Pesos | VENTA | 30037 | HAVANNA HOLDING | (2.000,00) | 31.173,99 | 1,00 | (62.347.970,00) | 0,00 | 155.869,92 | (62.503.839,92)"
+    return "\n".join(["Boletos", "Acciones"] + [line] * rows)
+
+
+def test_dense_pages_get_small_chunks_and_sparse_pages_are_packed():
+    dense = FakeReader([_boletos_page(60)] * 6)
+    sparse = FakeReader(["Posición de Títulos\nAL30 | 5921 | 100 | 85.000,00 | Pesos"] * 12)
+    planner = ChunkedExtractor(FakeLLM())
+
+    dense_chunks = planner.plan_chunks(dense, 0, 5, VISUAL_BOLETOS_SCHEMA)
+    _, page_output = estimate_page_tokens(dense.pages[0], VISUAL_BOLETOS_SCHEMA)
+    per_chunk = int(FakeLLM.max_tokens_output * 0.8) // page_output
+    assert 1 <= per_chunk < 5
+    assert all(end - start + 1 <= per_chunk for start, end in dense_chunks)
+    assert len(dense_chunks) == -(-6 // per_chunk)
+
+    # Más de 5 páginas por llamada cuando entran en el presupuesto
+    assert planner.plan_chunks(sparse, 2, 11, VISUAL_POSICION_TITULOS_SCHEMA) == [(2, 11)]
+    assert sparse.reads == list(range(2, 12))
+
+
+def test_chunks_cover_the_range_and_respect_caps():
+    reader = FakeReader([_boletos_page(5)] * 3 + [_boletos_page(400)] + [_boletos_page(5)] * 3)
+
+    chunks = ChunkedExtractor(FakeLLM()).plan_chunks(reader, 0, 6, VISUAL_BOLETOS_SCHEMA)
+    # Una página que sola supera el presupuesto va en su propio chunk
+    assert chunks == [(0, 2), (3, 3), (4, 6)]
+
+    capped = ChunkedExtractor(FakeLLM(), max_pages_per_chunk=2).plan_chunks(reader, 4, 6, VISUAL_BOLETOS_SCHEMA)
+    assert capped == [(4, 5), (6, 6)]
+
+    small_input = ChunkedExtractor(FakeLLM(), max_tokens_input=3000)
+    assert small_input.plan_chunks(reader, 0, 2, VISUAL_BOLETOS_SCHEMA, prompt_template="x" * 7000) == [(0, 0), (1, 1), (2, 2)]
+    assert ChunkedExtractor(FakeLLM()).plan_chunks(reader, 3, 2, VISUAL_BOLETOS_SCHEMA) == []
@@ -1,6 +1,6 @@
 from openpyxl import Workbook
 
-from pdf_converter.datalab.economic_sanity import add_validation_sheet, validate_workbook
+from pdf_converter.datalab.economic_sanity import SANITY_RULES, add_validation_sheet, validate_workbook
 
 
 def test_economic_sanity_flags_human_review_triggers_and_writes_sheet():
@@ -69,3 +69,32 @@ def test_economic_sanity_allows_ars_full_gain_with_zero_cost_initial_stock():
     assert 3 not in ars_ratio_rows
     assert 4 in ars_ratio_rows
     assert 5 in ars_ratio_rows
+
+
+def test_economic_sanity_reports_rule_timings_and_sees_edits_between_validations():
+    wb = Workbook()
+    boletos = wb.active
+    boletos.title = "Boletos"
+    boletos.append(["Moneda", "Tipo Operación", "Cantidad", "Precio", "Bruto", "Neto"])
+    boletos.append(["Pesos", "Compra", 1, 100, 100, 100])
+    boletos.append(["Dolar Cable", "Compra", 1, 4_000_000, 4_000_000, 4_000_000])
+
+    first = validate_workbook(wb)
+    second = validate_workbook(wb)
+
+    assert [issue.to_dict() for issue in first.issues] == [issue.to_dict() for issue in second.issues]
+    assert [(issue.row, issue.rule_id) for issue in first.issues] == [(2, "BOL-TINY-001"), (3, "BOL-USD-LARGE-001")]
+    timings = first.to_dict()["rule_timings_ms"]
+    assert "frame:Boletos" in timings
+    assert {rule.rule_id for rule in SANITY_RULES if rule.sheet == "Boletos"} <= set(timings)
+
+    boletos.append(["Pesos", "Compra", 1, 10, 10, 10])
+    third = validate_workbook(wb)
+
+    assert [issue.row for issue in third.issues if issue.rule_id == "BOL-TINY-001"] == [2, 4]
+
+    # Reescribir valores en el lugar (misma cantidad de celdas) también se ve
+    boletos["E2"] = boletos["F2"] = 1_000_000
+    fourth = validate_workbook(wb)
+
+    assert [issue.row for issue in fourth.issues if issue.rule_id == "BOL-TINY-001"] == [4]
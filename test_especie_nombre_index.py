@@ -0,0 +1,43 @@
+import random
+
+from pdf_converter.datalab.merge_gallo_visual import AuxDataStore, EspecieNombreIndex, GalloVisualMerger
+
+
+def _linear_scan(entradas, especie_upper):
+    for nombre, valor in entradas:
+        if GalloVisualMerger._match_especie(especie_upper, nombre):
+            return valor
+    return ""
+
+
+def test_index_returns_same_first_match_as_linear_scan():
+    store = AuxDataStore()
+    entradas = [
+        (str(data["nombre"]).upper(), codigo)
+        for codigo, data in store.especies_gallo_cache.items()
+        if data.get("nombre")
+    ]
+    nombres = [nombre for nombre, _ in entradas]
+    rng = random.Random(7)
+    consultas = ["", "AL", "YPF", "GD30 BONO REP. ARGENTINA USD STEP UP 2030", "ZZZ INEXISTENTE SA"]
+    for nombre in rng.sample(nombres, 150):
+        words = nombre.split()
+        consultas.append(nombre)
+        consultas.append(nombre[: max(1, len(nombre) // 2)])
+        consultas.append("XXXX " + " ".join(words[1:]))
+        consultas.append(nombre + " EXTRA")
+
+    index = store.especies_gallo_nombre_index
+    assert len(index) == len(entradas)
+    for consulta in consultas:
+        assert index.buscar(consulta) == _linear_scan(entradas, consulta), consulta
+
+
+def test_short_entries_and_rest_after_ticker_are_matched():
+    index = EspecieNombreIndex([("AB", "1"), ("TX26 BONCER 2026", "2"), ("PAMP PAMPA ENERGIA", "3")])
+
+    assert index.buscar("AB") == "1"
+    assert index.buscar("CABA") == "1"
+    assert index.buscar("T2X6 BONCER 2026") == "2"
+    assert index.buscar("PAMPX PAMPA ENERGIA") == "3"
+    assert index.buscar("GGAL") == ""
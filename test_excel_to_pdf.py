@@ -0,0 +1,73 @@
+import io
+from contextlib import redirect_stdout
+from datetime import datetime, timedelta
+
+import fitz
+import pytest
+from openpyxl import Workbook
+
+from pdf_converter.datalab import excel_to_pdf
+from pdf_converter.datalab.excel_to_pdf import ExcelToPdfExporter
+
+
+BOLETOS_HEADERS = [
+    "Tipo de Instrumento", "Concertación", "Liquidación", "Nro. Boleto", "Moneda", "Tipo Operación",
+    "Cod.Instrum", "Instrumento Crudo", "Cantidad", "Precio Nominal", "Tipo Cambio", "Bruto",
+    "Interés", "Gastos", "Neto Calculado",
+]
+
+
+@pytest.fixture(scope="module")
+def exporter():
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Boletos"
+    ws.append(BOLETOS_HEADERS)
+    start = datetime(2025, 1, 2)
+    for n in range(230):
+        tipo = "Acciones" if n % 3 else "Títulos Públicos"
+        fecha = start + timedelta(days=n)
+        cantidad = (n % 7 + 1) * 100 * (-1 if n % 4 == 0 else 1)
+        bruto = cantidad * (1000 + n)
+        ws.append([tipo, fecha, fecha + timedelta(days=1), 40000 + n, "Pesos", "VENTA" if cantidad < 0 else "COMPRA",
+                   500 + n % 5, f"INSTRUMENTO {n % 5}", cantidad, 1000 + n + 0.25, 1, bruto, 0, 12.5, bruto - 12.5])
+    with redirect_stdout(io.StringIO()):
+        return ExcelToPdfExporter(wb)
+
+
+def _render(exporter, **kwargs):
+    with redirect_stdout(io.StringIO()):
+        return fitz.open(stream=exporter.export_to_pdf(**kwargs), filetype="pdf")
+
+
+def _words(page):
+    return sorted((round(w[0]), round(w[1]), w[4]) for w in page.get_text("words"))
+
+
+def _shaded_rows(page):
+    alt = tuple(ExcelToPdfExporter.ROW_ALT_BG.rgb())
+    return sorted(round(d["rect"].y0) for d in page.get_drawings() if d.get("fill") and tuple(round(c, 2) for c in d["fill"]) == alt)
+
+
+def test_parallel_parts_match_single_render(exporter):
+    single = _render(exporter, workers=1)
+    parallel = _render(exporter, workers=2)
+
+    assert len(single) == len(parallel) > 3
+    for number, (expected, page) in enumerate(zip(single, parallel), start=1):
+        assert f"Pág. {number}" in page.get_text()
+        assert _words(page) == _words(expected)
+
+
+def test_chunked_tables_look_like_one_table(exporter, monkeypatch):
+    monkeypatch.setattr(excel_to_pdf, "TABLE_CHUNK_ROWS", 10**6)
+    single_table = _render(exporter, workers=1)
+    monkeypatch.setattr(excel_to_pdf, "TABLE_CHUNK_ROWS", 6)
+    chunked = _render(exporter, workers=1)
+
+    assert len(chunked) == len(single_table)
+    for expected, page in zip(single_table, chunked):
+        assert _words(page) == _words(expected)
+        # Las filas alternadas siguen el mismo patrón aunque la tabla se parta entre páginas
+        assert _shaded_rows(page) == _shaded_rows(expected)
+    assert _shaded_rows(chunked[1])
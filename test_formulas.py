@@ -0,0 +1,63 @@
+import pytest
+
+from pdf_converter.datalab.formulas import (
+    ES,
+    FormulaError,
+    cell,
+    contains_any,
+    evaluate,
+    fn,
+    formula,
+    group,
+    if_error,
+    render,
+    sheet_range,
+    sum_exprs,
+    vlookup,
+)
+
+
+def test_render_invariant_and_spanish_from_same_expression():
+    lookup = vlookup(cell("D", 5), sheet_range("Posicion Inicial Gallo", "D:V"), 19)
+    expr = fn.IF(if_error(lookup, 0).eq(0), cell("G", 5) * 0.1736, fn.AND(fn.NOT(cell("B", 5).eq("")), True))
+
+    assert formula(expr) == (
+        "=IF(IF(ISERROR(VLOOKUP(D5,'Posicion Inicial Gallo'!D:V,19,FALSE)),0,"
+        "VLOOKUP(D5,'Posicion Inicial Gallo'!D:V,19,FALSE))=0,G5*0.1736,AND(NOT(B5=\"\"),TRUE))"
+    )
+    assert formula(expr, ES) == (
+        "=SI(SI(ESERROR(BUSCARV(D5;'Posicion Inicial Gallo'!D:V;19;FALSO));0;"
+        "BUSCARV(D5;'Posicion Inicial Gallo'!D:V;19;FALSO))=0;G5*0,1736;Y(NO(B5=\"\");VERDADERO))"
+    )
+    # Los literales de texto no se traducen
+    assert render(contains_any(["Obligacion; SI"], cell("B", 2)), ES) == 'O(ESNUMERO(HALLAR("Obligacion; SI";B2)))'
+
+
+def test_parentheses_follow_operator_precedence():
+    I, Q, R, AA = cell("I", 2), cell("Q", 2), cell("R", 2), cell("AA", 2)
+
+    assert render((I * AA + Q * R) / (I + Q)) == "(I2*AA2+Q2*R2)/(I2+Q2)"
+    assert render(I - (Q - R)) == "I2-(Q2-R2)"
+    assert render(group(I + Q).eq(0)) == "(I2+Q2)=0"
+    assert render(sum_exprs(cell(col, 3) for col in "BCD")) == "B3+C3+D3"
+    assert render(sheet_range("FCI", "C:C")) == "FCI!C:C"
+
+
+def test_evaluate_if_error_and_lookup():
+    values = {"D2": "GD30", "D3": "XXXX", "P2": 0}
+    tabla = {"GD30": [None, 1500.0]}
+
+    def lookup(key, table, column):
+        assert table == "'Posicion Inicial Gallo'!D:I"
+        if key not in tabla:
+            raise FormulaError("#N/A")
+        return tabla[key][column - 1] if column <= len(tabla[key]) else None
+
+    def precio(row):
+        return if_error(vlookup(cell("D", row), sheet_range("Posicion Inicial Gallo", "D:I"), 2), 0)
+
+    assert evaluate(precio(2), values.get, lookup) == 1500.0
+    assert evaluate(precio(3), values.get, lookup) == 0
+    assert evaluate(if_error(1 / cell("P", 2), 1), values.get) == 1
+    with pytest.raises(FormulaError):
+        evaluate(1 / cell("P", 2), values.get)
@@ -0,0 +1,59 @@
+from datetime import date, datetime
+
+import numpy as np
+import pytest
+
+from pdf_converter.datalab.fx_rates import FxRateStore
+from pdf_converter.datalab.merge_gallo_visual import AuxDataStore, GalloVisualMerger
+
+
+ROWS = [
+    (datetime(2025, 1, 3), 1180.0, "Dolar MEP (local)"),
+    (datetime(2025, 1, 2), 1175.0, "Dolar MEP (local)"),
+    (datetime(2024, 12, 30), 1170.0, "Dolar MEP (local)"),
+    (datetime(2025, 1, 2), 1190.0, "Dolar Cable (exterior)"),
+]
+
+
+def test_exact_and_as_of_lookups_are_vectorized():
+    store = FxRateStore.from_rows(ROWS)
+    fechas = [datetime(2025, 1, 2), date(2025, 1, 4), "02/01/2025", datetime(2024, 1, 1)]
+
+    exact = store.rates_on(fechas, "Dolar MEP (local)")
+    as_of = store.rates_as_of(fechas, "Dolar MEP (local)")
+
+    assert exact[0] == 1175.0 and np.isnan(exact[1:]).all()
+    assert as_of[:2].tolist() == [1175.0, 1180.0]
+    assert np.isnan(as_of[2:]).all()
+    assert store.rate_on(datetime(2025, 1, 2), "Dolar Cable (exterior)") == 1190.0
+    assert store.resolve_tipo("Dolar Cable") == "Dolar Cable (exterior)"
+    assert store.resolve_tipo("Dolar") is None
+
+
+def test_period_start_prefers_explicit_fixing_then_last_quote_of_previous_year():
+    store = FxRateStore.from_rows(ROWS, period_start={(date(2024, 12, 31), "Dolar Cable (exterior)"): 1148.93})
+
+    assert store.period_start_rate("Dolar MEP", 2025) == 1170.0
+    assert store.period_start_rate("Dolar Cable", 2025) == 1148.93
+    assert store.period_start_rate("Dolar MEP", 2024) is None
+
+
+def test_merger_cotizacion_falls_back_to_previous_business_day():
+    store = AuxDataStore()
+    merger = GalloVisualMerger.__new__(GalloVisualMerger)
+    merger._fx_rates = store.fx_rates
+
+    viernes = merger._get_cotizacion(datetime(2025, 3, 7), "Dolar MEP")
+    assert merger._get_cotizacion(datetime(2025, 3, 8), "Dolar MEP") == viernes
+    assert merger._get_cotizaciones([datetime(2025, 3, 7), None, "x"], "Dolar Cable") == [viernes, 1.0, 1.0]
+    assert merger._get_cotizacion(datetime(2025, 3, 7), "Pesos") == 1.0
+    assert merger.COTIZACION_INICIO_PERIODO == 1167.806
+    assert merger.COTIZACION_INICIO_PERIODO_CABLE == 1148.93
+
+
+def test_period_start_rate_requires_the_merger_store():
+    merger = GalloVisualMerger.__new__(GalloVisualMerger)
+
+    with pytest.raises(AttributeError, match="_fx_rates"):
+        merger.COTIZACION_INICIO_PERIODO
+    assert GalloVisualMerger.COTIZACION_INICIO_PERIODO.tipo == "Dolar MEP"
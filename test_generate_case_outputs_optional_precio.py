@@ -3,6 +3,7 @@ import sys
 from openpyxl import Workbook
 
 import generate_case_outputs
+from pdf_converter.datalab import case_pipeline
 
 
 class _FakeReport:
@@ -41,14 +42,13 @@ def test_generate_case_outputs_allows_missing_precio_tenencias(tmp_path, monkeyp
             self.periodo_fin = None
             self.anio = None
 
-        def export_to_pdf(self, output_path):
-            with open(output_path, "wb") as handle:
-                handle.write(b"%PDF-1.4\n")
+        def export_to_pdf(self, output_path=None):
+            return b"%PDF-1.4\n"
 
-    monkeypatch.setattr(generate_case_outputs, "GalloVisualMerger", FakeMerger)
-    monkeypatch.setattr(generate_case_outputs, "validate_workbook", lambda wb: _FakeReport())
-    monkeypatch.setattr(generate_case_outputs, "add_validation_sheet", lambda wb, report: None)
-    monkeypatch.setattr(generate_case_outputs, "ExcelToPdfExporter", FakeExporter)
+    monkeypatch.setattr(case_pipeline, "GalloVisualMerger", FakeMerger)
+    monkeypatch.setattr(case_pipeline, "validate_workbook", lambda wb: _FakeReport())
+    monkeypatch.setattr(case_pipeline, "add_validation_sheet", lambda wb, report: None)
+    monkeypatch.setattr(case_pipeline, "ExcelToPdfExporter", FakeExporter)
     monkeypatch.setattr(sys, "argv", [
         "generate_case_outputs.py",
         "--root", str(tmp_path),
@@ -64,4 +64,6 @@ def test_generate_case_outputs_allows_missing_precio_tenencias(tmp_path, monkeyp
     assert seen["prefer_precio_tenencias_usd_cost_basis"] is True
     assert seen["precio_tenencias_usd_basis_fallback_codes"] == []
     assert (tmp_path / "nested" / "CASE_NO_PRECIO_Resumen_Impositivo_FIXED_values.xlsx").exists()
-    assert (tmp_path / "nested" / "CASE_NO_PRECIO_Resumen_Impositivo_VALIDATION.json").exists()
\ No newline at end of file
+    assert (tmp_path / "nested" / "CASE_NO_PRECIO_Resumen_Impositivo_VALIDATION.json").exists()
+    assert (tmp_path / "nested" / "CASE_NO_PRECIO_Resumen_Impositivo_TRACE.json").exists()
+    assert (tmp_path / "nested" / "CASE_NO_PRECIO_Resumen_Impositivo_FIXED.pdf").read_bytes() == b"%PDF-1.4\n"
\ No newline at end of file
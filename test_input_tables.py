@@ -0,0 +1,46 @@
+from datetime import datetime
+
+from openpyxl import Workbook, load_workbook
+from openpyxl.styles import Font
+
+from pdf_converter.datalab.input_tables import load_input_workbook
+
+
+def _write_gallo(path):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Renta Fija Pesos"
+    ws.append(["tipo_fila", "cod_especie", "especie", "fecha", "operacion", "numero", "cantidad"])
+    ws.append(["transaccion", "05.921", "TX26 BONCER", "15/03/25", "COMPRA", 1001, "1.500,5"])
+    ws.append(["transaccion", 5921, "TX26 BONCER", datetime(2024, 12, 30), "VENTA", 1002, -10])
+    ws["J3"].font = Font(bold=True)  # celda con estilo y sin valor
+    empty = wb.create_sheet("Cauciones Pesos")
+    wb.active = 1
+    wb.save(path)
+    return empty.title
+
+
+def test_tables_match_openpyxl_reads_and_expose_typed_columns(tmp_path):
+    path = tmp_path / "gallo.xlsx"
+    empty_title = _write_gallo(path)
+
+    tables = load_input_workbook(path)
+    reference = load_workbook(path)
+
+    assert tables.sheetnames == reference.sheetnames
+    assert tables.active.title == reference.active.title == empty_title
+    for ws in reference.worksheets:
+        table = tables[ws.title]
+        assert (table.max_row, table.max_column) == (ws.max_row, ws.max_column)
+        assert list(table.iter_rows(values_only=True)) == list(ws.iter_rows(values_only=True))
+
+    table = tables["Renta Fija Pesos"]
+    assert table.fecha(2, 4) == (datetime(2025, 3, 15), 2025)
+    assert table.fecha(3, 4) == (datetime(2024, 12, 30), 2024)
+    assert table.codigo(2, 2) == table.codigo(3, 2) == "5921"
+    assert table.numero(2, 7) == 0.0  # to_float no interpreta separadores de miles
+    assert table.numero(3, 7) == -10.0
+    assert table.find_column(["cantidad", "cant."]) == 7
+    assert table.find_column(["inexistente"], 9) == 9
+    assert table.find_header(["OPERAC"]) == 5
+    assert table.cell(10, 20).value is None
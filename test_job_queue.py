@@ -0,0 +1,156 @@
+import threading
+import time
+from datetime import timedelta
+
+from pdf_converter.datalab.job_queue import JobQueue, WorkerPool
+
+
+def _wait_until_done(queue, job_ids, timeout=10.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if all(not queue.get(job_id).activo for job_id in job_ids):
+            return
+        time.sleep(0.02)
+    raise AssertionError("los trabajos no terminaron a tiempo")
+
+
+def test_jobs_run_with_progress_results_and_dedupe(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite")
+
+    def duplicar(payload, job):
+        job.progress(0.5, "mitad")
+        return {"doble": payload["n"] * 2}
+
+    def fallar(payload, job):
+        raise ValueError("OCR caído")
+
+    pool = WorkerPool(queue, {"doble": duplicar, "falla": fallar}, workers=1)
+    job_id = queue.submit("doble", {"n": 21}, key="caso-1")
+    assert queue.submit("doble", {"n": 21}, key="caso-1") == job_id
+    failing = queue.submit("falla", None)
+    assert queue.position(failing) == 1
+
+    assert pool.run_one() and pool.run_one() and not pool.run_one()
+
+    assert queue.get(job_id).estado == "terminado"
+    assert queue.result(job_id) == {"doble": 42}
+    assert [(e.progreso, e.mensaje) for e in queue.events(job_id)] == [(0.5, "mitad")]
+    assert queue.get(failing).estado == "error"
+    assert queue.get(failing).error.startswith("ValueError: OCR caído")
+    # Un trabajo terminado se reutiliza por key; uno fallido no
+    assert queue.submit("doble", {"n": 21}, key="caso-1") == job_id
+    assert queue.submit("falla", None, key=None) != failing
+
+
+def test_cancel_pending_and_running_jobs(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite")
+    started = threading.Event()
+    steps = []
+
+    def largo(payload, job):
+        started.set()
+        for step in range(200):
+            job.progress(step / 200, f"paso {step}")
+            steps.append(step)
+            time.sleep(0.01)
+        return "completo"
+
+    running = queue.submit("largo", None)
+    pending = queue.submit("largo", None)
+    pool = WorkerPool(queue, {"largo": largo}, workers=1, poll_interval=0.01).start()
+    try:
+        assert started.wait(5)
+        assert queue.cancel(pending)
+        assert queue.get(pending).estado == "cancelado"
+        assert queue.cancel(running)
+        _wait_until_done(queue, [running])
+    finally:
+        pool.stop(timeout=5)
+
+    assert queue.get(running).estado == "cancelado"
+    assert len(steps) < 200
+    assert not queue.cancel(running)
+
+
+def test_pool_bounds_concurrent_jobs_and_survives_restart(tmp_path):
+    path = tmp_path / "jobs.sqlite"
+    lock = threading.Lock()
+    active = []
+    peak = []
+
+    def caso(payload, job):
+        with lock:
+            active.append(payload)
+            peak.append(len(active))
+        time.sleep(0.05)
+        with lock:
+            active.remove(payload)
+        return payload
+
+    queue = JobQueue(path)
+    job_ids = [queue.submit("caso", n) for n in range(6)]
+    # Un trabajo que quedó corriendo cuando se cayó el proceso vuelve a la cola
+    claimed, _ = queue.claim()
+    assert queue.get(claimed.id).estado == "corriendo"
+
+    pool = WorkerPool(JobQueue(path), {"caso": caso}, workers=2, poll_interval=0.01).start()
+    try:
+        _wait_until_done(queue, job_ids)
+    finally:
+        pool.stop(timeout=5)
+
+    assert [queue.result(job_id) for job_id in job_ids] == list(range(6))
+    assert 1 <= max(peak) <= 2
+
+
+def test_finished_jobs_are_reused_only_while_fresh_and_valid(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite")
+    pool = WorkerPool(queue, {"caso": lambda payload, job: {"salida": payload}}, workers=1)
+    first = queue.submit("caso", 1, key="k")
+    pool.run_one()
+
+    assert queue.submit("caso", 1, key="k", max_age=timedelta(hours=1), reusable=lambda r: r["salida"] == 1) == first
+    # Resultado que ya no sirve (p. ej. sus archivos se borraron): se encola otro y el viejo deja de contar
+    second = queue.submit("caso", 1, key="k", reusable=lambda r: False)
+    assert second != first
+    pool.run_one()
+    time.sleep(0.05)
+    third = queue.submit("caso", 1, key="k", max_age=timedelta(milliseconds=10))
+    assert third not in (first, second)
+    pool.run_one()
+    time.sleep(0.05)
+
+    purged = []
+    WorkerPool(queue, {}, workers=1, retention=timedelta(milliseconds=10), on_purge=purged.extend).purge()
+    assert sorted(purged) == sorted([first, second, third])
+    assert queue.jobs() == []
+
+
+def test_unsaveable_result_fails_the_job_instead_of_leaving_it_running(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite")
+    pool = WorkerPool(queue, {"caso": lambda payload, job: {"callback": lambda: None}}, workers=1)
+    job_id = queue.submit("caso", None)
+
+    assert pool.run_one()
+
+    assert queue.get(job_id).estado == "error"
+    assert queue.get(job_id).error.startswith("No se pudo guardar el resultado")
+
+
+def test_concurrent_submits_with_the_same_key_enqueue_one_job(tmp_path):
+    queue = JobQueue(tmp_path / "jobs.sqlite")
+    barrier = threading.Barrier(8)
+    ids = []
+
+    def submit():
+        barrier.wait()
+        ids.append(queue.submit("caso", 1, key="k"))
+
+    threads = [threading.Thread(target=submit) for _ in range(8)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert len(set(ids)) == 1
+    assert len(queue.jobs()) == 1
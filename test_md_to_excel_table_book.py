@@ -0,0 +1,67 @@
+import io
+from contextlib import redirect_stdout
+
+from openpyxl import load_workbook
+
+from pdf_converter.datalab.md_to_excel import (
+    POSITION_DATE_HEADER,
+    ExcelExporter,
+    MarkdownTableParser,
+    build_table_book,
+    convert_markdown_to_excel,
+)
+from pdf_converter.datalab.postprocess import postprocess_gallo_workbook, postprocess_visual_workbook
+from pdf_converter.datalab.synthetic_portfolio import PortfolioSpec, generate_portfolio
+
+
+def _values(ws):
+    return [list(row) for row in ws.iter_rows(values_only=True)]
+
+
+def _postprocess_on_openpyxl(markdown):
+    parser = MarkdownTableParser(markdown)
+    tables = parser.parse()
+    exporter = ExcelExporter()
+    for table in tables.values():
+        if parser.format_type == "visual" or table.rows:
+            exporter.add_table(table)
+    if parser.format_type == "gallo":
+        postprocess_gallo_workbook(exporter.wb, tables)
+    else:
+        postprocess_visual_workbook(exporter.wb)
+    return exporter.wb
+
+
+def test_postprocess_on_tables_matches_postprocess_on_worksheets():
+    portfolio = generate_portfolio(PortfolioSpec(instruments=8, trades=40, cauciones=20, rentas=3, seed=7))
+
+    for markdown in (portfolio.gallo_markdown, portfolio.visual_markdown):
+        with redirect_stdout(io.StringIO()):
+            expected = _postprocess_on_openpyxl(markdown)
+            parser = MarkdownTableParser(markdown)
+            book = build_table_book(parser.parse(), parser.format_type)
+
+        assert book.sheetnames == expected.sheetnames
+        for name in book.sheetnames:
+            ws = expected[name]
+            sheet = book[name]
+            assert (sheet.max_row, sheet.max_column) == (ws.max_row, ws.max_column), name
+            assert [list(row) for row in sheet.iter_rows()] == _values(ws), name
+
+
+def test_convert_writes_postprocessed_tables_once(tmp_path):
+    portfolio = generate_portfolio(PortfolioSpec(instruments=6, trades=20, cauciones=10, rentas=2, seed=3))
+    paths = portfolio.write(tmp_path, "CASE")
+    markdown_path = paths["gallo"]
+    output_path = tmp_path / "gallo.xlsx"
+
+    with redirect_stdout(io.StringIO()):
+        convert_markdown_to_excel(str(markdown_path), str(output_path))
+
+    wb = load_workbook(output_path)
+    posicion = wb["Posicion Inicial"]
+    headers = [cell.value for cell in posicion[1]]
+    assert headers[0] == "tipo_especie"
+    date_column = posicion.cell(1, headers.index(POSITION_DATE_HEADER) + 1).column_letter
+    assert posicion.column_dimensions[date_column].hidden
+    assert isinstance(posicion.cell(2, headers.index("Cantidad") + 1).value, (int, float))
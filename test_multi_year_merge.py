@@ -0,0 +1,80 @@
+from datetime import date, datetime
+
+from openpyxl import Workbook
+
+from pdf_converter.datalab.input_tables import InputWorkbook
+from pdf_converter.datalab.merge_gallo_visual import AuxDataStore, GalloVisualMerger
+from pdf_converter.datalab.position_ledger import openings_by_year
+
+
+def _gallo_history() -> InputWorkbook:
+    wb = Workbook()
+    inicial = wb.active
+    inicial.title = "Posicion Inicial"
+    inicial.append(["tipo_especie", "Especie", "Detalle", "Custodia", "Cantidad", "Precio",
+                    "Importe en Pesos", "% de Cartera", "Importe en Dolares", "% de Cartera", "fecha"])
+    inicial.append(["RENTA FIJA EN DOLARES", "GD30 BONO USD 2030", None, "CAJA VALORES", 1000, None,
+                    700000, 50, 600, 50, "31/12/23"])
+    inicial.append(["CASH", "PESOS", "Cuenta Corriente", None, 5000, None, 5000, 1, 4, 1, "31/12/23"])
+
+    dolares = wb.create_sheet("Renta Fija Dolares")
+    dolares.append(["tipo_fila", "cod_especie", "especie", "Fecha", "Operacion", "Numero", "Cantidad", "Precio"])
+    dolares.append(["transaccion", "05921", "BONO USD 2030", "10/06/22", "COMPRA", 1, 1000, 40])
+    dolares.append(["transaccion", "05921", "BONO USD 2030", "15/03/24", "COMPRA", 2, 1000, 80])
+    dolares.append(["transaccion", "05921", "BONO USD 2030", "20/02/25", "VENTA", 3, -500, 90])
+    dolares.append(["transaccion", "09234", "BOPREAL", "05/05/24", "COMPRA", 4, 200, 95])
+    return InputWorkbook.from_workbook(wb)
+
+
+def _history_merger() -> GalloVisualMerger:
+    merger = object.__new__(GalloVisualMerger)
+    merger.gallo_wb = _gallo_history()
+    merger.anio = 2025
+    merger._gallo_position_dates = {}
+    merger._operaciones_stock = None
+    merger._get_codigo_from_ticker = lambda ticker: 5921 if ticker == "GD30" else None
+    merger._anios_corrida = (2024, 2025)
+    return merger
+
+
+def test_gallo_snapshot_year_and_carry_forward_between_periods():
+    merger = _history_merger()
+
+    # La Posicion Inicial al 31/12/23 es la apertura de 2024 y no aplica en 2025
+    assert merger._anio_snapshot("Posicion Inicial") == 2024
+    merger.anio = 2024
+    assert merger._snapshot_aplica("Posicion Inicial")
+    merger.anio = 2025
+    assert not merger._snapshot_aplica("Posicion Inicial")
+
+    aperturas = {}
+    aperturas.update(openings_by_year(merger._operaciones_apertura(2024), [2024]))
+    aperturas.update(openings_by_year(merger._operaciones_apertura(2025), [2025]))
+
+    # 2024 sale de la historia completa; 2025 arrastra la Posicion Inicial (60 USD cada 100) + 2024
+    assert aperturas[2024]["5921"].cantidad == 1000
+    assert aperturas[2024]["5921"].precio_per100 == 40
+    assert aperturas[2025]["5921"].cantidad == 2000
+    assert aperturas[2025]["5921"].precio_per100 == 70
+    assert aperturas[2025]["9234"].cantidad == 200
+    assert all(op.fecha != datetime(2022, 6, 10) for op in merger._operaciones_apertura(2025))
+
+
+def test_single_year_merge_keeps_statement_snapshots():
+    merger = _history_merger()
+    merger._anios_corrida = None
+    merger._gallo_position_dates = {"Posicion Final": date(2023, 12, 31)}
+
+    assert merger._snapshot_aplica("Posicion Inicial")
+    assert merger._snapshot_aplica("Posicion Final")
+    assert merger._operaciones_apertura(2025) == merger._gallo_stock_operations()
+
+
+def test_period_start_rate_follows_merger_year():
+    merger = object.__new__(GalloVisualMerger)
+    merger._fx_rates = AuxDataStore().fx_rates
+    merger.anio = 2024
+
+    assert merger.COTIZACION_INICIO_PERIODO == merger._fx_rates.as_of(date(2023, 12, 31), "Dolar MEP (local)")
+    merger.anio = 2025
+    assert merger.COTIZACION_INICIO_PERIODO == 1167.806
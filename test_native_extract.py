@@ -0,0 +1,134 @@
+import io
+import re
+from contextlib import redirect_stdout
+
+import fitz
+import pytest
+
+from pdf_converter.datalab.case_pipeline import CaseSource, convert_source
+from pdf_converter.datalab.client import DatalabResult
+from pdf_converter.datalab.md_to_excel import markdown_to_table_book
+from pdf_converter.datalab.native_extract import (
+    check_parity,
+    compare_table_books,
+    is_digital_pdf,
+    page_range,
+    split_pages,
+)
+from pdf_converter.datalab.synthetic_portfolio import PortfolioSpec, generate_portfolio, render_pdf
+
+
+SPEC = PortfolioSpec(instruments=5, trades=16, cauciones=6, rentas=2, seed=7, rows_per_page=12)
+
+
+class FakeDatalabClient:
+    def __init__(self, markdown):
+        self.markdown = markdown
+        self.calls = []
+
+    def convert_pdf(self, pdf, page_range=None, paginate=True, filename="document.pdf"):
+        self.calls.append((filename, page_range))
+        if callable(self.markdown):
+            return DatalabResult(success=True, markdown=self.markdown(page_range))
+        return DatalabResult(success=True, markdown=self.markdown)
+
+
+def _scanned_pdf() -> bytes:
+    doc = fitz.open()
+    page = doc.new_page()
+    pixmap = fitz.Pixmap(fitz.csRGB, fitz.IRect(0, 0, 40, 40), False)
+    pixmap.clear_with(200)
+    page.insert_image(page.rect, pixmap=pixmap)
+    return doc.tobytes()
+
+
+def _rasterize(pdf: bytes, pages: set) -> bytes:
+    """Copia del PDF con esas páginas reemplazadas por una imagen, como un anexo escaneado."""
+    source = fitz.open(stream=pdf, filetype="pdf")
+    out = fitz.open()
+    for index, page in enumerate(source):
+        if index in pages:
+            scanned = out.new_page(width=page.rect.width, height=page.rect.height)
+            scanned.insert_image(scanned.rect, pixmap=page.get_pixmap(dpi=30))
+        else:
+            out.insert_pdf(source, from_page=index, to_page=index)
+    return out.tobytes()
+
+
+@pytest.mark.parametrize("kind", ["gallo", "visual", "precio_tenencias"])
+def test_native_extraction_matches_datalab_markdown(kind):
+    markdown = getattr(generate_portfolio(SPEC), f"{kind}_markdown")
+    pdf = render_pdf(markdown)
+
+    assert is_digital_pdf(pdf)
+    with redirect_stdout(io.StringIO()):
+        report = check_parity(pdf, markdown)
+
+    assert report.ok, "\n".join(report.summary())
+    assert report.cells_compared > 0
+
+
+def test_datalab_is_the_default_even_for_digital_pdfs():
+    portfolio = generate_portfolio(SPEC)
+    client = FakeDatalabClient(portfolio.visual_markdown)
+
+    with redirect_stdout(io.StringIO()):
+        converted = convert_source("visual", CaseSource.pdf(render_pdf(portfolio.visual_markdown), "visual.pdf"), client)
+
+    assert converted.extractor == "datalab"
+    assert client.calls == [("visual.pdf", None)]
+
+
+def test_auto_reads_digital_pdf_locally_and_sends_scanned_pdf_to_datalab():
+    portfolio = generate_portfolio(SPEC)
+    client = FakeDatalabClient(portfolio.gallo_markdown)
+
+    with redirect_stdout(io.StringIO()):
+        digital = convert_source(
+            "visual", CaseSource.pdf(render_pdf(portfolio.visual_markdown), "visual.pdf"), client, extractor="auto"
+        )
+        scanned = convert_source("gallo", CaseSource.pdf(_scanned_pdf(), "gallo.pdf"), client, extractor="auto")
+        expected = markdown_to_table_book(portfolio.visual_markdown)
+
+    assert digital.extractor == "native"
+    assert client.calls == [("gallo.pdf", None)]
+    assert scanned.extractor == "datalab"
+    assert scanned.markdown == portfolio.gallo_markdown
+    assert digital.tables.sheetnames == expected.sheetnames
+    for sheet in expected.worksheets:
+        assert list(digital.tables[sheet.title].iter_rows()) == list(sheet.iter_rows())
+
+    # Un PDF escaneado o que no es PDF nunca se lee localmente
+    assert not is_digital_pdf(_scanned_pdf())
+    assert not is_digital_pdf(b"not a pdf")
+    with pytest.raises(ValueError):
+        convert_source("gallo", CaseSource.pdf(_scanned_pdf()), client, extractor="native")
+
+
+def test_mixed_pdf_sends_only_scanned_pages_to_datalab():
+    markdown = generate_portfolio(
+        PortfolioSpec(instruments=5, trades=24, cauciones=6, rentas=2, seed=7, rows_per_page=8)
+    ).visual_markdown
+    pages = re.split(r"\n\{\d+\}-+\n", markdown)
+    pdf = render_pdf(markdown)
+    assert len(fitz.open(stream=pdf, filetype="pdf")) == len(pages) == 3
+
+    # Datalab devuelve solo las páginas pedidas, numeradas con su índice original
+    client = FakeDatalabClient(lambda rango: f"{{{rango}}}------------------------------------------------\n\n{pages[int(rango)]}")
+    with redirect_stdout(io.StringIO()):
+        converted = convert_source("visual", CaseSource.pdf(_rasterize(pdf, {1}), "visual.pdf"), client, extractor="auto")
+        report = compare_table_books(converted.tables, markdown_to_table_book(markdown))
+
+    assert converted.extractor == "hybrid"
+    assert client.calls == [("visual.pdf", "1")]
+    assert [int(n) for n in re.findall(r"^\{(\d+)\}-+$", converted.markdown, re.MULTILINE)] == [0, 1, 2]
+    assert report.ok, "\n".join(report.summary())
+
+
+def test_page_range_and_split_pages():
+    assert page_range([6, 0, 3, 2, 4]) == "0,2-4,6"
+    paged = "{3}------\n\nuno\n\n{5}------\n\ndos\n"
+    assert split_pages(paged, [3, 5]) == {3: "uno", 5: "dos"}
+    # Numeración distinta a la pedida (p. ej. desde 0): se asigna en orden
+    assert split_pages(paged, [7, 9]) == {7: "uno", 9: "dos"}
+    assert split_pages("sin separadores", [4]) == {4: "sin separadores"}
@@ -0,0 +1,75 @@
+import json
+
+from openpyxl import Workbook
+
+from pdf_converter.datalab.economic_sanity import validate_workbook
+from pdf_converter.datalab.tracing import Tracer, activate, current_tracer, span, traced
+
+
+def test_span_is_noop_without_active_tracer():
+    assert current_tracer() is None
+    with span("merge.boletos"):
+        pass
+    assert current_tracer() is None
+
+
+def test_tracer_records_nested_spans_and_exports_chrome_trace(tmp_path):
+    @traced("postprocess.visual", "postprocess")
+    def fake_postprocess():
+        with span("postprocess.inner", rows=3):
+            return "ok"
+
+    tracer = Tracer("CASE_TEST")
+    with activate(tracer):
+        with span("merge", "merge"):
+            assert fake_postprocess() == "ok"
+            assert fake_postprocess() == "ok"
+        wb = Workbook()
+        wb.active.title = "Boletos"
+        validate_workbook(wb)
+    assert current_tracer() is None
+
+    summary = {row["stage"]: row for row in tracer.summary()}
+    assert list(summary) == ["merge", "postprocess.visual", "postprocess.inner", "validate_workbook"]
+    assert summary["merge"]["depth"] == 0
+    assert summary["postprocess.visual"]["depth"] == 1
+    assert summary["postprocess.visual"]["calls"] == 2
+    assert summary["postprocess.inner"]["depth"] == 2
+    assert summary["merge"]["total_ms"] >= summary["postprocess.visual"]["total_ms"]
+
+    trace_path = tracer.write_chrome_trace(tmp_path / "trace.json")
+    trace = json.loads(trace_path.read_text(encoding="utf-8"))
+    events = trace["traceEvents"]
+    assert events[0]["ph"] == "M"
+    assert events[0]["args"]["name"] == "CASE_TEST"
+    complete = [event for event in events if event["ph"] == "X"]
+    assert len(complete) == 6
+    assert all({"name", "cat", "ts", "dur", "pid", "tid"} <= set(event) for event in complete)
+    assert [event for event in complete if event["name"] == "postprocess.inner"][0]["args"] == {"rows": 3}
+
+
+def test_memory_tracer_records_peaks_per_span():
+    import tracemalloc
+
+    tracer = Tracer("CASE_MEMORY", memory=True)
+    with activate(tracer):
+        with span("merge", "merge"):
+            kept = bytearray(8 * 1024 * 1024)
+            with span("pdf.render", "pdf"):
+                scratch = bytearray(32 * 1024 * 1024)
+                del scratch
+    assert not tracemalloc.is_tracing()
+
+    records = {record.name: record.memory for record in tracer.spans}
+    # El pico del span interno también cuenta para el que lo contiene
+    assert records["pdf.render"].heap_peak_mb >= 40
+    assert records["merge"].heap_peak_mb >= records["pdf.render"].heap_peak_mb
+    assert records["pdf.render"].heap_delta_mb < 1
+    assert 8 <= records["merge"].heap_delta_mb < 9
+    assert records["merge"].rss_peak_mb is None or records["merge"].rss_peak_mb >= 40
+    assert len(kept)
+
+    summary = {row["stage"]: row for row in tracer.summary()}
+    assert summary["pdf.render"]["heap_peak_mb"] == records["pdf.render"].heap_peak_mb
+    event = [event for event in tracer.to_chrome_trace()["traceEvents"] if event["name"] == "merge"][0]
+    assert event["args"]["heap_delta_mb"] == records["merge"].heap_delta_mb
@@ -0,0 +1,104 @@
+from dataclasses import replace
+from datetime import datetime
+
+import pdf_converter.datalab.position_ledger as position_ledger
+from pdf_converter.datalab.position_ledger import (
+    ContentHashes,
+    Operacion,
+    PositionLedger,
+    opening_positions,
+    replay_operations,
+)
+
+
+def _op(cod, fecha, cantidad, precio, operacion="compra"):
+    return Operacion(cod, fecha, fecha.year, operacion, cantidad, precio, f"ESPECIE {cod}", "Renta Fija Dolares")
+
+
+HISTORY = [
+    _op("710", datetime(2022, 3, 1), 100.0, 50.0),
+    _op("710", datetime(2023, 5, 2), 100.0, 80.0),
+    _op("711", datetime(2023, 6, 1), 10.0, 1000.0),
+    _op("710", datetime(2024, 2, 1), -50.0, 90.0, "venta"),
+    _op("711", datetime(2024, 8, 1), 5.0, 1300.0),
+    _op("710", datetime(2025, 1, 10), 30.0, 99.0),
+]
+
+
+def test_replay_from_stored_closing_matches_full_replay(tmp_path, monkeypatch):
+    ledger = PositionLedger(tmp_path / "ledger.sqlite")
+    full = replay_operations([op for op in HISTORY if op.anio < 2025])
+
+    assert opening_positions(HISTORY, 2025, comitente="13353", ledger=ledger) == full
+    assert [anio for anio, _ in ledger.cierres("13353")] == [2025, 2024]
+
+    replayed = []
+    original = position_ledger.replay_operations
+
+    def tracking(operaciones, estados=None, **kwargs):
+        operaciones = list(operaciones)
+        replayed.extend(operaciones)
+        return original(operaciones, estados, **kwargs)
+
+    monkeypatch.setattr(position_ledger, "replay_operations", tracking)
+    # Mismo input: el cierre 2024 se reutiliza sin reproducir la historia
+    assert opening_positions(HISTORY, 2025, comitente="13353", ledger=ledger) == full
+    assert all(op.anio == 2025 for op in replayed)
+
+    # Año siguiente con la misma historia: solo se aplican las operaciones nuevas
+    replayed.clear()
+    next_year = HISTORY + [_op("711", datetime(2026, 3, 3), -15.0, 1400.0, "venta")]
+    expected_2026 = original([op for op in next_year if op.anio < 2026])
+    assert opening_positions(next_year, 2026, comitente="13353", ledger=ledger) == expected_2026
+    assert all(op.anio == 2026 for op in replayed)
+
+
+def test_changed_history_invalidates_stored_closing(tmp_path):
+    ledger = PositionLedger(tmp_path / "ledger.sqlite")
+    opening_positions(HISTORY, 2025, comitente="13353", ledger=ledger)
+
+    corrected = [HISTORY[0], _op("710", datetime(2023, 5, 2), 100.0, 70.0)] + HISTORY[2:]
+    result = opening_positions(corrected, 2025, comitente="13353", ledger=ledger)
+
+    assert result == replay_operations([op for op in corrected if op.anio < 2025])
+    assert result["710"].precio_per100 == 60.0
+    assert opening_positions(HISTORY, 2025, comitente="99999") == opening_positions(HISTORY, 2025)
+
+
+def test_content_hash_covers_every_field_of_the_operations():
+    base = ContentHashes(HISTORY).through(2024)
+    variantes = [
+        replace(HISTORY[1], fecha=datetime(2023, 5, 2, 12, 30)),
+        replace(HISTORY[1], cantidad=101.0),
+        replace(HISTORY[1], precio=80.5),
+        replace(HISTORY[1], cod="712"),
+        replace(HISTORY[1], especie="ESPECIE 712"),
+        replace(HISTORY[1], tipo_especie="Acciones"),
+        replace(HISTORY[1], fecha=None),
+    ]
+    hashes = {ContentHashes([HISTORY[0], variante] + HISTORY[2:]).through(2024) for variante in variantes}
+
+    assert base not in hashes and len(hashes) == len(variantes)
+    # Las operaciones posteriores no cambian los cierres anteriores
+    assert ContentHashes(HISTORY[:3]).through(2023) == ContentHashes(HISTORY).through(2023)
+
+
+def test_ledger_version_bump_invalidates_stored_closing(tmp_path, monkeypatch):
+    ledger = PositionLedger(tmp_path / "ledger.sqlite")
+    opening_positions(HISTORY, 2025, comitente="13353", ledger=ledger)
+
+    replayed = []
+    original = position_ledger.replay_operations
+
+    def tracking(operaciones, estados=None, **kwargs):
+        operaciones = list(operaciones)
+        replayed.extend(operaciones)
+        return original(operaciones, estados, **kwargs)
+
+    monkeypatch.setattr(position_ledger, "replay_operations", tracking)
+    monkeypatch.setattr(position_ledger, "LEDGER_VERSION", position_ledger.LEDGER_VERSION + 1)
+    # Cierres calculados con otra versión del replay: se reproduce toda la historia
+    assert opening_positions(HISTORY, 2025, comitente="13353", ledger=ledger) == original(
+        [op for op in HISTORY if op.anio < 2025]
+    )
+    assert {2022, 2023, 2024} <= {op.anio for op in replayed}
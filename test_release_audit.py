@@ -1,8 +1,18 @@
+import sys
+import time
 from pathlib import Path
 
 from openpyxl import Workbook
 
-from run_release_audit import AuditTarget, audit_target, compare_to_baseline, summarize
+from run_release_audit import (
+    AuditTarget,
+    _peak_rss_mb,
+    audit_target,
+    compare_performance_to_baseline,
+    compare_to_baseline,
+    measure_target_performance,
+    summarize,
+)
 
 
 def _save_workbook(path: Path, resultado: float) -> None:
@@ -74,3 +84,66 @@ def test_compare_to_baseline_allows_existing_high_but_flags_increase():
     regressions = compare_to_baseline(worse_rows, baseline)
     assert any(regression.startswith("HIGH_INCREASE") for regression in regressions)
     assert any(regression.startswith("RESULT_RULE_INCREASE") for regression in regressions)
+
+
+def test_compare_performance_to_baseline_flags_slow_stages_and_rss_growth():
+    baseline = {
+        "targets": [
+            {
+                "label": "case",
+                "path": "case.xlsx",
+                "performance": {
+                    "wall_ms": 10000.0,
+                    "peak_rss_mb": 400.0,
+                    "stages_ms": {"merge.deep_copy_workbook": 5000.0, "merge.cauciones": 100.0},
+                },
+            }
+        ]
+    }
+    rows = [
+        {
+            "label": "case",
+            "path": "case.xlsx",
+            "performance": {
+                "wall_ms": 11000.0,
+                "peak_rss_mb": 520.0,
+                "stages_ms": {"merge.deep_copy_workbook": 7000.0, "merge.cauciones": 400.0},
+            },
+        }
+    ]
+
+    regressions = compare_performance_to_baseline(rows, baseline)
+
+    assert regressions == [
+        "PERF_SLOWER case merge.deep_copy_workbook 5000ms->7000ms (x1.40)",
+        "PERF_RSS_INCREASE case 400MB->520MB",
+    ]
+    assert compare_performance_to_baseline(rows, {"targets": [{"label": "case", "path": "case.xlsx"}]}) == []
+
+
+def test_peak_rss_is_none_without_resource_module(monkeypatch):
+    # Windows no tiene `resource`: el audit sigue funcionando y reporta None
+    monkeypatch.setitem(sys.modules, "resource", None)
+
+    assert _peak_rss_mb() is None
+
+
+def test_hung_regeneration_is_killed_and_reported(tmp_path, monkeypatch):
+    (tmp_path / "smoke_colgada.py").write_text(
+        "import time\n"
+        "class CONFIG:\n"
+        "    @staticmethod\n"
+        "    def run_pipeline():\n"
+        "        time.sleep(600)\n",
+        encoding="utf-8",
+    )
+    monkeypatch.syspath_prepend(str(tmp_path))
+    target = AuditTarget("colgada", tmp_path / "x.xlsx", "approved-smoke", "smoke-baseline", smoke_module="smoke_colgada")
+
+    started = time.monotonic()
+    performance = measure_target_performance(target, timeout_s=3)
+
+    assert performance == {"error": "timeout after 3s"}
+    assert time.monotonic() - started < 60
+    row = {"label": "colgada", "path": "x.xlsx", "performance": performance}
+    assert compare_performance_to_baseline([row], {"targets": []}) == ["PERF_FAILED colgada timeout after 3s"]
@@ -0,0 +1,62 @@
+import sys
+import textwrap
+
+from openpyxl import Workbook
+
+from run_smoke_suite import DEDICATED_SMOKE_MODULES, run_smokes_parallel, select_affected_smokes
+
+
+def test_select_affected_smokes_maps_changes_to_smokes():
+    koltan_input = "SMOKE_BASELINE/KOLTAN_13353_20260420_APPROVED/13353_gallo_frozen.xlsx"
+
+    assert select_affected_smokes([koltan_input]) == ["smoke_test_koltan_13353"]
+    assert select_affected_smokes(["smoke_test_prida.py", "README.md"]) == ["smoke_test_prida"]
+    assert select_affected_smokes(["pdf_converter/datalab/merge_gallo_visual.py"]) == list(DEDICATED_SMOKE_MODULES)
+    assert select_affected_smokes(["README.md"]) == []
+
+
+def test_run_smokes_parallel_collects_results_and_enforces_timeout(tmp_path, monkeypatch):
+    baseline = tmp_path / "baseline.xlsx"
+    wb = Workbook()
+    wb.active.append(["Cantidad"])
+    wb.active.append([10])
+    wb.save(baseline)
+
+    (tmp_path / "fake_smoke_ok.py").write_text(
+        textwrap.dedent(
+            f"""
+            from pathlib import Path
+            from openpyxl import load_workbook
+            from smoke_test_common import SmokeTestConfig
+
+            BASELINE = Path({str(baseline)!r})
+
+            CONFIG = SmokeTestConfig(
+                title="FAKE OK",
+                description="fake",
+                baseline_dir=BASELINE.parent,
+                baseline_values=BASELINE,
+                baseline_json=BASELINE.with_suffix(".json"),
+                input_labels=(),
+                run_pipeline=lambda: load_workbook(BASELINE),
+                summary_builder=lambda _wb: [],
+            )
+            """
+        ),
+        encoding="utf-8",
+    )
+    (tmp_path / "fake_smoke_slow.py").write_text("import time\ntime.sleep(60)\n", encoding="utf-8")
+    # Sale con código 0 sin dejar resultado: es una falla, no un timeout
+    (tmp_path / "fake_smoke_exit.py").write_text("import os\nos._exit(0)\n", encoding="utf-8")
+    monkeypatch.syspath_prepend(str(tmp_path))
+
+    results = run_smokes_parallel(["fake_smoke_ok", "fake_smoke_slow", "fake_smoke_exit"], jobs=3, timeout_s=8)
+
+    ok, slow, exited = results
+    assert ok.passed and ok.title == "FAKE OK"
+    assert "PASS - 0 differences" in ok.output
+    assert not slow.passed
+    assert slow.error.startswith("timeout")
+    assert not exited.passed
+    assert exited.error == "worker exited with code 0 without a result"
+    assert sys.modules.get("fake_smoke_slow") is None
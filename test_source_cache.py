@@ -0,0 +1,34 @@
+import time
+from datetime import timedelta
+
+from pdf_converter.datalab.case_pipeline import CaseSource, convert_source
+from pdf_converter.datalab.source_cache import SourceCache
+from pdf_converter.datalab.synthetic_portfolio import PortfolioSpec, generate_portfolio
+
+
+SPEC = PortfolioSpec(instruments=4, trades=10, cauciones=3, rentas=2, seed=11, rows_per_page=12)
+
+
+def _rows(workbook):
+    return {sheet.title: list(sheet.iter_rows(values_only=True)) for sheet in workbook.worksheets}
+
+
+def test_converted_sources_round_trip_by_format_hash_and_version(tmp_path):
+    converted = convert_source("gallo", CaseSource.markdown(generate_portfolio(SPEC).gallo_markdown))
+    cache = SourceCache(tmp_path / "fuentes.sqlite", max_age=timedelta(hours=1))
+
+    assert cache.get("gallo", "abc", "v1") is None
+    cache.put("gallo", "abc", "v1", converted)
+
+    cached = cache.get("gallo", "abc", "v1")
+    assert cached.markdown == converted.markdown
+    assert _rows(cached.workbook) == _rows(converted.workbook)
+    # Otro formato, otro PDF u otra versión del pipeline no reutilizan la entrada
+    assert cache.get("visual", "abc", "v1") is None
+    assert cache.get("gallo", "def", "v1") is None
+    assert cache.get("gallo", "abc", "v2") is None
+
+    time.sleep(0.05)
+    expired = SourceCache(tmp_path / "fuentes.sqlite", max_age=timedelta(milliseconds=10))
+    assert expired.get("gallo", "abc", "v1") is None
+    assert expired.purge() == 1
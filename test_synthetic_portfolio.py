@@ -0,0 +1,59 @@
+from openpyxl import load_workbook
+
+from pdf_converter.datalab.md_to_excel import MarkdownTableParser, convert_markdown_to_excel
+from pdf_converter.datalab.synthetic_portfolio import PortfolioSpec, generate_portfolio
+from run_scale_benchmark import compare_to_baseline
+
+
+SMALL_SPEC = PortfolioSpec(instruments=6, trades=30, cauciones=20, rentas=3, rows_per_page=8)
+
+
+def test_generated_markdown_parses_into_expected_sheets(tmp_path):
+    portfolio = generate_portfolio(SMALL_SPEC)
+    paths = portfolio.write(tmp_path, "SYNTH")
+
+    gallo_parser = MarkdownTableParser(portfolio.gallo_markdown)
+    gallo_parser.parse()
+    assert gallo_parser.format_type == "gallo"
+
+    visual_xlsx = convert_markdown_to_excel(str(paths["visual"]), str(tmp_path / "visual.xlsx"))
+    gallo_xlsx = convert_markdown_to_excel(str(paths["gallo"]), str(tmp_path / "gallo.xlsx"))
+    precio_xlsx = convert_markdown_to_excel(str(paths["precio_tenencias"]), str(tmp_path / "precio.xlsx"))
+
+    visual = load_workbook(visual_xlsx)
+    gallo = load_workbook(gallo_xlsx)
+    precio = load_workbook(precio_xlsx)
+
+    visual_trades = sum(1 for trade_row in visual["Boletos"].iter_rows(min_row=2, values_only=True) if trade_row[1])
+    gallo_trades = sum(
+        1
+        for sheet in ("Tit.Privados Exentos", "Renta Fija Pesos", "Renta Fija Dolares")
+        if sheet in gallo.sheetnames
+        for row in gallo[sheet].iter_rows(min_row=2, values_only=True)
+        if row[0] == "transaccion"
+    )
+    # Las páginas repetidas (encabezados/metadata) no deben duplicar ni perder operaciones.
+    assert visual_trades + gallo_trades == SMALL_SPEC.trades
+    assert visual["Cauciones Tomadoras"].max_row > 1
+    assert {"Posicion Inicial", "Posicion Final", "Cauciones Pesos"} <= set(gallo.sheetnames)
+    assert precio["PrecioTenenciasIniciales"].max_row - 1 == SMALL_SPEC.instruments
+
+
+def test_generation_is_deterministic_and_scales():
+    first = generate_portfolio(SMALL_SPEC)
+    second = generate_portfolio(SMALL_SPEC)
+    assert first.visual_markdown == second.visual_markdown
+    assert first.gallo_markdown == second.gallo_markdown
+
+    scaled = SMALL_SPEC.scaled(10)
+    assert (scaled.trades, scaled.cauciones, scaled.instruments) == (300, 200, 60)
+    assert len(generate_portfolio(scaled).visual_markdown) > 5 * len(first.visual_markdown)
+
+
+def test_compare_to_baseline_flags_slower_stages_only_above_noise_floor():
+    baseline = {"runs": [{"scale": 1.0, "stage_ms": {"merge": 1000.0, "validate": 10.0}, "total_ms": 2000.0}]}
+    runs = [{"scale": 1.0, "label": "SYNTH_1X", "stage_ms": {"merge": 1600.0, "validate": 40.0}, "total_ms": 2200.0}]
+
+    regressions = compare_to_baseline(runs, baseline, tolerance=1.25)
+
+    assert regressions == ["SLOWER SYNTH_1X merge 1000ms->1600ms (x1.60)"]
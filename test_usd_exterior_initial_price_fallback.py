@@ -1,4 +1,4 @@
-from pdf_converter.datalab.merge_gallo_visual import GalloVisualMerger
+from pdf_converter.datalab.merge_gallo_visual import AuxDataStore, GalloVisualMerger
 
 
 def _minimal_merger() -> GalloVisualMerger:
@@ -37,6 +37,7 @@ def test_usd_exterior_action_precios_iniciales_fallback_stays_in_usd():
 
 def test_usd_non_exterior_precios_iniciales_fallback_is_converted_to_usd():
     merger = _minimal_merger()
+    merger._fx_rates = AuxDataStore().fx_rates
 
     cantidad, precio = merger._get_posicion_inicial(
         wb=type("WorkbookStub", (), {"sheetnames": []})(),
@@ -46,4 +47,4 @@ def test_usd_non_exterior_precios_iniciales_fallback_is_converted_to_usd():
     )
 
     assert cantidad == 0
-    assert precio == 1.035 / GalloVisualMerger.COTIZACION_INICIO_PERIODO
\ No newline at end of file
+    assert precio == 1.035 / merger.COTIZACION_INICIO_PERIODO == 1.035 / 1167.806
\ No newline at end of file
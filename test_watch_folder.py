@@ -0,0 +1,80 @@
+import os
+import threading
+import time
+
+from pdf_converter.datalab.watch_folder import FolderWatcher, read_status, status_path
+
+
+PDF = b"%PDF-1.4\n1 0 obj << >> endobj\ntrailer << >>\n%%EOF\n"
+
+
+def _drain(watcher):
+    for future in list(watcher._in_flight.values()):
+        future.result(timeout=10)
+
+
+def test_stable_pdfs_are_converted_once_and_partial_copies_wait(tmp_path):
+    converted = []
+
+    def convert(path):
+        if path.name == "roto.pdf":
+            raise ValueError("sin tablas")
+        converted.append(path.name)
+        return {"output": path.with_suffix(".xlsx").name}
+
+    (tmp_path / "visual.pdf").write_bytes(PDF)
+    (tmp_path / "copiando.pdf").write_bytes(PDF[:20])
+    (tmp_path / "roto.pdf").write_bytes(PDF)
+    (tmp_path / "notas.txt").write_text("no es un PDF")
+    watcher = FolderWatcher(tmp_path, convert, workers=2, settle_seconds=0)
+
+    # La primera pasada solo registra tamaño y fecha: nada se toma hasta verlo quieto
+    assert watcher.poll() == 0
+    assert watcher.poll() == 2
+    _drain(watcher)
+    assert converted == ["visual.pdf"]
+    assert read_status(tmp_path / "visual.pdf")["estado"] == "terminado"
+    assert read_status(tmp_path / "visual.pdf")["output"] == "visual.xlsx"
+    assert read_status(tmp_path / "roto.pdf")["error"] == "ValueError: sin tablas"
+    # Sin %%EOF sigue esperando: la copia no terminó
+    assert not status_path(tmp_path / "copiando.pdf").exists()
+
+    # Ni los terminados ni los fallidos se repiten mientras el PDF no cambie
+    assert watcher.poll() == 0
+    (tmp_path / "copiando.pdf").write_bytes(PDF)
+    os.utime(tmp_path / "visual.pdf", ns=(1, 1))
+    assert watcher.poll() == 0
+    assert watcher.poll() == 2
+    _drain(watcher)
+    assert sorted(converted) == ["copiando.pdf", "visual.pdf", "visual.pdf"]
+    assert read_status(tmp_path / "roto.pdf")["estado"] == "error"
+
+
+def test_pool_is_bounded_and_run_once_drains_the_folder(tmp_path):
+    for index in range(5):
+        (tmp_path / f"caso_{index}.pdf").write_bytes(PDF)
+    lock = threading.Lock()
+    running = {"now": 0, "max": 0}
+    release = threading.Event()
+
+    def convert(path):
+        with lock:
+            running["now"] += 1
+            running["max"] = max(running["max"], running["now"])
+        release.wait(5)
+        with lock:
+            running["now"] -= 1
+        return {}
+
+    watcher = FolderWatcher(tmp_path, convert, workers=2, poll_interval=0.01, settle_seconds=0)
+    thread = threading.Thread(target=watcher.run, kwargs={"once": True})
+    thread.start()
+    deadline = time.monotonic() + 5
+    while running["now"] < 2 and time.monotonic() < deadline:
+        time.sleep(0.01)
+    release.set()
+    thread.join(10)
+
+    assert not thread.is_alive()
+    assert running["max"] == 2
+    assert all(read_status(tmp_path / f"caso_{index}.pdf")["estado"] == "terminado" for index in range(5))
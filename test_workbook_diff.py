@@ -0,0 +1,56 @@
+from openpyxl import Workbook
+
+from compare_workbooks import compare_workbooks
+from smoke_test_common import compare_workbooks as compare_smoke_workbooks
+from workbook_diff import diff_workbooks
+
+
+HEADERS = ["Cod.Instrum", "Concertación", "Nro. Boleto", "Cantidad", "Resultado"]
+
+
+def _boletos_workbook(rows, aux_rows=3):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Boletos"
+    ws.append(HEADERS)
+    for row in rows:
+        ws.append(row)
+    aux = wb.create_sheet("EspeciesVisual")
+    for index in range(aux_rows):
+        aux.append([f"Especie {index}", index])
+    return wb
+
+
+BASE_ROWS = [[710, "01/07/2025", 1000 + index, 10 * index, 1.5 * index] for index in range(1, 200)]
+
+
+def test_inserted_row_is_reported_once_without_cascading_cell_diffs(tmp_path):
+    inserted = BASE_ROWS[:50] + [[999, "02/07/2025", 5555, 1, 2.0]] + BASE_ROWS[50:]
+    baseline_path = tmp_path / "baseline.xlsx"
+    candidate_path = tmp_path / "candidate.xlsx"
+    _boletos_workbook(BASE_ROWS).save(baseline_path)
+    _boletos_workbook(inserted).save(candidate_path)
+
+    diffs = compare_workbooks(baseline_path, candidate_path, tolerance=1e-9, max_diffs=100)
+
+    assert diffs == ["Boletos!R52: unexpected row in candidate: (999, '02/07/2025', 5555, 1, 2)"]
+
+
+def test_identical_files_short_circuit_and_tolerance_applies_per_cell(tmp_path):
+    baseline_path = tmp_path / "baseline.xlsx"
+    _boletos_workbook(BASE_ROWS).save(baseline_path)
+
+    sheet_diffs = diff_workbooks(baseline_path, baseline_path, lambda left, right, _header: left == right)
+    assert [sheet_diff.status for sheet_diff in sheet_diffs] == ["equal", "equal"]
+
+    noisy = [row[:4] + [row[4] + 0.001] for row in BASE_ROWS]
+    smoke_diffs = compare_smoke_workbooks(
+        baseline_path,
+        _boletos_workbook(noisy, aux_rows=4),
+        aux_sheets={"EspeciesVisual"},
+        float_rtol=1e-9,
+        float_atol=0.005,
+    )
+    assert smoke_diffs == [
+        {"type": "AUX_SIZE_CHANGE", "sheet": "EspeciesVisual", "baseline": "3x2", "current": "4x2"},
+    ]
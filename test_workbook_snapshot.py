@@ -0,0 +1,79 @@
+from datetime import datetime
+
+from openpyxl import Workbook
+
+from smoke_test_common import SmokeTestConfig, compare_workbooks, run_smoke, save_compact_snapshot
+from workbook_diff import WorkbookSnapshot, diff_workbooks
+
+
+def _workbook(resultado: float = 150.0):
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "Resultado Ventas ARS"
+    ws.append(["Concertación", "Cod.Instrum", "Resultado"])
+    ws.append([datetime(2025, 7, 8), 710, resultado])
+    ws.append([datetime(2025, 7, 9), 711, None])
+    aux = wb.create_sheet("EspeciesVisual")
+    aux.append(["Descripción", "Código"])
+    aux.append(["YPF", 710])
+    return wb
+
+
+def _config(tmp_path, workbook_factory):
+    return SmokeTestConfig(
+        title="SNAPSHOT",
+        description="snapshot",
+        baseline_dir=tmp_path,
+        baseline_values=tmp_path / "missing_values.xlsx",
+        baseline_json=tmp_path / "baseline_snapshot.json",
+        input_labels=(),
+        run_pipeline=workbook_factory,
+        summary_builder=lambda _wb: [],
+        aux_sheets={"EspeciesVisual"},
+    )
+
+
+def test_snapshot_roundtrip_preserves_values_and_hashes(tmp_path):
+    path = WorkbookSnapshot.from_workbook(_workbook(), size_only_sheets={"EspeciesVisual"}).save(tmp_path / "snap.json.gz")
+
+    snapshot = WorkbookSnapshot.load(path)
+
+    assert snapshot.sheetnames == ["Resultado Ventas ARS", "EspeciesVisual"]
+    assert snapshot.sheets["Resultado Ventas ARS"].rows()[1] == (datetime(2025, 7, 8), 710, 150.0)
+    assert snapshot.sheets["EspeciesVisual"].digest is None
+    assert snapshot.sheets["EspeciesVisual"].shape == (2, 2)
+    statuses = [sheet.status for sheet in diff_workbooks(snapshot, _workbook(), lambda a, b, _h: a == b, size_only_sheets={"EspeciesVisual"})]
+    assert statuses == ["equal", "equal"]
+
+
+def test_run_smoke_uses_compact_snapshot_without_xlsx_baseline(tmp_path, capsys):
+    config = _config(tmp_path, _workbook)
+    save_compact_snapshot(config, _workbook())
+
+    assert run_smoke(config) == 0
+    assert "PASS - 0 differences" in capsys.readouterr().out
+
+    diffs = compare_workbooks(
+        WorkbookSnapshot.load(config.compact_snapshot_path),
+        _workbook(resultado=175.0),
+        aux_sheets=config.aux_sheets,
+        float_rtol=1e-9,
+        float_atol=0.005,
+    )
+    assert [(diff["type"], diff["row"], diff["header"]) for diff in diffs] == [("CELL_DIFF", 2, "Resultado")]
+
+
+def test_run_smoke_ignores_snapshot_frozen_from_an_older_xlsx(tmp_path, capsys):
+    config = _config(tmp_path, lambda: _workbook(resultado=175.0))
+    config.baseline_values = tmp_path / "baseline_values.xlsx"
+    _workbook().save(config.baseline_values)
+    save_compact_snapshot(config, _workbook())
+    assert WorkbookSnapshot.load(config.compact_snapshot_path).source_sha256 is not None
+
+    # Se re-aprueba el xlsx sin re-congelar el snapshot
+    _workbook(resultado=175.0).save(config.baseline_values)
+
+    assert run_smoke(config) == 0
+    out = capsys.readouterr().out
+    assert "is stale" in out
+    assert "Baseline : baseline_values.xlsx" in out
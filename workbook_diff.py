@@ -0,0 +1,505 @@
+"""
+Motor de diff de workbooks para smoke tests y comparaciones de release.
+
+- Lee hojas en streaming (`iter_rows(values_only=True)`; read-only cuando se pasa un path).
+- Hojas cuyo XML es idéntico dentro de los dos .xlsx se dan por iguales sin parsearlas.
+- Hojas con filas idénticas se resuelven con una comparación de listas (sin celda a celda).
+- Las filas se alinean por clave (Cod.Instrum + fecha + boleto, o la fila completa con los
+  números normalizados a la tolerancia) para que una fila insertada no desplace todo lo que sigue.
+- Con paths, las hojas se leen en paralelo en procesos separados.
+- Un `WorkbookSnapshot` (JSON columnar comprimido con hash por hoja) puede usarse como
+  cualquiera de los dos lados: las hojas con el mismo hash no se decodifican.
+
+La decisión final de igualdad de cada celda la toma siempre el `values_equal` que pasa
+el caller; los hashes solo sirven para alinear y para cortar temprano.
+"""
+
+from __future__ import annotations
+
+import difflib
+import gzip
+import hashlib
+import json
+import os
+import zipfile
+from datetime import date, datetime, time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Iterable, Optional, Sequence
+
+from openpyxl import load_workbook
+
+
+ValuesEqual = Callable[[Any, Any, Any], bool]  # (baseline, current, header) -> bool
+
+DEFAULT_KEY_HEADERS = (
+    "cod_especie",
+    "cod.especie",
+    "cod.instrum",
+    "cod.instru",
+    "código",
+    "codigo",
+    "concertación",
+    "fecha",
+    "nro. boleto",
+    "# boleto",
+    "numero",
+    "nro. ndc",
+)
+# Por debajo de estas filas el costo de lanzar procesos supera el de leer secuencialmente.
+PARALLEL_MIN_ROWS = 2_000
+SNAPSHOT_FORMAT = 1
+
+
+@dataclass(frozen=True)
+class CellDiff:
+    row: int  # fila en el baseline (1-based, incluye encabezado)
+    col: int
+    header: str
+    baseline: Any
+    current: Any
+    current_row: int
+
+
+@dataclass(frozen=True)
+class SheetDiff:
+    sheet: str
+    status: str  # equal | different | missing | added | size_only
+    baseline_shape: tuple[int, int] = (0, 0)
+    current_shape: tuple[int, int] = (0, 0)
+    cells: tuple[CellDiff, ...] = ()
+    rows_removed: tuple[int, ...] = ()  # filas del baseline sin par en current
+    rows_added: tuple[int, ...] = ()  # filas de current sin par en el baseline
+    baseline_rows: dict[int, tuple] = field(default_factory=dict)
+    current_rows: dict[int, tuple] = field(default_factory=dict)
+
+    @property
+    def is_equal(self) -> bool:
+        return self.status == "equal"
+
+
+# ----------------------------------------------------------------------------
+# Snapshots compactos
+# ----------------------------------------------------------------------------
+
+def _encode_value(value: Any) -> Any:
+    if value is None or isinstance(value, (bool, int, float, str)):
+        return value
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    if isinstance(value, time):
+        return {"t": value.isoformat()}
+    return str(value)
+
+
+def _decode_value(value: Any) -> Any:
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+        if "t" in value:
+            return time.fromisoformat(value["t"])
+    return value
+
+
+def _encode_columns(rows: Sequence[tuple]) -> list[list[Any]]:
+    width = max((len(row) for row in rows), default=0)
+    return [[_encode_value(row[col] if col < len(row) else None) for row in rows] for col in range(width)]
+
+
+def sheet_digest(rows: Sequence[tuple]) -> str:
+    """Hash del contenido de una hoja (valores exactos, filas vacías finales recortadas)."""
+    payload = json.dumps(_encode_columns(rows), ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def file_sha256(path: str | Path) -> str:
+    """sha256 de un archivo, leído en bloques."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as handle:
+        for block in iter(lambda: handle.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+@dataclass(frozen=True)
+class SheetSnapshot:
+    shape: tuple[int, int]  # (max_row, max_column) de la hoja original
+    digest: Optional[str] = None  # None en hojas guardadas solo con dimensiones
+    columns: Optional[list[list[Any]]] = None
+
+    def rows(self) -> list[tuple]:
+        if not self.columns:
+            return []
+        decoded = [[_decode_value(value) for value in column] for column in self.columns]
+        return [tuple(row) for row in zip(*decoded)]
+
+
+class WorkbookSnapshot:
+    """
+    Baseline congelado como JSON columnar comprimido (gzip), con hash de contenido por
+    hoja. Cargarlo no requiere openpyxl y las hojas se decodifican solo si se piden.
+    `source_sha256` es el hash del .xlsx del que salió, para detectar un snapshot viejo.
+    """
+
+    def __init__(self, sheets: dict[str, SheetSnapshot], source_sha256: Optional[str] = None):
+        self.sheets = sheets
+        self.source_sha256 = source_sha256
+
+    @property
+    def sheetnames(self) -> list[str]:
+        return list(self.sheets)
+
+    @classmethod
+    def from_workbook(cls, workbook: Any, size_only_sheets: Iterable[str] = ()) -> "WorkbookSnapshot":
+        size_only = set(size_only_sheets)
+        sheets = {}
+        for worksheet in workbook.worksheets:
+            shape = (worksheet.max_row or 0, worksheet.max_column or 0)
+            if worksheet.title in size_only:
+                sheets[worksheet.title] = SheetSnapshot(shape)
+                continue
+            rows = _trim(list(worksheet.iter_rows(values_only=True)))
+            sheets[worksheet.title] = SheetSnapshot(shape, sheet_digest(rows), _encode_columns(rows))
+        return cls(sheets)
+
+    def save(self, path: str | Path) -> Path:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        payload = {
+            "format": SNAPSHOT_FORMAT,
+            "source_sha256": self.source_sha256,
+            "sheets": {
+                name: {"shape": list(sheet.shape), "hash": sheet.digest, "columns": sheet.columns}
+                for name, sheet in self.sheets.items()
+            },
+        }
+        with gzip.open(path, "wt", encoding="utf-8", compresslevel=6) as handle:
+            json.dump(payload, handle, ensure_ascii=False, separators=(",", ":"))
+        return path
+
+    @classmethod
+    def load(cls, path: str | Path) -> "WorkbookSnapshot":
+        with gzip.open(path, "rt", encoding="utf-8") as handle:
+            payload = json.load(handle)
+        if payload.get("format") != SNAPSHOT_FORMAT:
+            raise ValueError(f"Formato de snapshot no soportado en {path}: {payload.get('format')}")
+        return cls({
+            name: SheetSnapshot(tuple(sheet["shape"]), sheet.get("hash"), sheet.get("columns"))
+            for name, sheet in payload["sheets"].items()
+        }, payload.get("source_sha256"))
+
+
+# ----------------------------------------------------------------------------
+# Lectura
+# ----------------------------------------------------------------------------
+
+class _Source:
+    """Workbook en memoria, `WorkbookSnapshot` o path a un .xlsx (leído en modo read-only)."""
+
+    def __init__(self, source: Any, data_only: bool):
+        self.path: Optional[Path] = None
+        self.snapshot: Optional[WorkbookSnapshot] = None
+        self.workbook: Any = None
+        self.data_only = data_only
+        if isinstance(source, WorkbookSnapshot):
+            self.snapshot = source
+        elif isinstance(source, (str, os.PathLike)):
+            self.path = Path(source)
+            self.workbook = load_workbook(self.path, read_only=True, data_only=data_only)
+        else:
+            self.workbook = source
+        self.sheetnames = self.snapshot.sheetnames if self.snapshot else list(self.workbook.sheetnames)
+        self._digests: Optional[dict[str, tuple[int, int]]] = None
+        self._rows: dict[str, list[tuple]] = {}
+
+    def close(self) -> None:
+        if self.path is not None:
+            self.workbook.close()
+
+    def shape(self, name: str) -> tuple[int, int]:
+        if self.snapshot:
+            return self.snapshot.sheets[name].shape
+        worksheet = self.workbook[name]
+        return (worksheet.max_row or 0, worksheet.max_column or 0)
+
+    def rows(self, name: str) -> list[tuple]:
+        if name not in self._rows:
+            if self.snapshot:
+                self._rows[name] = self.snapshot.sheets[name].rows()
+            else:
+                self._rows[name] = _trim(list(self.workbook[name].iter_rows(values_only=True)))
+        return self._rows[name]
+
+    def content_digest(self, name: str) -> Optional[str]:
+        if self.snapshot:
+            return self.snapshot.sheets[name].digest
+        return sheet_digest(self.rows(name))
+
+    def digests(self) -> dict[str, tuple[int, int]]:
+        """CRC y tamaño del XML de cada hoja, más el de sharedStrings bajo la clave ''."""
+        if self._digests is None:
+            self._digests = {}
+            if self.path is not None:
+                with zipfile.ZipFile(self.path) as archive:
+                    infos = {info.filename: (info.CRC, info.file_size) for info in archive.infolist()}
+                self._digests[""] = infos.get("xl/sharedStrings.xml", (0, 0))
+                for name in self.sheetnames:
+                    member = getattr(self.workbook[name], "_worksheet_path", None)
+                    if member in infos:
+                        self._digests[name] = infos[member]
+        return self._digests
+
+
+def _trim(rows: list[tuple]) -> list[tuple]:
+    while rows and all(value is None or value == "" for value in rows[-1]):
+        rows.pop()
+    return rows
+
+
+def _read_sheet(path: str, name: str, data_only: bool) -> list[tuple]:
+    wb = load_workbook(path, read_only=True, data_only=data_only)
+    try:
+        return _trim(list(wb[name].iter_rows(values_only=True)))
+    finally:
+        wb.close()
+
+
+def _same_xml(baseline: _Source, current: _Source, name: str) -> bool:
+    if baseline.path is None or current.path is None:
+        return False
+    left, right = baseline.digests(), current.digests()
+    return left.get("") == right.get("") and name in left and left.get(name) == right.get(name)
+
+
+def _same_digest(baseline: _Source, current: _Source, name: str) -> bool:
+    # Solo vale la pena hashear cuando un lado ya trae el hash precalculado.
+    if baseline.snapshot is None and current.snapshot is None:
+        return False
+    baseline_digest = baseline.content_digest(name)
+    return baseline_digest is not None and baseline_digest == current.content_digest(name)
+
+
+# ----------------------------------------------------------------------------
+# Alineación y comparación
+# ----------------------------------------------------------------------------
+
+def _normalize_for_key(value: Any, quantum: float, zero_is_blank: bool) -> Any:
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        if quantum > 0:
+            value = round(float(value) / quantum)
+        if zero_is_blank and value == 0:
+            return None
+        return value
+    return value
+
+
+def _key_columns(headers: Sequence[Any], key_headers: Iterable[str]) -> list[int]:
+    wanted = {header.lower() for header in key_headers}
+    return [index for index, header in enumerate(headers) if str(header or "").strip().lower() in wanted]
+
+
+def _row_keys(rows: Sequence[tuple], columns: list[int], quantum: float, zero_is_blank: bool) -> list[int]:
+    keys = []
+    for row in rows:
+        values = [row[index] if index < len(row) else None for index in columns] if columns else row
+        keys.append(hash(tuple(_normalize_for_key(value, quantum, zero_is_blank) for value in values)))
+    return keys
+
+
+def _cell_diffs(
+    baseline_row: tuple,
+    current_row: tuple,
+    baseline_index: int,
+    current_index: int,
+    headers: Sequence[Any],
+    values_equal: ValuesEqual,
+) -> list[CellDiff]:
+    if baseline_row == current_row:
+        return []
+    width = max(len(baseline_row), len(current_row))
+    diffs = []
+    for col in range(width):
+        baseline_value = baseline_row[col] if col < len(baseline_row) else None
+        current_value = current_row[col] if col < len(current_row) else None
+        header = headers[col] if col < len(headers) and headers[col] is not None else f"Col{col + 1}"
+        if values_equal(baseline_value, current_value, header):
+            continue
+        diffs.append(CellDiff(baseline_index + 1, col + 1, str(header), baseline_value, current_value, current_index + 1))
+    return diffs
+
+
+def diff_sheet_rows(
+    name: str,
+    baseline_rows: list[tuple],
+    current_rows: list[tuple],
+    values_equal: ValuesEqual,
+    *,
+    quantum: float = 0.0,
+    zero_is_blank: bool = False,
+    key_headers: Iterable[str] = DEFAULT_KEY_HEADERS,
+    max_cell_diffs: Optional[int] = None,
+) -> SheetDiff:
+    baseline_shape = (len(baseline_rows), max((len(row) for row in baseline_rows), default=0))
+    current_shape = (len(current_rows), max((len(row) for row in current_rows), default=0))
+    if baseline_rows == current_rows:
+        return SheetDiff(name, "equal", baseline_shape, current_shape)
+
+    baseline_header = baseline_rows[0] if baseline_rows else ()
+    current_header = current_rows[0] if current_rows else ()
+    headers = [
+        (baseline_header[col] if col < len(baseline_header) else None)
+        or (current_header[col] if col < len(current_header) else None)
+        for col in range(max(len(baseline_header), len(current_header)))
+    ]
+
+    cells = _cell_diffs(baseline_header, current_header, 0, 0, headers, values_equal)
+    removed: list[int] = []
+    added: list[int] = []
+    baseline_body, current_body = baseline_rows[1:], current_rows[1:]
+
+    if len(baseline_body) == len(current_body):
+        pairs = [(index, index) for index in range(len(baseline_body))]
+    else:
+        columns = _key_columns(headers, key_headers)
+        baseline_keys = _row_keys(baseline_body, columns, quantum, zero_is_blank)
+        current_keys = _row_keys(current_body, columns, quantum, zero_is_blank)
+        matcher = difflib.SequenceMatcher(None, baseline_keys, current_keys, autojunk=False)
+        pairs = []
+        for tag, b0, b1, c0, c1 in matcher.get_opcodes():
+            paired = min(b1 - b0, c1 - c0) if tag in {"equal", "replace"} else 0
+            pairs.extend((b0 + offset, c0 + offset) for offset in range(paired))
+            removed.extend(range(b0 + paired, b1))
+            added.extend(range(c0 + paired, c1))
+
+    for baseline_index, current_index in pairs:
+        cells.extend(_cell_diffs(
+            baseline_body[baseline_index],
+            current_body[current_index],
+            baseline_index + 1,
+            current_index + 1,
+            headers,
+            values_equal,
+        ))
+        if max_cell_diffs is not None and len(cells) >= max_cell_diffs:
+            break
+
+    # Filas agregadas/eliminadas en numeración de hoja (encabezado = fila 1)
+    removed_rows = tuple(index + 2 for index in removed)
+    added_rows = tuple(index + 2 for index in added)
+    status = "equal" if not (cells or removed_rows or added_rows) else "different"
+    return SheetDiff(
+        name,
+        status,
+        baseline_shape,
+        current_shape,
+        tuple(cells),
+        removed_rows,
+        added_rows,
+        baseline_rows={row: baseline_body[row - 2] for row in removed_rows},
+        current_rows={row: current_body[row - 2] for row in added_rows},
+    )
+
+
+def diff_workbooks(
+    baseline: Any,
+    current: Any,
+    values_equal: ValuesEqual,
+    *,
+    sheets: Optional[Sequence[str]] = None,
+    size_only_sheets: Iterable[str] = (),
+    quantum: float = 0.0,
+    zero_is_blank: bool = False,
+    key_headers: Iterable[str] = DEFAULT_KEY_HEADERS,
+    data_only: bool = True,
+    max_workers: Optional[int] = None,
+    max_cell_diffs: Optional[int] = None,
+) -> list[SheetDiff]:
+    """
+    Compara dos workbooks (objetos openpyxl, `WorkbookSnapshot` o paths a .xlsx) hoja por hoja.
+
+    Args:
+        values_equal: criterio de igualdad por celda `(baseline, current, header) -> bool`.
+        sheets: hojas a comparar (por defecto todas las del baseline); las hojas de
+            current fuera de esta lista se reportan como 'added'.
+        size_only_sheets: hojas donde solo se comparan dimensiones (auxiliares).
+        quantum: tolerancia numérica absoluta usada para normalizar claves de alineación.
+        zero_is_blank: tratar 0 y vacío como la misma clave (si `values_equal` también lo hace).
+        max_workers: procesos para leer hojas grandes desde paths (1 = secuencial).
+    """
+    baseline_source = _Source(baseline, data_only)
+    current_source = _Source(current, data_only)
+    try:
+        names = list(sheets) if sheets else list(baseline_source.sheetnames)
+        size_only = set(size_only_sheets)
+        results: dict[str, SheetDiff] = {}
+        to_read: list[str] = []
+        for name in names:
+            if name not in current_source.sheetnames:
+                results[name] = SheetDiff(name, "missing")
+            elif name not in baseline_source.sheetnames:
+                results[name] = SheetDiff(name, "added")
+            elif name in size_only:
+                baseline_shape, current_shape = baseline_source.shape(name), current_source.shape(name)
+                results[name] = SheetDiff(name, "size_only" if baseline_shape != current_shape else "equal", baseline_shape, current_shape)
+            elif _same_xml(baseline_source, current_source, name) or _same_digest(baseline_source, current_source, name):
+                shape = baseline_source.shape(name)
+                results[name] = SheetDiff(name, "equal", shape, current_source.shape(name))
+            else:
+                to_read.append(name)
+
+        rows = _read_all(to_read, baseline_source, current_source, max_workers)
+        for name in to_read:
+            results[name] = diff_sheet_rows(
+                name,
+                rows[("baseline", name)],
+                rows[("current", name)],
+                values_equal,
+                quantum=quantum,
+                zero_is_blank=zero_is_blank,
+                key_headers=key_headers,
+                max_cell_diffs=max_cell_diffs,
+            )
+
+        ordered = [results[name] for name in names]
+        ordered.extend(
+            SheetDiff(name, "added", (0, 0), current_source.shape(name))
+            for name in current_source.sheetnames
+            if name not in names
+        )
+        return ordered
+    finally:
+        baseline_source.close()
+        current_source.close()
+
+
+def _read_all(names: list[str], baseline: _Source, current: _Source, max_workers: Optional[int]) -> dict[tuple[str, str], list[tuple]]:
+    jobs = [("baseline", baseline, name) for name in names] + [("current", current, name) for name in names]
+    parallel = [
+        (side, source, name)
+        for side, source, name in jobs
+        if source.path is not None and source.shape(name)[0] >= PARALLEL_MIN_ROWS
+    ]
+    workers = max_workers if max_workers is not None else min(len(parallel), os.cpu_count() or 1)
+    rows: dict[tuple[str, str], list[tuple]] = {}
+    if workers > 1 and len(parallel) > 1:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = {
+                (side, name): executor.submit(_read_sheet, str(source.path), name, source.data_only)
+                for side, source, name in parallel
+            }
+            for side, source, name in jobs:
+                if (side, name) not in futures:
+                    rows[(side, name)] = source.rows(name)
+            for key, future in futures.items():
+                rows[key] = future.result()
+    else:
+        for side, source, name in jobs:
+            rows[(side, name)] = source.rows(name)
+    return rows